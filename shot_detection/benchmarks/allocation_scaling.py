@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+视频分配算法扩展性基准测试
+对比旧流程（每个模板、每个视频都重新过滤未使用视频列表，逐个扫描已占用位置）与
+保序空闲池流程在不同素材规模下的分配耗时，并校验同一随机种子下结果一致
+"""
+
+import sys
+import time
+import random
+import logging
+import argparse
+from pathlib import Path
+
+# 项目根目录
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from jianying.video_allocation_algorithm import (
+    AllocationResult, TemplateInfo, VideoAllocationAlgorithm, VideoFile
+)
+
+
+class LegacyAllocation(VideoAllocationAlgorithm):
+    """旧流程：每次从完整列表重新过滤已使用视频"""
+
+    def run(self, templates, video_files):
+        round_num = 1
+        while len(video_files) > 0 and self._can_continue_allocation(templates, video_files):
+            round_results = self._execute_allocation_round(templates, video_files, round_num)
+            if not round_results:
+                break
+            self.allocation_results.extend(round_results)
+            round_num += 1
+
+    def _can_continue_allocation(self, templates, video_files):
+        available_videos = [v for v in video_files if v.path not in self.used_videos]
+        if len(available_videos) == 0:
+            return False
+        for template in templates:
+            if len(available_videos) >= max(1, int(template.video_positions * 0.3)):
+                return True
+        return False
+
+    def _execute_allocation_round(self, templates, video_files, round_num):
+        round_results = []
+        templates_sorted = sorted(templates, key=lambda t: self._estimate_template_min_videos(t))
+        for template in templates_sorted:
+            current_available = [v for v in video_files if v.path not in self.used_videos]
+            if len(current_available) == 0:
+                break
+            if len(current_available) >= self._estimate_template_min_videos(template):
+                result = self._allocate_single_video(template, video_files, round_num)
+                if result and result.videos_used > 0:
+                    round_results.append(result)
+        return round_results
+
+    def _allocate_single_video(self, template, video_files, round_num):
+        template_name = f"{template.name}_第{round_num}轮_{len(self.allocation_results) + 1}"
+        available_videos = [v for v in video_files if v.path not in self.used_videos]
+        target_videos = min(self._estimate_template_min_videos(template), len(available_videos))
+        if target_videos == 0:
+            return None
+
+        selected_videos = self._sample_videos(available_videos, target_videos)
+        video_assignments = []
+        positions_to_fill = template.video_positions
+        for i, video in enumerate(selected_videos):
+            remaining_videos = len(selected_videos) - i
+            if remaining_videos == 1:
+                positions_for_this_video = min(2, positions_to_fill)
+            else:
+                positions_for_this_video = max(1, min(2, positions_to_fill - (remaining_videos - 1)))
+            available_positions = [p for p in range(template.video_positions)
+                                   if not any(p == pos for pos, _ in video_assignments)]
+            selected_positions = random.sample(available_positions,
+                                               min(positions_for_this_video, len(available_positions)))
+            for position in selected_positions:
+                video_assignments.append((position, video))
+                positions_to_fill -= 1
+            self.used_videos.add(video.path)
+
+        return AllocationResult(template_name, video_assignments, template.video_positions, len(selected_videos))
+
+
+def make_inputs(clips: int, templates: int, seed: int):
+    rng = random.Random(seed)
+    videos = [VideoFile(path=f"/resources/clip_{i:06d}.mp4", name=f"clip_{i:06d}.mp4",
+                        relative_path=f"clip_{i:06d}.mp4") for i in range(clips)]
+    template_infos = [TemplateInfo(name=f"template_{i:03d}", path="", draft_content_path="",
+                                   video_positions=rng.randint(4, 40)) for i in range(templates)]
+    return videos, template_infos
+
+
+def run_allocation(algorithm_class, clips: int, templates: int, seed: int):
+    videos, template_infos = make_inputs(clips, templates, seed)
+    algorithm = algorithm_class(str(ROOT_DIR / "workspace"), near_duplicate_distance=None)
+    random.seed(seed)
+    start = time.perf_counter()
+    if algorithm_class is LegacyAllocation:
+        algorithm.run(template_infos, videos)
+    else:
+        algorithm._run_allocation_rounds(template_infos, videos)
+    elapsed = time.perf_counter() - start
+    signature = [(r.template_name, [(p, v.path) for p, v in r.video_assignments])
+                 for r in algorithm.allocation_results]
+    return elapsed, signature
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视频分配算法扩展性基准测试")
+    parser.add_argument("--clips", type=int, nargs="+", default=[1000, 5000, 20000, 50000],
+                        help="素材数量")
+    parser.add_argument("--templates", type=int, default=200, help="模板数量")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--legacy-max-clips", type=int, default=20000,
+                        help="超过该素材数量时不运行旧流程（耗时过长）")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    print(f"📊 Video allocation, {args.templates} templates, seed {args.seed}")
+    print(f"{'clips':>8}{'drafts':>8}{'legacy s':>12}{'new s':>10}{'speedup':>10}{'identical':>11}")
+
+    for clips in args.clips:
+        new_time, new_result = run_allocation(VideoAllocationAlgorithm, clips, args.templates, args.seed)
+        if clips <= args.legacy_max_clips:
+            legacy_time, legacy_result = run_allocation(LegacyAllocation, clips, args.templates, args.seed)
+            print(f"{clips:>8}{len(new_result):>8}{legacy_time:>12.2f}{new_time:>10.2f}"
+                  f"{legacy_time / new_time:>9.1f}x{str(legacy_result == new_result):>11}")
+        else:
+            print(f"{clips:>8}{len(new_result):>8}{'-':>12}{new_time:>10.2f}{'-':>10}{'-':>11}")
+
+
+if __name__ == "__main__":
+    main()
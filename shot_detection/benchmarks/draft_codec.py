@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+剪映草稿编解码基准测试
+对比旧写法（json.load + json.dump indent=2 写文件）与各可用编解码器
+读取、save_draft 紧凑/缩进写文件的耗时和输出体积
+"""
+
+import sys
+import glob
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# 项目根目录
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from utils.draft_codec import get_codec, save_draft
+
+DEFAULT_TEMPLATES = [
+    str(ROOT_DIR.parent / "scripts" / "jianying" / "**" / "draft_*.json"),
+    str(ROOT_DIR.parent / "packages" / "cli" / "draft_content.json"),
+    str(ROOT_DIR / "workspace" / "templates" / "*" / "draft_*.json"),
+]
+
+
+def collect_files(patterns: list) -> list:
+    files = []
+    for pattern in patterns:
+        for match in sorted(glob.glob(pattern, recursive=True)):
+            path = Path(match)
+            if path.is_file() and path not in files:
+                files.append(path)
+    return files
+
+
+def timed(func, repeat: int) -> float:
+    """返回 repeat 次调用的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000.0 / repeat
+
+
+def scaled(data, scale: int):
+    """把草稿复制 scale 份，模拟大草稿"""
+    return data if scale <= 1 else {"copies": [data] * scale}
+
+
+def legacy_row(raw: bytes, scale: int, out: Path, repeat: int) -> tuple:
+    def save():
+        with open(out, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    data = scaled(json.loads(raw.decode('utf-8-sig')), scale)
+    encoded = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    load_ms = timed(lambda: json.loads(encoded.decode('utf-8-sig')), repeat)
+    save_ms = timed(save, repeat)
+    return load_ms, save_ms, out.stat().st_size
+
+
+def codec_row(codec, raw: bytes, scale: int, pretty: bool, out: Path, repeat: int) -> tuple:
+    raw = raw[3:] if raw.startswith(b'\xef\xbb\xbf') else raw
+    data = scaled(codec.loads(raw), scale)
+    encoded = codec.dumps(data, pretty)
+    load_ms = timed(lambda: codec.loads(encoded), repeat)
+    save_ms = timed(lambda: save_draft(out, data, pretty=pretty, codec=codec), repeat)
+    return load_ms, save_ms, out.stat().st_size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="剪映草稿编解码基准测试")
+    parser.add_argument("--templates", nargs="+", default=DEFAULT_TEMPLATES,
+                        help="草稿 JSON 文件路径或 glob")
+    parser.add_argument("--repeat", type=int, default=20, help="每项测量重复次数")
+    parser.add_argument("--scale", type=int, default=1, help="每个草稿复制的份数，用于模拟数 MB 的大草稿")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    files = collect_files(args.templates)
+    if not files:
+        print("❌ No draft files found")
+        return
+
+    codecs = []
+    for name in ("json", "orjson", "msgspec"):
+        codec = get_codec(name)
+        if codec.name == name:
+            codecs.append(codec)
+        else:
+            print(f"⚠️  {name} not installed, skipped")
+
+    raws = [path.read_bytes() for path in files]
+    total_kb = sum(len(raw) for raw in raws) * args.scale / 1024
+    print(f"📊 Draft codec, {len(files)} files x{args.scale} ({total_kb:.0f} KB), {args.repeat} repeats")
+    print(f"{'codec':<18}{'load ms':>10}{'save ms':>10}{'size KB':>10}{'speedup':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out = Path(tmp_dir) / "draft_content.json"
+        rows = [("json indent (old)", [legacy_row(raw, args.scale, out, args.repeat) for raw in raws])]
+        for codec in codecs:
+            for pretty in (False, True):
+                label = f"{codec.name} {'indent' if pretty else 'compact'}"
+                rows.append((label, [codec_row(codec, raw, args.scale, pretty, out, args.repeat)
+                                     for raw in raws]))
+
+    baseline = None
+    for label, results in rows:
+        load_ms = sum(r[0] for r in results)
+        save_ms = sum(r[1] for r in results)
+        size_kb = sum(r[2] for r in results) / 1024
+        if baseline is None:
+            baseline = load_ms + save_ms
+        print(f"{label:<18}{load_ms:>10.2f}{save_ms:>10.2f}{size_kb:>10.0f}"
+              f"{baseline / (load_ms + save_ms):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+FrameDifference 预处理基准测试
+对比旧流程（全分辨率模糊+颜色转换，每帧对缩放两次）与
+缩放优先流程（每帧只缩放、转灰度、模糊一次并缓存）的逐帧耗时
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import cv2
+
+# 项目根目录
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from detectors.frame_diff import FrameDifferenceDetector
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4K": (3840, 2160),
+}
+
+
+def make_frames(width: int, height: int, count: int) -> list:
+    """生成带噪声和运动块的测试帧"""
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    frames = []
+    for i in range(count):
+        frame = base.copy()
+        x = (i * 17) % (width - 200)
+        frame[100:300, x:x + 200] = 255
+        frames.append(frame)
+    return frames
+
+
+def legacy_pipeline(frames: list, resize_height: int = 240) -> float:
+    """旧流程：全分辨率模糊+BGR→RGB，帧对比较时两帧都重新缩放和转灰度"""
+    def preprocess(frame):
+        frame = cv2.GaussianBlur(frame, (5, 5), 0)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    def process_pair(frame1, frame2):
+        h1, w1 = frame1.shape[:2]
+        if h1 > resize_height:
+            new_width = int(w1 * resize_height / h1)
+            frame1 = cv2.resize(frame1, (new_width, resize_height))
+            frame2 = cv2.resize(frame2, (new_width, resize_height))
+        gray1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2GRAY)
+        gray2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2GRAY)
+        return np.mean(cv2.absdiff(gray1, gray2)) / 255.0
+
+    start = time.perf_counter()
+    prev = preprocess(frames[0])
+    for frame in frames[1:]:
+        curr = preprocess(frame)
+        process_pair(prev, curr)
+        prev = curr
+    return time.perf_counter() - start
+
+
+def downscale_first_pipeline(frames: list, resize_height: int = 240) -> float:
+    """新流程：每帧缩放→灰度→模糊一次，缓存给下一帧对使用"""
+    detector = FrameDifferenceDetector(resize_height=resize_height)
+
+    start = time.perf_counter()
+    prev = detector.preprocess_frame(frames[0])
+    for frame in frames[1:]:
+        curr = detector.preprocess_frame(frame)
+        detector.process_frame_pair(prev, curr)
+        prev = curr
+    return time.perf_counter() - start
+
+
+def run_video(video_path: str):
+    """在真实视频上测量端到端检测耗时"""
+    detector = FrameDifferenceDetector()
+    detector.initialize()
+    result = detector.detect_shots(video_path)
+    fps = result.frame_count / result.processing_time if result.processing_time else 0
+    print(f"🎬 {Path(video_path).name}: {result.frame_count} frames in "
+          f"{result.processing_time:.2f}s ({fps:.1f} frames/s), "
+          f"{len(result.boundaries)} boundaries")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FrameDifference 预处理基准测试")
+    parser.add_argument("--frames", type=int, default=60, help="每种分辨率的测试帧数")
+    parser.add_argument("--resize-height", type=int, default=240, help="工作分辨率高度")
+    parser.add_argument("--video", help="可选：在真实视频上运行端到端检测")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    print(f"📊 FrameDifference preprocessing, {args.frames} frames per resolution")
+    print(f"{'resolution':<12}{'legacy ms/frame':>18}{'new ms/frame':>16}{'speedup':>10}")
+
+    for name, (width, height) in RESOLUTIONS.items():
+        frames = make_frames(width, height, args.frames)
+        legacy = legacy_pipeline(frames, args.resize_height)
+        new = downscale_first_pipeline(frames, args.resize_height)
+        per_frame = 1000.0 / (len(frames) - 1)
+        print(f"{name:<12}{legacy * per_frame:>18.2f}{new * per_frame:>16.2f}{legacy / new:>9.1f}x")
+
+    if args.video:
+        run_video(args.video)
+
+
+if __name__ == "__main__":
+    main()
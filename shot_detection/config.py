@@ -53,7 +53,8 @@ class ProcessingConfig:
     # 处理参数配置
     target_fps: Optional[int] = None  # None表示保持原始帧率
     target_resolution: Optional[Tuple[int, int]] = None  # None表示保持原始分辨率
-    quality_preset: str = 'medium'  # low, medium, high, lossless
+    quality_preset: str = 'medium'  # low, medium, high, lossless, copy（流复制快速切分）
+    keyframe_snap: str = 'none'  # copy 模式的切点策略：none（边缘重编码）, nearest（吸附到最近关键帧）
     
     # 性能配置
     max_workers: int = 8
@@ -298,6 +299,8 @@ class ConfigManager:
         # 验证处理配置
         if self.processing.max_workers < 1:
             errors.append("max_workers must be at least 1")
+        if self.processing.keyframe_snap not in ('none', 'nearest'):
+            errors.append("keyframe_snap must be 'none' or 'nearest'")
         
         # 验证质量配置
         if not 0 < self.quality.min_accuracy <= 1:
@@ -10,6 +10,7 @@ from typing import Dict, List, Any, Optional, Tuple
 from loguru import logger
 
 from ..detection.base import BaseDetector, DetectionResult, ShotBoundary
+from ..detection.frame_reader import FrameReader
 
 
 class ModelManager:
@@ -276,17 +277,17 @@ class AIDetector(BaseDetector):
             
             start_time = time.time()
             
-            # 打开视频文件
+            # 读取视频信息
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
                 raise Exception(f"Cannot open video file: {video_path}")
             
             fps = cap.get(cv2.CAP_PROP_FPS)
             frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
             
             # 提取帧序列
-            frames = self._extract_frames(cap, frame_count, progress_callback)
-            cap.release()
+            frames = self._extract_frames(video_path, frame_count, progress_callback)
             
             # 预处理帧
             processed_frames = self._preprocess_frames(frames)
@@ -313,7 +314,7 @@ class AIDetector(BaseDetector):
             self.logger.error(f"AI detection failed: {e}")
             raise Exception(f"AI detection failed: {e}")
     
-    def _extract_frames(self, cap, frame_count: int, 
+    def _extract_frames(self, video_path: str, frame_count: int, 
                        progress_callback: Optional[callable] = None) -> List[np.ndarray]:
         """提取视频帧"""
         frames = []
@@ -322,25 +323,28 @@ class AIDetector(BaseDetector):
         if sampling_method == 'uniform':
             # 均匀采样
             sample_interval = max(1, frame_count // 1000)  # 最多采样1000帧
-            frame_indices = range(0, frame_count, sample_interval)
         elif sampling_method == 'adaptive':
             # 自适应采样（简化实现）
-            frame_indices = range(0, frame_count, max(1, frame_count // 500))
+            sample_interval = max(1, frame_count // 500)
         else:
             # 默认采样
-            frame_indices = range(0, frame_count, 30)  # 每秒一帧
+            sample_interval = 30  # 每秒一帧
         
-        for i, frame_idx in enumerate(frame_indices):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            
-            if ret:
-                frames.append(frame)
+        total_samples = max(1, (frame_count + sample_interval - 1) // sample_interval)
+        
+        # 后台线程顺序解码，跳过的帧只grab不解码，输出直接缩放到模型输入尺寸
+        with FrameReader(video_path, buffer_size=self.ai_config.get('read_ahead', 8),
+                         output_size=(224, 224), stride=sample_interval) as reader:
+            if not reader.open():
+                raise Exception(f"Cannot open video file: {video_path}")
             
-            # 更新进度
-            if progress_callback and i % 10 == 0:
-                progress = (i + 1) / len(frame_indices) * 0.3  # 30%用于帧提取
-                progress_callback(progress, f"提取帧 {i+1}/{len(frame_indices)}")
+            for i, (_, frame) in enumerate(reader):
+                frames.append(frame.copy())
+                
+                # 更新进度
+                if progress_callback and i % 10 == 0:
+                    progress = (i + 1) / total_samples * 0.3  # 30%用于帧提取
+                    progress_callback(progress, f"提取帧 {i+1}/{total_samples}")
         
         return frames
     
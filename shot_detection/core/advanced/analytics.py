@@ -31,6 +31,8 @@ class AdvancedAnalytics:
             'enable_temporal_analysis': True,
             'enable_statistical_analysis': True,
             'quality_metrics': ['sharpness', 'brightness', 'contrast', 'noise'],
+            'quality_samples': 50,
+            'quality_working_height': None,  # 质量指标工作副本高度，清晰度评分按原分辨率归一化
             'content_metrics': ['motion', 'scene_complexity', 'color_distribution'],
             'temporal_metrics': ['shot_duration', 'transition_types', 'rhythm']
         })
@@ -124,6 +126,7 @@ class AdvancedAnalytics:
         """分析视频质量"""
         try:
             import cv2
+            from utils.quality_sampler import sample_video_quality
             
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
@@ -147,71 +150,22 @@ class AdvancedAnalytics:
             if quality_metrics["fps"] > 0:
                 quality_metrics["duration"] = quality_metrics["frame_count"] / quality_metrics["fps"]
             
-            # 采样分析帧质量
-            sample_frames = min(50, quality_metrics["frame_count"])
-            frame_interval = max(1, quality_metrics["frame_count"] // sample_frames)
-            
-            sharpness_values = []
-            brightness_values = []
-            contrast_values = []
-            noise_values = []
-            
-            for i in range(0, quality_metrics["frame_count"], frame_interval):
-                cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-                ret, frame = cap.read()
-                
-                if ret:
-                    # 转换为灰度图
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    
-                    # 计算清晰度（拉普拉斯方差）
-                    sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
-                    sharpness_values.append(sharpness)
-                    
-                    # 计算亮度
-                    brightness = np.mean(gray)
-                    brightness_values.append(brightness)
-                    
-                    # 计算对比度
-                    contrast = np.std(gray)
-                    contrast_values.append(contrast)
-                    
-                    # 估算噪声水平
-                    noise = self._estimate_noise_level(gray)
-                    noise_values.append(noise)
-            
+            # 采样分析帧质量：只解码采样帧，指标在灰度副本上批量计算
+            samples = sample_video_quality(
+                cap,
+                max_samples=self.analytics_config.get('quality_samples', 50),
+                working_height=self.analytics_config.get('quality_working_height')
+            )
             cap.release()
             
             # 统计质量指标
-            if sharpness_values:
-                quality_metrics["sharpness"] = {
-                    "mean": float(np.mean(sharpness_values)),
-                    "std": float(np.std(sharpness_values)),
-                    "min": float(np.min(sharpness_values)),
-                    "max": float(np.max(sharpness_values))
-                }
-            
-            if brightness_values:
-                quality_metrics["brightness"] = {
-                    "mean": float(np.mean(brightness_values)),
-                    "std": float(np.std(brightness_values)),
-                    "min": float(np.min(brightness_values)),
-                    "max": float(np.max(brightness_values))
-                }
-            
-            if contrast_values:
-                quality_metrics["contrast"] = {
-                    "mean": float(np.mean(contrast_values)),
-                    "std": float(np.std(contrast_values)),
-                    "min": float(np.min(contrast_values)),
-                    "max": float(np.max(contrast_values))
-                }
-            
-            if noise_values:
-                quality_metrics["noise_level"] = {
-                    "mean": float(np.mean(noise_values)),
-                    "std": float(np.std(noise_values))
-                }
+            if len(samples):
+                quality_metrics["sharpness"] = samples.stats('sharpness')
+                quality_metrics["brightness"] = samples.stats('brightness')
+                quality_metrics["contrast"] = samples.stats('contrast')
+                noise = samples.stats('noise')
+                quality_metrics["noise_level"] = {"mean": noise["mean"], "std": noise["std"]}
+            quality_metrics["sampled_frames"] = len(samples)
             
             # 质量评级
             quality_metrics["quality_score"] = self._calculate_quality_score(quality_metrics)
@@ -339,17 +293,6 @@ class AdvancedAnalytics:
             self.logger.error(f"Statistical analysis failed: {e}")
             return {"error": str(e)}
     
-    def _estimate_noise_level(self, gray_image: np.ndarray) -> float:
-        """估算图像噪声水平"""
-        try:
-            # 使用高斯拉普拉斯算子估算噪声
-            kernel = np.array([[0, -1, 0], [-1, 4, -1], [0, -1, 0]])
-            convolved = cv2.filter2D(gray_image, cv2.CV_64F, kernel)
-            noise_level = np.std(convolved)
-            return float(noise_level)
-        except:
-            return 0.0
-    
     def _calculate_quality_score(self, quality_metrics: Dict[str, Any]) -> float:
         """计算质量评分"""
         try:
@@ -13,6 +13,8 @@ from typing import Dict, List, Any, Optional, Callable, Union
 from datetime import datetime, timedelta
 from loguru import logger
 
+from utils.fingerprint import file_fingerprint
+
 
 class CloudStorage:
     """云存储服务"""
@@ -37,7 +39,8 @@ class CloudStorage:
             'encryption': True,
             'compression': True,
             'max_file_size_mb': 1024,
-            'retry_attempts': 3
+            'retry_attempts': 3,
+            'full_content_hash': True  # 判断远程文件是否相同时读取全部内容，关闭后只采样
         })
         
         # 连接状态
@@ -330,12 +333,8 @@ class CloudStorage:
         return True
     
     def _calculate_file_hash(self, file_path: str) -> str:
-        """计算文件哈希"""
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        """计算文件哈希（相同哈希会跳过上传，默认读取全部内容）"""
+        return file_fingerprint(file_path, full=self.storage_config.get('full_content_hash', True))
     
     def disconnect(self):
         """断开云存储连接"""
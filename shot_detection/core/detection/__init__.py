@@ -7,6 +7,9 @@ from .base import BaseDetector, ShotBoundary, DetectionResult
 from .frame_diff import FrameDifferenceDetector, EnhancedFrameDifferenceDetector
 from .histogram import HistogramDetector, MultiChannelHistogramDetector, AdaptiveHistogramDetector
 from .multi_detector import MultiDetector
+from .frame_source import FrameSource, SharedFramePipeline
+from .frame_reader import FrameReader
+from .compact import CompactDetectionResult, CompactBoundary
 
 __all__ = [
     "BaseDetector",
@@ -18,4 +21,9 @@ __all__ = [
     "MultiChannelHistogramDetector", 
     "AdaptiveHistogramDetector",
     "MultiDetector",
+    "FrameSource",
+    "SharedFramePipeline",
+    "FrameReader",
+    "CompactDetectionResult",
+    "CompactBoundary",
 ]
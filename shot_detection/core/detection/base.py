@@ -3,13 +3,20 @@
 定义所有检测算法的通用接口和基础功能
 """
 
+import time
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Tuple, Dict, Any, Optional, TYPE_CHECKING
 import numpy as np
 import cv2
 from dataclasses import dataclass
 from loguru import logger
 
+from .frame_source import SharedFramePipeline
+from .rolling import rolling_mean
+
+if TYPE_CHECKING:
+    from .compact import CompactDetectionResult
+
 
 @dataclass
 class ShotBoundary:
@@ -38,11 +45,22 @@ class DetectionResult:
     def __post_init__(self):
         if self.metadata is None:
             self.metadata = {}
+    
+    def to_compact(self) -> "CompactDetectionResult":
+        """转换为列式存储的紧凑结果"""
+        from .compact import CompactDetectionResult
+        return CompactDetectionResult.from_result(self)
 
 
 class BaseDetector(ABC):
     """镜头检测算法基类"""
     
+    # 只参与阈值化和后处理、不影响逐帧分数的参数，分数曲线缓存键中不包含
+    post_stage_params = ('threshold', 'min_scene_length', 'read_ahead', 'coarse_to_fine')
+    # detect_shots 的边界与 boundaries_from_scores 对逐帧分数的结果一致时为True，
+    # 此时可由缓存的分数曲线直接重建检测结果
+    supports_score_replay = False
+    
     def __init__(self, name: str, **kwargs):
         self.name = name
         self.config = kwargs
@@ -53,6 +71,16 @@ class BaseDetector(ABC):
         """设置日志"""
         self.logger = logger.bind(detector=self.name)
     
+    def __getstate__(self) -> Dict[str, Any]:
+        """序列化时去掉日志对象（可能绑定了不可pickle的输出流），便于传给工作进程"""
+        state = self.__dict__.copy()
+        state.pop('logger', None)
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._setup_logging()
+    
     @abstractmethod
     def initialize(self) -> bool:
         """初始化检测器"""
@@ -77,6 +105,137 @@ class BaseDetector(ABC):
         # 可以在子类中重写以添加特定的预处理步骤
         return frame
     
+    def detect_shots_coarse_to_fine(self, video_path: str, stride: int = 8,
+                                    sampling: str = 'stride', sensitivity: float = 0.5,
+                                    **kwargs) -> DetectionResult:
+        """两阶段检测：稀疏采样粗扫，再对分数跳变的窗口逐帧精修
+        
+        Args:
+            video_path: 视频文件路径
+            stride: 粗扫采样步长（sampling='stride' 时有效）
+            sampling: 采样方式，stride 或 keyframe
+            sensitivity: 粗扫阈值系数，越小召回越高、速度越慢
+        """
+        from .coarse_to_fine import CoarseToFineScanner, CoarseToFineConfig
+        
+        config = CoarseToFineConfig(stride=stride, sampling=sampling, sensitivity=sensitivity)
+        try:
+            return CoarseToFineScanner(self, config).scan(video_path)
+        except Exception as e:
+            self.logger.error(f"Error in {self.name} coarse-to-fine detection: {e}")
+            return DetectionResult([], self.name, 0.0, 0, [])
+    
+    def _coarse_to_fine_options(self, kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """从调用参数或构造参数中读取粗扫精修选项，未启用时返回None"""
+        options = kwargs.get('coarse_to_fine', self.config.get('coarse_to_fine'))
+        if not options:
+            return None
+        return options if isinstance(options, dict) else {}
+    
+    def get_working_height(self) -> int:
+        """检测器所需的工作分辨率高度"""
+        return getattr(self, 'resize_height', 240)
+    
+    def extract_frame_features(self, frame: np.ndarray) -> np.ndarray:
+        """提取用于帧对比较的特征，默认为预处理后的帧
+        
+        传入的帧可能是预解码缓冲区的视图，返回值不能直接引用它。
+        """
+        return self.preprocess_frame(frame)
+    
+    def begin_stream(self, fps: float, frame_count: int = 0):
+        """开始逐帧评分会话"""
+        self._stream_fps = fps if fps and fps > 0 else 30.0
+        self._stream_frame_count = frame_count
+        self._stream_prev = None
+        self._stream_scores = []
+        self._stream_time = 0.0
+    
+    def score_frame(self, frame: np.ndarray) -> Optional[float]:
+        """对下一帧评分，返回与上一帧的差异分数（首帧返回None）"""
+        start_time = time.time()
+        features = self.extract_frame_features(frame)
+        prev_features = self._stream_prev
+        self._stream_prev = features
+        
+        score = None
+        if prev_features is not None:
+            score = float(self.process_frame_pair(prev_features, features))
+            self._stream_scores.append(score)
+        
+        self._stream_time += time.time() - start_time
+        return score
+    
+    def end_stream(self) -> DetectionResult:
+        """结束逐帧评分会话并生成检测结果"""
+        scores = self._stream_scores
+        boundaries = self._stream_boundaries()
+        frame_count = self._stream_frame_count or len(scores) + 1
+        
+        self.logger.info(f"{self.name} stream completed: {len(boundaries)} boundaries found")
+        self._stream_prev = None
+        
+        return DetectionResult(
+            boundaries=boundaries,
+            algorithm_name=self.name,
+            processing_time=self._stream_time,
+            frame_count=frame_count,
+            confidence_scores=scores,
+            metadata={'fps': self._stream_fps, 'shared_decode': True}
+        )
+    
+    def _stream_boundaries(self) -> List[ShotBoundary]:
+        """逐帧评分会话结束时生成边界"""
+        return self.boundaries_from_scores(self._stream_scores, self._stream_fps)
+    
+    def boundaries_from_scores(self, scores: List[float], fps: float) -> List[ShotBoundary]:
+        """根据逐帧分数生成镜头边界（scores[i] 对应第 i+1 帧）"""
+        threshold = getattr(self, 'threshold', 0.5)
+        boundaries = []
+        
+        for i, score in enumerate(scores):
+            if score > threshold:
+                frame_number = i + 1
+                boundaries.append(ShotBoundary(
+                    frame_number=frame_number,
+                    timestamp=frame_number / fps,
+                    confidence=score,
+                    boundary_type='cut',
+                    metadata=self.boundary_metadata(score)
+                ))
+        
+        return self.postprocess_boundaries(boundaries, getattr(self, 'min_scene_length', 15))
+    
+    def result_from_scores(self, scores: List[float], fps: float, frame_count: int,
+                           processing_time: float = 0.0,
+                           metadata: Optional[Dict[str, Any]] = None) -> DetectionResult:
+        """
+        由逐帧分数曲线生成检测结果（只做阈值化和后处理，不解码视频）
+        
+        Args:
+            scores: 逐帧分数（scores[i] 对应第 i+1 帧）
+            fps: 帧率
+            frame_count: 总帧数
+            processing_time: 记录的处理耗时
+            metadata: 附加的结果元数据
+            
+        Returns:
+            检测结果
+        """
+        score_list = list(scores)
+        return DetectionResult(
+            boundaries=self.boundaries_from_scores(score_list, fps),
+            algorithm_name=self.name,
+            processing_time=processing_time,
+            frame_count=frame_count,
+            confidence_scores=score_list,
+            metadata={'fps': fps, **(metadata or {})}
+        )
+    
+    def boundary_metadata(self, score: float) -> Dict[str, Any]:
+        """边界元数据"""
+        return {'algorithm': self.name, 'diff_score': score}
+    
     def postprocess_boundaries(self, boundaries: List[ShotBoundary], 
                              min_scene_length: int = 15) -> List[ShotBoundary]:
         """后处理边界，移除过短的镜头"""
@@ -106,15 +265,8 @@ class BaseDetector(ABC):
         if len(scores) < window_size:
             return scores
         
-        smoothed = []
         half_window = window_size // 2
-        
-        for i in range(len(scores)):
-            start = max(0, i - half_window)
-            end = min(len(scores), i + half_window + 1)
-            smoothed.append(np.mean(scores[start:end]))
-        
-        return smoothed
+        return rolling_mean(scores, half_window, half_window).tolist()
     
     def find_peaks(self, scores: List[float], threshold: float, 
                    min_distance: int = 15) -> List[int]:
@@ -147,6 +299,30 @@ class BaseDetector(ABC):
             'config': self.config
         }
     
+    def get_config(self) -> Dict[str, Any]:
+        """影响检测结果的参数（构造参数和标量属性），用于生成缓存键"""
+        scalar_types = (int, float, str, bool, type(None))
+        config = {'class': type(self).__name__, 'name': self.name}
+        for key, value in vars(self).items():
+            if key.startswith('_') or key in ('name', 'config', 'is_initialized', 'logger'):
+                continue
+            if isinstance(value, scalar_types):
+                config[key] = value
+        config['options'] = {
+            key: value for key, value in self.config.items()
+            if isinstance(value, scalar_types + (list, tuple, dict))
+        }
+        return config
+    
+    def get_scoring_config(self) -> Dict[str, Any]:
+        """决定逐帧分数曲线的参数（去掉 post_stage_params），用于生成分数曲线缓存键"""
+        config = self.get_config()
+        config['options'] = dict(config['options'])
+        for key in self.post_stage_params:
+            config.pop(key, None)
+            config['options'].pop(key, None)
+        return config
+    
     def cleanup(self):
         """清理资源"""
         self.logger.info(f"Cleaning up {self.name} detector")
@@ -156,9 +332,19 @@ class BaseDetector(ABC):
 class MultiDetector:
     """多算法检测器管理器"""
     
-    def __init__(self):
+    def __init__(self, shared_decode: bool = True):
         self.detectors: List[BaseDetector] = []
         self.weights: Dict[str, float] = {}
+        self.shared_decode = shared_decode  # 所有检测器共享一次解码
+        self.logger = logger.bind(component="MultiDetector")
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state.pop('logger', None)
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
         self.logger = logger.bind(component="MultiDetector")
     
     def add_detector(self, detector: BaseDetector, weight: float = 1.0):
@@ -186,18 +372,27 @@ class MultiDetector:
     def detect_shots_ensemble(self, video_path: str, **kwargs) -> DetectionResult:
         """使用集成方法检测镜头"""
         all_results = []
+        active_detectors = [d for d in self.detectors if d.is_initialized]
         
-        # 运行所有检测器
-        for detector in self.detectors:
-            if not detector.is_initialized:
-                continue
+        if self.shared_decode and len(active_detectors) > 1:
+            # 共享解码：一次解码，逐帧分发给所有检测器
+            pipeline = SharedFramePipeline(active_detectors)
+            all_results = pipeline.run(video_path)
+            for result in all_results:
+                self.logger.info(f"{result.algorithm_name} found {len(result.boundaries)} boundaries")
+            total_time = pipeline.wall_time
+        else:
+            # 运行所有检测器
+            for detector in active_detectors:
+                try:
+                    result = detector.detect_shots(video_path, **kwargs)
+                    all_results.append(result)
+                    self.logger.info(f"{detector.name} found {len(result.boundaries)} boundaries")
+                except Exception as e:
+                    self.logger.error(f"Error in {detector.name}: {e}")
             
-            try:
-                result = detector.detect_shots(video_path, **kwargs)
-                all_results.append(result)
-                self.logger.info(f"{detector.name} found {len(result.boundaries)} boundaries")
-            except Exception as e:
-                self.logger.error(f"Error in {detector.name}: {e}")
+            # 计算总处理时间
+            total_time = sum(result.processing_time for result in all_results)
         
         if not all_results:
             return DetectionResult([], "ensemble", 0.0, 0, [])
@@ -205,9 +400,6 @@ class MultiDetector:
         # 融合结果
         fused_boundaries = self._fuse_boundaries(all_results)
         
-        # 计算总处理时间
-        total_time = sum(result.processing_time for result in all_results)
-        
         # 获取帧数（假设所有结果的帧数相同）
         frame_count = all_results[0].frame_count if all_results else 0
         
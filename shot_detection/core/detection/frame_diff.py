@@ -8,16 +8,21 @@ import numpy as np
 import cv2
 from typing import List, Tuple
 from .base import BaseDetector, ShotBoundary, DetectionResult
+from .frame_reader import FrameReader
 
 
 class FrameDifferenceDetector(BaseDetector):
     """帧差分析检测器"""
     
+    supports_score_replay = True
+    
     def __init__(self, threshold: float = 0.3, min_scene_length: int = 15, **kwargs):
         super().__init__("FrameDifference", **kwargs)
         self.threshold = threshold
         self.min_scene_length = min_scene_length
         self.resize_height = kwargs.get('resize_height', 240)  # 降低分辨率加速处理
+        self.blur_kernel_size = kwargs.get('blur_kernel_size', 5)
+        self.read_ahead = kwargs.get('read_ahead', 8)  # 预解码缓冲帧数
         
     def initialize(self) -> bool:
         """初始化检测器"""
@@ -30,23 +35,30 @@ class FrameDifferenceDetector(BaseDetector):
             return False
     
     def detect_shots(self, video_path: str, **kwargs) -> DetectionResult:
-        """检测镜头边界"""
+        """检测镜头边界，传入 coarse_to_fine=True 或选项字典时使用粗扫精修模式"""
+        coarse_to_fine = self._coarse_to_fine_options(kwargs)
+        if coarse_to_fine is not None:
+            return self.detect_shots_coarse_to_fine(video_path, **coarse_to_fine)
+        
         start_time = time.time()
         boundaries = []
         confidence_scores = []
+        reader = None
         
         try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
+            # 后台线程预解码，直接输出缩放后的灰度工作帧
+            reader = FrameReader(video_path, buffer_size=self.read_ahead,
+                                 working_height=self.resize_height, grayscale=True)
+            if not reader.open():
                 raise ValueError(f"Cannot open video file: {video_path}")
             
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps = reader.fps
+            frame_count = reader.frame_count
             
             self.logger.info(f"Processing video: {frame_count} frames at {fps} FPS")
             
             # 读取第一帧
-            ret, prev_frame = cap.read()
+            ret, prev_frame = reader.read()
             if not ret:
                 raise ValueError("Cannot read first frame")
             
@@ -54,7 +66,7 @@ class FrameDifferenceDetector(BaseDetector):
             frame_number = 0
             
             while True:
-                ret, curr_frame = cap.read()
+                ret, curr_frame = reader.read()
                 if not ret:
                     break
                 
@@ -81,9 +93,10 @@ class FrameDifferenceDetector(BaseDetector):
                     boundaries.append(boundary)
                     self.logger.debug(f"Shot boundary detected at frame {frame_number} (score: {diff_score:.3f})")
                 
+                # 缓存预处理结果，下一帧对直接复用
                 prev_frame = curr_frame
             
-            cap.release()
+            reader.release()
             
             # 后处理：移除过短的镜头
             boundaries = self.postprocess_boundaries(boundaries, self.min_scene_length)
@@ -96,45 +109,53 @@ class FrameDifferenceDetector(BaseDetector):
                 algorithm_name=self.name,
                 processing_time=processing_time,
                 frame_count=frame_count,
-                confidence_scores=confidence_scores
+                confidence_scores=confidence_scores,
+                metadata={'fps': fps}
             )
             
         except Exception as e:
+            if reader is not None:
+                reader.release()
             self.logger.error(f"Error in FrameDifference detection: {e}")
             return DetectionResult([], self.name, time.time() - start_time, 0, [])
     
     def process_frame_pair(self, frame1: np.ndarray, frame2: np.ndarray) -> float:
-        """计算两帧之间的差异分数"""
-        # 调整帧大小以加速处理
-        h1, w1 = frame1.shape[:2]
-        if h1 > self.resize_height:
-            scale = self.resize_height / h1
-            new_width = int(w1 * scale)
-            frame1 = cv2.resize(frame1, (new_width, self.resize_height))
-            frame2 = cv2.resize(frame2, (new_width, self.resize_height))
+        """计算两帧之间的差异分数
         
-        # 转换为灰度图
-        if len(frame1.shape) == 3:
-            gray1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2GRAY)
-            gray2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2GRAY)
-        else:
-            gray1, gray2 = frame1, frame2
+        接受 preprocess_frame 输出的灰度工作帧，传入原始帧时先做预处理。
+        """
+        gray1 = self._ensure_working_frame(frame1)
+        gray2 = self._ensure_working_frame(frame2)
         
-        # 计算绝对差值
+        # 计算绝对差值的均值
         diff = cv2.absdiff(gray1, gray2)
-        
-        # 计算差异的均值
-        mean_diff = np.mean(diff) / 255.0
+        mean_diff = cv2.mean(diff)[0] / 255.0
         
         return mean_diff
     
+    def boundary_metadata(self, score: float) -> dict:
+        """边界元数据"""
+        return {'algorithm': 'frame_difference', 'diff_score': score}
+    
     def preprocess_frame(self, frame: np.ndarray) -> np.ndarray:
-        """预处理帧"""
-        # 应用高斯模糊减少噪声
+        """预处理帧：先缩放到工作分辨率，再转灰度、模糊，每帧只做一次"""
+        height, width = frame.shape[:2]
+        if height > self.resize_height:
+            scale = self.resize_height / height
+            new_width = int(width * scale)
+            frame = cv2.resize(frame, (new_width, self.resize_height))
+        
         if len(frame.shape) == 3:
-            frame = cv2.GaussianBlur(frame, (5, 5), 0)
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
-        return super().preprocess_frame(frame)
+        # 在小尺寸灰度图上做高斯模糊减少噪声（同时生成新数组，可安全缓存）
+        return cv2.GaussianBlur(frame, (self.blur_kernel_size, self.blur_kernel_size), 0)
+    
+    def _ensure_working_frame(self, frame: np.ndarray) -> np.ndarray:
+        """确保帧为灰度工作帧"""
+        if len(frame.shape) == 2 and frame.shape[0] <= self.resize_height:
+            return frame
+        return self.preprocess_frame(frame)
 
 
 class EnhancedFrameDifferenceDetector(FrameDifferenceDetector):
@@ -148,20 +169,9 @@ class EnhancedFrameDifferenceDetector(FrameDifferenceDetector):
     
     def process_frame_pair(self, frame1: np.ndarray, frame2: np.ndarray) -> float:
         """增强版帧差计算"""
-        # 调整帧大小
-        h1, w1 = frame1.shape[:2]
-        if h1 > self.resize_height:
-            scale = self.resize_height / h1
-            new_width = int(w1 * scale)
-            frame1 = cv2.resize(frame1, (new_width, self.resize_height))
-            frame2 = cv2.resize(frame2, (new_width, self.resize_height))
-        
-        # 转换为灰度图
-        if len(frame1.shape) == 3:
-            gray1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2GRAY)
-            gray2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2GRAY)
-        else:
-            gray1, gray2 = frame1, frame2
+        # 灰度工作帧
+        gray1 = self._ensure_working_frame(frame1)
+        gray2 = self._ensure_working_frame(frame2)
         
         # 边缘增强
         if self.edge_enhancement:
@@ -0,0 +1,231 @@
+"""
+预解码帧读取器
+后台线程解码到预分配的环形缓冲区，解码与评分并行进行
+"""
+
+import queue
+import threading
+from typing import Iterator, Optional, Tuple
+import numpy as np
+import cv2
+from loguru import logger
+
+
+class FrameReader:
+    """后台线程预解码帧读取器
+
+    解码线程把帧写入固定数量的预分配缓冲槽，消费者通过 read() 取帧。
+    缓冲槽用尽时解码线程阻塞等待（背压），因此峰值内存只取决于
+    buffer_size 和帧尺寸，与视频长度无关。
+
+    read() 返回的帧是缓冲槽的视图，下一次调用 read() 后即被回收复用，
+    需要跨帧保留时请自行 copy()。
+    """
+
+    _POLL_INTERVAL = 0.1  # 等待时检查停止信号的间隔（秒）
+
+    def __init__(self, video_path: str, buffer_size: int = 8,
+                 working_height: Optional[int] = None,
+                 output_size: Optional[Tuple[int, int]] = None,
+                 stride: int = 1,
+                 grayscale: bool = False,
+                 interpolation: int = cv2.INTER_LINEAR,
+                 start_frame: int = 0):
+        """
+        初始化帧读取器
+
+        Args:
+            video_path: 视频文件路径
+            buffer_size: 环形缓冲区槽数
+            working_height: 解码后缩放到的高度（只缩小不放大）
+            output_size: 固定输出尺寸 (宽, 高)，优先于 working_height
+            stride: 采样步长，跳过的帧只 grab 不 retrieve
+            grayscale: 输出单通道灰度帧（先缩放再转灰度）
+            interpolation: 缩放插值方式（线性插值只采样输出像素，耗时与源分辨率基本无关）
+            start_frame: 起始帧号，大于0时打开后先跳转，返回的帧号从该帧开始计
+        """
+        self.video_path = video_path
+        self.buffer_size = max(2, buffer_size)
+        self.working_height = working_height
+        self.output_size = output_size
+        self.stride = max(1, stride)
+        self.grayscale = grayscale
+        self.interpolation = interpolation
+        self.start_frame = max(0, start_frame)
+
+        self.fps = 0.0
+        self.frame_count = 0
+        self.width = 0
+        self.height = 0
+        self.frame_size: Optional[Tuple[int, int]] = None  # 输出帧尺寸 (宽, 高)
+
+        self._cap = None
+        self._buffers: Optional[np.ndarray] = None
+        self._free_slots: queue.Queue = queue.Queue()
+        self._filled_slots: queue.Queue = queue.Queue()
+        self._held_slot: Optional[int] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._finished = False
+        self.error: Optional[Exception] = None
+        self.logger = logger.bind(component="FrameReader")
+
+    def open(self) -> bool:
+        """打开视频、预分配缓冲区并启动解码线程"""
+        self._cap = cv2.VideoCapture(self.video_path)
+        if not self._cap.isOpened():
+            self.logger.error(f"Cannot open video file: {self.video_path}")
+            self._cap = None
+            return False
+
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        if self.start_frame > 0:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+
+        # 部分容器不报告分辨率，读取首帧确定
+        first_frame = None
+        if self.width <= 0 or self.height <= 0:
+            ret, first_frame = self._cap.read()
+            if not ret:
+                self.logger.error(f"Cannot read first frame: {self.video_path}")
+                self.release()
+                return False
+            self.height, self.width = first_frame.shape[:2]
+
+        self.frame_size = self._compute_frame_size()
+        out_w, out_h = self.frame_size
+        channels = () if self.grayscale else (3,)
+        self._buffers = np.empty((self.buffer_size, out_h, out_w) + channels, dtype=np.uint8)
+        for slot in range(self.buffer_size):
+            self._free_slots.put(slot)
+
+        self._thread = threading.Thread(
+            target=self._decode_loop, args=(first_frame,),
+            name="FrameReader", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def _compute_frame_size(self) -> Tuple[int, int]:
+        """计算输出帧尺寸"""
+        if self.output_size:
+            return self.output_size
+        if self.working_height and self.height > self.working_height:
+            scale = self.working_height / self.height
+            return int(self.width * scale), self.working_height
+        return self.width, self.height
+
+    def _acquire_free_slot(self) -> Optional[int]:
+        """获取空闲缓冲槽，缓冲区满时阻塞（背压）"""
+        while not self._stop_event.is_set():
+            try:
+                return self._free_slots.get(timeout=self._POLL_INTERVAL)
+            except queue.Empty:
+                continue
+        return None
+
+    def _store_frame(self, frame: np.ndarray, slot: int):
+        """把解码帧写入缓冲槽（先缩放，再做颜色转换）"""
+        dst = self._buffers[slot]
+        needs_resize = (frame.shape[1], frame.shape[0]) != self.frame_size
+        needs_convert = (frame.ndim == 3) == self.grayscale
+
+        if not needs_convert:
+            if needs_resize:
+                cv2.resize(frame, self.frame_size, dst=dst, interpolation=self.interpolation)
+            else:
+                np.copyto(dst, frame)
+            return
+
+        if needs_resize:
+            frame = cv2.resize(frame, self.frame_size, interpolation=self.interpolation)
+        code = cv2.COLOR_BGR2GRAY if self.grayscale else cv2.COLOR_GRAY2BGR
+        cv2.cvtColor(frame, code, dst=dst)
+
+    def _decode_loop(self, first_frame: Optional[np.ndarray]):
+        """解码线程主循环"""
+        frame_number = self.start_frame
+        try:
+            while not self._stop_event.is_set():
+                if (frame_number - self.start_frame) % self.stride == 0:
+                    if first_frame is not None:
+                        ret, frame = True, first_frame
+                        first_frame = None
+                    else:
+                        ret, frame = self._cap.read()
+                    if not ret:
+                        break
+
+                    slot = self._acquire_free_slot()
+                    if slot is None:
+                        break
+                    self._store_frame(frame, slot)
+                    self._filled_slots.put((slot, frame_number))
+                else:
+                    if first_frame is not None:
+                        first_frame = None
+                    elif not self._cap.grab():
+                        break
+                frame_number += 1
+        except Exception as e:
+            self.error = e
+            self.logger.error(f"Error decoding {self.video_path}: {e}")
+        finally:
+            self._filled_slots.put(None)
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """读取下一帧，接口与 cv2.VideoCapture.read 一致"""
+        item = self.read_indexed()
+        if item is None:
+            return False, None
+        return True, item[1]
+
+    def read_indexed(self) -> Optional[Tuple[int, np.ndarray]]:
+        """读取下一帧及其帧号，结束时返回None"""
+        self._recycle_held_slot()
+        if self._finished or self._thread is None:
+            return None
+
+        item = self._filled_slots.get()
+        if item is None:
+            self._finished = True
+            return None
+
+        slot, frame_number = item
+        self._held_slot = slot
+        return frame_number, self._buffers[slot]
+
+    def _recycle_held_slot(self):
+        """归还上一次交给消费者的缓冲槽"""
+        if self._held_slot is not None:
+            self._free_slots.put(self._held_slot)
+            self._held_slot = None
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        while True:
+            item = self.read_indexed()
+            if item is None:
+                break
+            yield item
+
+    def release(self):
+        """停止解码线程并释放资源"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        self._finished = True
+        self._held_slot = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
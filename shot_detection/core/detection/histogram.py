@@ -8,17 +8,22 @@ import numpy as np
 import cv2
 from typing import List, Tuple
 from .base import BaseDetector, ShotBoundary, DetectionResult
+from .frame_reader import FrameReader
+from .rolling import rolling_mean_std, StreamingAdaptiveThreshold
 
 
 class HistogramDetector(BaseDetector):
     """直方图检测器"""
     
+    supports_score_replay = True
+    
     def __init__(self, threshold: float = 0.4, bins: int = 256, **kwargs):
         super().__init__("Histogram", **kwargs)
         self.threshold = threshold
         self.bins = bins
         self.min_scene_length = kwargs.get('min_scene_length', 15)
         self.color_space = kwargs.get('color_space', 'RGB')  # RGB, HSV, LAB
+        self.read_ahead = kwargs.get('read_ahead', 8)  # 预解码缓冲帧数
         
     def initialize(self) -> bool:
         """初始化检测器"""
@@ -31,23 +36,29 @@ class HistogramDetector(BaseDetector):
             return False
     
     def detect_shots(self, video_path: str, **kwargs) -> DetectionResult:
-        """检测镜头边界"""
+        """检测镜头边界，传入 coarse_to_fine=True 或选项字典时使用粗扫精修模式"""
+        coarse_to_fine = self._coarse_to_fine_options(kwargs)
+        if coarse_to_fine is not None:
+            return self.detect_shots_coarse_to_fine(video_path, **coarse_to_fine)
+        
         start_time = time.time()
         boundaries = []
         confidence_scores = []
+        reader = None
         
         try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
+            # 后台线程预解码并缩放到240高度，解码与评分并行
+            reader = FrameReader(video_path, buffer_size=self.read_ahead, working_height=240)
+            if not reader.open():
                 raise ValueError(f"Cannot open video file: {video_path}")
             
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps = reader.fps
+            frame_count = reader.frame_count
             
             self.logger.info(f"Processing video: {frame_count} frames at {fps} FPS")
             
             # 读取第一帧
-            ret, prev_frame = cap.read()
+            ret, prev_frame = reader.read()
             if not ret:
                 raise ValueError("Cannot read first frame")
             
@@ -56,7 +67,7 @@ class HistogramDetector(BaseDetector):
             frame_number = 0
             
             while True:
-                ret, curr_frame = cap.read()
+                ret, curr_frame = reader.read()
                 if not ret:
                     break
                 
@@ -87,7 +98,7 @@ class HistogramDetector(BaseDetector):
                 
                 prev_hist = curr_hist
             
-            cap.release()
+            reader.release()
             
             # 后处理
             boundaries = self.postprocess_boundaries(boundaries, self.min_scene_length)
@@ -100,10 +111,13 @@ class HistogramDetector(BaseDetector):
                 algorithm_name=self.name,
                 processing_time=processing_time,
                 frame_count=frame_count,
-                confidence_scores=confidence_scores
+                confidence_scores=confidence_scores,
+                metadata={'fps': fps}
             )
             
         except Exception as e:
+            if reader is not None:
+                reader.release()
             self.logger.error(f"Error in Histogram detection: {e}")
             return DetectionResult([], self.name, time.time() - start_time, 0, [])
     
@@ -140,6 +154,14 @@ class HistogramDetector(BaseDetector):
         
         return final_distance
     
+    def extract_frame_features(self, frame: np.ndarray) -> np.ndarray:
+        """逐帧评分时以直方图作为帧特征"""
+        return self._calculate_histogram(self.preprocess_frame(frame))
+    
+    def boundary_metadata(self, score: float) -> dict:
+        """边界元数据"""
+        return {'algorithm': 'histogram', 'diff_score': score, 'color_space': self.color_space}
+    
     def _calculate_histogram(self, frame: np.ndarray) -> np.ndarray:
         """计算帧的直方图"""
         if self.color_space == 'HSV':
@@ -263,6 +285,8 @@ class MultiChannelHistogramDetector(HistogramDetector):
 class AdaptiveHistogramDetector(HistogramDetector):
     """自适应直方图检测器"""
     
+    post_stage_params = HistogramDetector.post_stage_params + ('adaptation_window',)
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.adaptation_window = kwargs.get('adaptation_window', 30)
@@ -276,46 +300,75 @@ class AdaptiveHistogramDetector(HistogramDetector):
         # 使用自适应阈值重新处理
         if result.confidence_scores:
             adaptive_boundaries = self._adaptive_threshold_detection(
-                result.confidence_scores, video_path
+                result.confidence_scores, result.metadata.get('fps', 30.0)
             )
             result.boundaries = adaptive_boundaries
         
         return result
     
-    def _adaptive_threshold_detection(self, scores: List[float], video_path: str) -> List[ShotBoundary]:
-        """使用自适应阈值检测边界"""
-        boundaries = []
+    def boundaries_from_scores(self, scores: List[float], fps: float) -> List[ShotBoundary]:
+        """逐帧评分结束后使用自适应阈值生成边界"""
+        return self._adaptive_threshold_detection(scores, fps)
+    
+    def begin_stream(self, fps: float, frame_count: int = 0):
+        """开始逐帧评分会话，自适应阈值随分数到达流式判定"""
+        super().begin_stream(fps, frame_count)
+        before, after = self._adaptation_extent()
+        self._stream_threshold = StreamingAdaptiveThreshold(before, after, 2.0, self.threshold)
+        self._stream_hits = []
+    
+    def score_frame(self, frame: np.ndarray):
+        """对下一帧评分，并输出局部窗口已收齐的自适应判定"""
+        score = super().score_frame(frame)
+        if score is not None:
+            self._stream_hits.extend(self._stream_threshold.push(score))
+        return score
+    
+    def _stream_boundaries(self) -> List[ShotBoundary]:
+        """使用流式判定结果生成边界"""
+        self._stream_hits.extend(self._stream_threshold.flush())
+        return self._hits_to_boundaries(self._stream_hits, self._stream_fps)
+    
+    def _adaptation_extent(self) -> Tuple[int, int]:
+        """局部窗口 [i - half, i + half) 向前、向后包含的元素数"""
+        half = self.adaptation_window // 2
+        return half, max(half - 1, 0)
+    
+    def _adaptive_threshold_detection(self, scores: List[float], fps: float) -> List[ShotBoundary]:
+        """使用自适应阈值检测边界（滑动窗口统计向量化计算）"""
+        scores_array = np.asarray(scores, dtype=np.float64)
+        before, after = self._adaptation_extent()
+        local_mean, local_std = rolling_mean_std(scores_array, before, after)
+        adaptive_threshold = local_mean + 2 * local_std
         
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        cap.release()
+        hit_indices = np.flatnonzero((scores_array > adaptive_threshold) & (scores_array > self.threshold))
+        hits = [
+            (i, scores_array[i], adaptive_threshold[i], local_mean[i], local_std[i])
+            for i in hit_indices
+        ]
+        return self._hits_to_boundaries(hits, fps)
+    
+    def _hits_to_boundaries(self, hits: List[Tuple[int, float, float, float, float]],
+                            fps: float) -> List[ShotBoundary]:
+        """把自适应判定命中转换为边界"""
+        boundaries = []
         
-        for i, score in enumerate(scores):
-            # 计算局部自适应阈值
-            start_idx = max(0, i - self.adaptation_window // 2)
-            end_idx = min(len(scores), i + self.adaptation_window // 2)
-            local_scores = scores[start_idx:end_idx]
-            
-            # 使用局部统计计算阈值
-            local_mean = np.mean(local_scores)
-            local_std = np.std(local_scores)
-            adaptive_threshold = local_mean + 2 * local_std
-            
-            if score > adaptive_threshold and score > self.threshold:
-                timestamp = i / fps
-                boundary = ShotBoundary(
-                    frame_number=i,
-                    timestamp=timestamp,
-                    confidence=score,
-                    boundary_type='cut',
-                    metadata={
-                        'algorithm': 'adaptive_histogram',
-                        'diff_score': score,
-                        'adaptive_threshold': adaptive_threshold,
-                        'local_mean': local_mean,
-                        'local_std': local_std
-                    }
-                )
-                boundaries.append(boundary)
+        for i, score, adaptive_threshold, local_mean, local_std in hits:
+            i = int(i)
+            timestamp = i / fps
+            boundary = ShotBoundary(
+                frame_number=i,
+                timestamp=timestamp,
+                confidence=float(score),
+                boundary_type='cut',
+                metadata={
+                    'algorithm': 'adaptive_histogram',
+                    'diff_score': float(score),
+                    'adaptive_threshold': float(adaptive_threshold),
+                    'local_mean': float(local_mean),
+                    'local_std': float(local_std)
+                }
+            )
+            boundaries.append(boundary)
         
         return self.postprocess_boundaries(boundaries, self.min_scene_length)
@@ -3,26 +3,30 @@ Multi-Detector Module
 多检测器融合模块
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 from loguru import logger
 
 from .base import BaseDetector, DetectionResult, ShotBoundary
+from .frame_source import SharedFramePipeline
 
 
 class MultiDetector:
     """多检测器融合类"""
     
-    def __init__(self, detectors: List[BaseDetector], fusion_weights: Dict[str, float] = None):
+    def __init__(self, detectors: List[BaseDetector], fusion_weights: Dict[str, float] = None,
+                 shared_decode: bool = True):
         """
         初始化多检测器
         
         Args:
             detectors: 检测器列表
             fusion_weights: 融合权重字典
+            shared_decode: 是否共享一次解码，逐帧分发给所有检测器
         """
         self.detectors = detectors
         self.fusion_weights = fusion_weights or {}
+        self.shared_decode = shared_decode
         self.logger = logger.bind(component="MultiDetector")
         
         # 设置默认权重
@@ -30,6 +34,16 @@ class MultiDetector:
             weight = 1.0 / len(detectors)
             self.fusion_weights = {detector.name: weight for detector in detectors}
     
+    def __getstate__(self) -> Dict[str, Any]:
+        """序列化时去掉日志对象，便于传给工作进程"""
+        state = self.__dict__.copy()
+        state.pop('logger', None)
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self.logger = logger.bind(component="MultiDetector")
+    
     def initialize_all(self) -> bool:
         """初始化所有检测器"""
         success_count = 0
@@ -59,9 +73,33 @@ class MultiDetector:
         """
         self.logger.info(f"Starting multi-detector fusion for {video_path}")
         
-        # 运行所有检测器
+        results, wall_time = self.run_detectors(video_path, **kwargs)
+        return self.fuse_detector_results(results, wall_time)
+    
+    def run_detectors(self, video_path: str, detectors: Optional[List[BaseDetector]] = None,
+                      **kwargs) -> Tuple[List[DetectionResult], Optional[float]]:
+        """
+        运行检测器（默认全部），不做融合
+        
+        Args:
+            video_path: 视频文件路径
+            detectors: 要运行的检测器子集
+            **kwargs: 其他参数
+            
+        Returns:
+            (各检测器的检测结果, 共享解码的实际耗时；未共享解码时为None)
+        """
+        detectors = self.detectors if detectors is None else detectors
         results = []
-        for detector in self.detectors:
+        
+        if self.shared_decode and len(detectors) > 1:
+            pipeline = SharedFramePipeline(detectors)
+            results = pipeline.run(video_path)
+            for result in results:
+                self.logger.info(f"{result.algorithm_name} detected {len(result.boundaries)} boundaries")
+            return results, pipeline.wall_time
+        
+        for detector in detectors:
             try:
                 result = detector.detect_shots(video_path, **kwargs)
                 results.append(result)
@@ -70,6 +108,20 @@ class MultiDetector:
                 self.logger.error(f"Error in {detector.name}: {e}")
                 continue
         
+        return results, None
+    
+    def fuse_detector_results(self, results: List[DetectionResult],
+                              wall_time: Optional[float] = None) -> DetectionResult:
+        """
+        融合各检测器的结果（结果可来自本次运行，也可由缓存的分数曲线重建）
+        
+        Args:
+            results: 各检测器的检测结果
+            wall_time: 共享解码的实际耗时
+            
+        Returns:
+            融合后的检测结果
+        """
         if not results:
             self.logger.error("No detector produced valid results")
             return DetectionResult(
@@ -82,6 +134,10 @@ class MultiDetector:
         
         # 融合结果
         fused_result = self._fuse_results(results)
+        if wall_time is not None:
+            # 共享解码时各检测器并非依次运行，使用实际耗时
+            fused_result.processing_time = wall_time
+            fused_result.metadata['shared_decode'] = True
         
         self.logger.info(f"Fusion complete: {len(fused_result.boundaries)} final boundaries")
         return fused_result
@@ -221,6 +277,17 @@ class MultiDetector:
         
         return final_boundaries
     
+    def get_config(self) -> Dict[str, Any]:
+        """各检测器参数和融合权重，用于生成缓存键"""
+        return {
+            'class': type(self).__name__,
+            'detectors': [
+                detector.get_config() if hasattr(detector, 'get_config') else {'name': detector.name}
+                for detector in self.detectors
+            ],
+            'fusion_weights': self.fusion_weights
+        }
+    
     def cleanup(self):
         """清理所有检测器"""
         for detector in self.detectors:
@@ -14,6 +14,9 @@ from loguru import logger
 class CacheOptimizer:
     """缓存优化器"""
     
+    # 查找近重复片段的视频格式
+    VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v'}
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         初始化缓存优化器
@@ -89,7 +92,7 @@ class CacheOptimizer:
             
             # 遍历缓存文件
             for file_path in cache_path.rglob("*"):
-                if file_path.is_file():
+                if self._is_cache_file(file_path):
                     try:
                         stat = file_path.stat()
                         file_size = stat.st_size
@@ -214,6 +217,13 @@ class CacheOptimizer:
                 duplicate_optimization = self._remove_duplicate_files(cache_dir)
                 optimizations.append(duplicate_optimization)
             
+            # 5. 近重复视频（重新上传、转码的同一片段），需要解码采样帧，默认关闭；开启后默认只报告不删除
+            if config.get('find_near_duplicates', False):
+                near_duplicate_optimization = self._find_near_duplicate_videos(
+                    cache_dir, remove=config.get('remove_near_duplicates', False)
+                )
+                optimizations.append(near_duplicate_optimization)
+            
             # 计算总体优化效果
             total_freed_mb = sum(opt.get("freed_mb", 0) for opt in optimizations)
             total_files_removed = sum(opt.get("files_removed", 0) for opt in optimizations)
@@ -240,6 +250,12 @@ class CacheOptimizer:
                 "error": str(e)
             }
     
+    def _is_cache_file(self, file_path: Path) -> bool:
+        """是否为可清理的缓存文件（跳过其他进程正在原子写入的临时文件）"""
+        if file_path.name.startswith('.') and file_path.suffix == '.tmp':
+            return False
+        return file_path.is_file()
+    
     def _optimize_cache_size(self, cache_dir: str, max_size_mb: float) -> Dict[str, Any]:
         """优化缓存大小"""
         try:
@@ -248,7 +264,7 @@ class CacheOptimizer:
             
             # 收集文件信息
             for file_path in cache_path.rglob("*"):
-                if file_path.is_file():
+                if self._is_cache_file(file_path):
                     try:
                         stat = file_path.stat()
                         files_with_stats.append({
@@ -311,7 +327,7 @@ class CacheOptimizer:
             files_removed = 0
             
             for file_path in cache_path.rglob("*"):
-                if file_path.is_file():
+                if self._is_cache_file(file_path):
                     try:
                         stat = file_path.stat()
                         file_age = current_time - stat.st_mtime
@@ -364,52 +380,69 @@ class CacheOptimizer:
             }
     
     def _remove_duplicate_files(self, cache_dir: str) -> Dict[str, Any]:
-        """移除重复文件"""
+        """移除重复文件
+
+        先按大小分组，大小唯一的文件不读取内容；大小相同的比较采样指纹，
+        指纹相同的再用完整哈希确认后才删除，每组保留最早的文件。
+        """
         try:
-            import hashlib
+            from utils.fingerprint import sampled_fingerprint, full_fingerprint
             
             cache_path = Path(cache_dir)
-            file_hashes = {}
+            by_size: Dict[int, List[Tuple[Path, os.stat_result]]] = {}
             freed_mb = 0
             files_removed = 0
+            unique_files = 0
             
             for file_path in cache_path.rglob("*"):
-                if file_path.is_file():
+                if self._is_cache_file(file_path):
                     try:
-                        # 计算文件哈希
-                        with open(file_path, 'rb') as f:
-                            file_hash = hashlib.md5(f.read()).hexdigest()
-                        
-                        if file_hash in file_hashes:
-                            # 发现重复文件，删除较新的
-                            existing_file = file_hashes[file_hash]
-                            existing_stat = existing_file.stat()
-                            current_stat = file_path.stat()
-                            
-                            if current_stat.st_mtime > existing_stat.st_mtime:
-                                # 删除当前文件
-                                file_size_mb = current_stat.st_size / (1024 * 1024)
+                        stat = file_path.stat()
+                        by_size.setdefault(stat.st_size, []).append((file_path, stat))
+                    except OSError as e:
+                        self.logger.warning(f"Failed to process file {file_path}: {e}")
+            
+            for files in by_size.values():
+                if len(files) == 1:
+                    unique_files += 1
+                    continue
+                
+                by_sample: Dict[str, List[Tuple[Path, os.stat_result]]] = {}
+                for file_path, stat in files:
+                    try:
+                        by_sample.setdefault(sampled_fingerprint(file_path), []).append((file_path, stat))
+                    except OSError as e:
+                        self.logger.warning(f"Failed to process file {file_path}: {e}")
+                
+                for candidates in by_sample.values():
+                    if len(candidates) == 1:
+                        unique_files += 1
+                        continue
+                    
+                    # 采样指纹相同，用完整哈希确认后再删除
+                    by_content: Dict[str, List[Tuple[Path, os.stat_result]]] = {}
+                    for file_path, stat in candidates:
+                        try:
+                            by_content.setdefault(full_fingerprint(file_path), []).append((file_path, stat))
+                        except OSError as e:
+                            self.logger.warning(f"Failed to process file {file_path}: {e}")
+                    
+                    for duplicates in by_content.values():
+                        unique_files += 1
+                        duplicates.sort(key=lambda item: item[1].st_mtime)
+                        for file_path, stat in duplicates[1:]:
+                            try:
                                 file_path.unlink()
-                                freed_mb += file_size_mb
-                                files_removed += 1
-                            else:
-                                # 删除已存在的文件，更新记录
-                                file_size_mb = existing_stat.st_size / (1024 * 1024)
-                                existing_file.unlink()
-                                file_hashes[file_hash] = file_path
-                                freed_mb += file_size_mb
+                                freed_mb += stat.st_size / (1024 * 1024)
                                 files_removed += 1
-                        else:
-                            file_hashes[file_hash] = file_path
-                            
-                    except Exception as e:
-                        self.logger.warning(f"Failed to process file {file_path}: {e}")
+                            except OSError as e:
+                                self.logger.warning(f"Failed to remove duplicate {file_path}: {e}")
             
             return {
                 "type": "duplicate_removal",
                 "freed_mb": freed_mb,
                 "files_removed": files_removed,
-                "unique_files": len(file_hashes)
+                "unique_files": unique_files
             }
             
         except Exception as e:
@@ -421,6 +454,46 @@ class CacheOptimizer:
                 "files_removed": 0
             }
     
+    def _find_near_duplicate_videos(self, cache_dir: str, remove: bool = False) -> Dict[str, Any]:
+        """查找近重复视频，remove 为真时每组只保留最早的文件"""
+        try:
+            from utils.perceptual_index import PerceptualIndex
+            
+            videos = [str(file_path) for file_path in Path(cache_dir).rglob("*")
+                      if file_path.suffix.lower() in self.VIDEO_EXTENSIONS and self._is_cache_file(file_path)]
+            index = PerceptualIndex()
+            index.index_files(videos)
+            groups = index.near_duplicate_groups()
+            
+            freed_mb = 0
+            files_removed = 0
+            if remove:
+                for group in groups:
+                    files = sorted((Path(path) for path in group), key=lambda path: path.stat().st_mtime)
+                    for file_path in files[1:]:
+                        try:
+                            freed_mb += file_path.stat().st_size / (1024 * 1024)
+                            file_path.unlink()
+                            files_removed += 1
+                        except OSError as e:
+                            self.logger.warning(f"Failed to remove near duplicate {file_path}: {e}")
+            
+            return {
+                "type": "near_duplicate_videos",
+                "groups": groups,
+                "freed_mb": freed_mb,
+                "files_removed": files_removed
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Near duplicate detection failed: {e}")
+            return {
+                "type": "near_duplicate_videos",
+                "error": str(e),
+                "freed_mb": 0,
+                "files_removed": 0
+            }
+    
     def start_auto_cleanup(self, cache_dir: str):
         """启动自动清理"""
         if self.auto_cleanup_enabled:
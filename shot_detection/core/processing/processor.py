@@ -6,6 +6,7 @@ Video Processor Module
 from typing import Dict, Any, Optional, List, Callable
 from dataclasses import dataclass
 from pathlib import Path
+import subprocess
 import cv2
 import numpy as np
 from loguru import logger
@@ -57,6 +58,16 @@ class VideoProcessor:
             "medium": {"crf": 23, "preset": "medium"},
             "high": {"crf": 18, "preset": "slow"}
         }
+        
+        # 编码格式对应的FFmpeg编码器
+        self.encoders = {
+            "h264": "libx264",
+            "h265": "libx265",
+            "hevc": "libx265"
+        }
+        
+        # 编码调度器，处理过程中可查询队列深度和吞吐量
+        self.scheduler = None
     
     def process_video(self, video_path: str, detection_result: DetectionResult,
                      progress_callback: Callable[[float], None] = None) -> Dict[str, Any]:
@@ -81,7 +92,7 @@ class VideoProcessor:
             segments = self._generate_segments(detection_result, video_info)
             
             # 处理分割
-            results = self._process_segments(video_path, segments, progress_callback)
+            results = self._process_segments(video_path, segments, progress_callback, video_info)
             
             return {
                 "success": True,
@@ -216,31 +227,54 @@ class VideoProcessor:
         return segments
     
     def _process_segments(self, video_path: str, segments: List[Dict[str, Any]],
-                         progress_callback: Callable[[float], None] = None) -> List[str]:
-        """处理分割片段"""
-        output_files = []
+                         progress_callback: Callable[[float], None] = None,
+                         video_info: Optional[Dict[str, Any]] = None) -> List[str]:
+        """处理分割片段（由编码调度器按核数和分辨率并发编码）"""
+        from processors.encode_scheduler import EncodeScheduler, EncodeJob, plan_concurrency
+        
+        video_info = video_info or {}
+        preset = self.quality_presets.get(self.config.quality, self.quality_presets["high"])["preset"]
+        self.scheduler = EncodeScheduler(plan_concurrency(
+            preset=preset,
+            width=video_info.get("width") or 1920,
+            height=video_info.get("height") or 1080
+        ))
+        
+        output_files: Dict[int, str] = {}
         total_segments = len(segments)
+        finished = 0
         
-        for i, segment in enumerate(segments):
+        def encode(position: int, threads: int) -> bool:
             try:
-                output_file = self._extract_segment(video_path, segment)
-                output_files.append(output_file)
-                
-                if progress_callback:
-                    progress = (i + 1) / total_segments
-                    progress_callback(progress)
-                    
+                output_files[position] = self._extract_segment(video_path, segments[position], threads)
+                return True
             except Exception as e:
-                self.logger.error(f"Error processing segment {i}: {e}")
-                continue
+                self.logger.error(f"Error processing segment {position}: {e}")
+                return False
+        
+        def on_done(job, success: bool):
+            nonlocal finished
+            finished += 1
+            if progress_callback:
+                progress_callback(finished / total_segments)
+        
+        jobs = [
+            EncodeJob(key=i, duration=segment["end_time"] - segment["start_time"],
+                      run=lambda threads, i=i: encode(i, threads))
+            for i, segment in enumerate(segments)
+        ]
+        self.scheduler.run(jobs, job_callback=on_done)
         
-        return output_files
+        return [output_files[i] for i in sorted(output_files)]
     
-    def _extract_segment(self, video_path: str, segment: Dict[str, Any]) -> str:
-        """提取视频片段"""
+    def _extract_segment(self, video_path: str, segment: Dict[str, Any],
+                         threads: Optional[int] = None) -> str:
+        """提取视频片段，threads 限制FFmpeg的线程数"""
+        from processors.encode_scheduler import apply_thread_cap
+        
         input_path = Path(video_path)
         output_dir = self.config.output_dir or input_path.parent / "segments"
-        output_dir.mkdir(exist_ok=True)
+        output_dir.mkdir(parents=True, exist_ok=True)
         
         # 生成输出文件名
         output_filename = self.config.filename_template.format(
@@ -250,15 +284,50 @@ class VideoProcessor:
         )
         output_path = output_dir / output_filename
         
-        # 使用ffmpeg提取片段（这里简化为示例）
-        # 实际实现需要调用ffmpeg或使用moviepy等库
         self.logger.info(f"Extracting segment {segment['index']}: "
                         f"{segment['start_time']:.2f}s - {segment['end_time']:.2f}s")
         
-        # TODO: 实现实际的视频分割逻辑
-        # 这里返回模拟的输出路径
+        cmd = apply_thread_cap(self._build_ffmpeg_command(video_path, segment, str(output_path)), threads)
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8',
+                                errors='ignore', timeout=300)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg failed: {result.stderr.strip()}")
+        if not output_path.exists():
+            raise RuntimeError(f"Output file not created: {output_path}")
+        
         return str(output_path)
     
+    def _build_ffmpeg_command(self, video_path: str, segment: Dict[str, Any], output_path: str) -> List[str]:
+        """构建片段的FFmpeg命令（-ss 在 -i 之前，按输入跳转）"""
+        preset = self.quality_presets.get(self.config.quality, self.quality_presets["high"])
+        duration = segment["end_time"] - segment["start_time"]
+        
+        cmd = ['ffmpeg', '-y',
+               '-ss', f"{segment['start_time']:.6f}",
+               '-i', video_path,
+               '-t', f"{duration:.6f}",
+               '-c:v', self.encoders.get(self.config.codec, self.config.codec),
+               '-preset', preset["preset"]]
+        
+        if self.config.bitrate:
+            cmd.extend(['-b:v', self.config.bitrate])
+        else:
+            cmd.extend(['-crf', str(preset["crf"])])
+        
+        cmd.extend(['-c:a', self.config.audio_codec])
+        
+        if self.config.resolution:
+            width, height = self.config.resolution
+            cmd.extend(['-s', f'{width}x{height}'])
+        if self.config.fps:
+            cmd.extend(['-r', str(self.config.fps)])
+        
+        cmd.extend(['-avoid_negative_ts', 'make_zero'])
+        if self.config.output_format in ('mp4', 'mov', 'm4v'):
+            cmd.extend(['-movflags', '+faststart'])
+        cmd.append(output_path)
+        return cmd
+    
     def create_preview(self, video_path: str, segments: List[Dict[str, Any]]) -> str:
         """创建预览视频"""
         if not self.config.enable_preview:
@@ -272,5 +341,6 @@ class VideoProcessor:
         """获取处理统计信息"""
         return {
             "config": self.config.__dict__,
-            "quality_presets": self.quality_presets
+            "quality_presets": self.quality_presets,
+            "encode": self.scheduler.get_stats() if self.scheduler else {}
         }
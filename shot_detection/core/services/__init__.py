@@ -7,6 +7,8 @@ from .video_service import VideoService
 from .batch_service import BatchService
 from .analysis_service import AdvancedAnalysisService, VideoMetrics, ShotAnalysis
 from .workflow_service import WorkflowService
+from .detection_pool import DetectionProcessPool
+from .result_cache import ResultCache
 
 __all__ = [
     "VideoService",
@@ -15,4 +17,6 @@ __all__ = [
     "VideoMetrics",
     "ShotAnalysis",
     "WorkflowService",
+    "DetectionProcessPool",
+    "ResultCache",
 ]
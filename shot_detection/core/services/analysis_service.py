@@ -12,6 +12,8 @@ from loguru import logger
 import concurrent.futures
 from dataclasses import dataclass, asdict
 
+from utils.sparse_frames import iter_sparse_frames
+from utils.quality_sampler import sample_video_quality
 from ..detection.base import DetectionResult
 from .video_service import VideoService
 
@@ -81,6 +83,7 @@ class AdvancedAnalysisService:
         self.analysis_config = {
             "sample_rate": 30,  # 每30帧采样一次
             "max_samples": 100,  # 最大采样数
+            "quality_working_height": None,  # 质量指标工作副本高度，清晰度评分按原分辨率归一化
             "enable_object_detection": False,  # 是否启用对象检测
             "enable_text_detection": False,   # 是否启用文本检测
             "enable_face_detection": False,   # 是否启用人脸检测
@@ -178,57 +181,27 @@ class AdvancedAnalysisService:
             cap.release()
     
     def _analyze_video_quality(self, video_path: str) -> Dict[str, Any]:
-        """分析视频质量"""
-        cap = cv2.VideoCapture(video_path)
-        
-        try:
-            brightness_values = []
-            contrast_values = []
-            sharpness_values = []
-            
-            # 采样分析
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            sample_interval = max(1, total_frames // self.analysis_config["max_samples"])
-            
-            frame_idx = 0
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                if frame_idx % sample_interval == 0:
-                    # 转换为灰度图
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    
-                    # 计算亮度
-                    brightness = np.mean(gray)
-                    brightness_values.append(brightness)
-                    
-                    # 计算对比度
-                    contrast = np.std(gray)
-                    contrast_values.append(contrast)
-                    
-                    # 计算清晰度（拉普拉斯方差）
-                    laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-                    sharpness = laplacian.var()
-                    sharpness_values.append(sharpness)
-                
-                frame_idx += 1
-            
-            return {
-                "avg_brightness": np.mean(brightness_values) if brightness_values else 0,
-                "brightness_std": np.std(brightness_values) if brightness_values else 0,
-                "avg_contrast": np.mean(contrast_values) if contrast_values else 0,
-                "contrast_std": np.std(contrast_values) if contrast_values else 0,
-                "avg_sharpness": np.mean(sharpness_values) if sharpness_values else 0,
-                "sharpness_std": np.std(sharpness_values) if sharpness_values else 0,
-                "quality_score": self._calculate_quality_score(
-                    brightness_values, contrast_values, sharpness_values
-                )
-            }
-            
-        finally:
-            cap.release()
+        """分析视频质量（只解码采样帧，指标在灰度副本上批量计算）"""
+        samples = sample_video_quality(
+            video_path,
+            max_samples=self.analysis_config["max_samples"],
+            working_height=self.analysis_config["quality_working_height"]
+        )
+        brightness, contrast, sharpness = (samples.stats(name)
+                                           for name in ('brightness', 'contrast', 'sharpness'))
+        
+        return {
+            "avg_brightness": brightness["mean"],
+            "brightness_std": brightness["std"],
+            "avg_contrast": contrast["mean"],
+            "contrast_std": contrast["std"],
+            "avg_sharpness": sharpness["mean"],
+            "sharpness_std": sharpness["std"],
+            "sampled_frames": len(samples),
+            "quality_score": self._calculate_quality_score(
+                samples.brightness.tolist(), samples.contrast.tolist(), samples.sharpness.tolist()
+            )
+        }
     
     def _calculate_quality_score(self, brightness_values: List[float],
                                 contrast_values: List[float],
@@ -282,10 +255,7 @@ class AdvancedAnalysisService:
     
     def _analyze_single_shot(self, cap: cv2.VideoCapture, start_frame: int,
                            end_frame: int, fps: float, shot_index: int) -> ShotAnalysis:
-        """分析单个镜头"""
-        # 设置到起始帧
-        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-        
+        """分析单个镜头（镜头按顺序分析，相邻镜头的采样帧通常无需跳转）"""
         frames = []
         brightness_values = []
         
@@ -293,14 +263,10 @@ class AdvancedAnalysisService:
         frame_count = end_frame - start_frame
         sample_interval = max(1, frame_count // 10)  # 最多采样10帧
         
-        for frame_idx in range(start_frame, end_frame, sample_interval):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            
-            if ret:
-                frames.append(frame)
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                brightness_values.append(np.mean(gray))
+        for _, frame in iter_sparse_frames(cap, range(start_frame, end_frame, sample_interval)):
+            frames.append(frame)
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            brightness_values.append(np.mean(gray))
         
         # 分析主要颜色
         dominant_colors = self._extract_dominant_colors(frames)
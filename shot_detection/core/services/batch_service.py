@@ -18,17 +18,24 @@ class BatchService:
     
     def __init__(self, detector: BaseDetector = None,
                  processing_config: ProcessingConfig = None,
-                 max_workers: int = 4):
+                 max_workers: int = 4,
+                 execution_mode: str = "thread",
+                 file_timeout: Optional[float] = None):
         """
         初始化批量处理服务
         
         Args:
             detector: 检测器实例
             processing_config: 处理配置
-            max_workers: 最大工作线程数
+            max_workers: 最大工作线程数（process 模式下为工作进程数）
+            execution_mode: 执行方式，thread（线程池）或 process（绑核的多进程池，
+                逐帧评分不受GIL限制）
+            file_timeout: process 模式下单个文件的超时时间（秒），None表示不限制
         """
         self.video_service = VideoService(detector, processing_config)
         self.max_workers = max_workers
+        self.execution_mode = execution_mode
+        self.file_timeout = file_timeout
         self.logger = logger.bind(component="BatchService")
         self._stop_requested = False
     
@@ -122,53 +129,12 @@ class BatchService:
             output_dir = Path(output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
             
-            results = []
             self._stop_requested = False
             
-            # 使用线程池进行并行处理
-            with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                # 提交所有任务
-                future_to_file = {
-                    executor.submit(self._process_single_file, file_info, output_dir): file_info
-                    for file_info in video_files
-                }
-                
-                processed_count = 0
-                total_count = len(video_files)
-                
-                # 处理完成的任务
-                for future in concurrent.futures.as_completed(future_to_file):
-                    if self._stop_requested:
-                        # 取消剩余任务
-                        for f in future_to_file:
-                            f.cancel()
-                        break
-                    
-                    file_info = future_to_file[future]
-                    
-                    try:
-                        result = future.result()
-                        results.append(result)
-                        
-                        processed_count += 1
-                        
-                        if progress_callback:
-                            progress_callback(processed_count, total_count, file_info["name"])
-                        
-                        status = "成功" if result["success"] else "失败"
-                        self.logger.info(f"Processed {file_info['name']}: {status}")
-                        
-                    except Exception as e:
-                        self.logger.error(f"Error processing {file_info['name']}: {e}")
-                        results.append({
-                            "success": False,
-                            "file_info": file_info,
-                            "error": str(e)
-                        })
-                        processed_count += 1
-                        
-                        if progress_callback:
-                            progress_callback(processed_count, total_count, file_info["name"])
+            if self.execution_mode == "process":
+                results = self._run_process_pool(video_files, output_dir, progress_callback)
+            else:
+                results = self._run_thread_pool(video_files, output_dir, progress_callback)
             
             # 生成批量处理报告
             report = self._generate_batch_report(results, output_dir)
@@ -195,6 +161,94 @@ class BatchService:
                 "total_files": len(video_files) if 'video_files' in locals() else 0
             }
     
+    def _run_thread_pool(self, video_files: List[Dict[str, Any]], output_dir: Path,
+                         progress_callback: Optional[Callable[[int, int, str], None]]) -> List[Dict[str, Any]]:
+        """使用线程池进行并行处理"""
+        results = []
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # 提交所有任务
+            future_to_file = {
+                executor.submit(self._process_single_file, file_info, output_dir): file_info
+                for file_info in video_files
+            }
+            
+            processed_count = 0
+            total_count = len(video_files)
+            
+            # 处理完成的任务
+            for future in concurrent.futures.as_completed(future_to_file):
+                if self._stop_requested:
+                    # 取消剩余任务
+                    for f in future_to_file:
+                        f.cancel()
+                    break
+                
+                file_info = future_to_file[future]
+                
+                try:
+                    result = future.result()
+                    results.append(result)
+                    
+                    processed_count += 1
+                    
+                    if progress_callback:
+                        progress_callback(processed_count, total_count, file_info["name"])
+                    
+                    status = "成功" if result["success"] else "失败"
+                    self.logger.info(f"Processed {file_info['name']}: {status}")
+                    
+                except Exception as e:
+                    self.logger.error(f"Error processing {file_info['name']}: {e}")
+                    results.append({
+                        "success": False,
+                        "file_info": file_info,
+                        "error": str(e)
+                    })
+                    processed_count += 1
+                    
+                    if progress_callback:
+                        progress_callback(processed_count, total_count, file_info["name"])
+        
+        return results
+    
+    def _run_process_pool(self, video_files: List[Dict[str, Any]], output_dir: Path,
+                          progress_callback: Optional[Callable[[int, int, str], None]]) -> List[Dict[str, Any]]:
+        """使用绑核的多进程池并行检测，工作进程以列式数组返回结果"""
+        results = []
+        processed_count = 0
+        total_count = len(video_files)
+        output_dirs = [str(output_dir / Path(file_info["path"]).stem) for file_info in video_files]
+        
+        detections = self.video_service.detect_shots_parallel(
+            [file_info["path"] for file_info in video_files],
+            output_dirs,
+            max_workers=self.max_workers,
+            file_timeout=self.file_timeout,
+            should_stop=lambda: self._stop_requested
+        )
+        
+        for index, detection_result in detections:
+            file_info = video_files[index]
+            result = {
+                "success": detection_result["success"],
+                "file_info": file_info,
+                "detection_result": detection_result,
+                "output_dir": output_dirs[index]
+            }
+            if not detection_result["success"]:
+                result["error"] = detection_result.get("error", "")
+            results.append(result)
+            
+            processed_count += 1
+            if progress_callback:
+                progress_callback(processed_count, total_count, file_info["name"])
+            
+            status = "成功" if result["success"] else "失败"
+            self.logger.info(f"Processed {file_info['name']}: {status}")
+        
+        return results
+    
     def _process_single_file(self, file_info: Dict[str, Any], output_dir: Path) -> Dict[str, Any]:
         """处理单个文件"""
         try:
@@ -277,7 +331,8 @@ class BatchService:
         """获取处理状态"""
         return {
             "is_processing": not self._stop_requested,
-            "max_workers": self.max_workers
+            "max_workers": self.max_workers,
+            "execution_mode": self.execution_mode
         }
 
     def create_batch_report(self, results: List[Dict[str, Any]],
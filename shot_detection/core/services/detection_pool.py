@@ -0,0 +1,339 @@
+"""
+Detection Process Pool Module
+检测进程池模块
+
+每个工作进程绑定到固定的CPU核心，启动时反序列化并初始化一次检测器，
+之后逐个接收任务：视频路径（整段检测，返回列式紧凑结果）或带 run(detector)
+方法的任务对象（如分段评分）。逐帧评分循环在各自进程中运行，
+不受GIL限制；单个文件超时或导致进程崩溃时只影响该文件，进程会被替换。
+"""
+
+import os
+import time
+import pickle
+import multiprocessing
+from multiprocessing.connection import wait
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+from loguru import logger
+
+from ..detection.compact import CompactDetectionResult
+
+
+@dataclass
+class PoolTaskResult:
+    """单个文件的进程池检测结果"""
+    task_id: int
+    video_path: str
+    result: Optional[Union[CompactDetectionResult, Any]] = None
+    error: Optional[str] = None
+    worker_time: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.result is not None
+
+
+def available_cpus() -> List[int]:
+    """当前进程可用的CPU编号"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _run_job(detector, job):
+    """执行任务：视频路径按 VideoService.detect_shots 相同的入口整段检测，其他任务调用 run(detector)"""
+    if not isinstance(job, str):
+        return job.run(detector)
+    if hasattr(detector, 'detect_shots_fusion'):
+        result = detector.detect_shots_fusion(job)
+    else:
+        result = detector.detect_shots(job)
+    return CompactDetectionResult.from_result(result)
+
+
+def _job_path(job) -> str:
+    """任务对应的视频路径"""
+    return job if isinstance(job, str) else getattr(job, 'video_path', str(job))
+
+
+def _worker_main(detector_bytes: bytes, cpus: List[int], conn):
+    """工作进程主循环：绑核、初始化检测器，然后逐个处理任务"""
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+
+    try:
+        import cv2
+        # 每个进程只占用分到的核心，避免 OpenCV 内部线程池相互争抢
+        cv2.setNumThreads(len(cpus) if cpus else 1)
+    except Exception:
+        pass
+
+    try:
+        detector = pickle.loads(detector_bytes)
+        if hasattr(detector, 'initialize'):
+            if not detector.initialize():
+                raise RuntimeError("检测器初始化失败")
+        elif hasattr(detector, 'initialize_all'):
+            detector.initialize_all()
+    except Exception as e:
+        conn.send(('init_failed', f"{type(e).__name__}: {e}"))
+        conn.close()
+        return
+
+    conn.send(('ready', None))
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+
+        task_id, job = task
+        start_time = time.time()
+        try:
+            result = _run_job(detector, job)
+            conn.send(('done', (task_id, result, None, time.time() - start_time)))
+        except Exception as e:
+            conn.send(('done', (task_id, None, f"{type(e).__name__}: {e}", time.time() - start_time)))
+
+    conn.close()
+
+
+class _WorkerHandle:
+    """父进程侧的工作进程句柄"""
+
+    def __init__(self, slot: int, cpus: List[int]):
+        self.slot = slot
+        self.cpus = cpus
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.task: Optional[Tuple[int, Any]] = None
+        self.task_started = 0.0
+
+    @property
+    def idle(self) -> bool:
+        return self.ready and self.task is None
+
+
+class DetectionProcessPool:
+    """镜头检测进程池"""
+
+    _POLL_INTERVAL = 0.2  # 检查超时和停止请求的间隔（秒）
+
+    def __init__(self, detector, max_workers: Optional[int] = None,
+                 file_timeout: Optional[float] = None,
+                 pin_workers: bool = True,
+                 start_method: Optional[str] = None):
+        """
+        初始化进程池
+
+        Args:
+            detector: 检测器实例（需可pickle），每个工作进程持有一份副本
+            max_workers: 工作进程数，默认等于可用CPU数
+            file_timeout: 单个文件的超时时间（秒），None表示不限制
+            pin_workers: 是否把每个工作进程绑定到固定的CPU核心
+            start_method: 进程启动方式（fork/spawn/forkserver），默认使用平台默认值
+        """
+        self.detector_bytes = pickle.dumps(detector)
+        self.cpus = available_cpus()
+        self.max_workers = max(1, max_workers or len(self.cpus))
+        self.file_timeout = file_timeout
+        self.pin_workers = pin_workers
+        self.context = multiprocessing.get_context(start_method)
+        self.logger = logger.bind(component="DetectionProcessPool")
+
+        self._workers: List[_WorkerHandle] = []
+        self.stats = {"restarts": 0, "timeouts": 0, "crashes": 0}
+
+    def _worker_cpus(self, slot: int) -> List[int]:
+        """为工作进程分配的CPU核心（进程数少于核心数时每个进程分到多个核心）"""
+        if not self.pin_workers:
+            return []
+        per_worker = max(1, len(self.cpus) // self.max_workers)
+        start = (slot * per_worker) % len(self.cpus)
+        return [self.cpus[(start + i) % len(self.cpus)] for i in range(per_worker)]
+
+    def _spawn(self, handle: _WorkerHandle):
+        """启动（或替换）一个工作进程"""
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=_worker_main,
+            args=(self.detector_bytes, handle.cpus, child_conn),
+            name=f"DetectionWorker-{handle.slot}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        handle.process = process
+        handle.conn = parent_conn
+        handle.ready = False
+        handle.task = None
+
+    def _retire(self, handle: _WorkerHandle, terminate: bool = False):
+        """结束工作进程"""
+        if handle.process is None:
+            return
+        if terminate and handle.process.is_alive():
+            handle.process.terminate()
+        else:
+            try:
+                handle.conn.send(None)
+            except (OSError, BrokenPipeError):
+                pass
+        handle.process.join(timeout=5)
+        if handle.process.is_alive():
+            handle.process.kill()
+            handle.process.join()
+        handle.conn.close()
+        handle.process = None
+        handle.conn = None
+
+    def start(self):
+        """启动全部工作进程（检测器在各进程内预先初始化）"""
+        if self._workers:
+            return
+        for slot in range(self.max_workers):
+            handle = _WorkerHandle(slot, self._worker_cpus(slot))
+            self._spawn(handle)
+            self._workers.append(handle)
+        self.logger.info(f"Started {self.max_workers} detection workers"
+                         f"{' (pinned)' if self.pin_workers else ''}")
+
+    def shutdown(self, terminate: bool = False):
+        """关闭进程池"""
+        for handle in self._workers:
+            self._retire(handle, terminate=terminate or handle.task is not None)
+        self._workers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(terminate=exc_type is not None)
+
+    def _replace(self, handle: _WorkerHandle):
+        """替换故障或超时的工作进程"""
+        self._retire(handle, terminate=True)
+        self.stats["restarts"] += 1
+        self._spawn(handle)
+
+    def imap_unordered(self, video_paths: List[str],
+                       should_stop: Optional[Callable[[], bool]] = None) -> Iterator[PoolTaskResult]:
+        """
+        并行检测，按完成顺序逐个产出结果
+
+        Args:
+            video_paths: 视频文件路径列表
+            should_stop: 停止检查函数，返回True时不再分发新任务并终止进行中的任务
+
+        Yields:
+            每个文件的检测结果（task_id 为其在 video_paths 中的下标）
+        """
+        return self.imap_jobs(video_paths, should_stop)
+
+    def imap_jobs(self, jobs: List[Any],
+                  should_stop: Optional[Callable[[], bool]] = None) -> Iterator[PoolTaskResult]:
+        """
+        并行执行任务，按完成顺序逐个产出结果
+
+        Args:
+            jobs: 任务列表，元素为视频路径或带 run(detector) 方法的可pickle对象
+            should_stop: 停止检查函数，返回True时不再分发新任务并终止进行中的任务
+
+        Yields:
+            每个任务的结果（task_id 为其在 jobs 中的下标）
+        """
+        self.start()
+        pending = deque(enumerate(jobs))
+        init_failures = 0
+
+        while pending or any(handle.task is not None for handle in self._workers):
+            if should_stop and should_stop():
+                self.logger.info(f"Stop requested, {len(pending)} files not started")
+                for handle in self._workers:
+                    if handle.task is not None:
+                        self._replace(handle)
+                return
+
+            # 分发任务到空闲进程
+            for handle in self._workers:
+                if pending and handle.idle:
+                    task = pending.popleft()
+                    try:
+                        handle.conn.send(task)
+                        handle.task = task
+                        handle.task_started = time.time()
+                    except (OSError, BrokenPipeError):
+                        pending.appendleft(task)
+                        self._replace(handle)
+
+            waitables = {}
+            for handle in self._workers:
+                waitables[handle.conn] = handle
+                waitables[handle.process.sentinel] = handle
+            ready = wait(list(waitables), timeout=self._POLL_INTERVAL)
+
+            handled = set()
+            for obj in ready:
+                handle = waitables[obj]
+                if handle.slot in handled:
+                    continue
+                handled.add(handle.slot)
+
+                message = None
+                try:
+                    if handle.conn.poll():
+                        message = handle.conn.recv()
+                except (EOFError, OSError):
+                    message = None
+
+                if message is None:
+                    # 进程退出（崩溃、被系统杀死等）
+                    handle.process.join(timeout=1)
+                    exit_code = handle.process.exitcode
+                    if handle.task is not None:
+                        task_id, video_path = handle.task[0], _job_path(handle.task[1])
+                        self.stats["crashes"] += 1
+                        self.logger.error(f"Worker {handle.slot} crashed on {video_path} (exit code {exit_code})")
+                        yield PoolTaskResult(task_id, video_path,
+                                             error=f"工作进程异常退出 (exit code {exit_code})",
+                                             worker_time=time.time() - handle.task_started)
+                    self._replace(handle)
+                    continue
+
+                kind, payload = message
+                if kind == 'ready':
+                    handle.ready = True
+                elif kind == 'init_failed':
+                    init_failures += 1
+                    self.logger.error(f"Worker {handle.slot} failed to initialize: {payload}")
+                    if init_failures >= self.max_workers:
+                        raise RuntimeError(f"检测进程初始化失败: {payload}")
+                    self._replace(handle)
+                elif kind == 'done':
+                    task_id, result, error, worker_time = payload
+                    handle.task = None
+                    yield PoolTaskResult(task_id, _job_path(jobs[task_id]), result, error, worker_time)
+
+            # 单文件超时：终止该进程并用新进程替换
+            if self.file_timeout:
+                now = time.time()
+                for handle in self._workers:
+                    if handle.task is not None and now - handle.task_started > self.file_timeout:
+                        task_id, video_path = handle.task[0], _job_path(handle.task[1])
+                        self.stats["timeouts"] += 1
+                        self.logger.warning(f"Detection timed out after {self.file_timeout}s: {video_path}")
+                        self._replace(handle)
+                        yield PoolTaskResult(task_id, video_path,
+                                             error=f"检测超时 ({self.file_timeout}s)",
+                                             worker_time=now - handle.task_started)
@@ -0,0 +1,239 @@
+"""
+Result Cache Module
+检测结果缓存模块
+
+两级缓存：进程内按字节预算的LRU内存层，以及按键前缀分片的磁盘层。
+磁盘层以 .npz 列式格式保存，写入时先写临时文件再原子替换，多个进程可共享
+同一缓存目录；超过容量上限时在写入时按最近访问时间淘汰。
+"""
+
+import os
+import time
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from loguru import logger
+
+from ..detection.compact import CompactDetectionResult
+
+CACHE_SUFFIX = ".npz"
+
+
+class ResultCache:
+    """检测结果两级缓存"""
+
+    def __init__(self, cache_dir: str,
+                 memory_budget_mb: float = 64,
+                 max_disk_mb: float = 1024,
+                 shard_width: int = 2):
+        """
+        初始化结果缓存
+
+        Args:
+            cache_dir: 缓存目录
+            memory_budget_mb: 内存层字节预算(MB)，0表示不使用内存层
+            max_disk_mb: 磁盘层容量上限(MB)，0表示不限制
+            shard_width: 分片子目录名取缓存键的前几位
+        """
+        self.cache_dir = Path(cache_dir)
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.shard_width = shard_width
+        self.logger = logger.bind(component="ResultCache")
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[CompactDetectionResult, int]]" = OrderedDict()
+        self._memory_bytes = 0
+
+        # 磁盘用量索引：键 -> (字节数, 最近访问时间)，首次写入时扫描建立
+        self._disk_index: Optional[Dict[str, Tuple[int, float]]] = None
+        self._disk_bytes = 0
+
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0
+        }
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, key: str) -> Path:
+        """缓存键对应的磁盘文件"""
+        return self.cache_dir / key[:self.shard_width] / f"{key}{CACHE_SUFFIX}"
+
+    def get(self, key: str) -> Optional[CompactDetectionResult]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的检测结果或None
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[0]
+
+        path = self.path_for(key)
+        try:
+            result = CompactDetectionResult.load(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        except Exception as e:
+            # 损坏或被其他进程淘汰中的文件按未命中处理
+            self.logger.warning(f"Error reading cache entry {path.name}: {e}")
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+
+        # 更新修改时间作为磁盘层LRU依据（不依赖可能被 noatime 关闭的 atime）
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, result)
+            if self._disk_index is not None and key in self._disk_index:
+                self._disk_index[key] = (self._disk_index[key][0], now)
+        return result
+
+    def put(self, key: str, result: CompactDetectionResult):
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            result: 检测结果
+        """
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 同目录唯一临时文件 + 原子替换，并发写入同一键时以最后完成者为准
+        fd, temp_name = tempfile.mkstemp(prefix=f".{key}.", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                result.save(f)
+            os.replace(temp_name, path)
+        except Exception:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+
+        size = path.stat().st_size
+        with self._lock:
+            self._remember(key, result)
+            if self.max_disk_bytes > 0:
+                self._track_disk_entry(key, size, path.stat().st_mtime)
+                if self._disk_bytes > self.max_disk_bytes:
+                    self._evict_disk()
+
+    def _remember(self, key: str, result: CompactDetectionResult):
+        """放入内存层并按字节预算淘汰（调用方持有锁）"""
+        if self.memory_budget <= 0:
+            return
+        size = result.nbytes
+        if size > self.memory_budget:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        self._memory[key] = (result, size)
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.memory_budget:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+
+    def _scan_disk(self):
+        """扫描磁盘层建立用量索引（包含其他进程写入的条目）"""
+        index = {}
+        total = 0
+        for path in self.cache_dir.glob(f"*/*{CACHE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            index[path.name[:-len(CACHE_SUFFIX)]] = (stat.st_size, stat.st_mtime)
+            total += stat.st_size
+        self._disk_index = index
+        self._disk_bytes = total
+
+    def _track_disk_entry(self, key: str, size: int, mtime: float):
+        """记录新写入的条目（调用方持有锁）"""
+        if self._disk_index is None:
+            self._scan_disk()
+            return
+        previous = self._disk_index.get(key)
+        if previous is not None:
+            self._disk_bytes -= previous[0]
+        self._disk_index[key] = (size, mtime)
+        self._disk_bytes += size
+
+    def _evict_disk(self):
+        """超过容量上限时按最近访问时间淘汰到上限的90%（调用方持有锁）"""
+        # 重新扫描以纳入其他进程的写入和访问
+        self._scan_disk()
+        target = int(self.max_disk_bytes * 0.9)
+        evicted = 0
+
+        for key, (size, _) in sorted(self._disk_index.items(), key=lambda item: item[1][1]):
+            if self._disk_bytes <= target:
+                break
+            try:
+                self.path_for(key).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.warning(f"Failed to evict cache entry {key}: {e}")
+                continue
+            del self._disk_index[key]
+            self._disk_bytes -= size
+            self._memory.pop(key, None)
+            evicted += 1
+
+        self._memory_bytes = sum(size for _, size in self._memory.values())
+        self.stats["evictions"] += evicted
+        self.logger.debug(f"Evicted {evicted} cache entries, disk usage {self._disk_bytes / (1024 * 1024):.1f}MB")
+
+    def clear(self):
+        """清空内存层和磁盘层"""
+        import shutil
+
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._disk_index = None
+            self._disk_bytes = 0
+            if self.cache_dir.exists():
+                shutil.rmtree(self.cache_dir)
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def info(self) -> Dict[str, Any]:
+        """缓存状态"""
+        with self._lock:
+            self._scan_disk()
+            return {
+                "cache_dir": str(self.cache_dir),
+                "cache_files_count": len(self._disk_index),
+                "total_size_mb": self._disk_bytes / (1024 * 1024),
+                "max_disk_mb": self.max_disk_bytes / (1024 * 1024),
+                "memory_entries": len(self._memory),
+                "memory_size_mb": self._memory_bytes / (1024 * 1024),
+                "memory_budget_mb": self.memory_budget / (1024 * 1024),
+                **self.stats
+            }
@@ -3,18 +3,25 @@ Video Service Module
 视频服务模块
 """
 
-from typing import Dict, Any, Optional, Callable, List, Union
+from typing import Dict, Any, Optional, Callable, List, Union, Iterator, Tuple
 from pathlib import Path
 import json
 import hashlib
 import time
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from loguru import logger
 
+from utils.fingerprint import sampled_fingerprint
+
 from ..detection.base import BaseDetector, DetectionResult
+from ..detection.compact import CompactDetectionResult
+from ..detection.chunked import ChunkScanJob, plan_chunks, merge_chunk_scores
 from ..processing.processor import VideoProcessor, ProcessingConfig
 from ..processing.segmentation import SegmentationService
+from .detection_pool import DetectionProcessPool
+from .result_cache import ResultCache
 
 
 class VideoService:
@@ -24,7 +31,11 @@ class VideoService:
                  processing_config: ProcessingConfig = None,
                  enable_cache: bool = True,
                  cache_dir: Optional[str] = None,
-                 max_workers: int = 4):
+                 max_workers: int = 4,
+                 cache_memory_mb: float = 64,
+                 cache_max_size_mb: float = 1024,
+                 parallel_chunks: int = 0,
+                 chunk_overlap: int = 30):
         """
         初始化视频服务
 
@@ -34,6 +45,11 @@ class VideoService:
             enable_cache: 是否启用缓存
             cache_dir: 缓存目录
             max_workers: 最大工作线程数
+            cache_memory_mb: 结果缓存内存层的字节预算(MB)，分数曲线缓存另有同样的预算
+            cache_max_size_mb: 结果缓存磁盘层的容量上限(MB)，写入时按LRU淘汰；
+                分数曲线缓存另有同样的上限
+            parallel_chunks: 单个视频分段并行检测的分段数（工作进程数），0或1表示不分段
+            chunk_overlap: 相邻分段的重叠帧数，用于接缝对齐
         """
         self.detector = detector
         self.processing_config = processing_config or ProcessingConfig()
@@ -41,11 +57,19 @@ class VideoService:
         self.segmentation_service = SegmentationService()
         self.logger = logger.bind(component="VideoService")
 
+        # 单视频分段并行
+        self.parallel_chunks = parallel_chunks
+        self.chunk_overlap = chunk_overlap
+
         # 缓存配置
         self.enable_cache = enable_cache
         self.cache_dir = Path(cache_dir) if cache_dir else Path.cwd() / ".cache" / "video_service"
+        self.result_cache = None
+        self.score_cache = None
         if self.enable_cache:
-            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self.result_cache = ResultCache(self.cache_dir, cache_memory_mb, cache_max_size_mb)
+            # 逐帧分数曲线只由视频内容和评分参数决定，阈值等后处理参数变化时可复用
+            self.score_cache = ResultCache(self.cache_dir / "scores", cache_memory_mb, cache_max_size_mb)
 
         # 性能监控
         self.performance_stats = {
@@ -53,6 +77,7 @@ class VideoService:
             "total_processing_time": 0.0,
             "cache_hits": 0,
             "cache_misses": 0,
+            "score_cache_hits": 0,
             "errors": 0
         }
 
@@ -65,6 +90,9 @@ class VideoService:
         """
         生成缓存键
 
+        由文件内容的采样指纹和检测器配置决定，与文件路径、修改时间无关，
+        文件移动或复制到其他机器后仍能命中。
+
         Args:
             video_path: 视频文件路径
             detector_config: 检测器配置
@@ -72,24 +100,17 @@ class VideoService:
         Returns:
             缓存键
         """
-        # 获取文件信息
-        video_path = Path(video_path)
-        file_stat = video_path.stat()
-
-        # 创建唯一标识
         cache_data = {
-            "file_path": str(video_path),
-            "file_size": file_stat.st_size,
-            "file_mtime": file_stat.st_mtime,
-            "detector_name": self.detector.name if self.detector else "none",
+            "content": sampled_fingerprint(video_path),
+            "detector_name": getattr(self.detector, "name", type(self.detector).__name__) if self.detector else "none",
             "detector_config": detector_config or {}
         }
 
         # 生成MD5哈希
-        cache_str = json.dumps(cache_data, sort_keys=True)
+        cache_str = json.dumps(cache_data, sort_keys=True, default=str)
         return hashlib.md5(cache_str.encode()).hexdigest()
 
-    def _get_cached_result(self, cache_key: str) -> Optional[Dict[str, Any]]:
+    def _get_cached_result(self, cache_key: str) -> Optional[CompactDetectionResult]:
         """
         获取缓存结果
 
@@ -97,52 +118,246 @@ class VideoService:
             cache_key: 缓存键
 
         Returns:
-            缓存的结果或None
+            缓存的紧凑检测结果或None
         """
         if not self.enable_cache:
             return None
 
-        cache_file = self.cache_dir / f"{cache_key}.json"
-
-        try:
-            if cache_file.exists():
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-
-                self.performance_stats["cache_hits"] += 1
-                self.logger.debug(f"Cache hit for key: {cache_key}")
-                return cached_data
-        except Exception as e:
-            self.logger.warning(f"Error reading cache: {e}")
+        cached_result = self.result_cache.get(cache_key)
+        if cached_result is not None:
+            self.performance_stats["cache_hits"] += 1
+            self.logger.debug(f"Cache hit for key: {cache_key}")
+            return cached_result
 
         self.performance_stats["cache_misses"] += 1
         return None
 
-    def _save_to_cache(self, cache_key: str, result: Dict[str, Any]):
+    def _save_to_cache(self, cache_key: str, result: CompactDetectionResult):
         """
         保存结果到缓存
 
         Args:
             cache_key: 缓存键
-            result: 结果数据
+            result: 紧凑检测结果
         """
         if not self.enable_cache:
             return
 
-        cache_file = self.cache_dir / f"{cache_key}.json"
-
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False, default=str)
-
+            self.result_cache.put(cache_key, result)
             self.logger.debug(f"Result cached with key: {cache_key}")
         except Exception as e:
             self.logger.warning(f"Error saving to cache: {e}")
+
+    def _get_score_key(self, video_path: str, detector: BaseDetector) -> str:
+        """
+        生成分数曲线缓存键
+
+        只包含文件内容指纹和影响逐帧分数的参数，阈值、最短镜头长度等
+        后处理参数不参与。
+
+        Args:
+            video_path: 视频文件路径
+            detector: 检测器
+
+        Returns:
+            缓存键
+        """
+        key_data = {
+            "content": sampled_fingerprint(video_path),
+            "scoring_config": detector.get_scoring_config()
+        }
+        key_str = json.dumps(key_data, sort_keys=True, default=str)
+        return hashlib.md5(key_str.encode()).hexdigest()
+
+    def _score_replay_detectors(self) -> Optional[List[BaseDetector]]:
+        """可由分数曲线重建结果的检测器列表；当前检测器不支持时返回None"""
+        if isinstance(self.detector, BaseDetector):
+            return [self.detector] if self.detector.supports_score_replay else None
+
+        detectors = getattr(self.detector, 'detectors', None)
+        if (detectors and hasattr(self.detector, 'fuse_detector_results')
+                and all(isinstance(d, BaseDetector) and d.supports_score_replay for d in detectors)):
+            return list(detectors)
+        return None
+
+    def _save_score_curve(self, video_path: Path, detector: BaseDetector,
+                          result: Union[DetectionResult, CompactDetectionResult]):
+        """保存完整扫描得到的逐帧分数曲线"""
+        if not self.enable_cache or result.frame_count <= 0:
+            return
+
+        metadata = result.metadata or {}
+        # 粗扫精修只计算了部分帧的分数；共享解码分辨率不同时分数与单独运行不一致
+        if metadata.get('scan_mode') == 'coarse_to_fine':
+            return
+        if metadata.get('working_height', detector.get_working_height()) != detector.get_working_height():
+            return
+
+        scores = result.scores if isinstance(result, CompactDetectionResult) else result.confidence_scores
+        if len(scores) == 0:
+            return
+
+        curve = CompactDetectionResult.from_scores(
+            algorithm_name=detector.name,
+            scores=np.asarray(scores, dtype=np.float32),
+            frame_count=result.frame_count,
+            processing_time=result.processing_time,
+            metadata={'fps': metadata.get('fps', 30.0)}
+        )
+        try:
+            self.score_cache.put(self._get_score_key(str(video_path), detector), curve)
+        except Exception as e:
+            self.logger.warning(f"Error saving score curve to cache: {e}")
+
+    def _result_from_score_curve(self, detector: BaseDetector,
+                                 curve: CompactDetectionResult) -> DetectionResult:
+        """对缓存的分数曲线重新阈值化和后处理"""
+        start_time = time.time()
+        fps = curve.metadata.get('fps', 30.0)
+        result = detector.result_from_scores(
+            curve.confidence_scores, fps, curve.frame_count,
+            metadata={'score_source': 'cache', 'scan_time': curve.processing_time}
+        )
+        result.processing_time = time.time() - start_time
+        return result
+
+    def _load_score_curves(self, video_path: Path,
+                           detectors: List[BaseDetector]) -> List[Optional[CompactDetectionResult]]:
+        """读取各检测器的分数曲线缓存，未命中的位置为None"""
+        curves = [self.score_cache.get(self._get_score_key(str(video_path), d)) for d in detectors]
+        self.performance_stats["score_cache_hits"] += sum(curve is not None for curve in curves)
+        return curves
+
+    def _combine_detector_results(self, results: List[DetectionResult],
+                                  wall_time: Optional[float] = None,
+                                  cached_count: int = 0) -> DetectionResult:
+        """单检测器直接返回其结果，多检测器做融合"""
+        if isinstance(self.detector, BaseDetector):
+            return results[0]
+        result = self.detector.fuse_detector_results(results, wall_time)
+        result.metadata['score_curves_cached'] = cached_count
+        return result
+
+    def _replay_score_curves(self, video_path: Path) -> Optional[DetectionResult]:
+        """所有检测器的分数曲线都已缓存时由曲线重建结果，否则返回None"""
+        detectors = self._score_replay_detectors() if self.enable_cache else None
+        if detectors is None:
+            return None
+        curves = self._load_score_curves(video_path, detectors)
+        if any(curve is None for curve in curves):
+            return None
+        return self._result_from_score_curves(video_path, detectors, curves)
+
+    def _result_from_score_curves(self, video_path: Path, detectors: List[BaseDetector],
+                                  curves: List[CompactDetectionResult]) -> DetectionResult:
+        """所有检测器的曲线都已命中时，重新阈值化各曲线并融合"""
+        self.logger.info(f"Reusing {len(curves)} cached score curves for: {video_path}")
+        results = [self._result_from_score_curve(d, c) for d, c in zip(detectors, curves)]
+        return self._combine_detector_results(results, cached_count=len(curves))
+
+    def _run_detection(self, video_path: Path, chunk_count: int,
+                       use_score_cache: bool = True) -> DetectionResult:
+        """
+        执行检测，优先复用缓存的分数曲线
+
+        曲线全部命中时只做阈值化、峰值筛选和融合，不解码视频；多检测器融合时
+        只有曲线未命中的检测器参与解码。新扫描得到的完整曲线写入分数曲线缓存。
+
+        Args:
+            video_path: 视频文件路径
+            chunk_count: 分段并行检测的分段数
+            use_score_cache: 是否读取分数曲线缓存
+
+        Returns:
+            检测结果
+        """
+        detectors = self._score_replay_detectors() if self.enable_cache else None
+        if detectors is None:
+            return self._run_full_detection(video_path, chunk_count)
+
+        curves = [None] * len(detectors)
+        if use_score_cache:
+            curves = self._load_score_curves(video_path, detectors)
+        cached_count = sum(curve is not None for curve in curves)
+
+        if cached_count == len(detectors):
+            return self._result_from_score_curves(video_path, detectors, curves)
+
+        if isinstance(self.detector, BaseDetector):
+            result = self._run_full_detection(video_path, chunk_count)
+            self._save_score_curve(video_path, self.detector, result)
+            return result
+
+        # 多检测器融合：只解码运行曲线未命中的检测器
+        missing = [d for d, curve in zip(detectors, curves) if curve is None]
+        fresh_results, wall_time = self.detector.run_detectors(str(video_path), missing)
+        fresh_by_name = {result.algorithm_name: result for result in fresh_results}
+
+        results = []
+        for detector, curve in zip(detectors, curves):
+            if curve is not None:
+                results.append(self._result_from_score_curve(detector, curve))
+            elif detector.name in fresh_by_name:
+                result = fresh_by_name[detector.name]
+                self._save_score_curve(video_path, detector, result)
+                results.append(result)
+
+        return self._combine_detector_results(results, wall_time, cached_count)
+
+    def _run_full_detection(self, video_path: Path, chunk_count: int) -> DetectionResult:
+        """解码整个视频执行检测（可分段并行）"""
+        result = None
+        if chunk_count and chunk_count > 1 and isinstance(self.detector, BaseDetector):
+            result = self._detect_shots_chunked(video_path, chunk_count)
+        if result is None:
+            if hasattr(self.detector, 'detect_shots_fusion'):
+                result = self.detector.detect_shots_fusion(str(video_path))
+            else:
+                result = self.detector.detect_shots(str(video_path))
+        return result
+
+    def _build_detection_response(self, result: CompactDetectionResult, video_path: Path,
+                                  output_dir: Optional[str], cache_key: str,
+                                  from_cache: bool) -> Dict[str, Any]:
+        """由紧凑检测结果构建返回字典"""
+        return {
+            "success": True,
+            "video_path": str(video_path),
+            "boundaries": result.boundaries_to_dicts(),
+            "algorithm": result.algorithm_name,
+            "processing_time": result.processing_time,
+            "frame_count": result.frame_count,
+            "confidence_scores": result.scores.tolist(),
+            "metadata": dict(result.metadata or {}),
+            "output_dir": output_dir,
+            "cache_key": cache_key,
+            "from_cache": from_cache
+        }
+    
+    def _finish_detection(self, result: Union[DetectionResult, CompactDetectionResult],
+                          video_path: Path, output_dir: Optional[str],
+                          cache_key: str) -> Dict[str, Any]:
+        """转为列式存储，构建返回结果，写入缓存和结果文件"""
+        compact_result = CompactDetectionResult.from_result(result)
+        detection_result = self._build_detection_response(
+            compact_result, video_path, output_dir, cache_key, from_cache=False
+        )
+
+        # 保存到缓存
+        self._save_to_cache(cache_key, compact_result)
+
+        # 保存结果文件
+        if output_dir:
+            self._save_detection_result(compact_result, video_path, output_dir)
+
+        return detection_result
     
     def detect_shots(self, video_path: str,
                     output_dir: Optional[str] = None,
                     progress_callback: Optional[Callable[[float, str], None]] = None,
-                    force_reprocess: bool = False) -> Dict[str, Any]:
+                    force_reprocess: bool = False,
+                    parallel_chunks: Optional[int] = None) -> Dict[str, Any]:
         """
         检测视频镜头边界
 
@@ -151,6 +366,7 @@ class VideoService:
             output_dir: 输出目录
             progress_callback: 进度回调函数
             force_reprocess: 是否强制重新处理（忽略缓存）
+            parallel_chunks: 分段并行检测的分段数，默认使用服务配置
 
         Returns:
             检测结果字典
@@ -177,12 +393,14 @@ class VideoService:
 
             if not force_reprocess:
                 cached_result = self._get_cached_result(cache_key)
-                if cached_result:
+                if cached_result is not None:
                     if progress_callback:
                         progress_callback(1.0, "从缓存加载结果")
 
                     self.logger.info(f"Using cached result for: {video_path}")
-                    return cached_result
+                    return self._build_detection_response(
+                        cached_result, video_path, output_dir, cache_key, from_cache=True
+                    )
 
             if progress_callback:
                 progress_callback(0.1, "初始化检测器...")
@@ -195,45 +413,14 @@ class VideoService:
             if progress_callback:
                 progress_callback(0.2, "开始检测镜头边界...")
 
-            # 执行检测
-            if hasattr(self.detector, 'detect_shots_fusion'):
-                result = self.detector.detect_shots_fusion(str(video_path))
-            else:
-                result = self.detector.detect_shots(str(video_path))
+            # 执行检测（分数曲线已缓存时只做阈值化等后处理）
+            chunk_count = self.parallel_chunks if parallel_chunks is None else parallel_chunks
+            result = self._run_detection(video_path, chunk_count, use_score_cache=not force_reprocess)
 
             if progress_callback:
                 progress_callback(0.7, f"检测完成，发现 {len(result.boundaries)} 个边界")
 
-            # 构建返回结果
-            detection_result = {
-                "success": True,
-                "video_path": str(video_path),
-                "boundaries": [
-                    {
-                        "frame_number": b.frame_number,
-                        "timestamp": b.timestamp,
-                        "confidence": b.confidence,
-                        "boundary_type": b.boundary_type,
-                        "metadata": b.metadata or {}
-                    }
-                    for b in result.boundaries
-                ],
-                "algorithm": result.algorithm_name,
-                "processing_time": result.processing_time,
-                "frame_count": result.frame_count,
-                "confidence_scores": result.confidence_scores,
-                "metadata": result.metadata or {},
-                "output_dir": output_dir,
-                "cache_key": cache_key,
-                "from_cache": False
-            }
-
-            # 保存到缓存
-            self._save_to_cache(cache_key, detection_result)
-
-            # 保存结果文件
-            if output_dir:
-                self._save_detection_result(result, video_path, output_dir)
+            detection_result = self._finish_detection(result, video_path, output_dir, cache_key)
 
             if progress_callback:
                 progress_callback(1.0, "检测任务完成")
@@ -257,6 +444,60 @@ class VideoService:
                 "processing_time": time.time() - start_time
             }
     
+    def _detect_shots_chunked(self, video_path: Path, chunk_count: int) -> Optional[DetectionResult]:
+        """
+        单视频分段并行检测
+
+        视频按帧范围切成 chunk_count 段（相邻段重叠 chunk_overlap 帧），每段在独立的
+        工作进程中跳转到自己的起点逐帧评分；拼接时用重叠区校正跳转偏差并重建全局
+        分数曲线，再由检测器统一阈值化，重叠区内被两段同时检测到的切点只保留一次。
+
+        Returns:
+            检测结果；视频过短或无法获取帧数时返回None，由调用方回退为整段检测
+        """
+        import cv2
+
+        start_time = time.time()
+        cap = cv2.VideoCapture(str(video_path))
+        try:
+            if not cap.isOpened():
+                return None
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        finally:
+            cap.release()
+
+        # 每段至少包含数倍重叠长度，否则分段开销大于收益
+        min_chunk_frames = max(4 * self.chunk_overlap, 100)
+        chunk_count = min(chunk_count, frame_count // min_chunk_frames)
+        if chunk_count < 2:
+            return None
+
+        chunks = plan_chunks(frame_count, chunk_count, self.chunk_overlap)
+        jobs = [ChunkScanJob(str(video_path), chunk) for chunk in chunks]
+        self.logger.info(f"Chunked detection: {frame_count} frames in {len(chunks)} chunks "
+                         f"(overlap {self.chunk_overlap} frames)")
+
+        results = []
+        with DetectionProcessPool(self.detector, max_workers=len(jobs)) as pool:
+            for task in pool.imap_jobs(jobs):
+                if not task.success:
+                    raise RuntimeError(f"分段 {task.task_id} 检测失败: {task.error}")
+                results.append(task.result)
+
+        scores, seam_stats = merge_chunk_scores(results, max(frame_count - 1, 0))
+
+        return self.detector.result_from_scores(
+            scores.tolist(), fps, frame_count,
+            processing_time=time.time() - start_time,
+            metadata={
+                'scan_mode': 'chunked',
+                'chunk_overlap': self.chunk_overlap,
+                'chunk_time': sum(result.elapsed for result in results),
+                **seam_stats
+            }
+        )
+    
     def process_video_segments(self, video_path: str, detection_result: DetectionResult,
                               output_dir: str,
                               progress_callback: Optional[Callable[[float, str], None]] = None) -> Dict[str, Any]:
@@ -292,10 +533,21 @@ class VideoService:
             if progress_callback:
                 progress_callback(0.4, f"开始处理 {len(segments)} 个分段...")
             
-            # 处理分段
+            # 处理分段（由编码调度器并发编码）
             self.processing_config.output_dir = Path(output_dir)
+            
+            def on_encode_progress(progress: float):
+                if progress_callback:
+                    stats = self.processor.get_processing_stats()["encode"]
+                    total = stats.get('completed', 0) + stats.get('failed', 0) + \
+                        stats.get('running', 0) + stats.get('queue_depth', 0)
+                    progress_callback(0.4 + 0.6 * progress,
+                                      f"编码分段 {stats.get('completed', 0)}/{total}，"
+                                      f"队列 {stats.get('queue_depth', 0)}，"
+                                      f"{stats.get('throughput', 0.0):.1f}x 实时")
+            
             result = self.processor.process_video(
-                video_path, detection_result, progress_callback
+                video_path, detection_result, on_encode_progress
             )
             
             if progress_callback:
@@ -308,7 +560,8 @@ class VideoService:
                 "video_path": video_path,
                 "segments": segments,
                 "output_dir": output_dir,
-                "processing_result": result
+                "processing_result": result,
+                "encode_stats": self.processor.get_processing_stats()["encode"]
             }
             
         except Exception as e:
@@ -468,7 +721,10 @@ class VideoService:
     def detect_shots_batch(self, video_paths: List[str],
                           output_dir: Optional[str] = None,
                           progress_callback: Optional[Callable[[int, int, str], None]] = None,
-                          force_reprocess: bool = False) -> List[Dict[str, Any]]:
+                          force_reprocess: bool = False,
+                          execution_mode: str = "sequential",
+                          max_workers: Optional[int] = None,
+                          file_timeout: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         批量检测视频镜头边界
 
@@ -477,41 +733,66 @@ class VideoService:
             output_dir: 输出目录
             progress_callback: 进度回调函数 (completed, total, current_file)
             force_reprocess: 是否强制重新处理
+            execution_mode: 执行方式，sequential（逐个处理）或 process（多进程并行）
+            max_workers: 多进程模式下的工作进程数，默认等于CPU核心数
+            file_timeout: 多进程模式下单个文件的超时时间（秒）
 
         Returns:
-            检测结果列表
+            检测结果列表（与输入顺序一致）
         """
         results = []
         total_files = len(video_paths)
 
-        self.logger.info(f"Starting batch detection for {total_files} files")
+        self.logger.info(f"Starting batch detection for {total_files} files ({execution_mode})")
 
-        for i, video_path in enumerate(video_paths):
-            try:
-                if progress_callback:
-                    progress_callback(i, total_files, Path(video_path).name)
+        # 为每个文件创建单独的输出目录
+        file_output_dirs = []
+        for video_path in video_paths:
+            file_output_dir = None
+            if output_dir:
+                file_output_dir = Path(output_dir) / Path(video_path).stem
+                file_output_dir.mkdir(parents=True, exist_ok=True)
+            file_output_dirs.append(str(file_output_dir) if file_output_dir else None)
 
-                # 为每个文件创建单独的输出目录
-                file_output_dir = None
-                if output_dir:
-                    file_output_dir = Path(output_dir) / Path(video_path).stem
-                    file_output_dir.mkdir(parents=True, exist_ok=True)
+        if execution_mode == "process":
+            results = [None] * total_files
+            completed = 0
+            try:
+                for index, result in self.detect_shots_parallel(
+                    video_paths, file_output_dirs, force_reprocess,
+                    max_workers=max_workers, file_timeout=file_timeout
+                ):
+                    results[index] = result
+                    completed += 1
+                    if progress_callback:
+                        progress_callback(completed, total_files, Path(video_paths[index]).name)
+            except Exception as e:
+                self.logger.error(f"Process pool detection failed: {e}")
+                results = [
+                    result or {"success": False, "error": str(e), "video_path": video_path}
+                    for result, video_path in zip(results, video_paths)
+                ]
+        else:
+            for i, video_path in enumerate(video_paths):
+                try:
+                    if progress_callback:
+                        progress_callback(i, total_files, Path(video_path).name)
 
-                result = self.detect_shots(
-                    video_path,
-                    str(file_output_dir) if file_output_dir else None,
-                    force_reprocess=force_reprocess
-                )
+                    result = self.detect_shots(
+                        video_path,
+                        file_output_dirs[i],
+                        force_reprocess=force_reprocess
+                    )
 
-                results.append(result)
+                    results.append(result)
 
-            except Exception as e:
-                self.logger.error(f"Error processing {video_path}: {e}")
-                results.append({
-                    "success": False,
-                    "error": str(e),
-                    "video_path": video_path
-                })
+                except Exception as e:
+                    self.logger.error(f"Error processing {video_path}: {e}")
+                    results.append({
+                        "success": False,
+                        "error": str(e),
+                        "video_path": video_path
+                    })
 
         if progress_callback:
             progress_callback(total_files, total_files, "批量处理完成")
@@ -521,6 +802,93 @@ class VideoService:
 
         return results
 
+    def detect_shots_parallel(self, video_paths: List[str],
+                              output_dirs: Optional[List[Optional[str]]] = None,
+                              force_reprocess: bool = False,
+                              max_workers: Optional[int] = None,
+                              file_timeout: Optional[float] = None,
+                              should_stop: Optional[Callable[[], bool]] = None
+                              ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        多进程并行检测
+
+        缓存查询、结果缓存和结果文件写入在当前进程完成，只有缓存未命中的
+        文件分发给工作进程；工作进程以列式数组返回结果。
+
+        Args:
+            video_paths: 视频文件路径列表
+            output_dirs: 与 video_paths 对应的输出目录列表
+            force_reprocess: 是否强制重新处理
+            max_workers: 工作进程数，默认等于CPU核心数
+            file_timeout: 单个文件的超时时间（秒）
+            should_stop: 停止检查函数，返回True时终止剩余任务
+
+        Yields:
+            (文件下标, 检测结果字典)，按完成顺序
+        """
+        output_dirs = output_dirs or [None] * len(video_paths)
+        detector_config = getattr(self.detector, 'get_config', lambda: {})() if self.detector else {}
+        jobs = []
+
+        for index, video_path in enumerate(video_paths):
+            video_path = Path(video_path)
+            if not video_path.exists() or not self.detector:
+                self.performance_stats["errors"] += 1
+                error = f"视频文件不存在: {video_path}" if not video_path.exists() else "未设置检测器"
+                yield index, {"success": False, "error": error,
+                              "video_path": str(video_path), "processing_time": 0.0}
+                continue
+
+            cache_key = self._get_cache_key(str(video_path), detector_config)
+            if not force_reprocess:
+                cached_result = self._get_cached_result(cache_key)
+                if cached_result is not None:
+                    yield index, self._build_detection_response(
+                        cached_result, video_path, output_dirs[index], cache_key, from_cache=True
+                    )
+                    continue
+
+                # 分数曲线已缓存时在当前进程重新阈值化即可
+                replayed = self._replay_score_curves(video_path)
+                if replayed is not None:
+                    self.performance_stats["total_processed"] += 1
+                    yield index, self._finish_detection(replayed, video_path, output_dirs[index], cache_key)
+                    continue
+
+            jobs.append((index, video_path, cache_key))
+
+        if not jobs:
+            return
+
+        pool = DetectionProcessPool(self.detector, max_workers=min(max_workers or len(jobs), len(jobs)),
+                                    file_timeout=file_timeout)
+        with pool:
+            for task in pool.imap_unordered([str(job[1]) for job in jobs], should_stop):
+                index, video_path, cache_key = jobs[task.task_id]
+
+                if not task.success:
+                    self.performance_stats["errors"] += 1
+                    self.logger.error(f"Shot detection failed: {video_path}: {task.error}")
+                    yield index, {"success": False, "error": task.error,
+                                  "video_path": str(video_path), "processing_time": task.worker_time}
+                    continue
+
+                try:
+                    if isinstance(self.detector, BaseDetector) and self.detector.supports_score_replay:
+                        self._save_score_curve(video_path, self.detector, task.result)
+                    detection_result = self._finish_detection(task.result, video_path,
+                                                              output_dirs[index], cache_key)
+                except Exception as e:
+                    self.performance_stats["errors"] += 1
+                    self.logger.error(f"Error saving detection result for {video_path}: {e}")
+                    yield index, {"success": False, "error": str(e),
+                                  "video_path": str(video_path), "processing_time": task.worker_time}
+                    continue
+
+                self.performance_stats["total_processed"] += 1
+                self.performance_stats["total_processing_time"] += task.worker_time
+                yield index, detection_result
+
     def get_performance_stats(self) -> Dict[str, Any]:
         """
         获取性能统计信息
@@ -547,14 +915,14 @@ class VideoService:
             是否成功清空
         """
         try:
-            if self.enable_cache and self.cache_dir.exists():
-                import shutil
-                shutil.rmtree(self.cache_dir)
-                self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if self.enable_cache:
+                self.result_cache.clear()
+                self.score_cache.clear()
 
                 # 重置缓存统计
                 self.performance_stats["cache_hits"] = 0
                 self.performance_stats["cache_misses"] = 0
+                self.performance_stats["score_cache_hits"] = 0
 
                 self.logger.info("Cache cleared successfully")
                 return True
@@ -575,16 +943,13 @@ class VideoService:
             return {"enabled": False}
 
         try:
-            cache_files = list(self.cache_dir.glob("*.json"))
-            total_size = sum(f.stat().st_size for f in cache_files)
-
             return {
                 "enabled": True,
-                "cache_dir": str(self.cache_dir),
-                "cache_files_count": len(cache_files),
-                "total_size_mb": total_size / (1024 * 1024),
+                **self.result_cache.info(),
                 "cache_hits": self.performance_stats["cache_hits"],
-                "cache_misses": self.performance_stats["cache_misses"]
+                "cache_misses": self.performance_stats["cache_misses"],
+                "score_cache": self.score_cache.info(),
+                "score_cache_hits": self.performance_stats["score_cache_hits"]
             }
         except Exception as e:
             self.logger.error(f"Error getting cache info: {e}")
@@ -5,6 +5,9 @@
 from .base import BaseDetector, MultiDetector, ShotBoundary, DetectionResult
 from .frame_diff import FrameDifferenceDetector, EnhancedFrameDifferenceDetector
 from .histogram import HistogramDetector, MultiChannelHistogramDetector, AdaptiveHistogramDetector
+from .frame_source import FrameSource, SharedFramePipeline
+from .frame_reader import FrameReader
+from .compact import CompactDetectionResult, CompactBoundary
 
 __all__ = [
     'BaseDetector',
@@ -15,5 +18,10 @@ __all__ = [
     'EnhancedFrameDifferenceDetector',
     'HistogramDetector',
     'MultiChannelHistogramDetector',
-    'AdaptiveHistogramDetector'
+    'AdaptiveHistogramDetector',
+    'FrameSource',
+    'SharedFramePipeline',
+    'FrameReader',
+    'CompactDetectionResult',
+    'CompactBoundary'
 ]
@@ -0,0 +1,196 @@
+"""
+分段并行检测模块
+把单个长视频按帧范围切成带重叠的分段，各分段独立跳转解码、逐帧评分，
+再按重叠区对齐拼接成全局分数曲线，统一阈值化生成边界
+"""
+
+import time
+from dataclasses import dataclass
+from typing import List, Tuple, Dict, Any, TYPE_CHECKING
+import numpy as np
+from loguru import logger
+
+from .frame_reader import FrameReader
+
+if TYPE_CHECKING:
+    from .base import BaseDetector
+
+
+@dataclass
+class VideoChunk:
+    """视频分段
+
+    分段负责分数下标 [start, end)（scores[i] 为第 i 帧与第 i+1 帧的差异），
+    实际解码范围 [read_start, read_end] 向两侧多读 overlap 帧用于接缝对齐。
+    """
+    index: int
+    start: int
+    end: int
+    read_start: int
+    read_end: int
+
+
+@dataclass
+class ChunkScores:
+    """分段评分结果，scores[k] 对应帧对 (read_start+k, read_start+k+1)"""
+    chunk: VideoChunk
+    scores: np.ndarray
+    fps: float
+    elapsed: float = 0.0
+
+
+def plan_chunks(frame_count: int, chunk_count: int, overlap: int = 30) -> List[VideoChunk]:
+    """
+    按帧数均分视频
+
+    Args:
+        frame_count: 总帧数
+        chunk_count: 分段数
+        overlap: 相邻分段的重叠帧数
+
+    Returns:
+        分段列表
+    """
+    score_count = max(frame_count - 1, 0)
+    chunk_count = max(1, min(chunk_count, score_count))
+    edges = np.linspace(0, score_count, chunk_count + 1).astype(int)
+
+    chunks = []
+    for index in range(chunk_count):
+        start, end = int(edges[index]), int(edges[index + 1])
+        chunks.append(VideoChunk(
+            index=index,
+            start=start,
+            end=end,
+            read_start=max(0, start - overlap),
+            read_end=min(frame_count - 1, end + overlap)
+        ))
+    return chunks
+
+
+@dataclass
+class ChunkScanJob:
+    """分段评分任务（可pickle，供工作进程执行）"""
+    video_path: str
+    chunk: VideoChunk
+
+    def run(self, detector: "BaseDetector") -> ChunkScores:
+        return scan_chunk(detector, self.video_path, self.chunk)
+
+
+def scan_chunk(detector: "BaseDetector", video_path: str, chunk: VideoChunk,
+               buffer_size: int = 8) -> ChunkScores:
+    """
+    跳转到分段起点，逐帧评分到分段终点
+
+    Args:
+        detector: 提供帧特征和帧对评分的检测器
+        video_path: 视频文件路径
+        chunk: 分段
+        buffer_size: 预解码缓冲槽数
+
+    Returns:
+        分段评分结果
+    """
+    start_time = time.time()
+    scores = []
+
+    with FrameReader(video_path, buffer_size=buffer_size,
+                     working_height=detector.get_working_height(),
+                     start_frame=chunk.read_start) as reader:
+        if not reader.open():
+            raise ValueError(f"Cannot open video file: {video_path}")
+
+        prev_features = None
+        for frame_number, frame in reader:
+            features = detector.extract_frame_features(frame)
+            if prev_features is not None:
+                scores.append(float(detector.process_frame_pair(prev_features, features)))
+            prev_features = features
+            if frame_number >= chunk.read_end:
+                break
+        fps = reader.fps
+
+    return ChunkScores(chunk, np.asarray(scores, dtype=np.float64), fps, time.time() - start_time)
+
+
+def _seam_shift(prev_scores: np.ndarray, prev_start: int, chunk_scores: ChunkScores,
+                max_shift: int, tolerance: float) -> int:
+    """
+    用重叠区的分数估计分段跳转的帧偏差
+
+    部分编码格式按帧号跳转并不精确，实际起点可能偏离 read_start 若干帧；
+    在 [-max_shift, max_shift] 内寻找使重叠区分数差异最小的偏移，
+    偏移为0时差异已在容差内则直接采用。
+    """
+    local = chunk_scores.scores
+    base = chunk_scores.chunk.read_start
+
+    def mismatch(shift: int) -> float:
+        # local[k] 对应全局下标 base + shift + k，与前一分段的 prev_scores[g - prev_start] 比较
+        first = max(base + shift, prev_start)
+        last = min(base + shift + local.size, prev_start + prev_scores.size)
+        if last - first < 2:
+            return np.inf
+        ours = local[first - base - shift:last - base - shift]
+        theirs = prev_scores[first - prev_start:last - prev_start]
+        return float(np.mean(np.abs(ours - theirs)))
+
+    error = mismatch(0)
+    if error <= tolerance:
+        return 0
+
+    best_shift, best_error = 0, error
+    for shift in range(-max_shift, max_shift + 1):
+        candidate = mismatch(shift)
+        if candidate < best_error - tolerance:
+            best_shift, best_error = shift, candidate
+    return best_shift
+
+
+def merge_chunk_scores(results: List[ChunkScores], score_count: int,
+                       max_shift: int = 4, tolerance: float = 1e-6) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    拼接各分段分数为全局分数曲线
+
+    每个下标只取负责该范围的分段的分数；重叠区用于校正跳转偏差。
+    两个分段在重叠区各自检测到的同一切点，在全局曲线上只对应一个下标，
+    统一阈值化后不会重复。
+
+    Args:
+        results: 各分段评分结果
+        score_count: 全局分数个数（总帧数-1）
+        max_shift: 接缝对齐的最大搜索偏移（帧）
+        tolerance: 判定重叠区一致的平均差异容差
+
+    Returns:
+        (全局分数数组, 接缝统计)
+    """
+    scores = np.zeros(score_count, dtype=np.float64)
+    shifts = []
+    missing = 0
+    prev_scores, prev_start = None, 0
+
+    for result in sorted(results, key=lambda r: r.chunk.index):
+        chunk = result.chunk
+        shift = 0
+        if prev_scores is not None and chunk.start > 0:
+            shift = _seam_shift(prev_scores, prev_start, result, max_shift, tolerance)
+            if shift:
+                shifts.append((chunk.index, shift))
+                logger.warning(f"Chunk {chunk.index} seek landed {shift} frames off, realigned")
+
+        base = chunk.read_start + shift
+        first = max(chunk.start, base)
+        last = min(chunk.end, base + result.scores.size, score_count)
+        if last > first:
+            scores[first:last] = result.scores[first - base:last - base]
+        missing += (chunk.end - chunk.start) - max(last - first, 0)
+
+        prev_scores, prev_start = result.scores, base
+
+    return scores, {
+        'chunks': len(results),
+        'seam_shifts': shifts,
+        'missing_scores': missing
+    }
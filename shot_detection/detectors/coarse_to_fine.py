@@ -0,0 +1,225 @@
+"""
+粗扫精修检测模块
+先按步长或关键帧稀疏采样粗扫，再只对分数跳变的窗口逐帧精修定位切点
+"""
+
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import List, Tuple, Optional, TYPE_CHECKING
+import numpy as np
+import cv2
+from loguru import logger
+
+from .frame_reader import FrameReader
+
+if TYPE_CHECKING:
+    from .base import BaseDetector, DetectionResult
+
+
+@dataclass
+class CoarseToFineConfig:
+    """粗扫精修配置
+
+    stride 越大、sensitivity 越高，粗扫越快、精修窗口越少，但漏检风险越大；
+    sensitivity 为粗扫阈值相对检测阈值的系数，调低可提高召回率。
+    """
+    stride: int = 8
+    sampling: str = 'stride'  # stride, keyframe
+    sensitivity: float = 0.5
+    max_forward_skip: int = 64  # 相邻窗口间隔不超过该帧数时顺序读取而非跳转
+
+
+def probe_keyframe_indices(video_path: str, fps: float, timeout: int = 60) -> List[int]:
+    """使用ffprobe读取关键帧位置（只解析数据包，不解码）"""
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+        logger.warning(f"Keyframe probe failed for {video_path}: {e}")
+        return []
+
+    if result.returncode != 0:
+        return []
+
+    indices = set()
+    for line in result.stdout.splitlines():
+        parts = line.strip().split(',')
+        if len(parts) < 2 or 'K' not in parts[1]:
+            continue
+        try:
+            indices.add(int(round(float(parts[0]) * fps)))
+        except ValueError:
+            continue
+
+    return sorted(indices)
+
+
+class CoarseToFineScanner:
+    """粗扫精修扫描器"""
+
+    def __init__(self, detector: "BaseDetector", config: Optional[CoarseToFineConfig] = None):
+        """
+        初始化扫描器
+
+        Args:
+            detector: 提供帧特征和帧对评分的检测器
+            config: 粗扫精修配置
+        """
+        self.detector = detector
+        self.config = config or CoarseToFineConfig()
+        self.logger = logger.bind(component="CoarseToFineScanner")
+
+    def scan(self, video_path: str) -> "DetectionResult":
+        """
+        执行粗扫精修检测
+
+        Args:
+            video_path: 视频文件路径
+
+        Returns:
+            与逐帧检测结构相同的检测结果，未精修的帧分数记为0
+        """
+        from .base import DetectionResult
+
+        start_time = time.time()
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video file: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        try:
+            sampling = self.config.sampling
+            samples = []
+            if sampling == 'keyframe':
+                keyframes = probe_keyframe_indices(video_path, fps)
+                if len(keyframes) >= 2:
+                    samples = self._coarse_scan_keyframes(cap, keyframes)
+                else:
+                    self.logger.warning("No keyframe index available, falling back to stride sampling")
+                    sampling = 'stride'
+            if sampling == 'stride':
+                samples = self._coarse_scan_stride(video_path)
+
+            if frame_count <= 0 and samples:
+                frame_count = samples[-1][0] + 1
+
+            windows = self._select_windows(samples)
+            if samples and samples[-1][0] < frame_count - 1:
+                # 最后一个采样点之后的尾部不足一个步长，直接精修
+                tail = (samples[-1][0], frame_count - 1)
+                if windows and windows[-1][1] >= tail[0]:
+                    windows[-1] = (windows[-1][0], tail[1])
+                else:
+                    windows.append(tail)
+            scores = np.zeros(max(frame_count - 1, 0), dtype=np.float64)
+            refined_frames = self._refine_windows(cap, windows, scores)
+        finally:
+            cap.release()
+
+        score_list = scores.tolist()
+        boundaries = self.detector.boundaries_from_scores(score_list, fps)
+        processing_time = time.time() - start_time
+
+        self.logger.info(
+            f"{self.detector.name} coarse-to-fine: {len(samples)} coarse samples, "
+            f"{len(windows)} windows, {refined_frames} refined frames, "
+            f"{len(boundaries)} boundaries in {processing_time:.2f}s"
+        )
+
+        return DetectionResult(
+            boundaries=boundaries,
+            algorithm_name=self.detector.name,
+            processing_time=processing_time,
+            frame_count=frame_count,
+            confidence_scores=score_list,
+            metadata={
+                'fps': fps,
+                'scan_mode': 'coarse_to_fine',
+                'sampling': sampling,
+                'stride': self.config.stride,
+                'sensitivity': self.config.sensitivity,
+                'coarse_samples': len(samples),
+                'refined_windows': len(windows),
+                'refined_frames': refined_frames
+            }
+        )
+
+    def _coarse_scan_stride(self, video_path: str) -> List[Tuple[int, np.ndarray]]:
+        """按固定步长采样，返回 (帧号, 特征) 列表"""
+        samples = []
+        with FrameReader(video_path, working_height=self.detector.get_working_height(),
+                         stride=self.config.stride) as reader:
+            if not reader.open():
+                return samples
+            for frame_number, frame in reader:
+                samples.append((frame_number, self.detector.extract_frame_features(frame)))
+        return samples
+
+    def _coarse_scan_keyframes(self, cap, keyframes: List[int]) -> List[Tuple[int, np.ndarray]]:
+        """只在关键帧处采样，跳转到关键帧无需解码前序帧"""
+        samples = []
+        for frame_number in keyframes:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            samples.append((frame_number, self.detector.extract_frame_features(self._downscale(frame))))
+        return samples
+
+    def _select_windows(self, samples: List[Tuple[int, np.ndarray]]) -> List[Tuple[int, int]]:
+        """选出粗扫分数超过粗扫阈值的相邻采样区间，并合并相连区间"""
+        coarse_threshold = getattr(self.detector, 'threshold', 0.5) * self.config.sensitivity
+        windows = []
+
+        for (start, features1), (end, features2) in zip(samples, samples[1:]):
+            score = float(self.detector.process_frame_pair(features1, features2))
+            if score <= coarse_threshold:
+                continue
+            if windows and windows[-1][1] >= start:
+                windows[-1] = (windows[-1][0], end)
+            else:
+                windows.append((start, end))
+
+        return windows
+
+    def _refine_windows(self, cap, windows: List[Tuple[int, int]], scores: np.ndarray) -> int:
+        """逐帧精修候选窗口，写入 scores（scores[i] 对应第 i+1 帧）"""
+        refined_frames = 0
+        position = -1  # 下一次 read 返回的帧号
+
+        for start, end in windows:
+            if position < 0 or start < position or start - position > self.config.max_forward_skip:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            else:
+                # 间隔较小，顺序 grab 比跳转重新解码 GOP 更便宜
+                while position < start and cap.grab():
+                    position += 1
+            position = start
+
+            prev_features = None
+            for frame_number in range(start, end + 1):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                position = frame_number + 1
+                features = self.detector.extract_frame_features(self._downscale(frame))
+                if prev_features is not None and frame_number - 1 < len(scores):
+                    scores[frame_number - 1] = float(self.detector.process_frame_pair(prev_features, features))
+                    refined_frames += 1
+                prev_features = features
+
+        return refined_frames
+
+    def _downscale(self, frame: np.ndarray) -> np.ndarray:
+        """缩放到检测器工作分辨率"""
+        working_height = self.detector.get_working_height()
+        height, width = frame.shape[:2]
+        if height <= working_height:
+            return frame
+        new_width = int(width * working_height / height)
+        return cv2.resize(frame, (new_width, working_height))
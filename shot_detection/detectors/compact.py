@@ -0,0 +1,282 @@
+"""
+紧凑检测结果模块
+以列式数组保存逐帧分数和镜头边界，按需再转换为 ShotBoundary / DetectionResult
+"""
+
+import json
+from typing import List, Dict, Any, Optional, Iterator, Union, BinaryIO
+from pathlib import Path
+import numpy as np
+
+from .base import ShotBoundary, DetectionResult
+
+# 常见边界类型的固定编码，其他类型在结果内追加
+BOUNDARY_TYPES = ('cut', 'fade', 'dissolve')
+
+COMPACT_FORMAT_VERSION = 1
+
+
+class CompactBoundary:
+    """轻量边界记录，只在遍历时按需生成"""
+
+    __slots__ = ('frame_number', 'timestamp', 'confidence', 'boundary_type', 'metadata')
+
+    def __init__(self, frame_number: int, timestamp: float, confidence: float,
+                 boundary_type: str, metadata: Optional[Dict[str, Any]]):
+        self.frame_number = frame_number
+        self.timestamp = timestamp
+        self.confidence = confidence
+        self.boundary_type = boundary_type
+        self.metadata = metadata
+
+    def to_shot_boundary(self) -> ShotBoundary:
+        """转换为 ShotBoundary"""
+        return ShotBoundary(
+            frame_number=self.frame_number,
+            timestamp=self.timestamp,
+            confidence=self.confidence,
+            boundary_type=self.boundary_type,
+            metadata=dict(self.metadata) if self.metadata else {}
+        )
+
+    def __repr__(self) -> str:
+        return (f"CompactBoundary(frame_number={self.frame_number}, timestamp={self.timestamp:.3f}, "
+                f"confidence={self.confidence:.3f}, boundary_type={self.boundary_type!r})")
+
+
+class CompactDetectionResult:
+    """列式存储的检测结果
+
+    逐帧分数保存为 float32 数组，边界保存为 int32 帧号、时间戳、置信度和
+    类型编码数组；边界元数据只保留非空项。boundaries / confidence_scores
+    属性首次访问时才转换为原有的 ShotBoundary 列表和 float 列表，
+    因此可直接替代 DetectionResult 传给现有调用方。
+    """
+
+    __slots__ = (
+        'algorithm_name', 'processing_time', 'frame_count', 'metadata',
+        'scores', 'frame_numbers', 'timestamps', 'confidences', 'type_codes',
+        'type_names', 'boundary_metadata', '_boundaries', '_score_list'
+    )
+
+    def __init__(self, algorithm_name: str, processing_time: float, frame_count: int,
+                 scores: np.ndarray, frame_numbers: np.ndarray, timestamps: np.ndarray,
+                 confidences: np.ndarray, type_codes: np.ndarray,
+                 type_names: Optional[List[str]] = None,
+                 boundary_metadata: Optional[Dict[int, Dict[str, Any]]] = None,
+                 metadata: Optional[Dict[str, Any]] = None):
+        """
+        初始化紧凑结果
+
+        Args:
+            algorithm_name: 算法名称
+            processing_time: 处理耗时
+            frame_count: 总帧数
+            scores: 逐帧分数（scores[i] 对应第 i+1 帧）
+            frame_numbers: 边界帧号
+            timestamps: 边界时间戳
+            confidences: 边界置信度
+            type_codes: 边界类型编码（type_names 的下标）
+            type_names: 类型编码表
+            boundary_metadata: 边界序号 -> 元数据，只保存非空项
+            metadata: 结果元数据
+        """
+        self.algorithm_name = algorithm_name
+        self.processing_time = float(processing_time)
+        self.frame_count = int(frame_count)
+        self.metadata = metadata if metadata is not None else {}
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.frame_numbers = np.asarray(frame_numbers, dtype=np.int32)
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.confidences = np.asarray(confidences, dtype=np.float32)
+        self.type_codes = np.asarray(type_codes, dtype=np.uint8)
+        self.type_names = list(type_names) if type_names else list(BOUNDARY_TYPES)
+        self.boundary_metadata = boundary_metadata or {}
+        self._boundaries: Optional[List[ShotBoundary]] = None
+        self._score_list: Optional[List[float]] = None
+
+    @classmethod
+    def from_result(cls, result: DetectionResult) -> "CompactDetectionResult":
+        """从 DetectionResult 构建紧凑结果"""
+        if isinstance(result, cls):
+            return result
+
+        type_names = list(BOUNDARY_TYPES)
+        type_index = {name: code for code, name in enumerate(type_names)}
+        boundaries = result.boundaries
+        count = len(boundaries)
+
+        frame_numbers = np.empty(count, dtype=np.int32)
+        timestamps = np.empty(count, dtype=np.float64)
+        confidences = np.empty(count, dtype=np.float32)
+        type_codes = np.empty(count, dtype=np.uint8)
+        boundary_metadata = {}
+
+        for i, boundary in enumerate(boundaries):
+            code = type_index.get(boundary.boundary_type)
+            if code is None:
+                code = len(type_names)
+                type_names.append(boundary.boundary_type)
+                type_index[boundary.boundary_type] = code
+            frame_numbers[i] = boundary.frame_number
+            timestamps[i] = boundary.timestamp
+            confidences[i] = boundary.confidence
+            type_codes[i] = code
+            if boundary.metadata:
+                boundary_metadata[i] = boundary.metadata
+
+        return cls(
+            algorithm_name=result.algorithm_name,
+            processing_time=result.processing_time,
+            frame_count=result.frame_count,
+            scores=np.asarray(result.confidence_scores, dtype=np.float32),
+            frame_numbers=frame_numbers,
+            timestamps=timestamps,
+            confidences=confidences,
+            type_codes=type_codes,
+            type_names=type_names,
+            boundary_metadata=boundary_metadata,
+            metadata=dict(result.metadata or {})
+        )
+
+    @classmethod
+    def from_scores(cls, algorithm_name: str, scores, frame_count: int,
+                    processing_time: float = 0.0,
+                    metadata: Optional[Dict[str, Any]] = None) -> "CompactDetectionResult":
+        """只保存逐帧分数曲线、不含边界的紧凑结果"""
+        return cls(
+            algorithm_name=algorithm_name,
+            processing_time=processing_time,
+            frame_count=frame_count,
+            scores=scores,
+            frame_numbers=np.empty(0, dtype=np.int32),
+            timestamps=np.empty(0, dtype=np.float64),
+            confidences=np.empty(0, dtype=np.float32),
+            type_codes=np.empty(0, dtype=np.uint8),
+            metadata=metadata
+        )
+
+    def __len__(self) -> int:
+        """边界数量"""
+        return int(self.frame_numbers.size)
+
+    def records(self) -> Iterator[CompactBoundary]:
+        """逐个生成轻量边界记录"""
+        for i in range(len(self)):
+            yield CompactBoundary(
+                frame_number=int(self.frame_numbers[i]),
+                timestamp=float(self.timestamps[i]),
+                confidence=float(self.confidences[i]),
+                boundary_type=self.type_names[self.type_codes[i]],
+                metadata=self.boundary_metadata.get(i)
+            )
+
+    @property
+    def boundaries(self) -> List[ShotBoundary]:
+        """ShotBoundary 列表（首次访问时转换并缓存）"""
+        if self._boundaries is None:
+            self._boundaries = [record.to_shot_boundary() for record in self.records()]
+        return self._boundaries
+
+    @property
+    def confidence_scores(self) -> List[float]:
+        """逐帧分数列表（首次访问时转换并缓存）"""
+        if self._score_list is None:
+            self._score_list = self.scores.tolist()
+        return self._score_list
+
+    def to_result(self) -> DetectionResult:
+        """转换为 DetectionResult"""
+        return DetectionResult(
+            boundaries=list(self.boundaries),
+            algorithm_name=self.algorithm_name,
+            processing_time=self.processing_time,
+            frame_count=self.frame_count,
+            confidence_scores=list(self.confidence_scores),
+            metadata=dict(self.metadata)
+        )
+
+    def boundaries_to_dicts(self) -> List[Dict[str, Any]]:
+        """边界转换为字典列表，不经过 ShotBoundary"""
+        return [
+            {
+                "frame_number": record.frame_number,
+                "timestamp": record.timestamp,
+                "confidence": record.confidence,
+                "boundary_type": record.boundary_type,
+                "metadata": dict(record.metadata) if record.metadata else {}
+            }
+            for record in self.records()
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        """数组部分占用的字节数"""
+        return int(self.scores.nbytes + self.frame_numbers.nbytes + self.timestamps.nbytes
+                   + self.confidences.nbytes + self.type_codes.nbytes)
+
+    def save(self, file: Union[str, Path, BinaryIO], compressed: bool = True):
+        """
+        保存为 .npz 文件
+
+        数组直接以二进制写入，算法名、元数据等写入 JSON 头。
+
+        Args:
+            file: 文件路径或可写的二进制文件对象
+            compressed: 是否压缩
+        """
+        header = {
+            "version": COMPACT_FORMAT_VERSION,
+            "algorithm_name": self.algorithm_name,
+            "processing_time": self.processing_time,
+            "frame_count": self.frame_count,
+            "type_names": self.type_names,
+            "boundary_metadata": {str(i): meta for i, meta in self.boundary_metadata.items()},
+            "metadata": self.metadata
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False, default=str).encode('utf-8')
+
+        writer = np.savez_compressed if compressed else np.savez
+        writer(
+            file,
+            header=np.frombuffer(header_bytes, dtype=np.uint8),
+            scores=self.scores,
+            frame_numbers=self.frame_numbers,
+            timestamps=self.timestamps,
+            confidences=self.confidences,
+            type_codes=self.type_codes
+        )
+
+    @classmethod
+    def load(cls, file: Union[str, Path, BinaryIO]) -> "CompactDetectionResult":
+        """
+        从 .npz 文件加载
+
+        Args:
+            file: 文件路径或可读的二进制文件对象
+
+        Returns:
+            紧凑检测结果
+        """
+        with np.load(file, allow_pickle=False) as data:
+            header = json.loads(data["header"].tobytes().decode('utf-8'))
+            if header.get("version") != COMPACT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported compact result version: {header.get('version')}")
+
+            return cls(
+                algorithm_name=header["algorithm_name"],
+                processing_time=header["processing_time"],
+                frame_count=header["frame_count"],
+                scores=data["scores"],
+                frame_numbers=data["frame_numbers"],
+                timestamps=data["timestamps"],
+                confidences=data["confidences"],
+                type_codes=data["type_codes"],
+                type_names=header["type_names"],
+                boundary_metadata={int(i): meta for i, meta in header["boundary_metadata"].items()},
+                metadata=header["metadata"]
+            )
+
+    def __repr__(self) -> str:
+        return (f"CompactDetectionResult(algorithm_name={self.algorithm_name!r}, "
+                f"boundaries={len(self)}, scores={self.scores.size}, frame_count={self.frame_count})")
@@ -0,0 +1,142 @@
+"""
+共享帧源模块
+一次解码、一次缩放，将每一帧分发给所有已注册的检测器
+"""
+
+import time
+from typing import List, Iterator, Tuple, Optional, TYPE_CHECKING
+import numpy as np
+from loguru import logger
+
+from .frame_reader import FrameReader
+
+if TYPE_CHECKING:
+    from .base import BaseDetector, DetectionResult
+
+
+class FrameSource:
+    """单次解码帧源"""
+
+    def __init__(self, video_path: str, working_height: int = 240, buffer_size: int = 8):
+        """
+        初始化帧源
+
+        Args:
+            video_path: 视频文件路径
+            working_height: 工作分辨率高度，解码后统一缩放到该高度
+            buffer_size: 预解码缓冲区槽数
+        """
+        self.video_path = video_path
+        self.working_height = working_height
+        self.buffer_size = buffer_size
+        self.fps = 0.0
+        self.frame_count = 0
+        self.width = 0
+        self.height = 0
+        self._reader: Optional[FrameReader] = None
+        self.logger = logger.bind(component="FrameSource")
+
+    def open(self) -> bool:
+        """打开视频并启动后台解码"""
+        self._reader = FrameReader(
+            self.video_path, buffer_size=self.buffer_size, working_height=self.working_height
+        )
+        if not self._reader.open():
+            self._reader = None
+            return False
+
+        self.fps = self._reader.fps
+        self.frame_count = self._reader.frame_count
+        self.width = self._reader.width
+        self.height = self._reader.height
+        return True
+
+    def frames(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """逐帧生成 (帧号, 缩放后的BGR帧)，帧在取下一帧后即被复用"""
+        if self._reader is None and not self.open():
+            return
+        yield from self._reader
+
+    def release(self):
+        """释放视频资源"""
+        if self._reader is not None:
+            self._reader.release()
+            self._reader = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class SharedFramePipeline:
+    """共享解码流水线：一次解码，逐帧扇出到多个检测器"""
+
+    def __init__(self, detectors: List["BaseDetector"], working_height: Optional[int] = None):
+        """
+        初始化共享流水线
+
+        Args:
+            detectors: 检测器列表
+            working_height: 工作分辨率高度，默认取各检测器所需的最大值
+        """
+        self.detectors = detectors
+        self.working_height = working_height or max(
+            (detector.get_working_height() for detector in detectors), default=240
+        )
+        self.decode_wait_time = 0.0  # 等待解码线程的时间
+        self.wall_time = 0.0
+        self.logger = logger.bind(component="SharedFramePipeline")
+
+    def run(self, video_path: str) -> List["DetectionResult"]:
+        """
+        运行共享流水线
+
+        Args:
+            video_path: 视频文件路径
+
+        Returns:
+            各检测器的检测结果（评分出错的检测器不返回结果）
+        """
+        start_time = time.time()
+        self.decode_wait_time = 0.0
+        active = list(self.detectors)
+
+        with FrameSource(video_path, self.working_height) as source:
+            if not source.open():
+                return []
+
+            self.logger.info(
+                f"Shared decode: {source.frame_count} frames at {source.fps} FPS, "
+                f"{len(active)} detectors, working height {self.working_height}"
+            )
+
+            for detector in active:
+                detector.begin_stream(source.fps, source.frame_count)
+
+            frames = source.frames()
+            while active:
+                decode_start = time.time()
+                item = next(frames, None)
+                self.decode_wait_time += time.time() - decode_start
+                if item is None:
+                    break
+
+                _, frame = item
+                for detector in list(active):
+                    try:
+                        detector.score_frame(frame)
+                    except Exception as e:
+                        self.logger.error(f"Error in {detector.name}, dropping from shared pipeline: {e}")
+                        active.remove(detector)
+
+        results = [detector.end_stream() for detector in active]
+        for result in results:
+            # 分数按共享的工作分辨率计算，可能与检测器单独运行时不同
+            result.metadata['working_height'] = self.working_height
+        self.wall_time = time.time() - start_time
+        self.logger.info(
+            f"Shared pipeline completed in {self.wall_time:.2f}s (decode wait {self.decode_wait_time:.2f}s)"
+        )
+        return results
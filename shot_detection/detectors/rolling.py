@@ -0,0 +1,165 @@
+"""
+滑动窗口统计模块
+基于累积和的向量化窗口均值/标准差，以及逐个到达数据的流式版本
+"""
+
+from collections import deque
+from typing import List, Sequence, Tuple
+import numpy as np
+
+
+def _window_bounds(n: int, before: int, after: int) -> Tuple[np.ndarray, np.ndarray]:
+    """每个位置的窗口区间 [start, end)，在序列两端截断"""
+    index = np.arange(n)
+    start = np.maximum(index - before, 0)
+    end = np.minimum(index + after + 1, n)
+    return start, end
+
+
+def rolling_mean(values: Sequence[float], before: int, after: int) -> np.ndarray:
+    """
+    计算居中滑动窗口均值，窗口为 [i-before, i+after]，两端截断
+
+    Args:
+        values: 输入序列
+        before: 窗口向前包含的元素数
+        after: 窗口向后包含的元素数
+
+    Returns:
+        与输入等长的均值数组
+    """
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        return data
+
+    start, end = _window_bounds(data.size, before, after)
+    cumsum = np.concatenate(([0.0], np.cumsum(data)))
+    return (cumsum[end] - cumsum[start]) / (end - start)
+
+
+def rolling_mean_std(values: Sequence[float], before: int, after: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算居中滑动窗口均值和总体标准差，窗口为 [i-before, i+after]，两端截断
+
+    Args:
+        values: 输入序列
+        before: 窗口向前包含的元素数
+        after: 窗口向后包含的元素数
+
+    Returns:
+        (均值数组, 标准差数组)
+    """
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        return data, data
+
+    start, end = _window_bounds(data.size, before, after)
+    counts = end - start
+
+    # 先减去全局均值再累加，降低平方和相减时的精度损失
+    offset = data.mean()
+    centered = data - offset
+    cumsum = np.concatenate(([0.0], np.cumsum(centered)))
+    cumsum_sq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+
+    window_mean = (cumsum[end] - cumsum[start]) / counts
+    window_sq = (cumsum_sq[end] - cumsum_sq[start]) / counts
+    std = np.sqrt(np.maximum(window_sq - window_mean * window_mean, 0.0))
+
+    return window_mean + offset, std
+
+
+class StreamingWindowStats:
+    """流式滑动窗口统计
+
+    数据逐个到达，某个位置的窗口右侧收齐后立即输出该位置的均值和标准差，
+    结果与 rolling_mean_std 一致；内存只保留一个窗口的数据。
+    """
+
+    def __init__(self, before: int, after: int):
+        """
+        初始化流式统计
+
+        Args:
+            before: 窗口向前包含的元素数
+            after: 窗口向后包含的元素数
+        """
+        self.before = max(0, before)
+        self.after = max(0, after)
+        self._values = deque()
+        self._first_index = 0  # _values[0] 对应的位置
+        self._count = 0        # 已到达的元素数
+        self._emitted = 0      # 已输出统计的元素数
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def push(self, value: float) -> List[Tuple[int, float, float, float]]:
+        """
+        加入一个新值
+
+        Returns:
+            窗口已收齐的位置列表 (位置, 值, 均值, 标准差)
+        """
+        value = float(value)
+        self._values.append(value)
+        self._sum += value
+        self._sum_sq += value * value
+        self._count += 1
+
+        ready = self._count - 1 - self.after
+        if ready < self._emitted:
+            return []
+        return [self._emit(ready)]
+
+    def flush(self) -> List[Tuple[int, float, float, float]]:
+        """数据结束，输出剩余位置的统计（窗口右侧截断）"""
+        return [self._emit(index) for index in range(self._emitted, self._count)]
+
+    def _emit(self, index: int) -> Tuple[int, float, float, float]:
+        """输出指定位置的统计，窗口右端为最新到达的元素"""
+        window_start = max(0, index - self.before)
+        while self._first_index < window_start:
+            old = self._values.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+            self._first_index += 1
+
+        count = len(self._values)
+        mean = self._sum / count
+        variance = max(self._sum_sq / count - mean * mean, 0.0)
+        self._emitted = index + 1
+        return index, self._values[index - self._first_index], mean, variance ** 0.5
+
+
+class StreamingAdaptiveThreshold:
+    """流式自适应阈值：分数逐帧到达时判定超过 局部均值 + k·局部标准差 的位置"""
+
+    def __init__(self, before: int, after: int, std_factor: float = 2.0, min_score: float = 0.0):
+        """
+        初始化流式自适应阈值
+
+        Args:
+            before: 局部窗口向前包含的元素数
+            after: 局部窗口向后包含的元素数
+            std_factor: 标准差倍数
+            min_score: 全局最低分数
+        """
+        self.stats = StreamingWindowStats(before, after)
+        self.std_factor = std_factor
+        self.min_score = min_score
+
+    def push(self, score: float) -> List[Tuple[int, float, float, float, float]]:
+        """加入一个分数，返回新判定的命中 (位置, 分数, 阈值, 均值, 标准差)"""
+        return self._select(self.stats.push(score))
+
+    def flush(self) -> List[Tuple[int, float, float, float, float]]:
+        """数据结束，返回剩余位置中的命中"""
+        return self._select(self.stats.flush())
+
+    def _select(self, items: List[Tuple[int, float, float, float]]) -> List[Tuple[int, float, float, float, float]]:
+        hits = []
+        for index, score, mean, std in items:
+            threshold = mean + self.std_factor * std
+            if score > threshold and score > self.min_score:
+                hits.append((index, score, threshold, mean, std))
+        return hits
@@ -13,6 +13,8 @@ import requests
 import logging
 from dataclasses import dataclass, asdict
 
+from utils.fingerprint import file_fingerprint
+
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -39,6 +41,7 @@ class GeminiConfig:
     enable_cache: bool = True
     cache_dir: str = ".cache/gemini_analysis"
     cache_expiry: int = 7 * 24 * 3600  # 7天
+    cache_full_checksum: bool = False  # 校验和读取视频全部内容，默认只采样
 
     # 重试配置
     max_retries: int = 3
@@ -152,14 +155,8 @@ class GeminiVideoAnalyzer:
         }
 
     def _calculate_file_checksum(self, file_path: str) -> str:
-        """计算文件校验和"""
-        import hashlib
-
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        """计算文件校验和（采样内容指纹，同一文件在检查和保存缓存时只读取一次）"""
+        return file_fingerprint(file_path, full=self.config.cache_full_checksum)
 
     def _generate_cache_key(self, video_path: str, prompt: str, model_name: str) -> str:
         """生成缓存键"""
@@ -10,10 +10,19 @@ import json
 import time
 import uuid
 import os
+import posixpath
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, Iterable, List, Optional, Any, Set, Union
 from dataclasses import dataclass
 
+try:
+    from utils.draft_codec import load_draft, save_draft
+except ImportError:
+    # 从 jianying 目录直接运行脚本时，把项目根目录加入搜索路径
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from utils.draft_codec import load_draft, save_draft
+
 # 尝试导入yaml，如果失败则使用None
 try:
     import yaml
@@ -46,6 +55,182 @@ class MaterialRef:
     track_render_index: int = 0
 
 
+def normalize_material_path(path: Any) -> Any:
+    """统一路径分隔符并规整路径，Windows 盘符路径不区分大小写"""
+    if not isinstance(path, str) or not path:
+        return path
+    normalized = posixpath.normpath(path.replace("\\", "/"))
+    if len(normalized) >= 2 and normalized[1] == ":":
+        normalized = normalized.casefold()
+    return normalized
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class MaterialIndex:
+    """
+    素材索引
+
+    按对象身份索引 materials 中的每个素材：ID、规整后的文件路径和名称各有一张映射表，
+    可模糊搜索的字段按小写三元组建立倒排表。索引只用来缩小候选范围，
+    命中的素材会按原始字段再校验一次，因此查询结果与逐个扫描一致。
+
+    materials 各类型列表被替换、增加或删除元素后（按列表身份和长度判断）需要重建；
+    直接修改素材字段请通过 DraftContentManager.update_material_reference 以保持同步，
+    就地修改了查询返回的素材字典后需调用 DraftContentManager.refresh_material_index，
+    否则按新的 ID、名称、路径或文本查询找不到该素材。
+    """
+
+    TEXT_FIELDS = ("name", "file_path", "file_Path", "description", "extra_info")
+
+    def __init__(self, materials: Dict[str, List[Dict[str, Any]]]):
+        self._materials = materials
+        self._type_rank = {material_type: rank for rank, material_type in enumerate(materials)}
+        # id(素材) -> (类型, 素材, 序号, 索引时的键, 索引时的三元组)
+        self._entries: Dict[int, tuple] = {}
+        self._by_id: Dict[Any, Set[int]] = {}
+        self._by_path: Dict[Any, Set[int]] = {}
+        self._by_name: Dict[Any, Set[int]] = {}
+        self._grams: Dict[str, Dict[str, Set[int]]] = {field: {} for field in self.TEXT_FIELDS}
+        self._sequence = 0
+
+        for material_type, items in materials.items():
+            for material in items:
+                self.add(material_type, material)
+        self._signature = self._current_signature()
+
+    def _current_signature(self) -> tuple:
+        return tuple((material_type, id(items), len(items))
+                     for material_type, items in self._materials.items())
+
+    def is_current(self, materials: Dict[str, List[Dict[str, Any]]]) -> bool:
+        """索引是否仍对应这份 materials"""
+        return materials is self._materials and self._signature == self._current_signature()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _path_of(material: Dict[str, Any]) -> Any:
+        return material.get("file_path", "") or material.get("file_Path", "")
+
+    @staticmethod
+    def _hashable(value: Any) -> bool:
+        try:
+            hash(value)
+            return True
+        except TypeError:
+            return False
+
+    @staticmethod
+    def _discard(table: Dict[Any, Set[int]], value: Any, key: int):
+        bucket = table.get(value)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del table[value]
+
+    def add(self, material_type: str, material: Dict[str, Any]):
+        """索引一个素材（素材已在对应类型的列表中），重新索引时保留原来的顺序"""
+        key = id(material)
+        previous = self._entries.get(key)
+        self.remove(material)
+
+        keys = (material.get("id"), normalize_material_path(self._path_of(material)), material.get("name", ""))
+        for table, value in zip((self._by_id, self._by_path, self._by_name), keys):
+            if self._hashable(value):
+                table.setdefault(value, set()).add(key)
+
+        grams = {}
+        for field, postings in self._grams.items():
+            value = material.get(field)
+            if isinstance(value, str):
+                grams[field] = _trigrams(value.lower())
+                for gram in grams[field]:
+                    postings.setdefault(gram, set()).add(key)
+
+        if previous is not None:
+            sequence = previous[2]
+        else:
+            sequence = self._sequence
+            self._sequence += 1
+        self._entries[key] = (material_type, material, sequence, keys, grams)
+        self._signature = self._current_signature()
+
+    def remove(self, material: Dict[str, Any]):
+        """从索引中移除一个素材（按索引时的键清理，不受之后字段修改影响）"""
+        key = id(material)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        _, _, _, keys, grams = entry
+        for table, value in zip((self._by_id, self._by_path, self._by_name), keys):
+            if self._hashable(value):
+                self._discard(table, value, key)
+        for field, field_grams in grams.items():
+            for gram in field_grams:
+                self._discard(self._grams[field], gram, key)
+        self._signature = self._current_signature()
+
+    def _ordered(self, keys: Optional[Iterable[int]] = None,
+                 material_type: Optional[str] = None) -> List[tuple]:
+        """按素材在 materials 中的原始顺序（类型顺序、列表顺序）返回 (类型, 素材)"""
+        if keys is None:
+            entries = list(self._entries.values())
+        else:
+            entries = [self._entries[key] for key in keys if key in self._entries]
+        if material_type is not None:
+            entries = [entry for entry in entries if entry[0] == material_type]
+        entries.sort(key=lambda entry: (self._type_rank.get(entry[0], len(self._type_rank)), entry[2]))
+        return [(entry[0], entry[1]) for entry in entries]
+
+    def find_by_id(self, material_id: Any, material_type: Optional[str] = None) -> List[tuple]:
+        """ID 相同的素材"""
+        if not self._hashable(material_id):
+            return []
+        return [(t, m) for t, m in self._ordered(self._by_id.get(material_id, ()), material_type)
+                if m.get("id") == material_id]
+
+    def find_by_name(self, name: Any, material_type: Optional[str] = None) -> List[tuple]:
+        """名称相同的素材"""
+        if not self._hashable(name):
+            return []
+        return [(t, m) for t, m in self._ordered(self._by_name.get(name, ()), material_type)
+                if m.get("name", "") == name]
+
+    def find_by_path(self, path: Any) -> List[tuple]:
+        """规整后路径相同的素材"""
+        normalized = normalize_material_path(path)
+        if not self._hashable(normalized):
+            return []
+        return [(t, m) for t, m in self._ordered(self._by_path.get(normalized, ()))
+                if normalize_material_path(self._path_of(m)) == normalized]
+
+    def text_candidates(self, fields: Iterable[str], query_lower: str,
+                        material_type: Optional[str] = None) -> List[tuple]:
+        """
+        小写子串查询的候选素材
+
+        查询不少于3个字符且字段都有倒排表时，取各字段三元组倒排表交集的并集，
+        否则返回全部素材。调用方仍需按原始字段校验。
+        """
+        fields = list(fields)
+        query_grams = _trigrams(query_lower)
+        if not query_grams or any(field not in self._grams for field in fields):
+            return self._ordered(material_type=material_type)
+
+        candidates: Set[int] = set()
+        for field in fields:
+            postings = self._grams[field]
+            buckets = sorted((postings.get(gram, set()) for gram in query_grams), key=len)
+            if buckets[0]:
+                candidates.update(set.intersection(*buckets))
+        return self._ordered(candidates, material_type)
+
+
 class DraftContentManager:
     """剪映项目内容管理器"""
     
@@ -60,6 +245,7 @@ class DraftContentManager:
         self.content_file_path = self.project_path / "draft_content.json"
         self.project_name = self.project_path.name
         self._content_data = None
+        self._material_index: Optional[MaterialIndex] = None
         self._config = self._load_config()
 
     def _load_config(self) -> Dict[str, Any]:
@@ -121,8 +307,7 @@ class DraftContentManager:
         """加载内容数据文件"""
         if self.content_file_path.exists():
             try:
-                with open(self.content_file_path, 'r', encoding='utf-8') as f:
-                    self._content_data = json.load(f)
+                self._content_data = load_draft(self.content_file_path)
                 return self._content_data
             except Exception as e:
                 print(f"加载内容数据文件失败: {e}")
@@ -294,8 +479,7 @@ class DraftContentManager:
             return False
 
         try:
-            with open(template_file, 'r', encoding='utf-8') as f:
-                template_data = json.load(f)
+            template_data = load_draft(template_file)
 
             # 验证模板数据结构
             if not self._validate_template_structure(template_data):
@@ -678,6 +862,20 @@ class DraftContentManager:
         }
         self._update_modification_time()
 
+    def _get_material_index(self) -> MaterialIndex:
+        """素材索引，首次查询或 materials 被整体替换后重建"""
+        if self._content_data is None:
+            self.load_content_data()
+
+        materials = self._content_data.setdefault("materials", {})
+        if self._material_index is None or not self._material_index.is_current(materials):
+            self._material_index = MaterialIndex(materials)
+        return self._material_index
+
+    def refresh_material_index(self):
+        """就地修改素材字典（而不是通过 update_material_reference）后重建素材索引"""
+        self._material_index = None
+
     def add_material_reference(self, material_type: str, material_data: Dict[str, Any]) -> str:
         """
         添加素材引用到materials中
@@ -699,7 +897,9 @@ class DraftContentManager:
         if "id" not in material_data:
             material_data["id"] = str(uuid.uuid4()).upper()
 
+        index = self._get_material_index()
         self._content_data["materials"][material_type].append(material_data)
+        index.add(material_type, material_data)
         self._update_modification_time()
 
         return material_data["id"]
@@ -723,22 +923,26 @@ class DraftContentManager:
             print(f"不支持的素材类型: {material_type}")
             return False
 
-        materials = self._content_data["materials"][material_type]
-
-        # 查找要更新的素材
-        for material in materials:
-            if material.get("id") == material_id:
-                # 更新素材信息
-                for key, value in updates.items():
-                    material[key] = value
-
-                self._update_modification_time()
-                print(f"成功更新素材 {material_id} 的 {len(updates)} 个字段")
-                return True
+        if self._apply_material_update(material_type, material_id, updates):
+            self._update_modification_time()
+            print(f"成功更新素材 {material_id} 的 {len(updates)} 个字段")
+            return True
 
         print(f"未找到素材: {material_id} (类型: {material_type})")
         return False
 
+    def _apply_material_update(self, material_type: str, material_id: str, updates: Dict[str, Any]) -> bool:
+        """通过索引定位素材并更新字段，同步索引（不更新修改时间）"""
+        index = self._get_material_index()
+        matches = index.find_by_id(material_id, material_type)
+        if not matches:
+            return False
+
+        material = matches[0][1]
+        material.update(updates)
+        index.add(material_type, material)
+        return True
+
     def get_material_reference(self, material_type: str, material_id: str) -> Optional[Dict[str, Any]]:
         """
         获取指定的素材引用信息
@@ -749,6 +953,9 @@ class DraftContentManager:
 
         Returns:
             Dict: 素材信息，如果未找到返回None
+
+        就地修改返回的素材字典不会更新素材索引，请改用 update_material_reference，
+        或修改后调用 refresh_material_index。
         """
         if self._content_data is None:
             self.load_content_data()
@@ -756,13 +963,8 @@ class DraftContentManager:
         if material_type not in self._content_data["materials"]:
             return None
 
-        materials = self._content_data["materials"][material_type]
-
-        for material in materials:
-            if material.get("id") == material_id:
-                return material
-
-        return None
+        matches = self._get_material_index().find_by_id(material_id, material_type)
+        return matches[0][1] if matches else None
 
     def update_material_reference_batch(self, updates_list: List[Dict[str, Any]]) -> Dict[str, int]:
         """
@@ -779,7 +981,9 @@ class DraftContentManager:
 
         success_count = 0
         failed_count = 0
+        materials = self._content_data["materials"]
 
+        # 每项通过ID索引直接定位，整批只更新一次修改时间
         for update_item in updates_list:
             material_type = update_item.get("material_type")
             material_id = update_item.get("material_id")
@@ -790,12 +994,14 @@ class DraftContentManager:
                 failed_count += 1
                 continue
 
-            success = self.update_material_reference(material_type, material_id, updates)
-            if success:
+            if material_type in materials and self._apply_material_update(material_type, material_id, updates):
                 success_count += 1
             else:
+                print(f"未找到素材: {material_id} (类型: {material_type})")
                 failed_count += 1
 
+        if success_count:
+            self._update_modification_time()
         print(f"批量更新完成: 成功 {success_count}, 失败 {failed_count}")
         return {"success": success_count, "failed": failed_count}
 
@@ -811,13 +1017,20 @@ class DraftContentManager:
         if self._content_data is None:
             self.load_content_data()
 
-        materials = self._content_data.get("materials", {}).get(material_type, [])
-        for i, material in enumerate(materials):
-            if material.get("id") == material_id:
+        index = self._get_material_index()
+        matches = index.find_by_id(material_id, material_type)
+        if not matches:
+            return False
+
+        material = matches[0][1]
+        materials = self._content_data["materials"][material_type]
+        for i, item in enumerate(materials):
+            if item is material:
                 del materials[i]
-                self._update_modification_time()
-                return True
-        return False
+                break
+        index.remove(material)
+        self._update_modification_time()
+        return True
 
     def find_material_references(self, material_id: str) -> List[Dict[str, Any]]:
         """
@@ -828,21 +1041,16 @@ class DraftContentManager:
 
         Returns:
             List[Dict]: 包含素材类型和素材信息的列表
+
+        查询走素材索引：就地修改过的素材需先调用 refresh_material_index。
         """
         if self._content_data is None:
             self.load_content_data()
 
-        references = []
-
-        for material_type, materials in self._content_data["materials"].items():
-            for material in materials:
-                if material.get("id") == material_id:
-                    references.append({
-                        "material_type": material_type,
-                        "material_data": material
-                    })
-
-        return references
+        return [
+            {"material_type": material_type, "material_data": material}
+            for material_type, material in self._get_material_index().find_by_id(material_id)
+        ]
 
     def find_material_reference_by_material_name(self, material_name: str, material_type: str = None, exact_match: bool = True) -> List[Dict[str, Any]]:
         """
@@ -855,41 +1063,28 @@ class DraftContentManager:
 
         Returns:
             List[Dict]: 匹配的素材引用列表，每个元素包含 material_type, material_data
+
+        查询走素材索引：就地修改过的素材需先调用 refresh_material_index。
         """
         if self._content_data is None:
             self.load_content_data()
 
-        matches = []
-
-        # 确定要搜索的素材类型
-        search_types = [material_type] if material_type else self._content_data["materials"].keys()
+        index = self._get_material_index()
+        search_type = material_type or None
 
-        for search_type in search_types:
-            if search_type not in self._content_data["materials"]:
-                continue
-
-            materials = self._content_data["materials"][search_type]
-
-            for material in materials:
-                material_name_in_data = material.get("name", "")
-
-                # 根据匹配模式进行比较
-                if exact_match:
-                    # 精确匹配
-                    if material_name_in_data == material_name:
-                        matches.append({
-                            "material_type": search_type,
-                            "material_data": material
-                        })
-                else:
-                    # 模糊匹配（不区分大小写）
-                    if material_name.lower() in material_name_in_data.lower():
-                        matches.append({
-                            "material_type": search_type,
-                            "material_data": material
-                        })
+        if exact_match:
+            # 精确匹配
+            found = index.find_by_name(material_name, search_type)
+        else:
+            # 模糊匹配（不区分大小写），候选来自名称三元组索引
+            query = material_name.lower()
+            found = [
+                (found_type, material)
+                for found_type, material in index.text_candidates(["name"], query, search_type)
+                if isinstance(material.get("name", ""), str) and query in material.get("name", "").lower()
+            ]
 
-        return matches
+        return [{"material_type": found_type, "material_data": material} for found_type, material in found]
 
     def find_material_reference_by_file_path(self, file_path: str, exact_match: bool = True) -> List[Dict[str, Any]]:
         """
@@ -897,36 +1092,31 @@ class DraftContentManager:
 
         Args:
             file_path: 要查找的文件路径
-            exact_match: 是否精确匹配，False时进行模糊匹配
+            exact_match: 是否精确匹配（统一分隔符、规整路径后比较），False时进行模糊匹配
 
         Returns:
             List[Dict]: 匹配的素材引用列表
+
+        查询走素材索引：就地修改过的素材需先调用 refresh_material_index。
         """
         if self._content_data is None:
             self.load_content_data()
 
-        matches = []
+        index = self._get_material_index()
 
-        for material_type, materials in self._content_data["materials"].items():
-            for material in materials:
+        if exact_match:
+            # 精确匹配（分隔符和 . / .. 规整后比较）
+            found = index.find_by_path(file_path)
+        else:
+            # 模糊匹配（路径包含），候选来自路径字段的三元组索引
+            query = file_path.lower()
+            found = []
+            for material_type, material in index.text_candidates(["file_path", "file_Path"], query):
                 material_file_path = material.get("file_path", "") or material.get("file_Path", "")
+                if isinstance(material_file_path, str) and query in material_file_path.lower():
+                    found.append((material_type, material))
 
-                if exact_match:
-                    # 精确匹配
-                    if material_file_path == file_path:
-                        matches.append({
-                            "material_type": material_type,
-                            "material_data": material
-                        })
-                else:
-                    # 模糊匹配（路径包含）
-                    if file_path.lower() in material_file_path.lower():
-                        matches.append({
-                            "material_type": material_type,
-                            "material_data": material
-                        })
-
-        return matches
+        return [{"material_type": material_type, "material_data": material} for material_type, material in found]
 
     def find_material_reference_by_attributes(self, search_criteria: Dict[str, Any], match_all: bool = True) -> List[Dict[str, Any]]:
         """
@@ -988,6 +1178,8 @@ class DraftContentManager:
 
         Returns:
             List[Dict]: 匹配的素材引用列表
+
+        查询走素材索引：就地修改过的素材需先调用 refresh_material_index。
         """
         if self._content_data is None:
             self.load_content_data()
@@ -998,26 +1190,20 @@ class DraftContentManager:
         matches = []
         query_lower = query.lower()
 
-        for material_type, materials in self._content_data["materials"].items():
-            for material in materials:
-                found = False
-
-                for field in search_fields:
-                    field_value = material.get(field, "")
-                    if isinstance(field_value, str) and query_lower in field_value.lower():
-                        found = True
-                        break
-
-                if found:
-                    matches.append({
-                        "material_type": material_type,
-                        "material_data": material,
-                        "matched_fields": [
-                            field for field in search_fields
-                            if isinstance(material.get(field, ""), str) and
-                            query_lower in material.get(field, "").lower()
-                        ]
-                    })
+        # 三元组索引给出候选素材，再逐字段校验
+        for material_type, material in self._get_material_index().text_candidates(search_fields, query_lower):
+            matched_fields = [
+                field for field in search_fields
+                if isinstance(material.get(field, ""), str) and
+                query_lower in material.get(field, "").lower()
+            ]
+
+            if matched_fields:
+                matches.append({
+                    "material_type": material_type,
+                    "material_data": material,
+                    "matched_fields": matched_fields
+                })
 
         return matches
 
@@ -1188,9 +1374,8 @@ class DraftContentManager:
             # 确保项目目录存在
             self.project_path.mkdir(parents=True, exist_ok=True)
 
-            # 保存文件
-            with open(self.content_file_path, 'w', encoding='utf-8') as f:
-                json.dump(self._content_data, f, ensure_ascii=False, indent=4)
+            # 原子写入，默认紧凑格式
+            save_draft(self.content_file_path, self._content_data)
 
             return True
         except Exception as e:
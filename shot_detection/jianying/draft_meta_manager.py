@@ -15,6 +15,16 @@ from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass
 import subprocess
 
+try:
+    from utils.probe_index import get_probe_index
+    from utils.draft_codec import load_draft, save_draft
+except ImportError:
+    # 从 jianying 目录直接运行脚本时，把项目根目录加入搜索路径
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from utils.probe_index import get_probe_index
+    from utils.draft_codec import load_draft, save_draft
+
 
 @dataclass
 class MaterialInfo:
@@ -59,8 +69,7 @@ class DraftMetaManager:
         """加载元数据文件"""
         if self.meta_file_path.exists():
             try:
-                with open(self.meta_file_path, 'r', encoding='utf-8') as f:
-                    self._meta_data = json.load(f)
+                self._meta_data = load_draft(self.meta_file_path)
             except Exception as e:
                 print(f"加载元数据文件失败: {e}")
                 self._create_default_meta_data()
@@ -162,8 +171,7 @@ class DraftMetaManager:
         """加载虚拟存储数据文件"""
         if self.virtual_store_file_path.exists():
             try:
-                with open(self.virtual_store_file_path, 'r', encoding='utf-8') as f:
-                    self._virtual_store_data = json.load(f)
+                self._virtual_store_data = load_draft(self.virtual_store_file_path)
                 return self._virtual_store_data
             except Exception as e:
                 print(f"加载虚拟存储数据文件失败: {e}")
@@ -290,21 +298,11 @@ class DraftMetaManager:
                 break
 
     def _get_video_info(self, video_path: Path) -> Optional[Dict[str, Any]]:
-        """使用ffprobe获取详细的视频信息"""
+        """通过元数据索引获取详细的视频信息（同一文件只运行一次ffprobe）"""
         try:
-            # 使用ffprobe获取详细的视频信息
-            result = subprocess.run([
-                'ffprobe',
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
-                '-show_entries', 'stream=codec_type,width,height,duration,bit_rate,codec_name,pix_fmt,r_frame_rate:format=duration,bit_rate,size',
-                str(video_path)
-            ], capture_output=True, text=True, timeout=15)
+            probe_data = get_probe_index().probe(video_path)
 
-            if result.returncode == 0:
-                probe_data = json.loads(result.stdout)
+            if probe_data is not None:
                 video_info = {}
 
                 # 获取格式信息
@@ -376,12 +374,6 @@ class DraftMetaManager:
 
                 return video_info
 
-        except subprocess.TimeoutExpired:
-            print(f"ffprobe超时: {video_path.name}")
-        except subprocess.CalledProcessError as e:
-            print(f"ffprobe执行失败: {e}")
-        except json.JSONDecodeError as e:
-            print(f"ffprobe输出解析失败: {e}")
         except Exception as e:
             print(f"获取视频信息失败: {e}")
 
@@ -586,14 +578,12 @@ class DraftMetaManager:
             # 确保目录存在
             self.meta_file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # 保存主元数据文件
-            with open(self.meta_file_path, 'w', encoding='utf-8') as f:
-                json.dump(self._meta_data, f, ensure_ascii=False, indent=4)
+            # 保存主元数据文件（原子写入，默认紧凑格式）
+            save_draft(self.meta_file_path, self._meta_data)
 
             # 保存虚拟存储数据文件
             if self._virtual_store_data is not None:
-                with open(self.virtual_store_file_path, 'w', encoding='utf-8') as f:
-                    json.dump(self._virtual_store_data, f, ensure_ascii=False, indent=4)
+                save_draft(self.virtual_store_file_path, self._virtual_store_data)
 
             return True
 
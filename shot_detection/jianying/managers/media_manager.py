@@ -9,6 +9,7 @@ from typing import Dict, List, Any, Optional
 from loguru import logger
 
 from ..media_scanner import MediaScanner as LegacyMediaScanner
+from utils.probe_index import get_probe_index, first_stream, parse_rate
 
 
 class MediaManager:
@@ -108,20 +109,25 @@ class MediaManager:
         recursive = config.get('recursive', self.media_config['scan_recursively'])
         pattern = "**/*" if recursive else "*"
         
-        for file_path in directory.glob(pattern):
-            if file_path.is_file():
-                file_info = self._analyze_media_file(file_path)
+        files = [file_path for file_path in directory.glob(pattern) if file_path.is_file()]
+        
+        # 批量查询元数据索引，未命中的视频并发探测
+        video_formats = self.media_config["supported_video_formats"]
+        get_probe_index().probe_many(f for f in files if f.suffix.lower() in video_formats)
+        
+        for file_path in files:
+            file_info = self._analyze_media_file(file_path)
+            
+            if file_info["valid"]:
+                media_type = file_info["type"]
+                if media_type in media_files:
+                    media_files[media_type].append(file_info)
+                    statistics[f"{media_type[:-1]}_files"] += 1
+                    statistics["total_size"] += file_info["size"]
                 
-                if file_info["valid"]:
-                    media_type = file_info["type"]
-                    if media_type in media_files:
-                        media_files[media_type].append(file_info)
-                        statistics[f"{media_type[:-1]}_files"] += 1
-                        statistics["total_size"] += file_info["size"]
-                    
-                    statistics["total_files"] += 1
-                else:
-                    statistics["skipped_files"] += 1
+                statistics["total_files"] += 1
+            else:
+                statistics["skipped_files"] += 1
         
         return {
             "success": True,
@@ -185,14 +191,18 @@ class MediaManager:
         }
         
         try:
-            # 这里应该使用实际的视频分析工具
-            # 暂时返回模拟数据
-            metadata.update({
-                "duration": 30.0,
-                "resolution": (1920, 1080),
-                "fps": 30.0,
-                "codec": "h264"
-            })
+            data = get_probe_index().probe(file_path)
+            stream = first_stream(data, 'video')
+            if stream:
+                duration = data.get('format', {}).get('duration') or stream.get('duration') or 0.0
+                metadata.update({
+                    "duration": float(duration),
+                    "resolution": (int(stream.get('width', 0)), int(stream.get('height', 0))),
+                    "fps": parse_rate(stream.get('r_frame_rate')),
+                    "codec": stream.get('codec_name', 'unknown')
+                })
+            else:
+                self.logger.warning(f"No video stream found in {file_path}")
         except Exception as e:
             self.logger.warning(f"Failed to get video metadata for {file_path}: {e}")
         
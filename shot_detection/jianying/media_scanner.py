@@ -7,14 +7,27 @@
 
 import os
 import json
-import hashlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Union, Any
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Union, Any, Iterable, Iterator, Tuple
+from dataclasses import dataclass, asdict, field
 import mimetypes
 import time
 from datetime import datetime
 
+try:
+    from utils.probe_index import ProbeIndex, get_probe_index, first_stream, parse_rate
+    from utils.fingerprint import file_fingerprint
+    from utils.perceptual_index import PerceptualIndex, format_hashes
+except ImportError:
+    # 从 jianying 目录直接运行脚本时，把项目根目录加入搜索路径
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from utils.probe_index import ProbeIndex, get_probe_index, first_stream, parse_rate
+    from utils.fingerprint import file_fingerprint
+    from utils.perceptual_index import PerceptualIndex, format_hashes
+
 
 @dataclass
 class MediaInfo:
@@ -33,6 +46,271 @@ class MediaInfo:
     height: Optional[int] = None     # 视频/图片高度
     bitrate: Optional[int] = None    # 比特率
     fps: Optional[float] = None      # 帧率（视频）
+    phash: Optional[str] = None      # 采样帧的感知哈希（视频，逗号分隔的十六进制）
+
+
+class ScanCheckpoint:
+    """
+    扫描断点文件（JSON Lines）
+
+    首行记录扫描设置，之后每行一个已完成的文件（路径、大小、修改时间、媒体信息）。
+    中断后重新扫描时，大小和修改时间未变的文件直接使用断点中的结果。
+    """
+
+    def __init__(self, path: Union[str, Path], settings: Dict[str, Any]):
+        """
+        打开断点文件
+
+        Args:
+            path: 断点文件路径
+            settings: 扫描设置，与断点中记录的不同时丢弃旧断点
+        """
+        self.path = Path(path)
+        self.settings = settings
+        self.done: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+
+        resumed = self._load()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 行缓冲：每条记录写完即落盘
+        self._file = open(self.path, 'a' if resumed else 'w', encoding='utf-8', buffering=1)
+        if not resumed:
+            self._file.write(json.dumps({'settings': settings}, ensure_ascii=False) + '\n')
+
+    def _load(self) -> bool:
+        """读取已有断点，返回是否可以续用"""
+        if not self.path.exists():
+            return False
+
+        try:
+            content = self.path.read_bytes()
+            # 中断时可能留下写了一半的最后一行
+            complete = content[:content.rfind(b'\n') + 1]
+            lines = complete.decode('utf-8').splitlines()
+            if not lines or json.loads(lines[0]).get('settings') != self.settings:
+                return False
+
+            for line in lines[1:]:
+                record = json.loads(line)
+                self.done[record['path']] = (record['size'], record['mtime_ns'], record['media'])
+
+            if len(complete) != len(content):
+                self.path.write_bytes(complete)
+            return True
+
+        except (OSError, ValueError, KeyError) as e:
+            print(f"断点文件无效，重新扫描 {self.path}: {e}")
+            self.done.clear()
+            return False
+
+    def get(self, path: str, stat: os.stat_result) -> Optional['MediaInfo']:
+        """断点中大小和修改时间均未变化的文件的媒体信息"""
+        record = self.done.get(path)
+        if record is None or (record[0], record[1]) != (stat.st_size, stat.st_mtime_ns):
+            return None
+        return MediaInfo(**record[2])
+
+    def record(self, path: str, stat: os.stat_result, media_info: 'MediaInfo'):
+        """记录一个已完成的文件"""
+        self._file.write(json.dumps({
+            'path': path,
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'media': asdict(media_info)
+        }, ensure_ascii=False) + '\n')
+
+    def close(self, completed: bool = False):
+        """关闭断点文件，扫描完成时删除"""
+        self._file.close()
+        if completed:
+            self.path.unlink(missing_ok=True)
+
+
+@dataclass
+class JournalEntry:
+    """变更日志遍历到的一个文件"""
+    path: str
+    size: int
+    mtime_ns: int
+    status: str  # added, changed, unchanged
+    stat: Optional[os.stat_result] = None  # 复用目录且不检查文件时为空
+
+
+class DirectoryJournal:
+    """
+    目录变更日志（JSON）
+
+    记录每个目录的修改时间、子目录和符合条件的文件（大小、修改时间）。
+    目录的修改时间只在增删、重命名条目时变化，未变化的目录直接复用记录的
+    文件列表而不再列目录，只有变化的目录才重新 scandir。
+    """
+
+    # 修改时间距今不足该时长的目录不记录修改时间：同一时间刻度内的后续修改
+    # 不会改变修改时间，下次扫描时强制重新列出
+    RACY_WINDOW_NS = 2_000_000_000
+
+    def __init__(self, path: Union[str, Path], settings: Dict[str, Any]):
+        """
+        打开变更日志
+
+        Args:
+            path: 日志文件路径
+            settings: 扫描设置，与日志中记录的不同时丢弃旧日志
+        """
+        self.path = Path(path)
+        self.settings = settings
+        self.directories: Dict[str, Dict[str, Any]] = self._load()
+        self.removed: List[str] = []
+        self.stats = {'scanned_dirs': 0, 'reused_dirs': 0}
+        self._next: Dict[str, Dict[str, Any]] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """读取已有日志，设置不一致或文件损坏时返回空记录"""
+        if not self.path.exists():
+            return {}
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('settings') != self.settings:
+                return {}
+            return data['directories']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"变更日志无效，重新扫描 {self.path}: {e}")
+            return {}
+
+    def walk(self, directory: Union[str, Path], recursive: bool = True,
+             file_filter: Optional[callable] = None,
+             check_files: bool = True) -> Iterator[JournalEntry]:
+        """
+        遍历目录，逐个产出文件及其相对上次日志的状态
+
+        目录未变化时复用记录的文件列表；check_files 为真时仍会 stat 这些文件，
+        以发现原地覆盖（目录修改时间不变）的文件。遍历结束后 removed 为上次
+        存在、本次不存在的文件。与 MediaScanner.iter_files 一致跳过以 . 开头的
+        条目，不跟随目录符号链接。
+
+        Args:
+            directory: 根目录
+            recursive: 是否递归子目录
+            file_filter: 按文件名筛选需要记录的文件
+            check_files: 是否检查未变化目录中的文件
+        """
+        self._next = {}
+        self.removed = []
+        self.stats = {'scanned_dirs': 0, 'reused_dirs': 0}
+        now_ns = time.time_ns()
+
+        stack = [str(directory)]
+        while stack:
+            current = stack.pop()
+            try:
+                mtime_ns = os.stat(current).st_mtime_ns
+            except OSError as e:
+                print(f"无法读取目录 {current}: {e}")
+                continue
+
+            record = self.directories.get(current)
+            files: Dict[str, List[int]] = {}
+
+            if record is not None and record['mtime_ns'] == mtime_ns:
+                self.stats['reused_dirs'] += 1
+                subdirs = record['dirs']
+                for name, (size, file_mtime_ns) in record['files'].items():
+                    path = os.path.join(current, name)
+                    stat = None
+                    if check_files:
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        status = ('unchanged' if (stat.st_size, stat.st_mtime_ns) == (size, file_mtime_ns)
+                                  else 'changed')
+                        size, file_mtime_ns = stat.st_size, stat.st_mtime_ns
+                    else:
+                        status = 'unchanged'
+                    files[name] = [size, file_mtime_ns]
+                    yield JournalEntry(path, size, file_mtime_ns, status, stat)
+            else:
+                self.stats['scanned_dirs'] += 1
+                previous_files = record['files'] if record else {}
+                subdirs = []
+                try:
+                    with os.scandir(current) as entries:
+                        for entry in entries:
+                            if entry.name.startswith('.'):
+                                continue
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    subdirs.append(entry.name)
+                                elif entry.is_file() and (file_filter is None or file_filter(entry.name)):
+                                    stat = entry.stat()
+                                    old = previous_files.get(entry.name)
+                                    if old is None:
+                                        status = 'added'
+                                    elif tuple(old) == (stat.st_size, stat.st_mtime_ns):
+                                        status = 'unchanged'
+                                    else:
+                                        status = 'changed'
+                                    files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+                                    yield JournalEntry(entry.path, stat.st_size, stat.st_mtime_ns, status, stat)
+                            except OSError:
+                                continue
+                except OSError as e:
+                    print(f"无法读取目录 {current}: {e}")
+                    continue
+
+            racy = now_ns - mtime_ns < self.RACY_WINDOW_NS
+            self._next[current] = {'mtime_ns': None if racy else mtime_ns, 'dirs': subdirs, 'files': files}
+            if recursive:
+                # 逆序入栈，按目录内的原有顺序深度优先遍历
+                stack.extend(os.path.join(current, name) for name in reversed(subdirs))
+
+        for dir_path, record in self.directories.items():
+            current_files = self._next.get(dir_path, {}).get('files', {})
+            self.removed.extend(os.path.join(dir_path, name) for name in record['files']
+                                if name not in current_files)
+
+    def save(self):
+        """保存本次遍历的结果（先写临时文件再替换，避免留下损坏的日志）"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'settings': self.settings, 'directories': self._next}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.directories = self._next
+
+
+@dataclass
+class ScanDiff:
+    """增量扫描结果：相对上次清单新增、修改和删除的媒体文件"""
+    added: List[MediaInfo] = field(default_factory=list)
+    changed: List[MediaInfo] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)  # 文件路径
+    unchanged: int = 0
+    journal: Optional[DirectoryJournal] = field(default=None, repr=False, compare=False)  # 待提交的变更日志
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def commit_journal(self):
+        """保存变更日志；应在新清单保存成功之后调用，否则日志会超前于清单"""
+        if self.journal is not None:
+            self.journal.save()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可保存的字典"""
+        return {
+            'summary': {
+                'added': len(self.added),
+                'changed': len(self.changed),
+                'removed': len(self.removed),
+                'unchanged': self.unchanged
+            },
+            'added': [asdict(media) for media in self.added],
+            'changed': [asdict(media) for media in self.changed],
+            'removed': self.removed
+        }
 
 
 class MediaScanner:
@@ -54,16 +332,28 @@ class MediaScanner:
         '.webp', '.svg', '.ico', '.psd', '.raw', '.cr2', '.nef'
     }
     
-    def __init__(self, include_hash: bool = False, include_metadata: bool = True):
+    def __init__(self, include_hash: bool = False, include_metadata: bool = True,
+                 probe_index: Optional[ProbeIndex] = None, max_workers: int = 8,
+                 full_hash: bool = False, include_phash: bool = False):
         """
         初始化扫描器
         
         Args:
             include_hash: 是否计算文件哈希值
             include_metadata: 是否提取媒体元数据
+            probe_index: 媒体元数据索引，默认使用进程内共享的索引
+            max_workers: 并发读取元数据和计算哈希的线程数
+            full_hash: 哈希读取文件全部内容，默认只采样文件头、尾和中间若干块
+            include_phash: 是否计算视频的感知哈希（用于发现重新上传、转码的近重复片段）
         """
         self.include_hash = include_hash
+        self.full_hash = full_hash
+        self.include_phash = include_phash
+        # 扫描到的视频的近重复索引，帧哈希同时写入元数据索引供其他模块复用
+        self.perceptual_index = PerceptualIndex()
         self.include_metadata = include_metadata
+        self.probe_index = probe_index or get_probe_index()
+        self.max_workers = max(1, max_workers)
         
         # 初始化mimetypes
         mimetypes.init()
@@ -91,20 +381,16 @@ class MediaScanner:
     
     def calculate_file_hash(self, file_path: Path) -> str:
         """
-        计算文件MD5哈希值
+        计算文件内容指纹（BLAKE2b，默认采样，full_hash 时读取全部内容）
         
         Args:
             file_path: 文件路径
             
         Returns:
-            MD5哈希值
+            32位十六进制指纹
         """
-        hash_md5 = hashlib.md5()
         try:
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            return file_fingerprint(file_path, full=self.full_hash)
         except Exception:
             return None
     
@@ -134,25 +420,11 @@ class MediaScanner:
         return metadata
     
     def _get_ffprobe_info(self, file_path: Path) -> Dict[str, Any]:
-        """使用ffprobe获取视频/音频信息"""
-        import subprocess
-        import json as json_module
-        
+        """通过元数据索引获取视频/音频信息"""
         try:
-            cmd = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-print_format', 'json',
-                '-show_format',
-                '-show_streams',
-                str(file_path)
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            data = self.probe_index.probe(file_path)
             
-            if result.returncode == 0:
-                data = json_module.loads(result.stdout)
-                
+            if data is not None:
                 metadata = {}
                 
                 # 获取格式信息
@@ -163,20 +435,16 @@ class MediaScanner:
                     if 'bit_rate' in format_info:
                         metadata['bitrate'] = int(format_info['bit_rate'])
                 
-                # 获取流信息
-                if 'streams' in data:
-                    for stream in data['streams']:
-                        if stream.get('codec_type') == 'video':
-                            if 'width' in stream:
-                                metadata['width'] = stream['width']
-                            if 'height' in stream:
-                                metadata['height'] = stream['height']
-                            if 'r_frame_rate' in stream:
-                                fps_str = stream['r_frame_rate']
-                                if '/' in fps_str:
-                                    num, den = fps_str.split('/')
-                                    if int(den) != 0:
-                                        metadata['fps'] = float(num) / float(den)
+                # 获取视频流信息
+                stream = first_stream(data, 'video')
+                if stream:
+                    if 'width' in stream:
+                        metadata['width'] = stream['width']
+                    if 'height' in stream:
+                        metadata['height'] = stream['height']
+                    fps = parse_rate(stream.get('r_frame_rate'))
+                    if fps:
+                        metadata['fps'] = fps
                 
                 return metadata
         except Exception:
@@ -200,12 +468,13 @@ class MediaScanner:
         
         return {}
     
-    def scan_file(self, file_path: Path) -> Optional[MediaInfo]:
+    def scan_file(self, file_path: Path, stat: Optional[os.stat_result] = None) -> Optional[MediaInfo]:
         """
         扫描单个文件
         
         Args:
             file_path: 文件路径
+            stat: 已读取的文件状态（目录遍历时已获得），为空时重新读取
             
         Returns:
             媒体信息对象或None
@@ -217,7 +486,8 @@ class MediaScanner:
         
         try:
             # 获取文件基本信息
-            stat = file_path.stat()
+            if stat is None:
+                stat = file_path.stat()
             
             # 获取MIME类型
             mime_type, _ = mimetypes.guess_type(str(file_path))
@@ -250,86 +520,319 @@ class MediaScanner:
                     media_info.bitrate = metadata.get('bitrate')
                     media_info.fps = metadata.get('fps')
             
+            # 计算感知哈希
+            if self.include_phash and media_type == 'video':
+                hashes = self.perceptual_index.index_files(
+                    [media_info.file_path], probe_index=self.probe_index, max_workers=1
+                ).get(media_info.file_path)
+                if hashes:
+                    media_info.phash = format_hashes(hashes)
+            
             return media_info
             
         except Exception as e:
             print(f"扫描文件失败 {file_path}: {e}")
             return None
     
-    def scan_directory(self, directory: Union[str, Path], 
-                      recursive: bool = True,
-                      progress_callback: Optional[callable] = None) -> List[MediaInfo]:
+    def iter_files(self, directory: Union[str, Path], recursive: bool = True) -> Iterator[os.DirEntry]:
         """
-        扫描目录
-        
+        基于 os.scandir 逐个产出目录下的文件，不预先构建完整的文件列表
+
+        与 glob 一致跳过以 . 开头的文件和目录；不跟随目录符号链接，避免循环。
+
+        Args:
+            directory: 目录路径
+            recursive: 是否递归子目录
+        """
+        stack = [str(directory)]
+        while stack:
+            current = stack.pop()
+            subdirs = []
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.name.startswith('.'):
+                            continue
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if recursive:
+                                    subdirs.append(entry.path)
+                            elif entry.is_file():
+                                yield entry
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"无法读取目录 {current}: {e}")
+                continue
+            # 逆序入栈，按目录内的原有顺序深度优先遍历
+            stack.extend(reversed(subdirs))
+
+    def iter_scan(self, directory: Union[str, Path],
+                  recursive: bool = True,
+                  progress_callback: Optional[callable] = None,
+                  checkpoint_path: Optional[Union[str, Path]] = None) -> Iterator[MediaInfo]:
+        """
+        流式扫描目录，按遍历顺序逐个产出媒体信息
+
+        读取元数据和计算哈希在有界线程池中并发进行，同时在途的文件数有上限，
+        调用方可以在扫描结束前就开始处理结果。设置断点文件后，中断再扫描时
+        跳过已完成且未修改的文件；完整扫描结束后删除断点文件。
+
         Args:
             directory: 目录路径
             recursive: 是否递归扫描子目录
-            progress_callback: 进度回调函数
-            
-        Returns:
-            媒体信息列表
+            progress_callback: 进度回调 (已处理文件数, 已发现文件数, 文件路径)
+            checkpoint_path: 断点文件路径
+
+        Yields:
+            媒体信息
         """
         directory = Path(directory)
         
         if not directory.exists() or not directory.is_dir():
             raise ValueError(f"目录不存在或不是有效目录: {directory}")
         
-        media_files = []
+        checkpoint = ScanCheckpoint(checkpoint_path, self._scan_settings(directory, recursive)) \
+            if checkpoint_path else None
         
-        # 获取所有文件
-        if recursive:
-            pattern = "**/*"
-        else:
-            pattern = "*"
+        def files():
+            for entry in self.iter_files(directory, recursive):
+                try:
+                    yield Path(entry.path), entry.stat()
+                except OSError:
+                    continue
         
-        all_files = list(directory.glob(pattern))
-        total_files = len(all_files)
+        counts = {'discovered': 0, 'processed': 0, 'media': 0, 'resumed': 0}
+        completed = False
         
         print(f"开始扫描目录: {directory}")
-        print(f"发现 {total_files} 个文件")
+        if checkpoint and checkpoint.done:
+            print(f"从断点继续，已完成 {len(checkpoint.done)} 个文件")
         
-        processed = 0
-        for file_path in all_files:
-            if file_path.is_file():
-                media_info = self.scan_file(file_path)
-                if media_info:
-                    media_files.append(media_info)
-                
-                processed += 1
+        try:
+            yield from self._scan_stream(files(), checkpoint, progress_callback, counts)
+            completed = True
+        finally:
+            if checkpoint:
+                checkpoint.close(completed=completed)
+        
+        print(f"扫描完成，共处理 {counts['processed']} 个文件，发现 {counts['media']} 个媒体文件"
+              + (f"（{counts['resumed']} 个来自断点）" if counts['resumed'] else ""))
+    
+    def _scan_settings(self, directory: Path, recursive: bool) -> Dict[str, Any]:
+        """断点和变更日志中记录的扫描设置，设置变化后旧记录作废"""
+        return {
+            'directory': str(directory.resolve()),
+            'recursive': recursive,
+            'include_hash': self.include_hash,
+            'full_hash': self.full_hash,
+            'include_metadata': self.include_metadata,
+            'include_phash': self.include_phash
+        }
+    
+    def _scan_stream(self, files: Iterable[Tuple[Path, os.stat_result]],
+                     checkpoint: Optional[ScanCheckpoint],
+                     progress_callback: Optional[callable],
+                     counts: Dict[str, int]) -> Iterator[MediaInfo]:
+        """
+        在有界线程池中并发扫描文件，按输入顺序逐个产出媒体信息
+
+        Args:
+            files: (路径, 文件状态) 序列
+            checkpoint: 断点文件，其中大小和修改时间未变的文件不再扫描
+            progress_callback: 进度回调 (已处理文件数, 已发现文件数, 文件路径)
+            counts: 计数（发现、处理、媒体、来自断点），扫描过程中更新
+        """
+        # 在途窗口：(路径, 文件状态, 任务, 已有结果)，按输入顺序出队
+        window = deque()
+        limit = self.max_workers * 4
+        
+        def drain(force: bool):
+            while window and (force or len(window) >= limit
+                              or window[0][2] is None or window[0][2].done()):
+                path, stat, future, media_info = window.popleft()
+                if future is not None:
+                    media_info = future.result()
+                    if media_info and checkpoint:
+                        checkpoint.record(str(path), stat, media_info)
                 
-                # 调用进度回调
+                counts['processed'] += 1
                 if progress_callback:
-                    progress_callback(processed, total_files, file_path)
+                    progress_callback(counts['processed'], counts['discovered'], path)
+                if counts['processed'] % 1000 == 0:
+                    print(f"已处理: {counts['processed']} 文件，发现媒体文件: {counts['media']}")
                 
-                # 简单进度显示
-                if processed % 100 == 0 or processed == total_files:
-                    print(f"已处理: {processed}/{total_files} 文件，发现媒体文件: {len(media_files)}")
+                if media_info:
+                    counts['media'] += 1
+                    yield media_info
         
-        print(f"扫描完成，共发现 {len(media_files)} 个媒体文件")
-        return media_files
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="media-scan")
+        try:
+            for path, stat in files:
+                counts['discovered'] += 1
+                
+                restored = checkpoint.get(str(path), stat) if checkpoint else None
+                if restored is not None:
+                    counts['resumed'] += 1
+                    window.append((path, stat, None, restored))
+                elif self.get_media_type(path):
+                    window.append((path, stat, executor.submit(self.scan_file, path, stat), None))
+                else:
+                    window.append((path, stat, None, None))
+                
+                yield from drain(False)
+            
+            yield from drain(True)
+        finally:
+            # 提前结束时取消尚未开始的任务，断点保留给下次扫描
+            for _, _, future, _ in window:
+                if future is not None:
+                    future.cancel()
+            executor.shutdown(wait=True)
     
-    def generate_inventory(self, media_files: List[MediaInfo]) -> Dict[str, Any]:
+    def scan_incremental(self, directory: Union[str, Path],
+                         previous_inventory: Optional[Dict[str, Any]],
+                         journal_path: Union[str, Path],
+                         recursive: bool = True,
+                         check_files: bool = True,
+                         progress_callback: Optional[callable] = None,
+                         checkpoint_path: Optional[Union[str, Path]] = None) -> ScanDiff:
+        """
+        增量扫描目录，只读取新增和修改过的文件的元数据
+
+        按变更日志只重新列出修改过的目录；大小和修改时间未变、且上次清单中
+        已有记录的文件直接沿用清单，其余文件重新扫描。结果是相对上次清单的
+        差异，可以交给 generate_inventory 修补上次的清单。变更日志不在这里保存，
+        调用方保存新清单后再调用 diff.commit_journal()，保存失败或被中断时日志保持
+        与上次清单一致。
+
+        Args:
+            directory: 目录路径
+            previous_inventory: 上次生成的资源清单，为空时所有文件都视为新增
+            journal_path: 变更日志路径
+            recursive: 是否递归扫描子目录
+            check_files: 是否检查未变化目录中的文件（发现原地覆盖的文件）
+            progress_callback: 进度回调 (已处理文件数, 待扫描文件数, 文件路径)
+            checkpoint_path: 断点文件路径，中断后再次扫描时跳过已完成的文件
+
+        Returns:
+            扫描差异
+        """
+        directory = Path(directory)
+        
+        if not directory.exists() or not directory.is_dir():
+            raise ValueError(f"目录不存在或不是有效目录: {directory}")
+        
+        settings = self._scan_settings(directory, recursive)
+        journal = DirectoryJournal(journal_path, settings)
+        checkpoint = ScanCheckpoint(checkpoint_path, settings) if checkpoint_path else None
+        
+        previous: Dict[str, Dict[str, Any]] = {}
+        for records in (previous_inventory or {}).get('files', {}).values():
+            for record in records:
+                previous[record['file_path']] = record
+        
+        diff = ScanDiff()
+        seen = set()
+        
+        def pending():
+            for entry in journal.walk(settings['directory'], recursive,
+                                      lambda name: self.get_media_type(Path(name)) is not None,
+                                      check_files):
+                if entry.status == 'unchanged' and entry.path in previous:
+                    seen.add(entry.path)
+                    diff.unchanged += 1
+                    continue
+                try:
+                    yield Path(entry.path), entry.stat or os.stat(entry.path)
+                except OSError:
+                    continue
+        
+        counts = {'discovered': 0, 'processed': 0, 'media': 0, 'resumed': 0}
+        completed = False
+        print(f"开始增量扫描目录: {directory}")
+        
+        try:
+            for media_info in self._scan_stream(pending(), checkpoint, progress_callback, counts):
+                seen.add(media_info.file_path)
+                old = previous.get(media_info.file_path)
+                if old is None:
+                    diff.added.append(media_info)
+                elif old == asdict(media_info):
+                    diff.unchanged += 1
+                else:
+                    diff.changed.append(media_info)
+            completed = True
+        finally:
+            if checkpoint:
+                checkpoint.close(completed=completed)
+        
+        diff.removed = [path for path in previous if path not in seen]
+        diff.journal = journal
+        
+        print(f"增量扫描完成: 重新列出 {journal.stats['scanned_dirs']} 个目录，"
+              f"复用 {journal.stats['reused_dirs']} 个；新增 {len(diff.added)}，"
+              f"修改 {len(diff.changed)}，删除 {len(diff.removed)}，未变化 {diff.unchanged}")
+        return diff
+    
+    def scan_directory(self, directory: Union[str, Path], 
+                      recursive: bool = True,
+                      progress_callback: Optional[callable] = None,
+                      checkpoint_path: Optional[Union[str, Path]] = None) -> List[MediaInfo]:
+        """
+        扫描目录
+        
+        Args:
+            directory: 目录路径
+            recursive: 是否递归扫描子目录
+            progress_callback: 进度回调 (已处理文件数, 已发现文件数, 文件路径)
+            checkpoint_path: 断点文件路径，中断后再次扫描时跳过已完成的文件
+            
+        Returns:
+            媒体信息列表
+        """
+        return list(self.iter_scan(directory, recursive, progress_callback, checkpoint_path))
+    
+    def generate_inventory(self, media_files: Iterable[MediaInfo] = (),
+                           previous_inventory: Optional[Dict[str, Any]] = None,
+                           diff: Optional[ScanDiff] = None) -> Dict[str, Any]:
         """
         生成资源清单
         
         Args:
-            media_files: 媒体文件列表
+            media_files: 媒体文件列表，或 iter_scan 流式产出的媒体信息
+            previous_inventory: 上次的资源清单，与 diff 同时给出时在其基础上修补
+            diff: scan_incremental 返回的扫描差异
             
         Returns:
             资源清单字典
         """
-        # 按类型分组
+        if diff is not None:
+            if previous_inventory:
+                return self._patch_inventory(previous_inventory, diff)
+            media_files = diff.added + diff.changed
+        
+        # 按类型分组（只遍历一次，可以直接传入 iter_scan 的结果）
         by_type = {'video': [], 'audio': [], 'image': []}
         total_size = 0
+        total_files = 0
+        extensions = {}
         
         for media in media_files:
             by_type[media.media_type].append(asdict(media))
             total_size += media.file_size
+            total_files += 1
+            
+            # 扩展名统计
+            ext = media.file_extension
+            if ext not in extensions:
+                extensions[ext] = {'count': 0, 'size': 0}
+            extensions[ext]['count'] += 1
+            extensions[ext]['size'] += media.file_size
         
         # 统计信息
         stats = {
-            'total_files': len(media_files),
+            'total_files': total_files,
             'total_size': total_size,
             'total_size_mb': round(total_size / (1024 * 1024), 2),
             'video_count': len(by_type['video']),
@@ -338,20 +841,12 @@ class MediaScanner:
             'scan_time': datetime.now().isoformat()
         }
         
-        # 扩展名统计
-        extensions = {}
-        for media in media_files:
-            ext = media.file_extension
-            if ext not in extensions:
-                extensions[ext] = {'count': 0, 'size': 0}
-            extensions[ext]['count'] += 1
-            extensions[ext]['size'] += media.file_size
-        
         return {
             'metadata': {
                 'scan_time': datetime.now().isoformat(),
                 'scanner_version': '1.0.0',
                 'include_hash': self.include_hash,
+                'full_hash': self.full_hash,
                 'include_metadata': self.include_metadata
             },
             'statistics': stats,
@@ -363,6 +858,72 @@ class MediaScanner:
             }
         }
     
+    def _patch_inventory(self, previous: Dict[str, Any], diff: ScanDiff) -> Dict[str, Any]:
+        """按扫描差异修补上次的清单：保留原有顺序，原位替换修改的文件，新增的追加在后"""
+        type_keys = {'video': 'videos', 'audio': 'audios', 'image': 'images'}
+        stats = dict(previous['statistics'])
+        extensions = {ext: dict(data) for ext, data in previous.get('extensions', {}).items()}
+        
+        def account(record: Dict[str, Any], sign: int):
+            stats['total_files'] += sign
+            stats['total_size'] += sign * record['file_size']
+            data = extensions.setdefault(record['file_extension'], {'count': 0, 'size': 0})
+            data['count'] += sign
+            data['size'] += sign * record['file_size']
+            if data['count'] <= 0:
+                del extensions[record['file_extension']]
+        
+        removed = set(diff.removed)
+        replaced = {media.file_path: asdict(media) for media in diff.changed}
+        files = {}
+        for key in type_keys.values():
+            records = previous['files'].get(key, [])
+            if not removed and not replaced:
+                files[key] = list(records)
+                continue
+            
+            files[key] = []
+            for record in records:
+                path = record['file_path']
+                if path in removed:
+                    account(record, -1)
+                    continue
+                new_record = replaced.pop(path, None)
+                if new_record is not None:
+                    account(record, -1)
+                    account(new_record, 1)
+                    record = new_record
+                files[key].append(record)
+        
+        # 上次清单中没有的修改项按新增处理
+        added = [asdict(media) for media in diff.added] + list(replaced.values())
+        for record in added:
+            files[type_keys[record['media_type']]].append(record)
+            account(record, 1)
+        
+        now = datetime.now().isoformat()
+        stats.update({
+            'total_size_mb': round(stats['total_size'] / (1024 * 1024), 2),
+            'video_count': len(files['videos']),
+            'audio_count': len(files['audios']),
+            'image_count': len(files['images']),
+            'scan_time': now
+        })
+        metadata = dict(previous.get('metadata', {}))
+        metadata.update({
+            'scan_time': now,
+            'include_hash': self.include_hash,
+            'full_hash': self.full_hash,
+            'include_metadata': self.include_metadata
+        })
+        
+        return {
+            'metadata': metadata,
+            'statistics': stats,
+            'extensions': extensions,
+            'files': files
+        }
+    
     def save_inventory(self, inventory: Dict[str, Any], output_path: Union[str, Path],
                       format_type: str = 'json'):
         """
@@ -755,7 +1316,12 @@ def scan_media_resources(directory: Union[str, Path],
                         output_format: str = 'json',
                         recursive: bool = True,
                         include_hash: bool = False,
-                        include_metadata: bool = True) -> Dict[str, Any]:
+                        include_metadata: bool = True,
+                        full_hash: bool = False,
+                        include_phash: bool = False,
+                        max_workers: int = 8,
+                        checkpoint_path: Optional[Union[str, Path]] = None,
+                        journal_path: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
     """
     扫描媒体资源的便捷函数
 
@@ -766,22 +1332,19 @@ def scan_media_resources(directory: Union[str, Path],
         recursive: 是否递归扫描子目录
         include_hash: 是否计算文件哈希值
         include_metadata: 是否提取媒体元数据
+        full_hash: 哈希读取文件全部内容，默认只采样
+        include_phash: 是否计算视频的感知哈希
+        max_workers: 并发读取元数据和计算哈希的线程数
+        checkpoint_path: 断点文件路径，中断后再次扫描时跳过已完成的文件
+        journal_path: 变更日志路径，设置后增量扫描并修补上次输出的JSON清单
 
     Returns:
         资源清单字典
     """
-    scanner = MediaScanner(include_hash=include_hash, include_metadata=include_metadata)
-    
-    # 扫描目录
-    media_files = scanner.scan_directory(directory, recursive=recursive)
-    
-    # 生成清单
-    inventory = scanner.generate_inventory(media_files)
+    scanner = MediaScanner(include_hash=include_hash, include_metadata=include_metadata,
+                           max_workers=max_workers, full_hash=full_hash, include_phash=include_phash)
     
-    # 保存到文件
-    if output_path:
-        scanner.save_inventory(inventory, output_path, output_format)
-    else:
+    if not output_path:
         # 根据格式确定默认文件名
         format_extensions = {
             'json': '.json',
@@ -791,8 +1354,31 @@ def scan_media_resources(directory: Union[str, Path],
             'excel': '.xlsx'
         }
         ext = format_extensions.get(output_format.lower(), '.json')
-        default_output = Path(directory) / f"media_inventory{ext}"
-        scanner.save_inventory(inventory, default_output, output_format)
+        output_path = Path(directory) / f"media_inventory{ext}"
+    
+    if journal_path:
+        # 只有JSON清单可以作为下次修补的基础
+        previous = None
+        if output_format.lower() == 'json' and Path(output_path).exists():
+            try:
+                with open(output_path, 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"读取上次清单失败，重新完整扫描: {e}")
+        
+        diff = scanner.scan_incremental(directory, previous, journal_path, recursive=recursive,
+                                        checkpoint_path=checkpoint_path)
+        inventory = scanner.generate_inventory(previous_inventory=previous, diff=diff)
+    else:
+        # 边扫描边生成清单
+        inventory = scanner.generate_inventory(
+            scanner.iter_scan(directory, recursive=recursive, checkpoint_path=checkpoint_path)
+        )
+    
+    # 保存到文件；清单写入后再提交变更日志
+    scanner.save_inventory(inventory, output_path, output_format)
+    if journal_path:
+        diff.commit_journal()
     
     return inventory
 
@@ -808,7 +1394,12 @@ def main():
                        default='json', help="输出格式 (默认: json)")
     parser.add_argument("--no-recursive", action="store_true", help="不递归扫描子目录")
     parser.add_argument("--include-hash", action="store_true", help="计算文件哈希值")
+    parser.add_argument("--full-hash", action="store_true", help="哈希读取文件全部内容（默认只采样）")
+    parser.add_argument("--phash", action="store_true", help="计算视频感知哈希，用于发现近重复片段")
     parser.add_argument("--no-metadata", action="store_true", help="不提取媒体元数据")
+    parser.add_argument("--workers", type=int, default=8, help="并发读取元数据的线程数 (默认: 8)")
+    parser.add_argument("--checkpoint", help="断点文件路径，中断后重新运行时跳过已完成的文件")
+    parser.add_argument("--journal", help="变更日志路径，增量扫描并修补上次的JSON清单")
     
     args = parser.parse_args()
     
@@ -819,7 +1410,12 @@ def main():
             output_format=args.format,
             recursive=not args.no_recursive,
             include_hash=args.include_hash,
-            include_metadata=not args.no_metadata
+            include_metadata=not args.no_metadata,
+            full_hash=args.full_hash,
+            include_phash=args.phash,
+            max_workers=args.workers,
+            checkpoint_path=args.checkpoint,
+            journal_path=args.journal
         )
         
         # 显示统计信息
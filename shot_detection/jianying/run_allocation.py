@@ -36,19 +36,24 @@ logger = logging.getLogger(__name__)
 class DouyinVideoWorkflow:
     """抖音视频制作完整工作流程"""
 
-    def __init__(self, base_dir: str = ".", original_materials_dir: str = None):
+    def __init__(self, base_dir: str = ".", original_materials_dir: str = None,
+                 save_workers: int = 8, dry_run: bool = False):
         """
         初始化工作流程
 
         Args:
             base_dir: 基础工作目录，默认为当前目录
             original_materials_dir: 原始素材目录（用于路径映射）
+            save_workers: 并行生成输出草稿的线程数
+            dry_run: 只序列化输出草稿、测量吞吐量，不写入文件
         """
         self.base_dir = Path(base_dir).resolve()
         self.resources_dir = self.base_dir / "resources"
         self.templates_dir = self.base_dir / "templates"
         self.outputs_dir = self.base_dir / "outputs"
         self.original_materials_dir = original_materials_dir
+        self.save_workers = save_workers
+        self.dry_run = dry_run
 
         # 确保必要目录存在
         self.outputs_dir.mkdir(exist_ok=True)
@@ -104,12 +109,13 @@ class DouyinVideoWorkflow:
         logger.error(f"在 {self.base_dir} 和 {self.resources_dir} 中都未找到视频文件")
         return None
 
-    def step1_scan_resources(self, output_formats: list = None) -> Dict[str, Any]:
+    def step1_scan_resources(self, output_formats: list = None, incremental: bool = True) -> Dict[str, Any]:
         """
         步骤1: 扫描resources获取资源清单
 
         Args:
             output_formats: 输出格式列表，默认为 ['json', 'html']
+            incremental: 是否增量扫描（只重新读取新增和修改过的文件，修补上次的清单）
 
         Returns:
             资源清单字典
@@ -127,18 +133,35 @@ class DouyinVideoWorkflow:
         if output_formats is None:
             output_formats = ['json', 'html']
 
+        inventory_path = self.outputs_dir / "media_inventory.json"
+        journal_path = self.outputs_dir / "media_scan.journal"
+
         try:
             # 使用媒体扫描器扫描资源
-            scanner = MediaScanner(include_hash=False, include_metadata=True)
-            media_files = scanner.scan_directory(scan_dir, recursive=True)
-            inventory = scanner.generate_inventory(media_files)
-
-            # 保存多种格式的清单
-            for format_type in output_formats:
+            # 同时计算视频感知哈希，分配时避免把近重复片段放进同一个模板
+            scanner = MediaScanner(include_hash=False, include_metadata=True, include_phash=True)
+            previous = self._load_previous_inventory(inventory_path) if incremental else None
+
+            # 按变更日志只扫描新增和修改过的文件；中断后再次运行时从断点继续
+            diff = scanner.scan_incremental(
+                scan_dir, previous, journal_path, recursive=True,
+                checkpoint_path=self.outputs_dir / "media_scan.checkpoint"
+            )
+            inventory = scanner.generate_inventory(previous_inventory=previous, diff=diff)
+
+            # 保存多种格式的清单；JSON清单是下次增量扫描的基础，总是保存
+            for format_type in dict.fromkeys(['json'] + list(output_formats)):
                 output_file = self.outputs_dir / f"media_inventory.{format_type}"
                 scanner.save_inventory(inventory, output_file, format_type)
                 logger.info(f"资源清单已保存: {output_file}")
 
+            # 清单写入后再提交变更日志，中断或保存失败时日志不会超前于清单
+            diff.commit_journal()
+
+            diff_file = self.outputs_dir / "media_inventory.diff.json"
+            with open(diff_file, 'w', encoding='utf-8') as f:
+                json.dump(diff.to_dict(), f, indent=2, ensure_ascii=False)
+
             # 打印统计信息
             stats = inventory['statistics']
             logger.info(f"扫描完成:")
@@ -147,6 +170,8 @@ class DouyinVideoWorkflow:
             logger.info(f"  - 音频文件: {stats['audio_count']}")
             logger.info(f"  - 图片文件: {stats['image_count']}")
             logger.info(f"  - 总大小: {stats['total_size_mb']} MB")
+            logger.info(f"  - 变化: 新增 {len(diff.added)}，修改 {len(diff.changed)}，"
+                        f"删除 {len(diff.removed)}，未变化 {diff.unchanged}")
 
             return inventory
 
@@ -154,6 +179,18 @@ class DouyinVideoWorkflow:
             logger.error(f"扫描资源失败: {e}")
             return {}
 
+    def _load_previous_inventory(self, inventory_path: Path) -> Dict[str, Any]:
+        """读取上次保存的JSON清单，不存在或无法解析时返回None"""
+        if not inventory_path.exists():
+            return None
+
+        try:
+            with open(inventory_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取上次资源清单失败，重新完整扫描: {e}")
+            return None
+
     def step2_manage_templates(self) -> JianyingProjectManager:
         """
         步骤2: 创建抖音项目管理根目录是templates
@@ -221,7 +258,8 @@ class DouyinVideoWorkflow:
 
         try:
             # 创建视频分配算法实例，使用当前目录作为workspace，传递原始素材目录
-            algorithm = VideoAllocationAlgorithm(str(self.base_dir), self.original_materials_dir)
+            algorithm = VideoAllocationAlgorithm(str(self.base_dir), self.original_materials_dir,
+                                                 save_workers=self.save_workers)
 
             # 如果提供了前面步骤的结果，则记录复用信息
             if inventory is not None:
@@ -262,7 +300,7 @@ class DouyinVideoWorkflow:
 
             # 执行分配，传递预扫描的资源和模板信息
             logger.info("开始执行视频素材智能分配算法 - 目标：最大化视频生成数量")
-            success = algorithm.execute_allocation(video_files, templates, project_manager)
+            success = algorithm.execute_allocation(video_files, templates, project_manager, dry_run=self.dry_run)
 
             if success:
                 logger.info("视频分配算法执行成功")
@@ -436,12 +474,13 @@ class DouyinVideoWorkflow:
             logger.error(f"整理输出失败: {e}")
             return False
 
-    def run_complete_workflow(self, output_formats: list = None) -> bool:
+    def run_complete_workflow(self, output_formats: list = None, incremental: bool = True) -> bool:
         """
         运行完整的工作流程
 
         Args:
             output_formats: 资源清单输出格式
+            incremental: 是否增量扫描资源
 
         Returns:
             工作流程是否成功完成
@@ -451,7 +490,7 @@ class DouyinVideoWorkflow:
 
         try:
             # 步骤1: 扫描资源
-            inventory = self.step1_scan_resources(output_formats)
+            inventory = self.step1_scan_resources(output_formats, incremental=incremental)
             if not inventory:
                 logger.error("步骤1失败: 无法扫描资源")
                 return False
@@ -502,6 +541,8 @@ def main():
   python run_allocation.py -d /path/to/work   # 指定工作目录
   python run_allocation.py --formats json html csv  # 指定输出格式
   python run_allocation.py -v                 # 显示详细日志
+  python run_allocation.py --full-scan        # 忽略上次的清单，完整扫描资源
+  python run_allocation.py --dry-run          # 只测量草稿输出吞吐量，不写入文件
         """
     )
 
@@ -519,6 +560,25 @@ def main():
         help='资源清单输出格式 (默认: json html)'
     )
 
+    parser.add_argument(
+        '--full-scan',
+        action='store_true',
+        help='完整扫描资源，不沿用上次的清单'
+    )
+
+    parser.add_argument(
+        '--save-workers',
+        type=int,
+        default=8,
+        help='并行生成输出草稿的线程数 (默认: 8)'
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='只序列化输出草稿并统计吞吐量，不写入 outputs'
+    )
+
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
@@ -542,10 +602,10 @@ def main():
     print(f"📋 输出格式: {', '.join(args.formats)}")
 
     # 创建工作流程实例
-    workflow = DouyinVideoWorkflow(str(work_dir))
+    workflow = DouyinVideoWorkflow(str(work_dir), save_workers=args.save_workers, dry_run=args.dry_run)
 
     # 运行完整工作流程
-    success = workflow.run_complete_workflow(args.formats)
+    success = workflow.run_complete_workflow(args.formats, incremental=not args.full_scan)
 
     if success:
         print("✅ 工作流程执行成功！")
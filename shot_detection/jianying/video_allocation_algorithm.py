@@ -12,16 +12,33 @@
 5. 保存结果到 outputs 目录，复制使用的视频到 Resources/videoAlg
 """
 
-import os
-import json
 import shutil
 import random
+import threading
+import time
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple, Set
+from typing import Dict, List, Optional, Tuple, Set
 from dataclasses import dataclass
 import logging
 
+try:
+    from utils.perceptual_index import PerceptualIndex, DEFAULT_MAX_DISTANCE
+    from utils.draft_codec import dump_draft, load_draft, save_draft
+    from utils.ordered_pool import OrderedPool
+except ImportError:
+    # 从 jianying 目录直接运行脚本时，把项目根目录加入搜索路径
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from utils.perceptual_index import PerceptualIndex, DEFAULT_MAX_DISTANCE
+    from utils.draft_codec import dump_draft, load_draft, save_draft
+    from utils.ordered_pool import OrderedPool
+
+# 图片素材扩展名（不参与视频位置替换）
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tiff', '.svg'}
+
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -50,10 +67,159 @@ class AllocationResult:
     total_positions: int
     videos_used: int
 
+@dataclass
+class TemplateDraft:
+    """
+    解析后的模板草稿
+
+    content/meta/virtual_store 只读，生成输出时按写时复制克隆：
+    只复制到被替换路径为止的那几层容器，其余部分与模板共享
+    """
+    content: dict
+    meta: Optional[dict]
+    virtual_store: Optional[dict]
+    video_slots: List[int]  # materials.videos 中可替换的视频下标（排除图片）
+    material_ids: List[Tuple[int, str]]  # (materials.videos 下标, local_material_id)
+    meta_slots: Dict[str, List[Tuple[int, int]]]  # 素材ID -> [(draft_materials 下标, value 下标)]
+    signature: tuple
+
+    def render_content(self, paths: List[str]) -> Tuple[dict, Dict[int, str]]:
+        """
+        按顺序把路径填入视频位置
+
+        Returns:
+            (新的 draft_content, materials.videos 下标 -> 新路径)
+        """
+        patched = dict(zip(self.video_slots, paths))
+        if not patched:
+            return self.content, patched
+
+        content = dict(self.content)
+        materials = dict(content['materials'])
+        videos = list(materials['videos'])
+        for index, path in patched.items():
+            video = dict(videos[index])
+            video['path'] = path
+            videos[index] = video
+        materials['videos'] = videos
+        content['materials'] = materials
+        return content, patched
+
+    def material_paths(self, patched: Dict[int, str]) -> Dict[str, str]:
+        """替换后 local_material_id 到视频路径的映射（跳过图片）"""
+        videos = self.content['materials']['videos'] if self.material_ids else []
+        mapping = {}
+        for index, material_id in self.material_ids:
+            path = patched.get(index, videos[index]['path'])
+            if path and Path(path).suffix.lower() not in IMAGE_EXTENSIONS:
+                mapping[material_id] = path
+        return mapping
+
+    def render_meta(self, material_paths: Dict[str, str], now: int) -> Tuple[Optional[dict], int]:
+        """
+        把新路径同步到 draft_meta_info 的视频素材（type 为 0）
+
+        Returns:
+            (新的 draft_meta_info, 更新的素材数量)
+        """
+        touched = [(group_index, value_index, path)
+                   for material_id, path in material_paths.items()
+                   for group_index, value_index in self.meta_slots.get(material_id, ())]
+        if not touched:
+            return self.meta, 0
+
+        meta = dict(self.meta)
+        groups = list(meta['draft_materials'])
+        copied = set()
+        for group_index, value_index, path in touched:
+            if group_index not in copied:
+                group = dict(groups[group_index])
+                group['value'] = list(group['value'])
+                groups[group_index] = group
+                copied.add(group_index)
+            values = groups[group_index]['value']
+            video_meta = dict(values[value_index])
+            video_meta['file_Path'] = path
+            video_meta['extra_info'] = Path(path).name
+            video_meta['create_time'] = now
+            video_meta['import_time'] = now
+            video_meta['import_time_ms'] = now * 1000000  # 微秒
+            values[value_index] = video_meta
+        meta['draft_materials'] = groups
+        return meta, len(touched)
+
+
+class TemplateDraftCache:
+    """模板草稿缓存：每个模板只解析一次，文件修改后自动重新解析"""
+
+    FILES = ("draft_content.json", "draft_meta_info.json", "draft_virtual_store.json")
+
+    def __init__(self):
+        self._templates: Dict[str, TemplateDraft] = {}
+        self._lock = threading.Lock()
+
+    def get(self, template_path: Path) -> TemplateDraft:
+        """获取模板草稿，draft_content.json 不存在时抛出 FileNotFoundError"""
+        template_path = Path(template_path)
+        key = str(template_path)
+        # 并行输出时同一模板只由一个线程解析
+        with self._lock:
+            signature = self._signature(template_path)
+            draft = self._templates.get(key)
+            if draft is None or draft.signature != signature:
+                draft = self._parse(template_path, signature)
+                self._templates[key] = draft
+        return draft
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+    def _signature(self, template_path: Path) -> tuple:
+        signature = []
+        for name in self.FILES:
+            try:
+                stat = (template_path / name).stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _parse(self, template_path: Path, signature: tuple) -> TemplateDraft:
+        content_file, meta_file, virtual_file = (template_path / name for name in self.FILES)
+        content = load_draft(content_file)
+        meta = load_draft(meta_file) if signature[1] is not None else None
+        virtual_store = load_draft(virtual_file) if signature[2] is not None else None
+
+        videos = content.get('materials', {}).get('videos', [])
+        video_slots = []
+        material_ids = []
+        for index, video in enumerate(videos):
+            path = video.get('path', '')
+            if path and Path(path).suffix.lower() not in IMAGE_EXTENSIONS:
+                video_slots.append(index)
+            if 'path' in video and 'local_material_id' in video:
+                material_id = video['local_material_id']
+                if isinstance(material_id, str) and material_id.strip():
+                    material_ids.append((index, material_id))
+
+        meta_slots: Dict[str, List[Tuple[int, int]]] = {}
+        if meta and 'draft_materials' in meta:
+            for group_index, group in enumerate(meta['draft_materials']):
+                if group.get('type') == 0 and 'value' in group:
+                    for value_index, video_meta in enumerate(group['value']):
+                        if 'id' in video_meta and 'file_Path' in video_meta:
+                            meta_slots.setdefault(video_meta['id'], []).append((group_index, value_index))
+
+        logger.debug(f"解析模板 {template_path.name}: {len(video_slots)} 个视频位置")
+        return TemplateDraft(content, meta, virtual_store, video_slots, material_ids, meta_slots, signature)
+
 class VideoAllocationAlgorithm:
     """视频素材智能分配算法"""
 
-    def __init__(self, workspace_dir: str = "workspace", original_materials_dir: str = None):
+    def __init__(self, workspace_dir: str = "workspace", original_materials_dir: str = None,
+                 near_duplicate_distance: Optional[float] = DEFAULT_MAX_DISTANCE,
+                 save_workers: int = 8):
         self.workspace_dir = Path(workspace_dir)
         self.resources_dir = self.workspace_dir / "resources"
         self.templates_dir = self.workspace_dir / "templates"
@@ -71,6 +237,24 @@ class VideoAllocationAlgorithm:
         # 分配结果
         self.allocation_results: List[AllocationResult] = []
 
+        # 视频资源目录的变更日志和最近一次扫描的变化
+        self.scan_journal_path = self.outputs_dir / "video_resources.journal"
+        self.last_scan_changes = {'added': [], 'changed': [], 'removed': []}
+
+        # 近重复片段索引：同一模板内不放入互为近重复的片段（阈值为 None 时不检查）
+        self.near_duplicate_distance = near_duplicate_distance
+        self.near_duplicate_index = PerceptualIndex(near_duplicate_distance or DEFAULT_MAX_DISTANCE)
+        self._hashed_videos: Set[str] = set()
+        self._near_duplicates: Dict[str, Set[str]] = {}
+        self._indexed_pool: Optional[OrderedPool] = None
+
+        # 模板草稿缓存：多轮分配中同一模板只解析一次
+        self.template_cache = TemplateDraftCache()
+
+        # 并行生成输出草稿的线程数和最近一次保存的统计
+        self.save_workers = max(1, save_workers)
+        self.last_save_stats: Dict[str, float] = {}
+
     def _map_to_original_path(self, temp_path: str) -> str:
         """
         将临时目录路径映射回原始路径
@@ -114,8 +298,20 @@ class VideoAllocationAlgorithm:
             logger.warning(f"路径映射失败: {temp_path}, {e}")
             return temp_path
     
-    def scan_video_resources(self) -> List[VideoFile]:
-        """扫描 resources 目录获取所有视频文件"""
+    def scan_video_resources(self, incremental: bool = True) -> List[VideoFile]:
+        """扫描 resources 目录获取所有视频文件
+
+        增量模式下按变更日志只重新列出修改过的目录，相对上次扫描新增、修改和
+        删除的文件记录在 last_scan_changes 中。
+
+        Args:
+            incremental: 是否沿用上次的变更日志，为否时完整扫描
+        """
+        try:
+            from media_scanner import DirectoryJournal
+        except ImportError:
+            from .media_scanner import DirectoryJournal
+
         video_files = []
         
         if not self.resources_dir.exists():
@@ -124,20 +320,37 @@ class VideoAllocationAlgorithm:
         
         logger.info(f"扫描视频资源目录: {self.resources_dir}")
         
-        for root, _, files in os.walk(self.resources_dir):
-            for file in files:
-                file_path = Path(root) / file
-                if file_path.suffix.lower() in self.video_extensions:
-                    relative_path = file_path.relative_to(self.resources_dir)
-                    video_file = VideoFile(
-                        path=str(file_path),
-                        name=file,
-                        relative_path=str(relative_path),
-                        size=file_path.stat().st_size if file_path.exists() else 0
-                    )
-                    video_files.append(video_file)
+        root = str(self.resources_dir)
+        journal = DirectoryJournal(self.scan_journal_path, {
+            'directory': root,
+            'extensions': sorted(self.video_extensions)
+        })
+        if not incremental:
+            journal.directories = {}
         
-        logger.info(f"找到 {len(video_files)} 个视频文件")
+        changes = {'added': [], 'changed': [], 'removed': []}
+        for entry in journal.walk(root, file_filter=lambda name: Path(name).suffix.lower() in self.video_extensions):
+            file_path = Path(entry.path)
+            video_file = VideoFile(
+                path=str(file_path),
+                name=file_path.name,
+                relative_path=str(file_path.relative_to(self.resources_dir)),
+                size=entry.size
+            )
+            video_files.append(video_file)
+            if entry.status != 'unchanged':
+                changes[entry.status].append(entry.path)
+        changes['removed'] = journal.removed
+        self.last_scan_changes = changes
+        
+        try:
+            journal.save()
+        except OSError as e:
+            logger.warning(f"保存扫描变更日志失败: {e}")
+        
+        logger.info(f"找到 {len(video_files)} 个视频文件 (新增 {len(changes['added'])}，"
+                    f"修改 {len(changes['changed'])}，删除 {len(changes['removed'])}；"
+                    f"重新列出 {journal.stats['scanned_dirs']} 个目录，复用 {journal.stats['reused_dirs']} 个)")
         return video_files
     
     def scan_templates(self) -> List[TemplateInfo]:
@@ -174,8 +387,7 @@ class VideoAllocationAlgorithm:
     def _analyze_draft_content(self, draft_path: Path) -> int:
         """分析 draft_content.json 文件，获取需要的视频位置数量 - 只处理 materials.videos"""
         try:
-            with open(draft_path, 'r', encoding='utf-8') as f:
-                content = json.load(f)
+            content = load_draft(draft_path)
 
             # 只分析 materials.videos 数组，排除图片文件
             materials = content.get('materials', {})
@@ -240,19 +452,24 @@ class VideoAllocationAlgorithm:
         available_positions = list(range(video_positions))
         random.shuffle(available_positions)
 
+        # 被选作第二个位置的条目只标记跳过，不从列表中删除；
+        # i 之后的条目除被跳过的以外都未占用，剩余位置数 = 列表长度 - i - 之后被跳过的数量
+        taken_ahead: Set[int] = set()
+
         videos_allocated = 0
         i = 0
 
         while videos_allocated < target_video_count and i < len(available_positions):
             position = available_positions[i]
 
-            if position in occupied_positions:
+            if position in taken_ahead:
+                taken_ahead.discard(position)
                 i += 1
                 continue
 
             # 动态调整占用2个位置的概率
             remaining_videos_needed = target_video_count - videos_allocated
-            remaining_positions = len([p for p in available_positions[i:] if p not in occupied_positions])
+            remaining_positions = len(available_positions) - i - len(taken_ahead)
 
             # 如果剩余位置多于剩余需要的视频，降低占用2个位置的概率
             double_position_probability = 0.2 if remaining_positions > remaining_videos_needed * 1.5 else 0.1
@@ -266,7 +483,7 @@ class VideoAllocationAlgorithm:
                 second_pos = None
                 for j in range(i + 1, len(available_positions)):
                     candidate = available_positions[j]
-                    if (candidate not in occupied_positions and
+                    if (candidate not in taken_ahead and
                         abs(candidate - position) > 1):  # 确保不连续
                         second_pos = candidate
                         break
@@ -277,8 +494,8 @@ class VideoAllocationAlgorithm:
                     allocations.append((second_pos, 1))
                     occupied_positions.add(position)
                     occupied_positions.add(second_pos)
-                    # 从可用位置中移除第二个位置
-                    available_positions.remove(second_pos)
+                    # 第二个位置之后遍历到时跳过
+                    taken_ahead.add(second_pos)
                 else:
                     # 只占用1个位置
                     allocations.append((position, 1))
@@ -325,13 +542,13 @@ class VideoAllocationAlgorithm:
                 videos_used=0
             )
 
-        selected_videos = random.sample(available_videos_copy, videos_needed)
+        selected_videos = self._sample_videos(available_videos_copy, videos_needed)
 
         # 创建分配结果
         video_assignments = []
-        for i, (position, _) in enumerate(allocation_plan[:videos_needed]):
-            video_assignments.append((position, selected_videos[i]))
-            self.used_videos.add(selected_videos[i].path)
+        for (position, _), video in zip(allocation_plan[:videos_needed], selected_videos):
+            video_assignments.append((position, video))
+            self.used_videos.add(video.path)
 
         result = AllocationResult(
             template_name=template.name,
@@ -343,13 +560,83 @@ class VideoAllocationAlgorithm:
         logger.info(f"模板 '{template.name}' 分配完成: 使用了 {len(selected_videos)} 个视频 (剩余可用: {current_available_count - videos_needed})")
         return result
     
-    def execute_allocation(self, video_files=None, templates=None, project_manager=None) -> bool:
+    def _sample_videos(self, candidates: List[VideoFile], count: int) -> List[VideoFile]:
+        """
+        随机选择视频，同一模板内避免互为近重复的片段
+
+        先按原方式随机抽样；抽中的片段之间没有近重复时结果与 random.sample 相同。
+        有冲突时用其余候选随机替换，不重复的片段不够时仍用冲突片段补足数量。
+        """
+        selected = random.sample(candidates, count)
+        if self.near_duplicate_distance is None or count < 2:
+            return selected
+
+        self._index_videos(candidates)
+        chosen, conflicts = [], []
+        blocked: Set[str] = set()
+        for video in selected:
+            if video.path in blocked:
+                conflicts.append(video)
+                continue
+            chosen.append(video)
+            blocked.update(self._near_duplicates_of(video.path))
+
+        if not conflicts:
+            return chosen
+
+        logger.info(f"抽中的视频中有 {len(conflicts)} 个近重复片段，重新选择")
+        selected_paths = {video.path for video in selected}
+        spare = [video for video in candidates if video.path not in selected_paths]
+        random.shuffle(spare)
+        for video in spare:
+            if len(chosen) == count:
+                break
+            if video.path not in blocked:
+                chosen.append(video)
+                blocked.update(self._near_duplicates_of(video.path))
+
+        chosen.extend(conflicts[:count - len(chosen)])
+        return chosen
+
+    def _index_videos(self, videos: List[VideoFile]):
+        """把尚未处理的视频加入近重复索引（帧哈希优先从元数据索引读取）"""
+        # 剩余视频池只会缩小，处理过一次后不必再逐个检查
+        if videos is self._indexed_pool:
+            return
+        pending = [video.path for video in videos if video.path not in self._hashed_videos]
+        if pending:
+            self.near_duplicate_index.index_files(pending)
+            self._hashed_videos.update(pending)
+        if isinstance(videos, OrderedPool):
+            self._indexed_pool = videos
+
+    def _video_pool(self, video_files) -> OrderedPool:
+        """
+        未使用视频的保序池
+
+        与 [v for v in video_files if v.path not in self.used_videos] 顺序相同，
+        交给 random.sample 时结果也相同；标记使用后从池中移除，不必每次重新过滤
+        """
+        if isinstance(video_files, OrderedPool):
+            return video_files
+        return OrderedPool(video_files, key=lambda video: video.path, exclude=self.used_videos)
+
+    def _near_duplicates_of(self, path: str) -> Set[str]:
+        neighbors = self._near_duplicates.get(path)
+        if neighbors is None:
+            neighbors = self.near_duplicate_index.neighbors(path, self.near_duplicate_distance)
+            self._near_duplicates[path] = neighbors
+        return neighbors
+
+    def execute_allocation(self, video_files=None, templates=None, project_manager=None,
+                           dry_run: bool = False) -> bool:
         """执行完整的视频分配流程 - 最大化视频生成数量
 
         Args:
             video_files: 预先扫描的视频文件列表，如果为None则重新扫描
             templates: 预先扫描的模板列表，如果为None则重新扫描
             project_manager: 项目管理器实例，用于处理模板资源变更
+            dry_run: 只序列化输出草稿、测量吞吐量，不写入文件
         """
         try:
             logger.info("开始执行视频素材智能分配算法 - 目标：最大化视频生成数量")
@@ -381,23 +668,16 @@ class VideoAllocationAlgorithm:
             logger.info(f"预计最大可生成视频数量: {max_videos} 个")
 
             # 4. 执行多轮分配，直到视频用完或无法继续
-            round_num = 1
-            while len(video_files) > 0 and self._can_continue_allocation(templates, video_files):
-                logger.info(f"\n=== 第 {round_num} 轮分配 ===")
-                round_results = self._execute_allocation_round(templates, video_files, round_num)
-
-                if not round_results:
-                    logger.info("无法继续分配，结束")
-                    break
-
-                self.allocation_results.extend(round_results)
-                round_num += 1
+            self._run_allocation_rounds(templates, video_files)
 
             # 5. 保存结果
-            self._save_results()
+            self._save_results(dry_run=dry_run)
 
-            # 6. 生成报告
-            self._generate_report()
+            # 6. 生成报告（试运行时只打印摘要）
+            if dry_run:
+                self._print_summary()
+            else:
+                self._generate_report()
 
             total_generated = len(self.allocation_results)
             logger.info(f"视频分配算法执行完成 - 共生成 {total_generated} 个视频")
@@ -407,70 +687,76 @@ class VideoAllocationAlgorithm:
             logger.error(f"执行分配算法失败: {e}")
             return False
 
-    def _calculate_max_video_generation(self, templates: List[TemplateInfo], available_videos: int) -> int:
-        """计算最大可生成的视频数量 - 基于最小化素材使用策略"""
-        # 按模板所需视频数量排序（从少到多）
-        template_needs = []
-        for template in templates:
-            min_videos_needed = max(1, int(template.video_positions * 0.2))  # 最少只需要20%的位置
-            template_needs.append((template.name, min_videos_needed))
-
-        template_needs.sort(key=lambda x: x[1])  # 按需求量排序
+    def _run_allocation_rounds(self, templates: List[TemplateInfo], video_files: List[VideoFile]) -> int:
+        """
+        执行多轮分配，直到视频用完或无法继续
 
-        # 贪心算法计算最大生成数量
-        max_count = 0
-        remaining_videos = available_videos
+        Returns:
+            生成的视频数量
+        """
+        # 未使用视频池在各轮之间共享，分配时移除
+        pool = self._video_pool(video_files)
+        # 模板按所需视频数量排序（优先分配需求少的模板），排序键不变，只需排一次
+        templates_sorted = sorted(templates, key=lambda t: self._estimate_template_min_videos(t))
 
-        while remaining_videos > 0:
-            allocated_this_round = False
-            for _, min_needed in template_needs:
-                if remaining_videos >= min_needed:
-                    remaining_videos -= min_needed
-                    max_count += 1
-                    allocated_this_round = True
-                    break
+        generated = 0
+        round_num = 1
+        while len(pool) > 0 and self._can_continue_allocation(templates, pool):
+            logger.info(f"\n=== 第 {round_num} 轮分配 ===")
+            round_results = self._execute_allocation_round(templates_sorted, pool, round_num)
 
-            if not allocated_this_round:
+            if not round_results:
+                logger.info("无法继续分配，结束")
                 break
 
-        return max_count
+            self.allocation_results.extend(round_results)
+            generated += len(round_results)
+            round_num += 1
+
+        return generated
+
+    def _calculate_max_video_generation(self, templates: List[TemplateInfo], available_videos: int) -> int:
+        """计算最大可生成的视频数量 - 基于最小化素材使用策略"""
+        if not templates:
+            return 0
+
+        # 贪心地每次使用需求最少的模板（最少只需要20%的位置）
+        min_needed = min(max(1, int(template.video_positions * 0.2)) for template in templates)
+        return available_videos // min_needed
 
     def _can_continue_allocation(self, templates: List[TemplateInfo], video_files: List[VideoFile]) -> bool:
         """检查是否还能继续分配"""
-        available_videos = [v for v in video_files if v.path not in self.used_videos]
-        if len(available_videos) == 0:
+        available_count = len(self._video_pool(video_files))
+        if available_count == 0:
             return False
 
         # 检查是否至少有一个模板可以用剩余视频完成
-        for template in templates:
-            min_needed = max(1, int(template.video_positions * 0.3))
-            if len(available_videos) >= min_needed:
-                return True
-
-        return False
+        return any(available_count >= max(1, int(template.video_positions * 0.3)) for template in templates)
 
     def _execute_allocation_round(self, templates: List[TemplateInfo], video_files: List[VideoFile], round_num: int) -> List[AllocationResult]:
         """执行一轮分配"""
         round_results = []
-        available_videos = [v for v in video_files if v.path not in self.used_videos]
+        pool = self._video_pool(video_files)
 
-        logger.info(f"第 {round_num} 轮开始，可用视频: {len(available_videos)} 个")
+        logger.info(f"第 {round_num} 轮开始，可用视频: {len(pool)} 个")
 
-        # 按模板所需视频数量排序（优先分配需求少的模板）
+        # 按模板所需视频数量排序（优先分配需求少的模板），已排序时不改变顺序
         templates_sorted = sorted(templates, key=lambda t: self._estimate_template_min_videos(t))
 
         for template in templates_sorted:
-            current_available = [v for v in video_files if v.path not in self.used_videos]
-            if len(current_available) == 0:
+            if len(pool) == 0:
                 break
 
             min_needed = self._estimate_template_min_videos(template)
-            if len(current_available) >= min_needed:
-                # 为这个模板创建一个视频
-                result = self._allocate_single_video(template, video_files, round_num)
-                if result and result.videos_used > 0:
-                    round_results.append(result)
-                    logger.info(f"  ✓ 使用模板 '{template.name}' 生成视频 #{len(self.allocation_results) + len(round_results)}")
+            if len(pool) < min_needed:
+                # 模板按需求升序，剩余视频在本轮只会减少，后面的模板也无法分配
+                break
+
+            # 为这个模板创建一个视频
+            result = self._allocate_single_video(template, pool, round_num)
+            if result and result.videos_used > 0:
+                round_results.append(result)
+                logger.info(f"  ✓ 使用模板 '{template.name}' 生成视频 #{len(self.allocation_results) + len(round_results)}")
 
         logger.info(f"第 {round_num} 轮完成，生成了 {len(round_results)} 个视频")
         return round_results
@@ -490,7 +776,7 @@ class VideoAllocationAlgorithm:
         logger.debug(f"为模板 '{template.name}' 分配视频 (第{round_num}轮)")
 
         # 获取当前可用视频
-        available_videos = [v for v in video_files if v.path not in self.used_videos]
+        available_videos = self._video_pool(video_files)
 
         # 计算最少需要的视频数量（严格按数学公式）
         min_videos_needed = self._estimate_template_min_videos(template)
@@ -502,11 +788,13 @@ class VideoAllocationAlgorithm:
             return None
 
         # 随机选择视频
-        selected_videos = random.sample(available_videos, target_videos)
+        selected_videos = self._sample_videos(available_videos, target_videos)
 
         # 智能分配位置：确保所有位置都被填充，每个视频最多占2个位置
         video_assignments = []
         positions_to_fill = template.video_positions
+        # 未填充位置（升序），填充后移除
+        available_positions = OrderedPool(range(template.video_positions))
 
         for i, video in enumerate(selected_videos):
             # 计算这个视频应该占用多少个位置
@@ -522,17 +810,17 @@ class VideoAllocationAlgorithm:
                 positions_for_this_video = max(1, max_positions_for_this_video)
 
             # 随机选择位置
-            available_positions = [p for p in range(template.video_positions)
-                                 if not any(p == pos for pos, _ in video_assignments)]
             selected_positions = random.sample(available_positions,
                                              min(positions_for_this_video, len(available_positions)))
 
             # 添加分配
             for position in selected_positions:
                 video_assignments.append((position, video))
+                available_positions.discard(position)
                 positions_to_fill -= 1
 
             self.used_videos.add(video.path)
+            available_videos.discard(video.path)
 
         result = AllocationResult(
             template_name=template_name,
@@ -568,43 +856,99 @@ class VideoAllocationAlgorithm:
             template.effective_positions = min(template.video_positions, target_videos * 2)
             logger.info(f"模板 '{template.name}' 优化后目标: {target_videos} 个视频 (原需求: {template.video_positions} 个位置)")
 
-    def _save_results(self):
-        """保存分配结果到 outputs 目录 - 使用管理器生成干净的输出"""
-        logger.info("保存分配结果...")
+    def _save_results(self, dry_run: bool = False) -> Dict[str, float]:
+        """
+        保存分配结果到 outputs 目录 - 使用管理器生成干净的输出
+
+        多个线程并行序列化和写文件，结果按分配顺序汇报；单个草稿失败不影响其他草稿。
+
+        Args:
+            dry_run: 只序列化不写入文件，用于测量输出吞吐量
+
+        Returns:
+            统计信息：saved、failed、seconds、drafts_per_second
+        """
+        logger.info("试运行：只序列化分配结果，不写入文件" if dry_run else "保存分配结果...")
 
         # 创建 outputs 目录
-        self.outputs_dir.mkdir(exist_ok=True)
+        if not dry_run:
+            self.outputs_dir.mkdir(exist_ok=True)
 
-        for result in self.allocation_results:
-            try:
-                # 使用新的干净保存方法
-                success = self._save_clean_template_result(result)
-                if success:
-                    logger.info(f"模板 '{result.template_name}' 结果保存完成")
-                else:
-                    logger.error(f"模板 '{result.template_name}' 保存失败")
+        stats = {'saved': 0, 'failed': 0}
+        start = time.perf_counter()
 
+        def report(result: AllocationResult, future):
+            try:
+                success = future.result()
             except Exception as e:
                 logger.error(f"保存模板 '{result.template_name}' 结果失败: {e}")
+                success = False
 
-    def _save_clean_template_result(self, result: AllocationResult) -> bool:
+            if not success:
+                stats['failed'] += 1
+                logger.error(f"模板 '{result.template_name}' 保存失败")
+                return
+
+            stats['saved'] += 1
+            if not dry_run:
+                # 项目管理器不保证线程安全，在主线程按顺序更新
+                self._update_template_resources(result)
+                logger.info(f"模板 '{result.template_name}' 结果保存完成")
+
+        # 在途窗口：(分配结果, 任务)，按分配顺序出队
+        window = deque()
+        limit = self.save_workers * 4
+        executor = ThreadPoolExecutor(max_workers=self.save_workers, thread_name_prefix="draft-save")
+        try:
+            for result in self.allocation_results:
+                window.append((result, executor.submit(self._save_clean_template_result, result, dry_run)))
+                while window and (len(window) >= limit or window[0][1].done()):
+                    report(*window.popleft())
+            while window:
+                report(*window.popleft())
+        finally:
+            for _, future in window:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        seconds = time.perf_counter() - start
+        stats['seconds'] = seconds
+        stats['drafts_per_second'] = stats['saved'] / seconds if seconds > 0 else 0.0
+        logger.info(f"{'序列化' if dry_run else '保存'}完成: {stats['saved']} 个成功, {stats['failed']} 个失败, "
+                    f"耗时 {seconds:.2f}s ({stats['drafts_per_second']:.1f} 个/秒, {self.save_workers} 个线程)")
+        self.last_save_stats = stats
+        return stats
+
+    def _update_template_resources(self, result: AllocationResult):
+        """如果有project_manager，使用它来更新模板资源信息"""
+        if getattr(self, 'project_manager', None) is None:
+            return
+        try:
+            logger.info(f"使用project_manager更新模板 '{result.template_name}' 的资源信息")
+            # 更新项目管理器中的资源信息
+            self.project_manager.update_project_resources(result.template_name, result.video_assignments)
+            logger.debug(f"模板资源更新完成: {result.template_name}")
+        except Exception as e:
+            logger.warning(f"使用project_manager更新模板资源失败: {e}")
+            # 不影响主流程，继续执行
+
+    def _save_clean_template_result(self, result: AllocationResult, dry_run: bool = False) -> bool:
         """
-        使用管理器保存干净的模板结果 - 只生成3个JSON文件
+        保存干净的模板结果 - 只生成3个JSON文件
+
+        模板从缓存中取出（每个模板只解析一次），输出是替换了分配路径的浅克隆。
+        只写本结果自己的输出目录，可以在多个线程中并行调用；
+        project_manager 的资源更新由 _save_results 在主线程完成。
 
         Args:
             result: 分配结果
+            dry_run: 只序列化不写入文件
 
         Returns:
             是否保存成功
         """
         try:
-            # 导入管理器
-            from draft_meta_manager import DraftMetaManager
-            from draft_content_manager import DraftContentManager
-
-            # 创建输出目录
             output_dir = self.outputs_dir / result.template_name
-            output_dir.mkdir(parents=True, exist_ok=True)
 
             # 获取原始模板路径
             original_template_name = result.template_name.split('_第')[0]
@@ -614,36 +958,27 @@ class VideoAllocationAlgorithm:
                 logger.error(f"模板目录不存在: {template_path}")
                 return False
 
-            # 模板文件路径
             template_content_file = template_path / "draft_content.json"
-            template_meta_file = template_path / "draft_meta_info.json"
-            template_virtual_file = template_path / "draft_virtual_store.json"
-
             if not template_content_file.exists():
                 logger.error(f"模板内容文件不存在: {template_content_file}")
                 return False
 
+            template = self.template_cache.get(template_path)
+
+            # 模板有效后再创建输出目录，失败的草稿不留下空目录
+            if not dry_run:
+                output_dir.mkdir(parents=True, exist_ok=True)
+
             # 1. 处理 draft_content.json
-            success = self._create_clean_content_file(template_content_file, output_dir, result)
-            if not success:
+            patched = self._create_clean_content_file(template, output_dir, result, dry_run)
+            if patched is None:
                 return False
 
             # 2. 处理 draft_meta_info.json 和 draft_virtual_store.json
-            success = self._create_clean_meta_files(template_meta_file, template_virtual_file, output_dir, result)
+            success = self._create_clean_meta_files(template, output_dir, patched, dry_run)
             if not success:
                 return False
 
-            # 3. 如果有project_manager，使用它来更新模板资源信息
-            if hasattr(self, 'project_manager') and self.project_manager is not None:
-                try:
-                    logger.info(f"使用project_manager更新模板 '{result.template_name}' 的资源信息")
-                    # 更新项目管理器中的资源信息
-                    self.project_manager.update_project_resources(result.template_name, result.video_assignments)
-                    logger.debug(f"模板资源更新完成: {result.template_name}")
-                except Exception as e:
-                    logger.warning(f"使用project_manager更新模板资源失败: {e}")
-                    # 不影响主流程，继续执行
-
             logger.debug(f"干净输出完成: {output_dir} (仅包含3个JSON文件)")
             return True
 
@@ -651,97 +986,44 @@ class VideoAllocationAlgorithm:
             logger.error(f"保存干净模板结果失败: {e}")
             return False
 
-    def _create_clean_content_file(self, template_content_file: Path, output_dir: Path, result: AllocationResult) -> bool:
-        """创建干净的 draft_content.json 文件"""
-        try:
-            # 读取原始模板内容
-            with open(template_content_file, 'r', encoding='utf-8') as f:
-                content = json.load(f)
-
-            # 更新视频路径
-            materials = content.get('materials', {})
-            videos = materials.get('videos', [])
-
-            if videos:
-                # 图片文件扩展名
-                image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tiff', '.svg'}
-
-                # 创建视频位置映射（排除图片文件）
-                video_positions = []
-                for i, video in enumerate(videos):
-                    video_path = video.get('path', '')
-                    if video_path:
-                        file_ext = Path(video_path).suffix.lower()
-                        if file_ext not in image_extensions:
-                            video_positions.append(i)
-
-                # 从video_assignments中提取视频路径，并映射到原始路径
-                allocated_videos = []
-                for _, video_file in result.video_assignments:
-                    original_path = self._map_to_original_path(video_file.path)
-                    allocated_videos.append(original_path)
-
-                # 更新视频路径
-                allocated_index = 0
-                for pos in video_positions:
-                    if allocated_index < len(allocated_videos):
-                        videos[pos]['path'] = allocated_videos[allocated_index]
-                        logger.debug(f"更新 materials.videos[{pos}]: {allocated_videos[allocated_index]}")
-                        allocated_index += 1
+    def _create_clean_content_file(self, template: TemplateDraft, output_dir: Path,
+                                   result: AllocationResult, dry_run: bool = False) -> Optional[Dict[int, str]]:
+        """
+        创建干净的 draft_content.json 文件
 
-                logger.info(f"更新 materials.videos: {allocated_index} 个视频路径 (使用绝对路径，其他位置的视频未处理)")
+        Returns:
+            materials.videos 下标 -> 新路径，失败时返回 None
+        """
+        try:
+            # 按分配顺序把视频（映射回原始路径）填入模板的视频位置
+            allocated_videos = [self._map_to_original_path(video_file.path)
+                                for _, video_file in result.video_assignments]
+            content, patched = template.render_content(allocated_videos)
 
-            # 保存更新后的内容
-            output_file = output_dir / "draft_content.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(content, f, ensure_ascii=False, indent=2)
+            if template.video_slots:
+                logger.debug(f"更新 materials.videos: {len(patched)} 个视频路径 (使用绝对路径，其他位置的视频未处理)")
 
-            return True
+            self._emit_draft(output_dir / "draft_content.json", content, dry_run)
+            return patched
 
         except Exception as e:
             logger.error(f"创建干净内容文件失败: {e}")
-            return False
+            return None
 
-    def _create_clean_meta_files(self, template_meta_file: Path, template_virtual_file: Path,
-                                output_dir: Path, result: AllocationResult) -> bool:
+    def _create_clean_meta_files(self, template: TemplateDraft, output_dir: Path,
+                                 patched: Dict[int, str], dry_run: bool = False) -> bool:
         """创建干净的 draft_meta_info.json 和 draft_virtual_store.json 文件"""
         try:
-            # 更新 draft_meta_info.json 中的素材信息
-            if template_meta_file.exists():
-                with open(template_meta_file, 'r', encoding='utf-8') as f:
-                    meta_content = json.load(f)
-
-                # 读取已更新的 draft_content.json 来获取ID到路径的映射关系
-                output_content_file = output_dir / "draft_content.json"
-                id_to_path_mapping = {}
-                if output_content_file.exists():
-                    with open(output_content_file, 'r', encoding='utf-8') as f:
-                        content = json.load(f)
-                    id_to_path_mapping = self._extract_id_to_path_mapping_from_content(content)
-
-                # 同步素材信息到 draft_meta_info.json
-                updated_count = self._sync_materials_to_meta_info(meta_content, id_to_path_mapping)
-
-                output_meta_file = output_dir / "draft_meta_info.json"
-                with open(output_meta_file, 'w', encoding='utf-8') as f:
-                    json.dump(meta_content, f, ensure_ascii=False, indent=2)
-
-                logger.info(f"更新 draft_meta_info.json: {updated_count} 个视频路径")
-
-            # 复制 draft_virtual_store.json
-            if template_virtual_file.exists():
-                with open(template_virtual_file, 'r', encoding='utf-8') as f:
-                    virtual_content = json.load(f)
-
-                output_virtual_file = output_dir / "draft_virtual_store.json"
-                with open(output_virtual_file, 'w', encoding='utf-8') as f:
-                    json.dump(virtual_content, f, ensure_ascii=False, indent=2)
-            else:
-                # 如果虚拟存储文件不存在，创建一个基本的
-                virtual_content = {"store_data": {}}
-                output_virtual_file = output_dir / "draft_virtual_store.json"
-                with open(output_virtual_file, 'w', encoding='utf-8') as f:
-                    json.dump(virtual_content, f, ensure_ascii=False, indent=2)
+            # 按替换后的 local_material_id -> 路径 同步 draft_meta_info.json 中的素材信息
+            if template.meta is not None:
+                meta_content, updated_count = template.render_meta(
+                    template.material_paths(patched), int(time.time()))
+                self._emit_draft(output_dir / "draft_meta_info.json", meta_content, dry_run)
+                logger.debug(f"更新 draft_meta_info.json: {updated_count} 个视频路径")
+
+            # 复制 draft_virtual_store.json，不存在时创建一个基本的
+            virtual_content = template.virtual_store if template.virtual_store is not None else {"store_data": {}}
+            self._emit_draft(output_dir / "draft_virtual_store.json", virtual_content, dry_run)
 
             return True
 
@@ -749,36 +1031,13 @@ class VideoAllocationAlgorithm:
             logger.error(f"创建干净元数据文件失败: {e}")
             return False
 
-    def _extract_id_to_path_mapping_from_content(self, content: dict) -> dict:
-        """从 draft_content.json 中提取 local_material_id 到 file_path 的映射关系"""
-        id_to_path_mapping = {}
-        try:
-            # 从materials.videos中直接提取ID到路径的映射
-            materials = content.get('materials', {})
-            videos = materials.get('videos', [])
-
-            image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.tiff', '.svg'}
-
-            for video in videos:
-                if 'path' in video and 'local_material_id' in video:
-                    video_path = video['path']
-                    local_material_id = video.get('local_material_id', '')
-
-                    if video_path and local_material_id and local_material_id.strip():
-                        file_ext = Path(video_path).suffix.lower()
-                        # 只处理视频文件，跳过图片文件
-                        if file_ext not in image_extensions:
-                            id_to_path_mapping[local_material_id] = video_path
-                            logger.debug(f"ID映射: {local_material_id} -> {video_path}")
-
-            logger.debug(f"从 draft_content.json 提取了 {len(id_to_path_mapping)} 个ID到路径的映射")
-            return id_to_path_mapping
-
-        except Exception as e:
-            logger.error(f"从 draft_content.json 提取ID到路径映射失败: {e}")
-            import traceback
-            logger.error(f"详细错误: {traceback.format_exc()}")
-            return {}
+    @staticmethod
+    def _emit_draft(path: Path, data: dict, dry_run: bool):
+        """写入草稿文件；试运行时只序列化"""
+        if dry_run:
+            dump_draft(data)
+        else:
+            save_draft(path, data)
 
     def _extract_video_path_id_mapping_from_content(self, content: dict) -> list:
         """从 draft_content.json 中提取视频路径和local_material_id的映射关系"""
@@ -827,63 +1086,6 @@ class VideoAllocationAlgorithm:
             logger.error(f"从 draft_content.json 提取视频路径-ID映射失败: {e}")
             return []
 
-    def _sync_materials_to_meta_info(self, meta_content: dict, id_to_path_mapping: dict) -> int:
-        """
-        同步素材信息到 draft_meta_info.json
-
-        Args:
-            meta_content: draft_meta_info.json 的内容
-            id_to_path_mapping: local_material_id 到 file_path 的映射关系
-
-        Returns:
-            更新的素材数量
-        """
-        try:
-            updated_count = 0
-
-            # 更新 draft_materials 部分
-            if 'draft_materials' in meta_content and id_to_path_mapping:
-                draft_materials = meta_content['draft_materials']
-
-                # 查找视频素材类型 (type: 0 表示视频)
-                for material_group in draft_materials:
-                    if material_group.get('type') == 0 and 'value' in material_group:
-                        videos = material_group['value']
-
-                        for video_meta in videos:
-                            if 'id' in video_meta and 'file_Path' in video_meta:
-                                material_id = video_meta['id']
-
-                                # 如果这个ID在映射中存在，则更新对应的路径
-                                if material_id in id_to_path_mapping:
-                                    new_video_path = id_to_path_mapping[material_id]
-                                    old_path = video_meta['file_Path']
-
-                                    # 更新路径
-                                    video_meta['file_Path'] = new_video_path
-
-                                    # 更新文件名相关字段
-                                    video_meta['extra_info'] = Path(new_video_path).name
-
-                                    # 更新修改时间为当前时间
-                                    import time
-                                    current_time = int(time.time())
-                                    video_meta['create_time'] = current_time
-                                    video_meta['import_time'] = current_time
-                                    video_meta['import_time_ms'] = current_time * 1000000  # 微秒
-
-                                    updated_count += 1
-                                    logger.debug(f"同步素材ID {material_id}: {Path(old_path).name} -> {Path(new_video_path).name}")
-                                else:
-                                    logger.debug(f"素材ID {material_id} 在映射中不存在，保持原路径: {video_meta.get('file_Path', 'unknown')}")
-
-            logger.debug(f"draft_meta_info.json 素材同步完成，更新了 {updated_count} 个素材")
-            return updated_count
-
-        except Exception as e:
-            logger.error(f"同步素材信息到 draft_meta_info.json 失败: {e}")
-            return 0
-
     def _generate_report(self):
         """生成分配报告"""
         logger.info("生成分配报告...")
@@ -916,8 +1118,7 @@ class VideoAllocationAlgorithm:
 
         # 保存报告
         report_path = self.outputs_dir / "allocation_report.json"
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        save_draft(report_path, report, pretty=True)
 
         logger.info(f"分配报告已保存: {report_path}")
 
@@ -3,5 +3,9 @@
 """
 
 from .video_processor import VideoProcessor, VideoSegment
+from .segment_cutter import SegmentCutter
+from .fast_cutter import FastCutter
+from .encode_scheduler import EncodeScheduler, plan_concurrency
 
-__all__ = ['VideoProcessor', 'VideoSegment']
+__all__ = ['VideoProcessor', 'VideoSegment', 'SegmentCutter', 'FastCutter',
+           'EncodeScheduler', 'plan_concurrency']
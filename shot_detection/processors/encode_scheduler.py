@@ -0,0 +1,238 @@
+"""
+分段编码调度器
+按CPU核数、源分辨率和编码预设规划并发的FFmpeg进程数和每个进程的线程数，
+避免每个编码进程各自按核数开线程导致CPU超额订阅；分段按时长从长到短排队，
+减少最后才开始的长分段拖慢整体完成时间
+"""
+
+import os
+import time
+import heapq
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+# 1080p 下单个 x264/x265 进程能有效利用的线程数，预设越慢单帧工作量越大，多线程效率越高
+PRESET_THREADS = {
+    'ultrafast': 2, 'superfast': 2, 'veryfast': 3, 'faster': 3, 'fast': 4,
+    'medium': 4, 'slow': 6, 'slower': 8, 'veryslow': 8,
+}
+
+REFERENCE_PIXELS = 1920 * 1080
+
+# 单个进程的线程上限，超过后编码器的并行效率很低
+MAX_THREADS_PER_JOB = 16
+
+# 流复制不编码，主要受磁盘IO限制
+COPY_WORKERS = 4
+
+
+def encoder_preset(video_args: List[str]) -> Optional[str]:
+    """视频编码参数中的预设名，流复制返回 None"""
+    if '-c:v' in video_args and video_args[video_args.index('-c:v') + 1] == 'copy':
+        return None
+    if '-preset' in video_args:
+        return video_args[video_args.index('-preset') + 1]
+    return 'medium'
+
+
+def apply_thread_cap(cmd: List[str], threads: Optional[int]) -> List[str]:
+    """
+    限制FFmpeg命令的解码和编码线程数
+
+    在第一个 -i 之前加输入端 -threads（解码），在输出路径之前加输出端 -threads（编码）。
+    命令中已有 -threads 时保持不变。
+    """
+    if not threads or '-threads' in cmd or '-i' not in cmd:
+        return list(cmd)
+    cap = ['-threads', str(threads)]
+    input_index = cmd.index('-i')
+    return cmd[:input_index] + cap + cmd[input_index:-1] + cap + cmd[-1:]
+
+
+@dataclass
+class EncodePlan:
+    """编码并发计划"""
+    workers: int
+    threads_per_job: int
+    cores: int
+
+    def threads_for(self, job_count: int) -> int:
+        """任务数少于并发数时把空闲的核分给正在运行的任务"""
+        workers = max(1, min(self.workers, job_count))
+        return max(self.threads_per_job, min(self.cores // workers, MAX_THREADS_PER_JOB))
+
+
+def plan_concurrency(preset: Optional[str] = 'medium', width: int = 1920, height: int = 1080,
+                     cores: Optional[int] = None, max_workers: Optional[int] = None) -> EncodePlan:
+    """
+    规划编码并发
+
+    Args:
+        preset: 编码预设，None 表示流复制
+        width: 源视频宽度
+        height: 源视频高度
+        cores: CPU核数，默认取系统核数
+        max_workers: 并发进程数上限
+
+    Returns:
+        编码并发计划
+    """
+    cores = max(1, cores or os.cpu_count() or 1)
+
+    if preset is None:
+        threads = 1
+        workers = min(cores, COPY_WORKERS)
+    else:
+        base = PRESET_THREADS.get(preset, PRESET_THREADS['medium'])
+        scale = width * height / REFERENCE_PIXELS if width and height else 1.0
+        scale = min(max(scale, 0.25), 4.0)
+        threads = max(1, min(cores, MAX_THREADS_PER_JOB, round(base * scale ** 0.5)))
+        workers = max(1, cores // threads)
+
+    if max_workers:
+        workers = max(1, min(workers, max_workers))
+
+    return EncodePlan(workers=workers, threads_per_job=threads, cores=cores)
+
+
+@dataclass
+class EncodeJob:
+    """编码任务，run 接收该任务可用的线程数，返回是否成功"""
+    key: Any
+    duration: float
+    run: Callable[[int], bool]
+
+
+class EncodeScheduler:
+    """有界并发的分段编码调度器"""
+
+    def __init__(self, plan: Optional[EncodePlan] = None):
+        """
+        初始化调度器
+
+        Args:
+            plan: 编码并发计划，默认按 medium 预设、1080p 规划
+        """
+        self.plan = plan or plan_concurrency()
+        self.logger = logger.bind(component="EncodeScheduler")
+
+        self._lock = threading.Lock()
+        self._reset_stats(0)
+
+    def _reset_stats(self, queued: int):
+        self._queue_depth = queued
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._encoded_seconds = 0.0
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def run(self, jobs: List[EncodeJob],
+            job_callback: Optional[Callable[[EncodeJob, bool], None]] = None) -> Dict[Any, bool]:
+        """
+        执行所有任务，阻塞直到全部完成
+
+        任务按时长从长到短出队；job_callback 在调用线程中按完成顺序回调。
+
+        Args:
+            jobs: 任务列表
+            job_callback: 单个任务完成回调 (任务, 是否成功)
+
+        Returns:
+            任务key到是否成功的映射
+        """
+        if not jobs:
+            return {}
+
+        heap = [(-job.duration, order, job) for order, job in enumerate(jobs)]
+        heapq.heapify(heap)
+        outcomes: queue.Queue = queue.Queue()
+
+        worker_count = max(1, min(self.plan.workers, len(jobs)))
+        threads = self.plan.threads_for(len(jobs))
+        self.logger.info(f"Encoding {len(jobs)} segments with {worker_count} workers "
+                         f"x {threads} threads ({self.plan.cores} cores)")
+
+        with self._lock:
+            self._reset_stats(len(jobs))
+            self._started_at = time.time()
+
+        def worker():
+            while True:
+                with self._lock:
+                    if not heap:
+                        return
+                    _, _, job = heapq.heappop(heap)
+                    self._queue_depth -= 1
+                    self._running += 1
+
+                try:
+                    success = bool(job.run(threads))
+                except Exception as e:
+                    self.logger.error(f"Encode job {job.key} failed: {e}")
+                    success = False
+
+                with self._lock:
+                    self._running -= 1
+                    if success:
+                        self._completed += 1
+                        self._encoded_seconds += job.duration
+                    else:
+                        self._failed += 1
+                outcomes.put((job, success))
+
+        workers = [threading.Thread(target=worker, name=f"encode-worker-{i}", daemon=True)
+                   for i in range(worker_count)]
+        for thread in workers:
+            thread.start()
+
+        results = {}
+        for _ in range(len(jobs)):
+            job, success = outcomes.get()
+            results[job.key] = success
+            if job_callback:
+                try:
+                    job_callback(job, success)
+                except Exception as e:
+                    self.logger.error(f"Encode callback failed for {job.key}: {e}")
+
+        for thread in workers:
+            thread.join()
+
+        with self._lock:
+            self._finished_at = time.time()
+
+        stats = self.get_stats()
+        self.logger.info(f"Encoded {stats['completed']}/{len(jobs)} segments in {stats['elapsed']:.1f}s "
+                         f"({stats['throughput']:.2f}x realtime)")
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        当前状态，可在其他线程中运行期间调用
+
+        throughput 为每秒墙钟时间完成的分段时长（秒），即相对实时的倍速。
+        """
+        with self._lock:
+            if self._started_at is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self._finished_at or time.time()) - self._started_at
+            done = self._completed + self._failed
+            return {
+                'workers': self.plan.workers,
+                'threads_per_job': self.plan.threads_per_job,
+                'cores': self.plan.cores,
+                'queue_depth': self._queue_depth,
+                'running': self._running,
+                'completed': self._completed,
+                'failed': self._failed,
+                'encoded_seconds': self._encoded_seconds,
+                'elapsed': elapsed,
+                'throughput': self._encoded_seconds / elapsed if elapsed > 0 else 0.0,
+                'segments_per_minute': done / elapsed * 60 if elapsed > 0 else 0.0,
+            }
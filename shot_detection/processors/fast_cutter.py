@@ -0,0 +1,414 @@
+"""
+快速切分器（流复制）
+读取源视频的关键帧索引，分段内部完整的 GOP 直接流复制，只有分段两端不完整的
+GOP 重新编码；也可以把切点吸附到最近的关键帧，整个分段只做流复制
+"""
+
+import shutil
+import tempfile
+import subprocess
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Optional, Callable, Tuple
+from loguru import logger
+
+from .video_processor import VideoSegment
+from .segment_cutter import SegmentCutter, quality_video_args, DEFAULT_AUDIO_ARGS, MIN_OUTPUT_SIZE
+from .encode_scheduler import EncodeScheduler, EncodeJob, apply_thread_cap
+
+# 快速切分对应的质量档位名
+COPY_QUALITY = 'copy'
+
+# 关键帧吸附策略：none 为边缘重编码保证切点精确，nearest 为切点吸附到最近关键帧
+KEYFRAME_SNAP_POLICIES = ('none', 'nearest')
+
+# 可以边缘重编码后与流复制部分拼接的源编码及对应的编码器
+EDGE_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+
+
+def ffprobe_for(ffmpeg_path: str) -> str:
+    """与 FFmpeg 可执行文件同目录的 ffprobe"""
+    path = Path(ffmpeg_path)
+    if path.parent == Path('.'):
+        return path.name.replace('ffmpeg', 'ffprobe')
+    return str(path.with_name(path.name.replace('ffmpeg', 'ffprobe')))
+
+
+@dataclass
+class KeyframeIndex:
+    """源视频的视频流信息和关键帧时间（秒，升序）"""
+    codec_name: str
+    pix_fmt: str
+    time_base: str
+    duration: float
+    keyframes: List[float] = field(default_factory=list)
+
+    @property
+    def timescale(self) -> Optional[int]:
+        """time_base 的分母，用作输出的 video_track_timescale"""
+        try:
+            numerator, denominator = self.time_base.split('/')
+            return int(denominator) // max(int(numerator), 1)
+        except (ValueError, AttributeError):
+            return None
+
+    def at_or_after(self, t: float, tolerance: float = 1e-3) -> Optional[float]:
+        index = bisect_left(self.keyframes, t - tolerance)
+        return self.keyframes[index] if index < len(self.keyframes) else None
+
+    def at_or_before(self, t: float, tolerance: float = 1e-3) -> Optional[float]:
+        index = bisect_right(self.keyframes, t + tolerance)
+        return self.keyframes[index - 1] if index > 0 else None
+
+    def nearest(self, t: float) -> Optional[float]:
+        candidates = [k for k in (self.at_or_before(t, 0.0), self.at_or_after(t, 0.0)) if k is not None]
+        return min(candidates, key=lambda k: abs(k - t)) if candidates else None
+
+
+def probe_keyframes(video_path: str, ffprobe_path: str = 'ffprobe', timeout: float = 300) -> KeyframeIndex:
+    """
+    读取视频流的编码信息和关键帧时间
+
+    只读取数据包的时间戳和标志，不解码。
+
+    Args:
+        video_path: 视频文件路径
+        ffprobe_path: ffprobe可执行文件
+        timeout: 超时时间（秒）
+
+    Returns:
+        关键帧索引
+    """
+    import json
+
+    info_cmd = [
+        ffprobe_path, '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=codec_name,pix_fmt,time_base:format=duration',
+        '-of', 'json', video_path
+    ]
+    result = subprocess.run(info_cmd, capture_output=True, text=True, check=True, timeout=timeout)
+    data = json.loads(result.stdout)
+    if not data.get('streams'):
+        raise ValueError("No video stream found")
+    stream = data['streams'][0]
+
+    packet_cmd = [
+        ffprobe_path, '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path
+    ]
+    result = subprocess.run(packet_cmd, capture_output=True, text=True, check=True, timeout=timeout)
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' not in flags:
+            continue
+        try:
+            keyframes.append(float(pts_time))
+        except ValueError:
+            continue
+
+    return KeyframeIndex(
+        codec_name=stream.get('codec_name', ''),
+        pix_fmt=stream.get('pix_fmt', ''),
+        time_base=stream.get('time_base', ''),
+        duration=float(data.get('format', {}).get('duration', 0) or 0),
+        keyframes=sorted(set(keyframes))
+    )
+
+
+@dataclass
+class FastCutPlan:
+    """单个分段的快速切分计划，parts 为按时间顺序的 (encode|copy, 起点, 终点)"""
+    start: float
+    end: float
+    parts: List[Tuple[str, float, float]]
+
+    @property
+    def copied_duration(self) -> float:
+        return sum(end - start for kind, start, end in self.parts if kind == 'copy')
+
+    @property
+    def encoded_duration(self) -> float:
+        return sum(end - start for kind, start, end in self.parts if kind == 'encode')
+
+
+class FastCutter:
+    """流复制快速切分器"""
+
+    def __init__(self, ffmpeg_path: str = 'ffmpeg',
+                 ffprobe_path: Optional[str] = None,
+                 edge_video_args: Optional[List[str]] = None,
+                 audio_args: Optional[List[str]] = None,
+                 extra_args: Optional[List[str]] = None,
+                 keyframe_snap: str = 'none',
+                 timeout_per_segment: float = 300,
+                 scheduler: Optional[EncodeScheduler] = None):
+        """
+        初始化快速切分器
+
+        Args:
+            ffmpeg_path: FFmpeg可执行文件
+            ffprobe_path: ffprobe可执行文件，默认取 FFmpeg 同目录
+            edge_video_args: 边缘重编码（及无法流复制时整段重编码）的视频参数，默认 high 档
+            audio_args: 音频编码参数（如 ['-an'] 去掉音频），默认 AAC 128k
+            extra_args: 其他输出参数；包含分辨率、帧率等改动时无法流复制，整段重编码
+            keyframe_snap: 关键帧吸附策略（none/nearest）
+            timeout_per_segment: 单个分段的超时时间（秒）
+            scheduler: 编码调度器，设置后各分段并发切分
+        """
+        if keyframe_snap not in KEYFRAME_SNAP_POLICIES:
+            raise ValueError(f"Unknown keyframe snap policy: {keyframe_snap}")
+
+        self.ffmpeg_path = ffmpeg_path
+        self.ffprobe_path = ffprobe_path or ffprobe_for(ffmpeg_path)
+        self.edge_video_args = list(edge_video_args) if edge_video_args is not None else quality_video_args('high')
+        self.audio_args = list(audio_args) if audio_args is not None else list(DEFAULT_AUDIO_ARGS)
+        self.extra_args = list(extra_args or [])
+        self.keyframe_snap = keyframe_snap
+        self.timeout_per_segment = timeout_per_segment
+        self.scheduler = scheduler
+        self.logger = logger.bind(component="FastCutter")
+
+    def _fallback_cutter(self) -> SegmentCutter:
+        """无法流复制时使用的重编码切分器"""
+        return SegmentCutter(ffmpeg_path=self.ffmpeg_path, video_args=self.edge_video_args,
+                             audio_args=self.audio_args, extra_args=self.extra_args,
+                             timeout_per_segment=self.timeout_per_segment, scheduler=self.scheduler)
+
+    def plan_segment(self, index: KeyframeIndex, start: float, end: float,
+                     tolerance: float = 1e-3) -> FastCutPlan:
+        """
+        规划单个分段的切分方式
+
+        Args:
+            index: 关键帧索引
+            start: 分段起点（秒）
+            end: 分段终点（秒）
+            tolerance: 判定切点与关键帧重合的容差（秒）
+
+        Returns:
+            切分计划
+        """
+        at_end_of_file = index.duration > 0 and end >= index.duration - tolerance
+
+        if self.keyframe_snap == 'nearest':
+            snapped_start = index.nearest(start)
+            if snapped_start is None:
+                return FastCutPlan(start, end, [('encode', start, end)])
+            snapped_end = end if at_end_of_file else index.nearest(end)
+            if snapped_end is None or snapped_end <= snapped_start + tolerance:
+                # 分段短于一个GOP时延伸到下一个关键帧
+                snapped_end = index.at_or_after(snapped_start + 2 * tolerance, 0.0) or max(end, index.duration)
+            return FastCutPlan(snapped_start, snapped_end, [('copy', snapped_start, snapped_end)])
+
+        first_key = index.at_or_after(start, tolerance)
+        last_key = end if at_end_of_file else index.at_or_before(end, tolerance)
+        if first_key is None or last_key is None or last_key - first_key <= tolerance:
+            # 分段落在一个GOP之内
+            return FastCutPlan(start, end, [('encode', start, end)])
+
+        parts = []
+        if first_key - start > tolerance:
+            parts.append(('encode', start, first_key))
+        parts.append(('copy', first_key, last_key))
+        if end - last_key > tolerance:
+            parts.append(('encode', last_key, end))
+        return FastCutPlan(start, end, parts)
+
+    def build_part_command(self, video_path: str, index: KeyframeIndex, kind: str,
+                           start: float, end: float, output: str) -> List[str]:
+        """构建单个片段（只含视频）的FFmpeg命令"""
+        cmd = [self.ffmpeg_path, '-y', '-hide_banner', '-loglevel', 'error',
+               '-ss', f"{start:.6f}", '-i', video_path, '-t', f"{end - start:.6f}",
+               '-map', '0:v:0', '-an']
+        if kind == 'copy':
+            cmd.extend(['-c:v', 'copy'])
+        else:
+            cmd.extend(self._edge_args(index))
+        cmd.extend(['-avoid_negative_ts', 'make_zero', output])
+        return cmd
+
+    def _edge_args(self, index: KeyframeIndex) -> List[str]:
+        """边缘重编码参数：编码器和像素格式与源一致，保证能与流复制部分拼接"""
+        args = list(self.edge_video_args)
+        encoder = EDGE_ENCODERS.get(index.codec_name)
+        if '-c:v' in args:
+            args[args.index('-c:v') + 1] = encoder
+        else:
+            args = ['-c:v', encoder] + args
+        if index.pix_fmt:
+            args.extend(['-pix_fmt', index.pix_fmt])
+        return args
+
+    def build_mux_command(self, video_path: str, index: KeyframeIndex, list_file: str,
+                          plan: FastCutPlan, output: str) -> List[str]:
+        """拼接各片段并从源文件重新切出音频"""
+        cmd = [self.ffmpeg_path, '-y', '-hide_banner', '-loglevel', 'error',
+               '-f', 'concat', '-safe', '0', '-i', list_file]
+        with_audio = self.audio_args != ['-an']
+        if with_audio:
+            cmd.extend(['-ss', f"{plan.start:.6f}", '-t', f"{plan.end - plan.start:.6f}", '-i', video_path])
+        cmd.extend(['-map', '0:v:0'])
+        if with_audio:
+            cmd.extend(['-map', '1:a:0?'])
+        cmd.extend(['-c:v', 'copy'])
+        cmd.extend(self.audio_args)
+        if index.timescale:
+            cmd.extend(['-video_track_timescale', str(index.timescale)])
+        cmd.extend(['-movflags', '+faststart', '-avoid_negative_ts', 'make_zero', output])
+        return cmd
+
+    def build_copy_command(self, video_path: str, plan: FastCutPlan, output: str) -> List[str]:
+        """整段流复制（吸附到关键帧）的FFmpeg命令"""
+        cmd = [self.ffmpeg_path, '-y', '-hide_banner', '-loglevel', 'error',
+               '-ss', f"{plan.start:.6f}", '-i', video_path, '-t', f"{plan.end - plan.start:.6f}",
+               '-map', '0:v:0']
+        if self.audio_args == ['-an']:
+            cmd.append('-an')
+        else:
+            cmd.extend(['-map', '0:a:0?'])
+        cmd.extend(['-c', 'copy', '-movflags', '+faststart', '-avoid_negative_ts', 'make_zero', output])
+        return cmd
+
+    def cut(self, video_path: str, segments: List[VideoSegment],
+            fps: Optional[float] = None,
+            progress_callback: Optional[Callable[[float, str], None]] = None,
+            segment_callback: Optional[Callable[[VideoSegment, bool], None]] = None) -> List[VideoSegment]:
+        """
+        快速切出所有分段
+
+        吸附到关键帧时会更新分段的起止时间，原始时间保存在分段元数据中。
+
+        Args:
+            video_path: 源视频路径
+            segments: 分段列表
+            fps: 源帧率
+            progress_callback: 总体进度回调 (进度0-1, 消息)
+            segment_callback: 单个分段完成回调 (分段, 是否成功)
+
+        Returns:
+            成功切出的分段，顺序与输入一致
+        """
+        if not segments:
+            return []
+
+        fallback_reason = None
+        index = None
+        if self.extra_args:
+            fallback_reason = "输出参数改变了分辨率或帧率"
+        else:
+            try:
+                index = probe_keyframes(video_path, self.ffprobe_path)
+                if not index.keyframes:
+                    fallback_reason = "未读取到关键帧"
+                elif self.keyframe_snap == 'none' and index.codec_name not in EDGE_ENCODERS:
+                    fallback_reason = f"源编码 {index.codec_name} 不支持边缘重编码拼接"
+            except Exception as e:
+                fallback_reason = f"关键帧索引读取失败: {e}"
+
+        if fallback_reason:
+            self.logger.warning(f"Fast cut unavailable ({fallback_reason}), re-encoding segments")
+            return self._fallback_cutter().cut(video_path, segments, fps=fps,
+                                               progress_callback=progress_callback,
+                                               segment_callback=segment_callback)
+
+        tolerance = 0.5 / fps if fps and fps > 0 else 1e-3
+        plans = [self.plan_segment(index, s.start_time, s.end_time, tolerance) for s in segments]
+        results: Dict[int, bool] = {}
+
+        def report(position: int, success: bool):
+            segment, plan = segments[position], plans[position]
+            results[position] = success
+            if success and (plan.start, plan.end) != (segment.start_time, segment.end_time):
+                self._apply_snapped_times(segment, plan, fps)
+            if segment_callback:
+                segment_callback(segment, success)
+            if progress_callback:
+                progress_callback(len(results) / len(segments), f"分段 {Path(segment.file_path).name} "
+                                                                f"{'完成' if success else '失败'}")
+
+        if self.scheduler is not None and len(segments) > 1:
+            # 按需要重编码的时长排队，流复制部分几乎不占CPU
+            jobs = [EncodeJob(key=position, duration=plan.encoded_duration,
+                              run=lambda threads, position=position: self._cut_segment(
+                                  video_path, index, segments[position], plans[position], threads))
+                    for position, plan in enumerate(plans)]
+            self.scheduler.run(jobs, job_callback=lambda job, success: report(job.key, success))
+        else:
+            for position in range(len(segments)):
+                report(position, self._cut_segment(video_path, index, segments[position], plans[position]))
+
+        successful = [segment for position, segment in enumerate(segments) if results.get(position)]
+        copied = sum(plans[p].copied_duration for p in results if results[p])
+        total_duration = sum(plans[p].end - plans[p].start for p in results if results[p])
+        if total_duration > 0:
+            self.logger.info(f"Fast cut {len(successful)}/{len(segments)} segments, "
+                             f"{copied / total_duration * 100:.0f}% stream copied")
+        return successful
+
+    def _cut_segment(self, video_path: str, index: KeyframeIndex,
+                     segment: VideoSegment, plan: FastCutPlan, threads: Optional[int] = None) -> bool:
+        """按计划切出单个分段，threads 限制FFmpeg的线程数"""
+        output = Path(segment.file_path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+        if len(plan.parts) == 1 and plan.parts[0][0] == 'copy':
+            commands, work_dir = [self.build_copy_command(video_path, plan, str(output))], None
+        elif len(plan.parts) == 1:
+            # 分段落在一个GOP之内，直接重编码
+            return self._fallback_cutter().extract_single(video_path, segment, threads)
+        else:
+            work_dir = Path(tempfile.mkdtemp(prefix='.fastcut_', dir=output.parent))
+            # MPEG-TS 片段携带各自的参数集，拼接时重编码部分与复制部分互不干扰
+            part_files = [work_dir / f"part_{i:02d}.ts" for i in range(len(plan.parts))]
+            commands = [
+                self.build_part_command(video_path, index, kind, start, end, str(part_file))
+                for (kind, start, end), part_file in zip(plan.parts, part_files)
+            ]
+            list_file = work_dir / 'parts.txt'
+            list_file.write_text(''.join(f"file '{p.as_posix()}'\n" for p in part_files), encoding='utf-8')
+            commands.append(self.build_mux_command(video_path, index, str(list_file), plan, str(output)))
+
+        try:
+            for cmd in commands:
+                cmd = apply_thread_cap(cmd, threads)
+                self.logger.debug(f"Executing: {' '.join(cmd)}")
+                result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8',
+                                        errors='ignore', timeout=self.timeout_per_segment)
+                if result.returncode != 0:
+                    self.logger.error(f"FFmpeg error for segment {segment.index}: {result.stderr}")
+                    return False
+
+            if not output.exists():
+                self.logger.error(f"Output file not created: {output}")
+                return False
+            file_size = output.stat().st_size
+            if file_size < MIN_OUTPUT_SIZE:
+                self.logger.error(f"Output file too small: {output} ({file_size} bytes)")
+                return False
+            return True
+
+        except subprocess.TimeoutExpired:
+            self.logger.error(f"Timeout extracting segment {segment.index}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Error extracting segment {segment.index}: {e}")
+            return False
+        finally:
+            if work_dir is not None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _apply_snapped_times(segment: VideoSegment, plan: FastCutPlan, fps: Optional[float]):
+        """把分段时间更新为吸附后的关键帧时间"""
+        segment.metadata.setdefault('requested_start_time', segment.start_time)
+        segment.metadata.setdefault('requested_end_time', segment.end_time)
+        segment.metadata['keyframe_snapped'] = True
+        segment.start_time = plan.start
+        segment.end_time = plan.end
+        segment.duration = plan.end - plan.start
+        if fps and fps > 0:
+            segment.start_frame = int(round(plan.start * fps))
+            segment.end_frame = int(round(plan.end * fps))
@@ -0,0 +1,401 @@
+"""
+分段切分器
+一个视频的所有分段在一次 FFmpeg 运行中切出：在分段边界强制关键帧，由 segment
+封装器在这些关键帧处切开输出，整个文件只解码、编码一遍，而不是每个分段各启动
+一个 FFmpeg 并从文件开头解码到切点
+"""
+
+import os
+import csv
+import shutil
+import tempfile
+import threading
+import subprocess
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Optional, Callable
+from loguru import logger
+
+from .video_processor import VideoSegment
+from .encode_scheduler import EncodeScheduler, EncodeJob, apply_thread_cap
+
+# 质量档位对应的视频编码参数
+QUALITY_PRESETS = {
+    'lossless': ['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '0'],
+    'high': ['-c:v', 'libx264', '-preset', 'slow', '-crf', '18'],
+    'medium': ['-c:v', 'libx264', '-preset', 'medium', '-crf', '23'],
+    'low': ['-c:v', 'libx264', '-preset', 'fast', '-crf', '28'],
+}
+
+DEFAULT_AUDIO_ARGS = ['-c:a', 'aac', '-b:a', '128k']
+
+# 小于该大小的输出视为切分失败
+MIN_OUTPUT_SIZE = 1024
+
+
+def quality_video_args(quality: str) -> List[str]:
+    """质量档位对应的视频编码参数，未知档位按 low 处理"""
+    return list(QUALITY_PRESETS.get(quality, QUALITY_PRESETS['low']))
+
+
+@dataclass
+class CutPlan:
+    """单次切分计划
+
+    输出从 offset 开始、到 end 结束（相对源文件的秒数），在 cut_points（相对 offset）
+    处切开；第 k 段输出覆盖 [cut_points[k-1], cut_points[k])。pieces 记录哪些输出段
+    对应请求的分段，其余为分段之间的空隙，切完后删除。
+    """
+    offset: float
+    end: float
+    cut_points: List[float]
+    pieces: Dict[int, VideoSegment] = field(default_factory=dict)
+    unplanned: List[VideoSegment] = field(default_factory=list)
+
+
+def plan_cuts(segments: List[VideoSegment], tolerance: float = 1e-3) -> CutPlan:
+    """
+    把分段列表转换为单次切分计划
+
+    所有分段的起止时间都作为切点，因此每个不重叠的分段恰好对应一个输出段；
+    与其他分段重叠、无法对应到单个输出段的分段放入 unplanned，由调用方逐个切分。
+
+    Args:
+        segments: 分段列表
+        tolerance: 判定时间点相同的容差（秒）
+
+    Returns:
+        切分计划
+    """
+    ordered = sorted(segments, key=lambda s: (s.start_time, s.end_time))
+    if not ordered:
+        return CutPlan(0.0, 0.0, [])
+
+    offset = ordered[0].start_time
+    end = max(s.end_time for s in ordered)
+
+    times = []
+    for segment in ordered:
+        for t in (segment.start_time, segment.end_time):
+            if offset + tolerance < t < end - tolerance:
+                times.append(t - offset)
+    cut_points = []
+    for t in sorted(times):
+        if not cut_points or t - cut_points[-1] > tolerance:
+            cut_points.append(t)
+
+    plan = CutPlan(offset, end, cut_points)
+    for segment in ordered:
+        start = segment.start_time - offset
+        index = 0 if start <= tolerance else bisect_left(cut_points, start - tolerance) + 1
+        piece_start = 0.0 if index == 0 else cut_points[index - 1]
+        piece_end = cut_points[index] if index < len(cut_points) else end - offset
+
+        if (abs(piece_start - start) <= tolerance
+                and abs(piece_end - (segment.end_time - offset)) <= tolerance
+                and index not in plan.pieces):
+            plan.pieces[index] = segment
+        else:
+            plan.unplanned.append(segment)
+
+    return plan
+
+
+class SegmentCutter:
+    """单次解码多路输出的分段切分器"""
+
+    def __init__(self, ffmpeg_path: str = 'ffmpeg',
+                 video_args: Optional[List[str]] = None,
+                 audio_args: Optional[List[str]] = None,
+                 extra_args: Optional[List[str]] = None,
+                 timeout_per_segment: float = 300,
+                 scheduler: Optional[EncodeScheduler] = None):
+        """
+        初始化切分器
+
+        Args:
+            ffmpeg_path: FFmpeg可执行文件
+            video_args: 视频编码参数，默认 medium 档
+            audio_args: 音频编码参数（如 ['-an'] 去掉音频），默认 AAC 128k
+            extra_args: 其他输出参数（分辨率、帧率等）
+            timeout_per_segment: 按分段数折算的总超时时间（秒/分段）
+            scheduler: 编码调度器，设置后需要逐个切分的分段并发编码
+        """
+        self.ffmpeg_path = ffmpeg_path
+        self.video_args = list(video_args) if video_args is not None else quality_video_args('medium')
+        self.audio_args = list(audio_args) if audio_args is not None else list(DEFAULT_AUDIO_ARGS)
+        self.extra_args = list(extra_args or [])
+        self.timeout_per_segment = timeout_per_segment
+        self.scheduler = scheduler
+        self.logger = logger.bind(component="SegmentCutter")
+
+    def build_command(self, video_path: str, plan: CutPlan, piece_pattern: str,
+                      list_file: str, fps: Optional[float] = None) -> List[str]:
+        """
+        构建单次切分的FFmpeg命令
+
+        Args:
+            video_path: 源视频路径
+            plan: 切分计划
+            piece_pattern: 输出段文件名模板（如 piece_%05d.mp4）
+            list_file: segment 封装器写出已完成输出段的列表文件
+            fps: 源帧率，用于设置切点容差
+
+        Returns:
+            命令参数列表
+        """
+        cmd = [self.ffmpeg_path, '-y', '-hide_banner', '-nostats', '-loglevel', 'error']
+
+        # 输入端跳转：只从第一个分段的起点开始解码
+        if plan.offset > 0:
+            cmd.extend(['-ss', f"{plan.offset:.6f}"])
+        cmd.extend(['-i', video_path])
+        cmd.extend(['-t', f"{plan.end - plan.offset:.6f}"])
+
+        cmd.extend(self.video_args)
+        cmd.extend(self.audio_args)
+        cmd.extend(self.extra_args)
+
+        times = ','.join(f"{t:.6f}" for t in plan.cut_points)
+        cmd.extend(['-force_key_frames', times])
+
+        cmd.extend(['-f', 'segment', '-segment_times', times, '-reset_timestamps', '1'])
+        if fps and fps > 0:
+            # 强制关键帧的时间会取整到帧，容差取半帧
+            cmd.extend(['-segment_time_delta', f"{0.5 / fps:.6f}"])
+        if Path(piece_pattern).suffix.lower() in ('.mp4', '.mov', '.m4v'):
+            cmd.extend(['-segment_format_options', 'movflags=+faststart'])
+        cmd.extend(['-segment_list', list_file, '-segment_list_type', 'csv'])
+
+        cmd.extend(['-avoid_negative_ts', 'make_zero'])
+        cmd.extend(['-progress', 'pipe:1'])
+        cmd.append(piece_pattern)
+        return cmd
+
+    def build_single_command(self, video_path: str, segment: VideoSegment) -> List[str]:
+        """单个分段的FFmpeg命令（-ss 放在 -i 之前，按输入跳转）"""
+        cmd = [self.ffmpeg_path, '-y',
+               '-ss', str(segment.start_time),
+               '-i', video_path,
+               '-t', str(segment.duration)]
+        cmd.extend(self.video_args)
+        cmd.extend(self.audio_args)
+        cmd.extend(self.extra_args)
+        cmd.extend(['-avoid_negative_ts', 'make_zero', '-movflags', '+faststart'])
+        cmd.append(str(segment.file_path))
+        return cmd
+
+    def cut(self, video_path: str, segments: List[VideoSegment],
+            fps: Optional[float] = None,
+            progress_callback: Optional[Callable[[float, str], None]] = None,
+            segment_callback: Optional[Callable[[VideoSegment, bool], None]] = None) -> List[VideoSegment]:
+        """
+        切出所有分段
+
+        每个分段完成（移动到最终路径并校验）后立即回调 segment_callback，
+        单次切分失败时未完成的分段改为逐个切分。
+
+        Args:
+            video_path: 源视频路径
+            segments: 分段列表（file_path 为最终输出路径，可位于不同的类别目录）
+            fps: 源帧率
+            progress_callback: 总体进度回调 (进度0-1, 消息)
+            segment_callback: 单个分段完成回调 (分段, 是否成功)
+
+        Returns:
+            成功切出的分段，顺序与输入一致
+        """
+        if not segments:
+            return []
+
+        # 强制关键帧会取整到帧，不足半帧的时间差视为同一切点
+        tolerance = 0.5 / fps if fps and fps > 0 else 1e-3
+        plan = plan_cuts(segments, tolerance)
+        results: Dict[int, bool] = {}
+        total = len(segments)
+
+        def report(segment: VideoSegment, success: bool):
+            results[id(segment)] = success
+            if segment_callback:
+                segment_callback(segment, success)
+            if progress_callback:
+                progress_callback(len(results) / total, f"分段 {Path(segment.file_path).name} "
+                                                        f"{'完成' if success else '失败'}")
+
+        if plan.cut_points and plan.pieces:
+            try:
+                self._cut_single_pass(video_path, plan, fps, tolerance, report)
+            except Exception as e:
+                self.logger.error(f"Error in single-pass cut: {e}")
+
+        # 未能放入单次切分计划或单次切分中失败的分段逐个切分
+        retry = [s for s in segments if id(s) not in results]
+        if retry and len(retry) < total:
+            self.logger.info(f"Extracting {len(retry)} remaining segments individually")
+        self.extract_many(video_path, retry, report)
+
+        return [s for s in segments if results.get(id(s))]
+
+    def _cut_single_pass(self, video_path: str, plan: CutPlan, fps: Optional[float], tolerance: float,
+                         report: Callable[[VideoSegment, bool], None]):
+        """运行一次 segment 封装器切分，输出段完成后立即移动到分段的最终路径
+
+        只回报成功的分段，失败的分段留给调用方逐个重试。
+        """
+        targets = [Path(s.file_path) for s in plan.pieces.values()]
+        ext = targets[0].suffix or '.mp4'
+        try:
+            # 临时目录放在各类别目录的公共父目录下，完成的输出段直接改名移入
+            work_root = Path(os.path.commonpath([str(t.parent) for t in targets]))
+        except ValueError:
+            work_root = targets[0].parent
+        work_root.mkdir(parents=True, exist_ok=True)
+        work_dir = Path(tempfile.mkdtemp(prefix='.cut_', dir=work_root))
+
+        list_file = work_dir / 'pieces.csv'
+        cmd = self.build_command(video_path, plan, str(work_dir / f"piece_%05d{ext}"), str(list_file), fps)
+        self.logger.info(f"Cutting {len(plan.pieces)} segments in one pass "
+                         f"({len(plan.cut_points) + 1} pieces): {Path(video_path).name}")
+        self.logger.debug(f"Executing: {' '.join(cmd)}")
+
+        finished = set()
+
+        def collect():
+            """读取已完成的输出段，移动到最终路径"""
+            if not list_file.exists():
+                return
+            with open(list_file, newline='', encoding='utf-8', errors='ignore') as f:
+                rows = list(csv.reader(f))
+            for row in rows:
+                if not row or row[0] in finished:
+                    continue
+                finished.add(row[0])
+                piece_path = work_dir / row[0]
+                index = self._piece_index(plan, row, tolerance)
+                segment = plan.pieces.get(index)
+                if segment is None:
+                    # 分段之间的空隙
+                    piece_path.unlink(missing_ok=True)
+                    continue
+                if self._finalize_piece(piece_path, segment):
+                    report(segment, True)
+
+        stderr_file = tempfile.TemporaryFile(dir=work_dir)
+        timed_out = threading.Event()
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file,
+                                       text=True, encoding='utf-8', errors='ignore')
+
+            def kill():
+                timed_out.set()
+                process.kill()
+
+            watchdog = threading.Timer(self.timeout_per_segment * len(plan.pieces), kill)
+            watchdog.daemon = True
+            watchdog.start()
+            try:
+                # 每个进度块以 progress= 结尾，此时检查是否有输出段已完成
+                for line in process.stdout:
+                    if line.startswith('progress='):
+                        collect()
+                process.wait()
+            finally:
+                watchdog.cancel()
+
+            # 最后一个输出段在进程退出时才写入列表
+            collect()
+
+            if timed_out.is_set():
+                self.logger.error(f"FFmpeg single-pass cut timed out: {video_path}")
+            elif process.returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode('utf-8', errors='ignore')
+                self.logger.error(f"FFmpeg single-pass cut failed ({process.returncode}): {stderr}")
+        finally:
+            stderr_file.close()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def _piece_index(plan: CutPlan, row: List[str], tolerance: float) -> int:
+        """按列表中记录的起始时间确定输出段对应的切点区间，避免切点被合并时编号错位"""
+        try:
+            start = float(row[1])
+        except (IndexError, ValueError):
+            return int(Path(row[0]).stem.rsplit('_', 1)[-1])
+
+        if start <= tolerance:
+            return 0
+        index = bisect_left(plan.cut_points, start - tolerance)
+        if index < len(plan.cut_points) and abs(plan.cut_points[index] - start) <= tolerance:
+            return index + 1
+        return -1
+
+    def _finalize_piece(self, piece_path: Path, segment: VideoSegment) -> bool:
+        """校验输出段并移动到分段的最终路径"""
+        try:
+            if not piece_path.exists():
+                self.logger.error(f"Output piece not created for segment {segment.index}")
+                return False
+            file_size = piece_path.stat().st_size
+            if file_size < MIN_OUTPUT_SIZE:
+                self.logger.error(f"Output file too small: {segment.file_path} ({file_size} bytes)")
+                return False
+
+            target = Path(segment.file_path)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(piece_path), str(target))
+            return True
+        except Exception as e:
+            self.logger.error(f"Error finalizing segment {segment.index}: {e}")
+            return False
+
+    def extract_many(self, video_path: str, segments: List[VideoSegment],
+                     report: Callable[[VideoSegment, bool], None]):
+        """逐个切出多个分段，有调度器时并发编码，report 在调用线程中回调"""
+        if self.scheduler is None or len(segments) < 2:
+            for segment in segments:
+                report(segment, self.extract_single(video_path, segment))
+            return
+
+        jobs = [EncodeJob(key=position, duration=segment.duration,
+                          run=lambda threads, segment=segment: self.extract_single(video_path, segment, threads))
+                for position, segment in enumerate(segments)]
+        self.scheduler.run(jobs, job_callback=lambda job, success: report(segments[job.key], success))
+
+    def extract_single(self, video_path: str, segment: VideoSegment, threads: Optional[int] = None) -> bool:
+        """单独切出一个分段，threads 限制FFmpeg的线程数"""
+        try:
+            Path(segment.file_path).parent.mkdir(parents=True, exist_ok=True)
+            cmd = apply_thread_cap(self.build_single_command(video_path, segment), threads)
+            self.logger.debug(f"Executing: {' '.join(cmd)}")
+
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='ignore',
+                timeout=self.timeout_per_segment
+            )
+            if result.returncode != 0:
+                self.logger.error(f"FFmpeg error for segment {segment.index}: {result.stderr}")
+                return False
+
+            if not os.path.exists(segment.file_path):
+                self.logger.error(f"Output file not created: {segment.file_path}")
+                return False
+
+            file_size = os.path.getsize(segment.file_path)
+            if file_size < MIN_OUTPUT_SIZE:
+                self.logger.error(f"Output file too small: {segment.file_path} ({file_size} bytes)")
+                return False
+
+            return True
+
+        except subprocess.TimeoutExpired:
+            self.logger.error(f"Timeout extracting segment {segment.index}")
+            return False
+        except Exception as e:
+            self.logger.error(f"Error extracting segment {segment.index}: {e}")
+            return False
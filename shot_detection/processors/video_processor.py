@@ -9,8 +9,6 @@ from pathlib import Path
 from typing import List, Dict, Any, Tuple, Optional
 from dataclasses import dataclass
 import subprocess
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from loguru import logger
 
 from detectors.base import ShotBoundary
@@ -54,38 +52,25 @@ class VideoProcessor:
         # 生成分段信息
         segments = self._generate_segment_info(boundaries, fps, duration, output_dir, video_path)
         
-        # 并行处理分段
-        if self.config.processing.max_workers > 1:
-            segments = self._process_segments_parallel(video_path, segments)
-        else:
-            segments = self._process_segments_sequential(video_path, segments)
+        # 一次解码切出全部分段
+        segments = self._process_segments_single_pass(video_path, segments, fps, video_info=video_info)
         
         self.logger.info(f"Successfully created {len(segments)} video segments")
         return segments
     
     def _get_video_info(self, video_path: str) -> Dict[str, Any]:
-        """获取视频信息"""
+        """获取视频信息（ffprobe 结果来自共享的元数据索引）"""
+        from utils.probe_index import probe_media, first_stream, parse_rate
+        
         try:
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-print_format', 'json',
-                '-show_format', '-show_streams', video_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
-            
-            # 查找视频流
-            video_stream = None
-            for stream in data['streams']:
-                if stream['codec_type'] == 'video':
-                    video_stream = stream
-                    break
+            data = probe_media(video_path)
+            video_stream = first_stream(data, 'video')
             
             if not video_stream:
                 raise ValueError("No video stream found")
             
             # 提取信息
-            fps = eval(video_stream.get('r_frame_rate', '25/1'))
+            fps = parse_rate(video_stream.get('r_frame_rate')) or 25.0
             duration = float(data['format']['duration'])
             width = int(video_stream['width'])
             height = int(video_stream['height'])
@@ -159,138 +144,68 @@ class VideoProcessor:
         
         return segments
     
-    def _process_segments_parallel(self, video_path: str, segments: List[VideoSegment]) -> List[VideoSegment]:
-        """并行处理分段"""
-        self.logger.info(f"Processing {len(segments)} segments in parallel with {self.config.processing.max_workers} workers")
+    def _process_segments_single_pass(self, video_path: str, segments: List[VideoSegment],
+                                      fps: Optional[float] = None,
+                                      progress_callback=None,
+                                      video_info: Optional[Dict[str, Any]] = None) -> List[VideoSegment]:
+        """单次解码切出所有分段"""
+        self.logger.info(f"Processing {len(segments)} segments in a single pass")
         
-        successful_segments = []
-        
-        with ThreadPoolExecutor(max_workers=self.config.processing.max_workers) as executor:
-            # 提交所有任务
-            future_to_segment = {
-                executor.submit(self._extract_segment, video_path, segment): segment
-                for segment in segments
-            }
-            
-            # 收集结果
-            for future in as_completed(future_to_segment):
-                segment = future_to_segment[future]
-                try:
-                    success = future.result()
-                    if success:
-                        successful_segments.append(segment)
-                        self.logger.debug(f"Successfully processed segment {segment.index}")
-                    else:
-                        self.logger.error(f"Failed to process segment {segment.index}")
-                except Exception as e:
-                    self.logger.error(f"Error processing segment {segment.index}: {e}")
+        def on_segment(segment: VideoSegment, success: bool):
+            if success:
+                self.logger.debug(f"Successfully processed segment {segment.index}")
+            else:
+                self.logger.error(f"Failed to process segment {segment.index}")
         
-        return successful_segments
+        return self._create_cutter(video_info).cut(video_path, segments, fps=fps,
+                                         progress_callback=progress_callback,
+                                         segment_callback=on_segment)
     
-    def _process_segments_sequential(self, video_path: str, segments: List[VideoSegment]) -> List[VideoSegment]:
-        """顺序处理分段"""
-        self.logger.info(f"Processing {len(segments)} segments sequentially")
-        
-        successful_segments = []
+    def _create_cutter(self, video_info: Optional[Dict[str, Any]] = None):
+        """按配置创建分段切分器"""
+        from .segment_cutter import SegmentCutter
+        from .fast_cutter import FastCutter, COPY_QUALITY
         
-        for segment in segments:
-            try:
-                if self._extract_segment(video_path, segment):
-                    successful_segments.append(segment)
-                    self.logger.debug(f"Successfully processed segment {segment.index}")
-                else:
-                    self.logger.error(f"Failed to process segment {segment.index}")
-            except Exception as e:
-                self.logger.error(f"Error processing segment {segment.index}: {e}")
-        
-        return successful_segments
-    
-    def _extract_segment(self, video_path: str, segment: VideoSegment) -> bool:
-        """提取单个视频分段"""
-        try:
-            # 构建FFmpeg命令
-            cmd = self._build_ffmpeg_command(video_path, segment)
-            
-            # 执行命令
-            self.logger.debug(f"Executing: {' '.join(cmd)}")
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5分钟超时
-            )
-            
-            if result.returncode != 0:
-                self.logger.error(f"FFmpeg error for segment {segment.index}: {result.stderr}")
-                return False
-            
-            # 验证输出文件
-            if not os.path.exists(segment.file_path):
-                self.logger.error(f"Output file not created: {segment.file_path}")
-                return False
-            
-            # 检查文件大小
-            file_size = os.path.getsize(segment.file_path)
-            if file_size < 1024:  # 小于1KB可能是错误
-                self.logger.error(f"Output file too small: {segment.file_path} ({file_size} bytes)")
-                return False
-            
-            return True
-            
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"Timeout extracting segment {segment.index}")
-            return False
-        except Exception as e:
-            self.logger.error(f"Error extracting segment {segment.index}: {e}")
-            return False
+        video_args, audio_args, extra_args = self._encode_args()
+        scheduler = self._create_scheduler(video_info)
+        if self.config.processing.quality_preset == COPY_QUALITY:
+            return FastCutter(edge_video_args=video_args, audio_args=audio_args, extra_args=extra_args,
+                              keyframe_snap=self.config.processing.keyframe_snap, scheduler=scheduler)
+        return SegmentCutter(video_args=video_args, audio_args=audio_args, extra_args=extra_args,
+                             scheduler=scheduler)
     
-    def _build_ffmpeg_command(self, video_path: str, segment: VideoSegment) -> List[str]:
-        """构建FFmpeg命令"""
-        cmd = ['ffmpeg', '-y']  # -y 覆盖输出文件
-        
-        # 输入文件
-        cmd.extend(['-i', video_path])
-        
-        # 时间范围
-        cmd.extend(['-ss', str(segment.start_time)])
-        cmd.extend(['-t', str(segment.duration)])
-        
-        # 编码设置
-        quality_preset = self.config.processing.quality_preset
+    def _create_scheduler(self, video_info: Optional[Dict[str, Any]] = None):
+        """按CPU核数、源分辨率和编码预设创建编码调度器"""
+        from .encode_scheduler import EncodeScheduler, plan_concurrency, encoder_preset
         
-        if quality_preset == 'lossless':
-            cmd.extend(['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '0'])
-        elif quality_preset == 'high':
-            cmd.extend(['-c:v', 'libx264', '-preset', 'slow', '-crf', '18'])
-        elif quality_preset == 'medium':
-            cmd.extend(['-c:v', 'libx264', '-preset', 'medium', '-crf', '23'])
-        else:  # low
-            cmd.extend(['-c:v', 'libx264', '-preset', 'fast', '-crf', '28'])
+        video_info = video_info or {}
+        video_args, _, _ = self._encode_args()
+        plan = plan_concurrency(
+            preset=encoder_preset(video_args),
+            width=video_info.get('width', 1920),
+            height=video_info.get('height', 1080),
+            max_workers=self.config.processing.max_workers
+        )
+        return EncodeScheduler(plan)
+    
+    def _encode_args(self) -> Tuple[List[str], List[str], List[str]]:
+        """按配置生成 (视频编码参数, 音频参数, 分辨率/帧率等其他参数)"""
+        from .segment_cutter import quality_video_args, DEFAULT_AUDIO_ARGS
+        from .fast_cutter import COPY_QUALITY
         
-        # 音频处理
-        if self.config.output.preserve_audio:
-            cmd.extend(['-c:a', 'aac', '-b:a', '128k'])
-        else:
-            cmd.extend(['-an'])  # 无音频
+        quality = self.config.processing.quality_preset
+        # 快速切分模式下需要重编码的部分使用 high 档
+        video_args = quality_video_args('high' if quality == COPY_QUALITY else quality)
+        audio_args = list(DEFAULT_AUDIO_ARGS) if self.config.output.preserve_audio else ['-an']
         
-        # 分辨率设置
+        extra_args = []
         if self.config.processing.target_resolution:
             width, height = self.config.processing.target_resolution
-            cmd.extend(['-s', f'{width}x{height}'])
-        
-        # 帧率设置
+            extra_args.extend(['-s', f'{width}x{height}'])
         if self.config.processing.target_fps:
-            cmd.extend(['-r', str(self.config.processing.target_fps)])
-        
-        # 其他设置
-        cmd.extend(['-avoid_negative_ts', 'make_zero'])
-        cmd.extend(['-movflags', '+faststart'])
-        
-        # 输出文件
-        cmd.append(segment.file_path)
+            extra_args.extend(['-r', str(self.config.processing.target_fps)])
         
-        return cmd
+        return video_args, audio_args, extra_args
     
     def merge_segments(self, segments: List[VideoSegment], output_path: str) -> bool:
         """合并视频分段"""
@@ -13,8 +13,12 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from core.detection import FrameDifferenceDetector, HistogramDetector, MultiDetector
+from core.detection import FrameDifferenceDetector, HistogramDetector, MultiDetector, FrameReader
 from core.detection.base import ShotBoundary, DetectionResult
+from core.detection.coarse_to_fine import CoarseToFineScanner, CoarseToFineConfig, probe_keyframe_indices
+from core.detection.rolling import rolling_mean, rolling_mean_std, StreamingWindowStats
+from core.detection.compact import CompactDetectionResult
+from core.detection.chunked import plan_chunks, merge_chunk_scores, ChunkScores
 
 
 class TestFrameDifferenceDetector(unittest.TestCase):
@@ -270,5 +274,295 @@ class TestDetectionIntegration(unittest.TestCase):
         detector.cleanup()
 
 
+class TestSharedFramePipeline(unittest.TestCase):
+    """共享解码流水线测试"""
+
+    def _mock_capture(self, mock_video_capture, frames):
+        mock_cap = MagicMock()
+        mock_cap.isOpened.return_value = True
+        mock_cap.get.side_effect = lambda prop: {3: 640, 4: 480, 5: 25.0, 7: len(frames)}.get(prop, 0)
+        mock_cap.read.side_effect = [(True, f) for f in frames] + [(False, None)]
+        mock_video_capture.return_value = mock_cap
+        return mock_cap
+
+    @patch('core.detection.frame_reader.cv2.VideoCapture')
+    def test_single_decode_for_all_detectors(self, mock_video_capture):
+        """测试所有检测器共享一次解码"""
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8)] * 3 + \
+                 [np.full((480, 640, 3), 255, dtype=np.uint8)] * 3
+        self._mock_capture(mock_video_capture, frames)
+
+        detectors = [FrameDifferenceDetector(threshold=0.3, min_scene_length=1),
+                     HistogramDetector(threshold=0.3, min_scene_length=1)]
+        multi_detector = MultiDetector(detectors)
+        multi_detector.initialize_all()
+
+        result = multi_detector.detect_shots_fusion("test.mp4")
+
+        self.assertEqual(mock_video_capture.call_count, 1)
+        self.assertTrue(result.metadata['shared_decode'])
+        self.assertEqual(len(result.boundaries), 1)
+        self.assertEqual(result.boundaries[0].frame_number, 3)
+
+    def test_score_frame_stream(self):
+        """测试逐帧评分接口"""
+        detector = FrameDifferenceDetector(threshold=0.3, min_scene_length=1)
+        detector.begin_stream(fps=25.0, frame_count=3)
+
+        self.assertIsNone(detector.score_frame(np.zeros((240, 320, 3), dtype=np.uint8)))
+        self.assertAlmostEqual(detector.score_frame(np.zeros((240, 320, 3), dtype=np.uint8)), 0.0)
+        self.assertGreater(detector.score_frame(np.full((240, 320, 3), 255, dtype=np.uint8)), 0.9)
+
+        result = detector.end_stream()
+        self.assertEqual(len(result.confidence_scores), 2)
+        self.assertEqual([b.frame_number for b in result.boundaries], [2])
+        self.assertEqual(result.metadata['fps'], 25.0)
+
+
+class TestFrameDifferencePreprocess(unittest.TestCase):
+    """帧差检测器缩放优先预处理测试"""
+
+    def setUp(self):
+        self.detector = FrameDifferenceDetector(threshold=0.3, resize_height=240)
+
+    def test_preprocess_outputs_small_grayscale(self):
+        """测试预处理直接输出小尺寸灰度工作帧"""
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        working = self.detector.preprocess_frame(frame)
+
+        self.assertEqual(working.shape, (240, 426))
+        self.assertEqual(working.dtype, np.uint8)
+
+    def test_pair_accepts_working_and_raw_frames(self):
+        """测试帧对比较对工作帧与原始帧结果一致"""
+        black = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        white = np.full((1080, 1920, 3), 255, dtype=np.uint8)
+
+        raw_score = self.detector.process_frame_pair(black, white)
+        working_score = self.detector.process_frame_pair(
+            self.detector.preprocess_frame(black), self.detector.preprocess_frame(white)
+        )
+
+        self.assertAlmostEqual(raw_score, 1.0)
+        self.assertAlmostEqual(raw_score, working_score)
+
+
+class TestCoarseToFine(unittest.TestCase):
+    """粗扫精修检测测试"""
+
+    def setUp(self):
+        self.detector = FrameDifferenceDetector(threshold=0.3)
+
+    def test_select_windows_merges_adjacent_jumps(self):
+        """测试只选出分数跳变的区间并合并相连区间"""
+        black = self.detector.preprocess_frame(np.zeros((240, 320, 3), dtype=np.uint8))
+        white = self.detector.preprocess_frame(np.full((240, 320, 3), 255, dtype=np.uint8))
+        samples = [(0, black), (8, black), (16, white), (24, black), (32, black)]
+
+        scanner = CoarseToFineScanner(self.detector, CoarseToFineConfig(stride=8))
+        windows = scanner._select_windows(samples)
+
+        self.assertEqual(windows, [(8, 24)])
+
+    @patch('core.detection.coarse_to_fine.subprocess.run')
+    def test_probe_keyframe_indices(self, mock_run):
+        """测试解析ffprobe关键帧输出"""
+        mock_run.return_value = MagicMock(
+            returncode=0, stdout="0.000000,K_\n0.040000,__\n2.000000,K_\n4.000000,K_\n"
+        )
+
+        self.assertEqual(probe_keyframe_indices("test.mp4", 25.0), [0, 50, 100])
+
+
+class TestRollingStats(unittest.TestCase):
+    """滑动窗口统计测试"""
+
+    def setUp(self):
+        self.values = np.random.default_rng(0).random(200)
+
+    def test_rolling_mean_asymmetric_window(self):
+        """测试非对称窗口均值与逐窗口计算一致，空输入返回空数组"""
+        mean = rolling_mean(self.values, 4, 1)
+
+        self.assertEqual(len(mean), len(self.values))
+        for i in (0, 3, 100, 199):
+            self.assertAlmostEqual(mean[i], np.mean(self.values[max(0, i - 4):i + 2]))
+        self.assertEqual(rolling_mean([], 4, 1).size, 0)
+
+    def test_rolling_mean_std_matches_naive(self):
+        """测试向量化结果与逐窗口计算一致（含两端截断）"""
+        mean, std = rolling_mean_std(self.values, 15, 14)
+
+        for i in (0, 7, 100, 199):
+            window = self.values[max(0, i - 15):i + 15]
+            self.assertAlmostEqual(mean[i], np.mean(window))
+            self.assertAlmostEqual(std[i], np.std(window))
+
+    def test_smooth_scores(self):
+        """测试平滑分数与原逐点均值一致"""
+        detector = FrameDifferenceDetector()
+        smoothed = detector.smooth_scores(self.values.tolist(), window_size=5)
+
+        self.assertEqual(len(smoothed), len(self.values))
+        self.assertAlmostEqual(smoothed[0], np.mean(self.values[:3]))
+        self.assertAlmostEqual(smoothed[50], np.mean(self.values[48:53]))
+
+    def test_streaming_matches_batch(self):
+        """测试流式统计与批量统计一致"""
+        stream = StreamingWindowStats(before=3, after=2)
+        items = []
+        for value in self.values:
+            items.extend(stream.push(value))
+        items.extend(stream.flush())
+
+        mean, std = rolling_mean_std(self.values, 3, 2)
+        self.assertEqual([item[0] for item in items], list(range(len(self.values))))
+        np.testing.assert_allclose([item[2] for item in items], mean)
+        np.testing.assert_allclose([item[3] for item in items], std, atol=1e-7)
+
+
+class TestFrameReader(unittest.TestCase):
+    """预解码帧读取器测试"""
+
+    def _mock_capture(self, mock_video_capture, num_frames):
+        position = {'frame': 0}
+
+        def grab():
+            position['frame'] += 1
+            return position['frame'] <= num_frames
+
+        def read():
+            if not grab():
+                return False, None
+            return True, np.full((120, 160, 3), position['frame'] - 1, dtype=np.uint8)
+
+        mock_cap = MagicMock()
+        mock_cap.isOpened.return_value = True
+        mock_cap.get.side_effect = lambda prop: {3: 160, 4: 120, 5: 25.0, 7: num_frames}.get(prop, 0)
+        mock_cap.read.side_effect = read
+        mock_cap.grab.side_effect = grab
+        mock_video_capture.return_value = mock_cap
+        return mock_cap
+
+    @patch('core.detection.frame_reader.cv2.VideoCapture')
+    def test_reads_all_frames_in_order(self, mock_video_capture):
+        """测试按顺序读取全部帧，缓冲区大小固定"""
+        self._mock_capture(mock_video_capture, 20)
+
+        with FrameReader("test.mp4", buffer_size=3) as reader:
+            self.assertTrue(reader.open())
+            self.assertEqual(reader._buffers.shape, (3, 120, 160, 3))
+            items = [(index, int(frame[0, 0, 0])) for index, frame in reader]
+
+        self.assertEqual(items, [(i, i) for i in range(20)])
+
+    @patch('core.detection.frame_reader.cv2.VideoCapture')
+    def test_stride_and_resize(self, mock_video_capture):
+        """测试采样步长与缩放输出"""
+        self._mock_capture(mock_video_capture, 10)
+
+        with FrameReader("test.mp4", output_size=(32, 24), stride=4) as reader:
+            reader.open()
+            items = [(index, frame.shape) for index, frame in reader]
+
+        self.assertEqual([index for index, _ in items], [0, 4, 8])
+        self.assertEqual(items[0][1], (24, 32, 3))
+
+    @patch('core.detection.frame_reader.cv2.VideoCapture')
+    def test_release_stops_decode_thread(self, mock_video_capture):
+        """测试提前释放时解码线程能退出"""
+        self._mock_capture(mock_video_capture, 50)
+
+        reader = FrameReader("test.mp4", buffer_size=2)
+        reader.open()
+        reader.read()
+        reader.release()
+
+        self.assertIsNone(reader._thread)
+        self.assertEqual(reader.read(), (False, None))
+
+
+class TestCompactDetectionResult(unittest.TestCase):
+    """紧凑检测结果测试"""
+
+    def _make_result(self):
+        boundaries = [
+            ShotBoundary(100, 3.33, 0.8, "cut", {"diff_score": 0.8}),
+            ShotBoundary(200, 6.67, 0.9, "shot")
+        ]
+        return DetectionResult(boundaries, "TestAlgorithm", 1.5, 300,
+                               [0.1] * 299, {"fps": 30.0})
+
+    def test_columnar_storage(self):
+        """测试列式数组类型与按需转换"""
+        compact = self._make_result().to_compact()
+
+        self.assertEqual(compact.scores.dtype, np.float32)
+        self.assertEqual(compact.frame_numbers.dtype, np.int32)
+        self.assertEqual(compact.frame_numbers.tolist(), [100, 200])
+        self.assertEqual(compact.type_names[compact.type_codes[1]], "shot")
+        self.assertEqual(compact.boundary_metadata, {0: {"diff_score": 0.8}})
+
+        boundaries = compact.boundaries
+        self.assertIsInstance(boundaries[0], ShotBoundary)
+        self.assertEqual(boundaries[1].boundary_type, "shot")
+        self.assertEqual(boundaries[1].metadata, {})
+        self.assertAlmostEqual(boundaries[0].confidence, 0.8, places=6)
+        self.assertEqual(len(compact.confidence_scores), 299)
+
+    def test_npz_round_trip(self):
+        """测试 .npz 序列化往返"""
+        import io
+
+        compact = self._make_result().to_compact()
+        buffer = io.BytesIO()
+        compact.save(buffer)
+        buffer.seek(0)
+        loaded = CompactDetectionResult.load(buffer)
+
+        self.assertEqual(loaded.algorithm_name, "TestAlgorithm")
+        self.assertEqual(loaded.frame_count, 300)
+        self.assertEqual(loaded.metadata, {"fps": 30.0})
+        np.testing.assert_array_equal(loaded.scores, compact.scores)
+        self.assertEqual(loaded.boundaries_to_dicts(), compact.boundaries_to_dicts())
+
+        result = loaded.to_result()
+        self.assertIsInstance(result, DetectionResult)
+        self.assertEqual([b.frame_number for b in result.boundaries], [100, 200])
+
+
+class TestChunkedDetection(unittest.TestCase):
+    """分段并行检测测试"""
+
+    def test_plan_chunks_cover_all_scores(self):
+        """测试分段无缝覆盖全部分数下标"""
+        chunks = plan_chunks(1001, 4, overlap=10)
+
+        self.assertEqual(chunks[0].start, 0)
+        self.assertEqual(chunks[-1].end, 1000)
+        for prev, curr in zip(chunks, chunks[1:]):
+            self.assertEqual(prev.end, curr.start)
+            self.assertEqual(curr.read_start, curr.start - 10)
+        self.assertEqual(chunks[-1].read_end, 1000)
+
+    def test_merge_realigns_inaccurate_seek(self):
+        """测试跳转偏差由重叠区对齐校正"""
+        rng = np.random.default_rng(0)
+        truth = rng.random(400)
+        chunks = plan_chunks(401, 2, overlap=20)
+
+        results = []
+        for chunk, landed in zip(chunks, (0, 2)):
+            # 第二段实际从 read_start+2 开始解码
+            begin = chunk.read_start + landed
+            results.append(ChunkScores(chunk, truth[begin:chunk.read_end], 30.0))
+
+        scores, stats = merge_chunk_scores(results, 400)
+
+        np.testing.assert_array_equal(scores, truth)
+        self.assertEqual(stats['seam_shifts'], [(1, 2)])
+        self.assertEqual(stats['missing_scores'], 0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -15,8 +15,9 @@ import json
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from core.services import VideoService, BatchService, WorkflowService
-from core.detection import FrameDifferenceDetector
+from core.services import VideoService, BatchService, WorkflowService, DetectionProcessPool
+from core.services.result_cache import ResultCache
+from core.detection import FrameDifferenceDetector, ShotBoundary, DetectionResult
 from core.processing import ProcessingConfig
 
 
@@ -93,6 +94,77 @@ class TestVideoService(unittest.TestCase):
         self.assertTrue(cache_info['enabled'])
         self.assertEqual(cache_info['cache_dir'], self.temp_dir)
     
+    def test_cache_round_trip(self):
+        """测试检测结果以 .npz 缓存并从缓存加载"""
+        video_file = Path(self.temp_dir) / "test.mp4"
+        video_file.write_bytes(b"fake video")
+        detection = DetectionResult(
+            [ShotBoundary(30, 1.0, 0.75, "cut", {"diff_score": 0.75})],
+            self.detector.name, 0.5, 90, [0.25] * 89, {"fps": 30.0}
+        )
+
+        with patch.object(self.detector, 'initialize', return_value=True), \
+                patch.object(self.detector, 'detect_shots', return_value=detection) as mock_detect:
+            first = self.video_service.detect_shots(str(video_file))
+            second = self.video_service.detect_shots(str(video_file))
+
+        self.assertEqual(mock_detect.call_count, 1)
+        self.assertTrue(first['success'])
+        self.assertFalse(first['from_cache'])
+        self.assertTrue(second['from_cache'])
+        self.assertEqual(second['boundaries'], first['boundaries'])
+        self.assertEqual(second['confidence_scores'], first['confidence_scores'])
+        self.assertTrue(self.video_service.result_cache.path_for(first['cache_key']).exists())
+
+    def test_cache_key_follows_content(self):
+        """测试缓存键随内容和检测参数变化，与路径无关"""
+        original = Path(self.temp_dir) / "a.mp4"
+        copied = Path(self.temp_dir) / "b.mp4"
+        original.write_bytes(b"video content")
+        copied.write_bytes(b"video content")
+
+        key = self.video_service._get_cache_key(str(original), self.detector.get_config())
+        self.assertEqual(key, self.video_service._get_cache_key(str(copied), self.detector.get_config()))
+
+        other = FrameDifferenceDetector(threshold=0.5)
+        self.assertNotEqual(key, self.video_service._get_cache_key(str(original), other.get_config()))
+
+    def test_threshold_change_reuses_scores(self):
+        """测试修改阈值后由缓存的分数曲线重新阈值化，不再解码视频"""
+        video_file = Path(self.temp_dir) / "test.mp4"
+        video_file.write_bytes(b"fake video")
+        scores = [0.1] * 89
+        scores[29], scores[59] = 0.5, 0.25
+        detection = DetectionResult(
+            [ShotBoundary(30, 1.0, 0.5, "cut", {"diff_score": 0.5})],
+            self.detector.name, 0.5, 90, scores, {"fps": 30.0}
+        )
+
+        with patch.object(self.detector, 'initialize', return_value=True), \
+                patch.object(self.detector, 'detect_shots', return_value=detection) as mock_detect:
+            first = self.video_service.detect_shots(str(video_file))
+            self.detector.threshold = 0.2
+            second = self.video_service.detect_shots(str(video_file))
+
+        self.assertEqual(mock_detect.call_count, 1)
+        self.assertFalse(second['from_cache'])
+        self.assertEqual(second['metadata']['score_source'], 'cache')
+        self.assertEqual([b['frame_number'] for b in first['boundaries']], [30])
+        self.assertEqual([b['frame_number'] for b in second['boundaries']], [30, 60])
+        self.assertEqual(self.video_service.performance_stats['score_cache_hits'], 1)
+
+    def test_score_key_ignores_post_stage_params(self):
+        """测试分数曲线缓存键只随评分参数变化"""
+        video_file = Path(self.temp_dir) / "a.mp4"
+        video_file.write_bytes(b"video content")
+
+        key = self.video_service._get_score_key(str(video_file), self.detector)
+        relaxed = FrameDifferenceDetector(threshold=0.5, min_scene_length=5)
+        self.assertEqual(key, self.video_service._get_score_key(str(video_file), relaxed))
+
+        resized = FrameDifferenceDetector(threshold=0.3, resize_height=360)
+        self.assertNotEqual(key, self.video_service._get_score_key(str(video_file), resized))
+
     def test_clear_cache(self):
         """测试清空缓存"""
         # 创建一些缓存文件
@@ -369,5 +441,167 @@ class TestServiceIntegration(unittest.TestCase):
         video_service.cleanup()
 
 
+class _StubDetector(FrameDifferenceDetector):
+    """按文件名返回固定结果、抛出异常或直接退出进程的检测器"""
+
+    def detect_shots(self, video_path, **kwargs):
+        import os
+        name = Path(video_path).name
+        if name.startswith("crash"):
+            os._exit(3)
+        if name.startswith("error"):
+            raise ValueError("bad video")
+        return DetectionResult([ShotBoundary(10, 0.4, 0.9)], self.name, 0.1, 50, [0.9] * 49)
+
+
+class TestDetectionProcessPool(unittest.TestCase):
+    """检测进程池测试"""
+
+    def test_failures_are_isolated(self):
+        """测试单个文件异常或进程崩溃不影响其他文件"""
+        paths = ["ok_1.mp4", "error.mp4", "crash.mp4", "ok_2.mp4"]
+
+        with DetectionProcessPool(_StubDetector(), max_workers=2) as pool:
+            results = {r.task_id: r for r in pool.imap_unordered(paths)}
+
+        self.assertEqual(sorted(results), [0, 1, 2, 3])
+        self.assertTrue(results[0].success)
+        self.assertEqual(results[0].result.frame_numbers.tolist(), [10])
+        self.assertIn("bad video", results[1].error)
+        self.assertFalse(results[2].success)
+        self.assertTrue(results[3].success)
+        self.assertEqual(pool.stats["crashes"], 1)
+
+    def test_should_stop(self):
+        """测试停止请求后不再分发任务"""
+        with DetectionProcessPool(_StubDetector(), max_workers=1) as pool:
+            results = list(pool.imap_unordered(["ok.mp4"] * 5, should_stop=lambda: True))
+
+        self.assertEqual(results, [])
+
+
+class TestResultCache(unittest.TestCase):
+    """结果缓存测试"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _result(self, frames=100):
+        import random
+        scores = [random.random() for _ in range(frames - 1)]
+        return DetectionResult([ShotBoundary(10, 0.4, 0.9)], "Test", 0.1, frames, scores).to_compact()
+
+    def test_put_and_get(self):
+        """测试分片存储和两级读取"""
+        cache = ResultCache(self.temp_dir)
+        cache.put("abcdef", self._result())
+
+        self.assertTrue((Path(self.temp_dir) / "ab" / "abcdef.npz").exists())
+        self.assertIsNotNone(cache.get("abcdef"))
+        self.assertEqual(cache.stats["memory_hits"], 1)
+
+        # 新实例只能从磁盘读取
+        other = ResultCache(self.temp_dir)
+        self.assertEqual(other.get("abcdef").frame_numbers.tolist(), [10])
+        self.assertEqual(other.stats["disk_hits"], 1)
+        self.assertIsNone(other.get("missing"))
+
+    def test_disk_eviction(self):
+        """测试超过磁盘上限时在写入时淘汰最久未访问的条目"""
+        import os
+        import time
+
+        cache = ResultCache(self.temp_dir, memory_budget_mb=0, max_disk_mb=0.02)
+        for i, key in enumerate(["aa01", "bb02", "cc03", "dd04"]):
+            cache.put(key, self._result(2000))
+            # 模拟依次访问，越早写入的条目最近访问时间越早
+            past = time.time() - 100 + i
+            os.utime(cache.path_for(key), (past, past))
+
+        remaining = {path.stem for path in Path(self.temp_dir).glob("*/*.npz")}
+        self.assertIn("dd04", remaining)
+        self.assertNotIn("aa01", remaining)
+        self.assertGreater(cache.stats["evictions"], 0)
+
+    def test_memory_budget(self):
+        """测试内存层按字节预算淘汰"""
+        result = self._result(2000)
+        cache = ResultCache(self.temp_dir, memory_budget_mb=result.nbytes * 1.5 / (1024 * 1024))
+        cache.put("aa01", result)
+        cache.put("bb02", self._result(2000))
+
+        self.assertEqual(list(cache._memory), ["bb02"])
+
+
+
+class TestQualityScore(unittest.TestCase):
+    """质量评分测试"""
+
+    def setUp(self):
+        import cv2
+        import numpy as np
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.video_path = str(Path(self.temp_dir) / "blurred_1080p.avi")
+        rng = np.random.default_rng(0)
+        writer = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (1920, 1080))
+        for _ in range(6):
+            frame = rng.integers(0, 256, (1080, 1920, 3), dtype=np.uint8)
+            writer.write(cv2.GaussianBlur(frame, (0, 0), 1.5))
+        writer.release()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _full_resolution_metrics(self):
+        """原流程：逐帧在原分辨率灰度图上计算亮度、对比度和拉普拉斯方差"""
+        import cv2
+        import numpy as np
+
+        cap = cv2.VideoCapture(self.video_path)
+        brightness, contrast, sharpness = [], [], []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            brightness.append(np.mean(gray))
+            contrast.append(np.std(gray))
+            sharpness.append(cv2.Laplacian(gray, cv2.CV_64F).var())
+        cap.release()
+        return brightness, contrast, sharpness
+
+    def test_analysis_service_score_matches_full_resolution(self):
+        """测试采样分析的质量分数与原分辨率逐帧计算一致（清晰度项不因缩小而饱和）"""
+        from core.services import AdvancedAnalysisService
+
+        service = AdvancedAnalysisService()
+        brightness, contrast, sharpness = self._full_resolution_metrics()
+        self.assertLess(sum(sharpness) / len(sharpness), 1000)
+
+        quality = service._analyze_video_quality(self.video_path)
+        expected = service._calculate_quality_score(brightness, contrast, sharpness)
+        self.assertAlmostEqual(quality["quality_score"], expected, delta=0.02)
+
+    def test_analytics_score_matches_full_resolution(self):
+        """测试高级分析的质量评分与原分辨率逐帧计算一致"""
+        import numpy as np
+        from core.advanced import AdvancedAnalytics
+
+        analytics = AdvancedAnalytics()
+        brightness, contrast, sharpness = self._full_resolution_metrics()
+
+        quality = analytics._analyze_video_quality(self.video_path, {})
+        expected = analytics._calculate_quality_score({
+            "resolution": {"width": 1920, "height": 1080},
+            "sharpness": {"mean": float(np.mean(sharpness))},
+            "contrast": {"mean": float(np.mean(contrast))}
+        })
+        self.assertAlmostEqual(quality["quality_score"], expected, delta=0.02)
+
+
 if __name__ == '__main__':
     unittest.main()
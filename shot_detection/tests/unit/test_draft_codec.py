@@ -0,0 +1,75 @@
+"""
+Unit Tests for Draft Codec
+剪映草稿编解码单元测试
+"""
+
+import json
+
+import pytest
+
+from utils import draft_codec
+from utils.draft_codec import STDLIB_CODEC, dump_draft, get_codec, load_draft, save_draft
+
+DRAFT = {
+    "id": "6A1B",
+    "duration": 2 ** 40,
+    "canvas_config": {"ratio": "original", "width": 1920, "height": 1080},
+    "materials": {"videos": [{"id": "V1", "path": "C:/素材/海边 日落.mp4", "speed": 1.5,
+                              "crop": None, "has_audio": True}]},
+    "tracks": [],
+}
+
+
+def available_codecs():
+    return [codec for codec in (get_codec(name) for name in ("json", "orjson", "msgspec"))
+            if codec.name in ("json", "orjson", "msgspec")]
+
+
+@pytest.mark.parametrize("codec", available_codecs(), ids=lambda codec: codec.name)
+def test_round_trip_and_format(tmp_path, codec):
+    """测试各编解码器往返一致，默认紧凑输出，pretty 时缩进"""
+    path = tmp_path / "draft_content.json"
+    save_draft(path, DRAFT, codec=codec)
+    assert load_draft(path, codec=codec) == DRAFT
+    compact = path.read_bytes()
+    assert b"\n" not in compact and "海边".encode('utf-8') in compact
+
+    save_draft(path, DRAFT, pretty=True, codec=codec)
+    assert json.loads(path.read_bytes()) == DRAFT
+    assert b'\n  "id"' in path.read_bytes()
+    assert len(path.read_bytes()) > len(compact)
+
+    # 标准库能读但快速解析器不支持的写法回退到标准库
+    path.write_bytes(b'{"value": NaN, "items": [1, 2]}')
+    assert load_draft(path, codec=codec)["items"] == [1, 2]
+
+
+def test_bom_and_pretty_env(tmp_path, monkeypatch):
+    """测试带 BOM 的文件可读，环境变量切换缩进输出"""
+    path = tmp_path / "draft_meta_info.json"
+    path.write_bytes(b'\xef\xbb\xbf' + json.dumps(DRAFT).encode('utf-8'))
+    assert load_draft(path) == DRAFT
+
+    monkeypatch.setenv(draft_codec.PRETTY_ENV, "1")
+    assert b"\n" in dump_draft(DRAFT)
+    assert b"\n" not in dump_draft(DRAFT, pretty=False)
+
+
+def test_codec_env_override(monkeypatch):
+    """测试环境变量指定编解码器，不可用时回退到标准库"""
+    monkeypatch.setenv(draft_codec.CODEC_ENV, "json")
+    assert get_codec() is STDLIB_CODEC
+    monkeypatch.setenv(draft_codec.CODEC_ENV, "missing")
+    assert get_codec() is STDLIB_CODEC
+
+
+def test_atomic_write_keeps_original_on_failure(tmp_path):
+    """测试序列化失败时原文件不变，且不留下临时文件"""
+    path = tmp_path / "draft_content.json"
+    save_draft(path, DRAFT)
+    original = path.read_bytes()
+
+    with pytest.raises((TypeError, ValueError)):
+        save_draft(path, {"bad": object()})
+    assert path.read_bytes() == original
+    assert [p.name for p in tmp_path.iterdir()] == ["draft_content.json"]
@@ -0,0 +1,131 @@
+"""
+Unit Tests for Draft Content Manager
+剪映项目内容管理器单元测试
+"""
+
+import random
+
+import pytest
+
+from jianying.draft_content_manager import DraftContentManager
+
+WORDS = ["beach", "city", "night", "Sunset", "forest", "interview", "drone", "长城", "夜景"]
+
+
+def make_manager(tmp_path, count=300, seed=0):
+    rng = random.Random(seed)
+    manager = DraftContentManager(tmp_path / "project")
+    manager.load_content_data()
+    for i in range(count):
+        words = rng.sample(WORDS, 2)
+        material_type = rng.choice(["videos", "audios", "images"])
+        manager.add_material_reference(material_type, {
+            "id": f"M{i % 250}",  # 部分ID重复，跨类型查找应返回全部
+            "name": f"{words[0]}_{words[1]}_{i % 40}",
+            "file_path": f"C:\\Media\\{words[0]}\\clip_{i}.mp4",
+            "description": " ".join(words),
+        })
+    return manager
+
+
+def scan(manager, predicate):
+    """逐个扫描的参考实现"""
+    return [(material_type, material)
+            for material_type, materials in manager._content_data["materials"].items()
+            for material in materials if predicate(material)]
+
+
+def pairs(matches):
+    return [(match["material_type"], match["material_data"]) for match in matches]
+
+
+class TestMaterialIndex:
+    """素材索引测试"""
+
+    def test_lookups_match_linear_scan(self, tmp_path):
+        """测试各类查找结果和顺序与逐个扫描一致"""
+        manager = make_manager(tmp_path)
+
+        for material_id in ["M3", "M10", "M249", "missing"]:
+            assert pairs(manager.find_material_references(material_id)) == \
+                scan(manager, lambda m: m["id"] == material_id)
+
+        name = manager.get_materials_by_type("videos")[5]["name"]
+        assert pairs(manager.find_material_reference_by_material_name(name)) == \
+            scan(manager, lambda m: m["name"] == name)
+        for query in ["sunset", "NIGHT_", "长城", "_1", "ch"]:
+            assert pairs(manager.find_material_reference_by_material_name(query, exact_match=False)) == \
+                scan(manager, lambda m: query.lower() in m["name"].lower())
+            assert [(m["material_type"], m["material_data"], m["matched_fields"])
+                    for m in manager.search_materials(query)] == \
+                [(t, m, [f for f in ("name", "file_path", "description") if query.lower() in m[f].lower()])
+                 for t, m in scan(manager, lambda m: any(query.lower() in m[f].lower()
+                                                         for f in ("name", "file_path", "description")))]
+
+        path = manager.get_materials_by_type("audios")[0]["file_path"]
+        assert pairs(manager.find_material_reference_by_file_path(path.replace("\\", "/"))) == \
+            scan(manager, lambda m: m["file_path"] == path)
+        assert pairs(manager.find_material_reference_by_file_path("media\\drone", exact_match=False)) == \
+            scan(manager, lambda m: "media\\drone" in m["file_path"].lower())
+
+    def test_index_follows_mutations(self, tmp_path):
+        """测试增删改和批量更新后索引保持同步，素材列表被替换后自动重建"""
+        manager = make_manager(tmp_path, count=50)
+        video = manager.get_materials_by_type("videos")[0]
+
+        assert manager.update_material_reference("videos", video["id"], {"name": "renamed clip"})
+        assert pairs(manager.find_material_reference_by_material_name("renamed clip")) == [("videos", video)]
+        assert manager.find_material_reference_by_material_name("renamed", exact_match=False)[0]["material_data"] is video
+
+        result = manager.update_material_reference_batch([
+            {"material_type": "videos", "material_id": video["id"], "updates": {"id": "NEW"}},
+            {"material_type": "videos", "material_id": "missing", "updates": {}},
+            {"material_id": "M1"},
+        ])
+        assert result == {"success": 1, "failed": 2}
+        assert manager.get_material_reference("videos", "NEW") is video
+
+        assert manager.remove_material_reference("videos", "NEW")
+        assert manager.get_material_reference("videos", "NEW") is None
+        assert video not in manager.get_materials_by_type("videos")
+
+        manager.clear_all_materials()
+        assert manager.search_materials("beach") == []
+        manager.get_materials_by_type("images").append({"id": "EXT", "name": "external"})
+        assert manager.get_material_reference("images", "EXT")["name"] == "external"
+
+    def test_unsupported_type(self, tmp_path):
+        """测试不支持的素材类型"""
+        manager = make_manager(tmp_path, count=5)
+        assert manager.get_material_reference("unknown", "M1") is None
+        assert not manager.update_material_reference("unknown", "M1", {})
+        with pytest.raises(ValueError):
+            manager.add_material_reference("unknown", {})
+
+    def test_update_keeps_original_order(self, tmp_path):
+        """测试更新后重新索引的素材保持原位置，重复ID时删除的仍是第一个"""
+        manager = DraftContentManager(tmp_path / "project")
+        manager.load_content_data()
+        for material_id in ["A", "B", "A"]:
+            manager.add_material_reference("videos", {"id": material_id, "name": f"clip {material_id}"})
+        first, _, duplicate = manager.get_materials_by_type("videos")
+
+        assert manager.update_material_reference("videos", "A", {"description": "clip updated"})
+        assert manager.update_material_reference("videos", "B", {"name": "clip B2"})
+        for found in (manager.find_material_reference_by_material_name("clip", exact_match=False),
+                      manager.search_materials("clip")):
+            assert pairs(found) == scan(manager, lambda m: True)
+
+        assert manager.remove_material_reference("videos", "A")
+        remaining = manager.get_materials_by_type("videos")
+        assert [m["id"] for m in remaining] == ["B", "A"] and remaining[1] is duplicate
+        assert all(m is not first for m in remaining)
+
+    def test_refresh_after_in_place_edit(self, tmp_path):
+        """测试就地修改素材字典后刷新索引"""
+        manager = make_manager(tmp_path, count=20)
+        material = manager.get_material_reference("videos", manager.get_materials_by_type("videos")[0]["id"])
+        material["name"] = "edited in place"
+
+        manager.refresh_material_index()
+        assert pairs(manager.find_material_reference_by_material_name("edited in place")) == [("videos", material)]
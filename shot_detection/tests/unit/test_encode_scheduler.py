@@ -0,0 +1,101 @@
+"""
+Unit Tests for Encode Scheduler
+分段编码调度器单元测试
+"""
+
+import threading
+import time
+
+from processors.encode_scheduler import (
+    EncodeScheduler, EncodeJob, EncodePlan, plan_concurrency, apply_thread_cap, encoder_preset
+)
+
+
+class TestPlanConcurrency:
+    """编码并发规划测试"""
+
+    def test_cores_not_oversubscribed(self):
+        """测试并发进程数乘以每进程线程数不超过核数"""
+        for preset in ('ultrafast', 'medium', 'veryslow'):
+            for width, height in ((640, 360), (1920, 1080), (3840, 2160)):
+                plan = plan_concurrency(preset, width, height, cores=16)
+                assert plan.workers * plan.threads_per_job <= 16
+
+    def test_resolution_and_preset_scale_threads(self):
+        """测试分辨率越高、预设越慢，每进程线程越多"""
+        small = plan_concurrency('medium', 1280, 720, cores=32)
+        large = plan_concurrency('medium', 3840, 2160, cores=32)
+        slow = plan_concurrency('veryslow', 1920, 1080, cores=32)
+        fast = plan_concurrency('ultrafast', 1920, 1080, cores=32)
+
+        assert small.threads_per_job < large.threads_per_job
+        assert fast.threads_per_job < slow.threads_per_job
+        assert small.workers > large.workers
+
+    def test_max_workers_and_idle_cores(self):
+        """测试并发上限，任务少时空闲的核分给每个任务"""
+        plan = plan_concurrency('medium', 1920, 1080, cores=16, max_workers=2)
+        assert plan.workers == 2
+        assert plan.threads_for(1) == 16
+
+    def test_stream_copy(self):
+        """测试流复制只按IO限制并发"""
+        assert encoder_preset(['-c:v', 'copy']) is None
+        assert encoder_preset(['-c:v', 'libx264', '-preset', 'slow']) == 'slow'
+        assert plan_concurrency(None, cores=16).threads_per_job == 1
+
+
+def test_apply_thread_cap():
+    """测试解码和编码两端都限制线程数"""
+    cmd = apply_thread_cap(['ffmpeg', '-y', '-ss', '1', '-i', 'in.mp4', '-c:v', 'libx264', 'out.mp4'], 3)
+
+    assert cmd == ['ffmpeg', '-y', '-ss', '1', '-threads', '3', '-i', 'in.mp4',
+                   '-c:v', 'libx264', '-threads', '3', 'out.mp4']
+    assert apply_thread_cap(cmd, 5) == cmd
+
+
+class TestEncodeScheduler:
+    """编码调度器测试"""
+
+    def test_longest_first(self):
+        """测试任务按时长从长到短执行"""
+        order = []
+        scheduler = EncodeScheduler(EncodePlan(workers=1, threads_per_job=2, cores=2))
+        jobs = [EncodeJob(key=d, duration=d, run=lambda threads, d=d: order.append(d) or True)
+                for d in (3.0, 10.0, 1.0, 7.0)]
+
+        results = scheduler.run(jobs)
+
+        assert order == [10.0, 7.0, 3.0, 1.0]
+        assert all(results.values())
+
+    def test_bounded_concurrency_and_stats(self):
+        """测试并发数不超过计划，统计完成数、失败数和吞吐量"""
+        lock = threading.Lock()
+        running, peak = [0], [0]
+        callback_threads = set()
+
+        def run(threads, fail=False):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            if fail:
+                raise RuntimeError("encode failed")
+            return True
+
+        scheduler = EncodeScheduler(EncodePlan(workers=3, threads_per_job=1, cores=3))
+        jobs = [EncodeJob(key=i, duration=2.0, run=lambda threads, i=i: run(threads, fail=(i == 0)))
+                for i in range(10)]
+        results = scheduler.run(jobs, job_callback=lambda job, ok: callback_threads.add(threading.get_ident()))
+
+        stats = scheduler.get_stats()
+        assert peak[0] <= 3
+        assert results[0] is False
+        assert stats['completed'] == 9 and stats['failed'] == 1
+        assert stats['queue_depth'] == 0 and stats['running'] == 0
+        assert stats['encoded_seconds'] == 18.0
+        assert stats['throughput'] > 0
+        assert callback_threads == {threading.get_ident()}
@@ -0,0 +1,124 @@
+"""
+Unit Tests for Fast Cutter
+流复制快速切分器单元测试
+"""
+
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from processors.video_processor import VideoSegment
+from processors.fast_cutter import FastCutter, KeyframeIndex, probe_keyframes, ffprobe_for
+
+
+def make_segment(index, start, end):
+    return VideoSegment(index, start, end, end - start, int(start * 25), int(end * 25),
+                        f"out/video_segment_{index:03d}.mp4")
+
+
+def make_index(codec="h264"):
+    return KeyframeIndex(codec_name=codec, pix_fmt="yuv420p", time_base="1/12800",
+                         duration=20.0, keyframes=[0.0, 4.0, 8.0, 12.0, 16.0])
+
+
+class TestProbeKeyframes:
+    """关键帧索引读取测试"""
+
+    def test_parses_key_packets(self):
+        """测试只保留带 K 标志的数据包时间"""
+        info = subprocess.CompletedProcess([], 0, stdout='{"streams": [{"codec_name": "h264", '
+                                                         '"pix_fmt": "yuv420p", "time_base": "1/12800"}], '
+                                                         '"format": {"duration": "20.0"}}')
+        packets = subprocess.CompletedProcess([], 0, stdout="4.000000,K_\n0.000000,K_\n0.040000,__\nN/A,K_\n")
+
+        with patch('processors.fast_cutter.subprocess.run', side_effect=[info, packets]):
+            index = probe_keyframes("input.mp4")
+
+        assert index.keyframes == [0.0, 4.0]
+        assert index.codec_name == "h264"
+        assert index.timescale == 12800
+        assert index.duration == 20.0
+
+    def test_ffprobe_next_to_ffmpeg(self):
+        """测试 ffprobe 取 FFmpeg 同目录"""
+        assert ffprobe_for("ffmpeg") == "ffprobe"
+        assert ffprobe_for("/opt/ff/bin/ffmpeg.exe").endswith("ffprobe.exe")
+
+
+class TestFastCutPlan:
+    """快速切分计划测试"""
+
+    def test_edges_encoded_middle_copied(self):
+        """测试两端不完整的GOP重编码，中间完整GOP流复制"""
+        plan = FastCutter().plan_segment(make_index(), 2.5, 13.0)
+
+        assert plan.parts == [('encode', 2.5, 4.0), ('copy', 4.0, 12.0), ('encode', 12.0, 13.0)]
+        assert plan.copied_duration == 8.0
+
+    def test_keyframe_aligned_segment_is_pure_copy(self):
+        """测试起点在关键帧、终点在文件末尾时整段流复制"""
+        plan = FastCutter().plan_segment(make_index(), 8.0, 20.0)
+
+        assert plan.parts == [('copy', 8.0, 20.0)]
+
+    def test_segment_inside_one_gop_is_encoded(self):
+        """测试落在一个GOP之内的分段整段重编码"""
+        plan = FastCutter().plan_segment(make_index(), 4.5, 7.5)
+
+        assert plan.parts == [('encode', 4.5, 7.5)]
+
+    def test_nearest_snap(self):
+        """测试吸附策略把切点移到最近关键帧，整段流复制"""
+        cutter = FastCutter(keyframe_snap='nearest')
+
+        plan = cutter.plan_segment(make_index(), 2.5, 13.0)
+        assert (plan.start, plan.end) == (4.0, 12.0)
+        assert plan.parts == [('copy', 4.0, 12.0)]
+
+        # 两个切点吸附到同一关键帧时延伸到下一个关键帧
+        plan = cutter.plan_segment(make_index(), 4.5, 5.5)
+        assert (plan.start, plan.end) == (4.0, 8.0)
+
+    def test_unknown_snap_policy(self):
+        """测试未知的吸附策略"""
+        with pytest.raises(ValueError):
+            FastCutter(keyframe_snap='forward')
+
+
+class TestFastCutter:
+    """快速切分执行测试"""
+
+    def test_edge_encoder_matches_source(self):
+        """测试边缘重编码的编码器和像素格式与源一致"""
+        cmd = FastCutter().build_part_command("input.mp4", make_index("hevc"), 'encode', 2.5, 4.0, "p.ts")
+
+        assert cmd.index('-ss') < cmd.index('-i')
+        assert cmd[cmd.index('-c:v') + 1] == "libx265"
+        assert cmd[cmd.index('-pix_fmt') + 1] == "yuv420p"
+
+    def test_snapped_segment_times_updated(self):
+        """测试吸附后分段时间更新，原始时间保存在元数据中"""
+        cutter = FastCutter(keyframe_snap='nearest')
+        segments = [make_segment(0, 2.5, 13.0)]
+
+        with patch('processors.fast_cutter.probe_keyframes', return_value=make_index()), \
+                patch.object(cutter, '_cut_segment', return_value=True) as cut_segment:
+            result = cutter.cut("input.mp4", segments, fps=25)
+
+        assert cut_segment.call_count == 1
+        assert (result[0].start_time, result[0].end_time, result[0].duration) == (4.0, 12.0, 8.0)
+        assert result[0].start_frame == 100
+        assert result[0].metadata['requested_start_time'] == 2.5
+
+    def test_falls_back_to_reencode(self):
+        """测试源编码无法边缘重编码拼接时整段重编码"""
+        cutter = FastCutter()
+        segments = [make_segment(0, 0.0, 4.0)]
+
+        with patch('processors.fast_cutter.probe_keyframes', return_value=make_index("mpeg4")), \
+                patch('processors.fast_cutter.SegmentCutter.cut', return_value=segments) as reencode:
+            result = cutter.cut("input.mp4", segments, fps=25)
+
+        assert reencode.call_count == 1
+        assert result == segments
@@ -0,0 +1,71 @@
+"""
+Unit Tests for File Fingerprint
+文件内容指纹单元测试
+"""
+
+import os
+from unittest.mock import patch
+
+from utils.fingerprint import (
+    sampled_fingerprint, full_fingerprint, file_fingerprint, clear_fingerprint_cache,
+    DEFAULT_SAMPLE_COUNT, DEFAULT_SAMPLE_SIZE
+)
+
+LARGE = DEFAULT_SAMPLE_COUNT * DEFAULT_SAMPLE_SIZE * 4
+
+
+def make_file(path, size, fill=b"\x01"):
+    path.write_bytes(fill * size)
+    return path
+
+
+def patch_byte(path, offset, value=b"\xff"):
+    """原地改写一个字节并保持修改时间，模拟缓存无法察觉的内容变化"""
+    stat = os.stat(path)
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(value)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+class TestFingerprint:
+    """采样指纹和完整哈希测试"""
+
+    def test_sampled_reads_only_sample_blocks(self, tmp_path):
+        """测试采样指纹只反映采样块的变化，完整哈希反映任意字节的变化"""
+        video = make_file(tmp_path / "a.mp4", LARGE)
+        sampled, full = sampled_fingerprint(video), full_fingerprint(video)
+        clear_fingerprint_cache()
+
+        # 第一块和第二块采样之间的字节不参与采样
+        patch_byte(video, DEFAULT_SAMPLE_SIZE + 10)
+        assert sampled_fingerprint(video) == sampled
+        assert full_fingerprint(video) != full
+
+        clear_fingerprint_cache()
+        patch_byte(video, LARGE - 1)
+        assert sampled_fingerprint(video) != sampled
+
+    def test_size_and_small_files(self, tmp_path):
+        """测试大小参与指纹，小文件的采样指纹等于完整哈希"""
+        small = make_file(tmp_path / "small.bin", 1000)
+        other = make_file(tmp_path / "other.bin", 1001)
+
+        assert sampled_fingerprint(small) == full_fingerprint(small)
+        assert sampled_fingerprint(small) != sampled_fingerprint(other)
+        assert file_fingerprint(small, full=True) == full_fingerprint(small)
+
+    def test_memoized_on_inode_size_mtime(self, tmp_path):
+        """测试同一文件重复计算不再读取，改名后仍命中，修改后重新计算"""
+        video = make_file(tmp_path / "a.mp4", LARGE)
+        clear_fingerprint_cache()
+
+        with patch('utils.fingerprint.open', side_effect=open, create=True) as opened:
+            first = sampled_fingerprint(video)
+            renamed = video.rename(tmp_path / "b.mp4")
+            assert sampled_fingerprint(renamed) == first
+            assert opened.call_count == 1
+
+            make_file(renamed, LARGE + 1)
+            assert sampled_fingerprint(renamed) != first
+            assert opened.call_count == 2
@@ -0,0 +1,194 @@
+"""
+Unit Tests for Media Scanner
+媒体资源扫描器单元测试
+"""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from jianying.media_scanner import MediaScanner, DirectoryJournal, scan_media_resources
+
+
+def make_library(root):
+    """素材目录：两层子目录、隐藏目录和非媒体文件"""
+    for relative in ["a.mp4", "notes.txt", "sub/b.mov", "sub/c.jpg", "sub/deep/d.mp3",
+                     ".hidden/e.mp4", "sub/.f.mp4"]:
+        path = root / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * 2048)
+    return root
+
+
+class TestMediaScanner:
+    """流式扫描测试"""
+
+    def test_traversal(self, tmp_path):
+        """测试遍历跳过隐藏文件和目录，非递归时只扫描顶层"""
+        scanner = MediaScanner(include_metadata=False)
+        root = make_library(tmp_path)
+
+        names = sorted(entry.name for entry in scanner.iter_files(root))
+        assert names == ["a.mp4", "b.mov", "c.jpg", "d.mp3", "notes.txt"]
+        assert sorted(e.name for e in scanner.iter_files(root, recursive=False)) == ["a.mp4", "notes.txt"]
+
+    def test_streams_media_in_traversal_order(self, tmp_path):
+        """测试结果按遍历顺序逐个产出，清单可以直接消费生成器"""
+        scanner = MediaScanner(include_metadata=False, max_workers=2)
+        root = make_library(tmp_path)
+
+        order = [e.name for e in scanner.iter_files(root) if scanner.get_media_type(Path(e.path))]
+        results = list(scanner.iter_scan(root))
+        assert [m.file_name for m in results] == order
+
+        inventory = scanner.generate_inventory(scanner.iter_scan(root))
+        assert inventory['statistics']['total_files'] == 4
+        assert inventory['statistics']['video_count'] == 2
+
+    def test_checkpoint_resume(self, tmp_path):
+        """测试中断后从断点继续，只扫描未完成的文件，完成后删除断点"""
+        root = make_library(tmp_path / "library")
+        checkpoint = tmp_path / "scan.checkpoint"
+        scanner = MediaScanner(include_metadata=False, max_workers=1)
+
+        scan = scanner.iter_scan(root, checkpoint_path=checkpoint)
+        first = next(scan)
+        scan.close()
+        assert checkpoint.exists()
+
+        with patch.object(scanner, 'scan_file', wraps=scanner.scan_file) as scan_file:
+            results = scanner.scan_directory(root, checkpoint_path=checkpoint)
+
+        scanned = {call.args[0].name for call in scan_file.call_args_list}
+        assert first.file_name not in scanned
+        assert len(results) == 4
+        assert not checkpoint.exists()
+
+    def test_checkpoint_ignores_torn_line_and_changed_files(self, tmp_path):
+        """测试断点最后一行不完整时丢弃该行，修改过的文件重新扫描"""
+        root = make_library(tmp_path / "library")
+        checkpoint = tmp_path / "scan.checkpoint"
+        scanner = MediaScanner(include_metadata=False, max_workers=1)
+
+        scan = scanner.iter_scan(root, checkpoint_path=checkpoint)
+        done = [next(scan).file_path, next(scan).file_path]
+        scan.close()
+        with open(checkpoint, 'a', encoding='utf-8') as f:
+            f.write('{"path": "trunc')
+        with open(done[0], 'ab') as f:
+            f.write(b"modified")
+
+        with patch.object(scanner, 'scan_file', wraps=scanner.scan_file) as scan_file:
+            results = scanner.scan_directory(root, checkpoint_path=checkpoint)
+
+        scanned = {str(call.args[0].resolve()) for call in scan_file.call_args_list}
+        assert done[0] in scanned and done[1] not in scanned
+        assert len(results) == 4
+
+
+def age(path, seconds=60):
+    """把文件或目录的修改时间调早，避开刚修改目录的强制重新列出"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def age_tree(root):
+    for current, dirs, files in os.walk(root):
+        for name in files + dirs:
+            age(os.path.join(current, name))
+    age(root)
+
+
+class TestIncrementalScan:
+    """增量扫描测试"""
+
+    def test_only_changed_files_are_rescanned(self, tmp_path):
+        """测试只重新扫描新增和修改的文件，差异包含新增、修改和删除"""
+        root = make_library(tmp_path / "library")
+        age_tree(root)
+        journal = tmp_path / "scan.journal"
+        scanner = MediaScanner(include_metadata=False, max_workers=2)
+
+        first = scanner.scan_incremental(root, None, journal)
+        inventory = scanner.generate_inventory(diff=first)
+        assert len(first.added) == 4 and inventory['statistics']['total_files'] == 4
+        assert not journal.exists()  # 清单保存前不写变更日志
+        first.commit_journal()
+        assert journal.exists()
+
+        (root / "sub" / "new.mp4").write_bytes(b"y" * 100)
+        (root / "sub" / "deep" / "d.mp3").unlink()
+        (root / "a.mp4").write_bytes(b"z" * 10)
+        with patch.object(scanner, 'scan_file', wraps=scanner.scan_file) as scan_file:
+            diff = scanner.scan_incremental(root, inventory, journal)
+
+        assert sorted(call.args[0].name for call in scan_file.call_args_list) == ["a.mp4", "new.mp4"]
+        assert [m.file_name for m in diff.added] == ["new.mp4"]
+        assert [m.file_name for m in diff.changed] == ["a.mp4"]
+        assert [Path(p).name for p in diff.removed] == ["d.mp3"]
+        assert diff.unchanged == 2
+
+    def test_patched_inventory_matches_full_scan(self, tmp_path):
+        """测试修补后的清单与完整扫描生成的清单一致"""
+        root = make_library(tmp_path / "library")
+        journal = tmp_path / "scan.journal"
+        scanner = MediaScanner(include_metadata=False)
+        first = scanner.scan_incremental(root, None, journal)
+        previous = scanner.generate_inventory(diff=first)
+        first.commit_journal()
+
+        (root / "a.mp4").write_bytes(b"z" * 10)
+        (root / "sub" / "c.jpg").unlink()
+        (root / "extra.wav").write_bytes(b"w" * 300)
+        diff = scanner.scan_incremental(root, previous, journal)
+        patched = scanner.generate_inventory(previous_inventory=previous, diff=diff)
+        full = scanner.generate_inventory(scanner.iter_scan(root))
+
+        for key in ('videos', 'audios', 'images'):
+            assert sorted(patched['files'][key], key=lambda r: r['file_path']) == \
+                sorted(full['files'][key], key=lambda r: r['file_path'])
+        for key in ('total_files', 'total_size', 'video_count', 'audio_count', 'image_count'):
+            assert patched['statistics'][key] == full['statistics'][key]
+        assert patched['extensions'] == full['extensions']
+
+
+def test_journal_reuses_unchanged_directories(tmp_path):
+    """测试目录修改时间未变时不再列出目录"""
+    root = make_library(tmp_path / "library")
+    settings = {'directory': str(root)}
+    journal = DirectoryJournal(tmp_path / "dirs.journal", settings)
+    assert all(e.status == 'added' for e in journal.walk(root))
+    journal.save()
+    assert journal.stats['scanned_dirs'] == 3
+
+    # 刚修改的目录下次仍会重新列出
+    journal = DirectoryJournal(tmp_path / "dirs.journal", settings)
+    list(journal.walk(root))
+    assert journal.stats['reused_dirs'] == 0
+
+    age_tree(root)
+    list(journal.walk(root))
+    journal.save()
+
+    journal = DirectoryJournal(tmp_path / "dirs.journal", settings)
+    with patch('jianying.media_scanner.os.scandir', wraps=os.scandir) as scandir:
+        entries = list(journal.walk(root))
+    assert scandir.call_count == 0 and journal.stats['reused_dirs'] == 3
+    assert sorted(Path(e.path).name for e in entries) == ["a.mp4", "b.mov", "c.jpg", "d.mp3", "notes.txt"]
+    assert all(e.status == 'unchanged' for e in entries)
+
+
+def test_scan_media_resources_commits_journal(tmp_path):
+    """测试命令行增量扫描保存清单后写入变更日志，下次复用未变化的目录"""
+    root = make_library(tmp_path / "library")
+    age_tree(root)
+    journal = tmp_path / "scan.journal"
+    output = tmp_path / "media_inventory.json"
+
+    first = scan_media_resources(root, output, include_metadata=False, journal_path=journal)
+    assert journal.exists() and first['statistics']['total_files'] == 4
+
+    with patch('jianying.media_scanner.os.scandir', wraps=os.scandir) as scandir:
+        second = scan_media_resources(root, output, include_metadata=False, journal_path=journal)
+    assert scandir.call_count == 0
+    assert second['statistics']['total_files'] == 4
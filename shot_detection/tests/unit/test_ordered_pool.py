@@ -0,0 +1,49 @@
+"""
+Unit Tests for Ordered Pool
+保序空闲池单元测试
+"""
+
+import random
+
+import pytest
+
+from utils.ordered_pool import OrderedPool
+
+
+def test_matches_filtered_list_under_random_sampling():
+    """测试随机移除过程中，池与重新过滤的列表内容、下标和抽样结果一致"""
+    rng = random.Random(3)
+    items = [f"clip_{rng.randint(0, 150)}" for _ in range(200)]  # 含重复键
+    used = {"clip_1", "clip_2"}
+    pool = OrderedPool(items, exclude=used)
+
+    while True:
+        remaining = [item for item in items if item not in used]
+        assert list(pool) == remaining and len(pool) == len(remaining)
+        assert pool[0] == remaining[0] if remaining else not pool
+        if not remaining:
+            break
+        assert pool[-1] == remaining[-1]
+        assert pool[len(remaining) // 2] == remaining[len(remaining) // 2]
+
+        k = rng.randint(0, min(len(remaining), 30))
+        seed = rng.random()
+        random.seed(seed)
+        expected = random.sample(remaining, k)
+        random.seed(seed)
+        assert random.sample(pool, k) == expected
+
+        victim = rng.choice(remaining)
+        assert pool.discard(victim) == remaining.count(victim)
+        assert victim not in pool
+        used.add(victim)
+
+    with pytest.raises(IndexError):
+        pool[0]
+
+
+def test_key_function():
+    """测试按键移除"""
+    pool = OrderedPool([("a", 1), ("b", 2), ("a", 3)], key=lambda item: item[0])
+    assert pool.discard("a") == 2
+    assert list(pool) == [("b", 2)] and pool.discard("missing") == 0
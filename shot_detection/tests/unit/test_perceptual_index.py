@@ -0,0 +1,121 @@
+"""
+Unit Tests for Perceptual Index
+近重复片段索引单元测试
+"""
+
+import random
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+from utils.perceptual_index import (
+    PerceptualIndex, video_frame_hashes, clip_distance, format_hashes, parse_hashes, HASH_BITS
+)
+from utils.probe_index import ProbeIndex
+
+
+def flip(h, bits, rng):
+    for bit in rng.sample(range(HASH_BITS), bits):
+        h ^= 1 << bit
+    return h
+
+
+def write_video(path, seed, size=(160, 120), noise=0):
+    """写一个内容随时间变化的短视频，noise 模拟转码带来的像素误差"""
+    rng = np.random.default_rng(seed)
+    base = cv2.resize(rng.integers(0, 255, (12, 16), dtype=np.uint8), size, interpolation=cv2.INTER_CUBIC)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 10, size)
+    for i in range(30):
+        frame = np.roll(base, i * size[0] // 80, axis=1).astype(np.int16)
+        if noise:
+            frame += rng.integers(-noise, noise + 1, frame.shape, dtype=np.int16)
+        gray = np.clip(frame, 0, 255).astype(np.uint8)
+        writer.write(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+    writer.release()
+    return path
+
+
+class TestPerceptualIndex:
+    """多索引哈希查询测试"""
+
+    def test_query_matches_brute_force(self):
+        """测试查询结果与逐个比较完全一致（不漏掉近重复片段）"""
+        rng = random.Random(7)
+        index = PerceptualIndex(max_distance=10)
+        clips = {}
+        for i in range(2000):
+            clips[f"clip{i}"] = [rng.getrandbits(HASH_BITS) for _ in range(5)]
+        for i in range(0, 2000, 10):
+            clips[f"copy{i}"] = [flip(h, rng.randint(0, 14), rng) for h in clips[f"clip{i}"]]
+        for key, hashes in clips.items():
+            index.add(key, hashes)
+
+        for key in list(clips)[::37] + [f"copy{i}" for i in range(0, 2000, 50)]:
+            expected = sorted(other for other, hashes in clips.items()
+                              if other != key and clip_distance(clips[key], hashes) <= 10)
+            assert sorted(other for other, _ in index.query(clips[key], exclude=key)) == expected
+
+    def test_remove_and_groups(self):
+        """测试移除片段、纯色帧不进入分段表、近重复分组"""
+        rng = random.Random(3)
+        a = [rng.getrandbits(HASH_BITS) for _ in range(5)]
+        index = PerceptualIndex()
+        index.add("a", a)
+        index.add("b", [flip(h, 2, rng) for h in a])
+        index.add("c", [rng.getrandbits(HASH_BITS) for _ in range(5)])
+        index.add("black", [0] * 5)
+
+        assert index.near_duplicate_groups() == [["a", "b"]]
+        assert index.neighbors("black") == set()
+
+        index.remove("b")
+        assert index.neighbors("a") == set()
+        assert len(index) == 3
+
+    def test_hash_serialization(self):
+        hashes = [0, 1, (1 << 64) - 1]
+        assert parse_hashes(format_hashes(hashes)) == hashes
+        assert parse_hashes(None) == []
+
+
+def test_reencoded_video_is_near_duplicate(tmp_path):
+    """测试缩放加噪声的同一片段是近重复，不同片段不是；帧哈希持久化后不再计算"""
+    original = write_video(tmp_path / "a.avi", seed=1)
+    reencoded = write_video(tmp_path / "a_720.avi", seed=1, size=(240, 180), noise=6)
+    other = write_video(tmp_path / "b.avi", seed=2)
+    probe_index = ProbeIndex(tmp_path / "index.db")
+
+    assert len(video_frame_hashes(original)) == 5
+    index = PerceptualIndex()
+    index.index_files([original, reencoded, other], probe_index=probe_index)
+    assert index.neighbors(str(original)) == {str(reencoded)}
+
+    with patch('utils.perceptual_index.video_frame_hashes') as compute:
+        again = PerceptualIndex()
+        again.index_files([original, reencoded, other], probe_index=probe_index)
+    compute.assert_not_called()
+    assert again.near_duplicate_groups() == [sorted([str(original), str(reencoded)])]
+
+
+def test_allocation_avoids_near_duplicates_in_one_template():
+    """测试分配时同一模板不同时选中互为近重复的片段"""
+    from jianying.video_allocation_algorithm import VideoAllocationAlgorithm, VideoFile
+
+    rng = random.Random(5)
+    videos = [VideoFile(path=f"/v/{i}.mp4", name=f"{i}.mp4", relative_path=f"{i}.mp4") for i in range(6)]
+    algorithm = VideoAllocationAlgorithm("workspace")
+    base = [rng.getrandbits(HASH_BITS) for _ in range(5)]
+    for i, video in enumerate(videos):
+        hashes = [flip(h, 1, rng) for h in base] if i < 3 else [rng.getrandbits(HASH_BITS) for _ in range(5)]
+        algorithm.near_duplicate_index.add(video.path, hashes)
+    algorithm._hashed_videos.update(video.path for video in videos)
+
+    for seed in range(20):
+        random.seed(seed)
+        chosen = algorithm._sample_videos(videos, 4)
+        assert len(chosen) == 4 and len({v.path for v in chosen}) == 4
+        assert sum(1 for v in chosen if int(v.name[0]) < 3) == 1
+
+    # 不重复的片段不够时仍补足数量
+    assert len(algorithm._sample_videos(videos[:3], 2)) == 2
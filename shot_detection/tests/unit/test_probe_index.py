@@ -0,0 +1,101 @@
+"""
+Unit Tests for Probe Index
+媒体元数据索引单元测试
+"""
+
+import shutil
+from unittest.mock import patch
+
+from utils.probe_index import ProbeIndex, first_stream, parse_rate
+
+PROBE_DATA = {
+    "streams": [{"codec_type": "video", "codec_name": "h264", "width": 1280, "height": 720,
+                 "r_frame_rate": "30000/1001"}],
+    "format": {"duration": "12.5", "bit_rate": "800000"},
+}
+
+
+def make_file(path, content=b"video data"):
+    path.write_bytes(content)
+    return path
+
+
+class TestProbeIndex:
+    """元数据索引测试"""
+
+    def test_persistent_across_instances(self, tmp_path):
+        """测试探测结果持久化，新实例不再运行ffprobe"""
+        video = make_file(tmp_path / "a.mp4")
+        db = tmp_path / "index.db"
+
+        with patch('utils.probe_index.run_ffprobe', return_value=PROBE_DATA) as ffprobe:
+            assert ProbeIndex(db).probe(video) == PROBE_DATA
+            assert ProbeIndex(db).probe(str(video)) == PROBE_DATA
+
+        assert ffprobe.call_count == 1
+
+    def test_changed_file_is_reprobed(self, tmp_path):
+        """测试文件大小或修改时间变化后重新探测"""
+        video = make_file(tmp_path / "a.mp4")
+        index = ProbeIndex(tmp_path / "index.db")
+
+        with patch('utils.probe_index.run_ffprobe', return_value=PROBE_DATA) as ffprobe:
+            index.probe(video)
+            make_file(video, b"re-encoded video data")
+            index.probe(video)
+
+        assert ffprobe.call_count == 2
+
+    def test_batch_lookup(self, tmp_path):
+        """测试批量查询只探测未命中的文件"""
+        files = [make_file(tmp_path / f"{i}.mp4") for i in range(5)]
+        index = ProbeIndex(tmp_path / "index.db", max_workers=3)
+
+        with patch('utils.probe_index.run_ffprobe', return_value=PROBE_DATA) as ffprobe:
+            index.probe(files[0])
+            results = index.probe_many(files + [tmp_path / "missing.mp4"])
+
+        assert ffprobe.call_count == 5
+        assert all(results[str(f)] == PROBE_DATA for f in files)
+        assert results[str(tmp_path / "missing.mp4")] is None
+        stats = index.get_stats()
+        assert stats['hits'] == 1 and stats['entries'] == 5
+
+    def test_failures(self, tmp_path):
+        """测试无法解析的文件记入索引，找不到ffprobe时不记入"""
+        broken = make_file(tmp_path / "broken.mp4")
+        index = ProbeIndex(tmp_path / "index.db")
+
+        with patch('utils.probe_index.run_ffprobe', return_value=None) as ffprobe:
+            assert index.probe(broken) is None
+            assert index.probe(broken) is None
+        assert ffprobe.call_count == 1
+
+        other = ProbeIndex(tmp_path / "other.db")
+        with patch('utils.probe_index.run_ffprobe', side_effect=FileNotFoundError):
+            assert other.probe(broken) is None
+        assert other.get_stats()['entries'] == 0
+
+    def test_fingerprint_reuse(self, tmp_path):
+        """测试按内容指纹复用复制到新路径的文件的探测结果"""
+        video = make_file(tmp_path / "a.mp4")
+        index = ProbeIndex(tmp_path / "index.db",
+                           fingerprint_func=lambda path: open(path, 'rb').read().hex())
+
+        with patch('utils.probe_index.run_ffprobe', return_value=PROBE_DATA) as ffprobe:
+            index.probe(video)
+            copy = shutil.copy(video, tmp_path / "copy.mp4")
+            assert index.probe(copy) == PROBE_DATA
+
+        assert ffprobe.call_count == 1
+        assert index.get_stats()['fingerprint_hits'] == 1
+
+
+def test_stream_helpers():
+    """测试流查找和帧率解析"""
+    assert first_stream(PROBE_DATA, 'video')['width'] == 1280
+    assert first_stream(PROBE_DATA, 'audio') is None
+    assert first_stream(None, 'video') is None
+    assert round(parse_rate("30000/1001"), 3) == 29.97
+    assert parse_rate("0/0") == 0.0
+    assert parse_rate("25") == 25.0
@@ -0,0 +1,50 @@
+"""
+Unit Tests for Quality Sampler
+采样质量分析单元测试
+"""
+
+import cv2
+import numpy as np
+
+from utils.quality_sampler import batch_quality_metrics, sample_indices, sample_video_quality
+
+
+def write_video(path, frames=90, size=(320, 240)):
+    rng = np.random.default_rng(0)
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 25, size)
+    for i in range(frames):
+        frame = rng.integers(0, 64, (size[1], size[0], 3), dtype=np.uint8)
+        cv2.rectangle(frame, (i, 40), (i + 80, 160), (200, 180, 160), -1)
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def test_batch_metrics_match_per_frame_computation():
+    """测试批量计算与逐帧 OpenCV 计算一致（拉普拉斯只比较内部像素）"""
+    rng = np.random.default_rng(1)
+    grays = rng.integers(0, 256, (5, 48, 64), dtype=np.uint8)
+    metrics = batch_quality_metrics(grays)
+
+    for i, gray in enumerate(grays):
+        laplacian = cv2.Laplacian(gray, cv2.CV_64F)[1:-1, 1:-1]
+        assert np.isclose(metrics['brightness'][i], np.mean(gray))
+        assert np.isclose(metrics['contrast'][i], np.std(gray))
+        assert np.isclose(metrics['sharpness'][i], laplacian.var())
+        assert np.isclose(metrics['noise'][i], laplacian.std())
+
+
+def test_sample_video_quality(tmp_path):
+    """测试只采样指定数量的帧，指标在缩小的工作副本上计算"""
+    video = write_video(tmp_path / "clip.avi")
+
+    samples = sample_video_quality(video, max_samples=10, working_height=120, batch_size=4)
+    assert samples.frame_indices.tolist() == sample_indices(90, 10)
+    assert len(samples.sharpness) == 10 and np.all(samples.sharpness > 0)
+
+    full = sample_video_quality(video, max_samples=10, working_height=None)
+    assert np.allclose(samples.brightness, full.brightness, atol=1.0)
+    assert samples.stats('brightness')['max'] >= samples.stats('brightness')['mean']
+
+    empty = sample_video_quality(str(tmp_path / "missing.avi"))
+    assert len(empty) == 0 and empty.stats('noise')['mean'] == 0.0
@@ -0,0 +1,89 @@
+"""
+Unit Tests for Segment Cutter
+分段切分器单元测试
+"""
+
+from unittest.mock import patch
+
+from processors.video_processor import VideoSegment
+from processors.segment_cutter import SegmentCutter, plan_cuts, quality_video_args
+
+
+def make_segment(index, start, end, folder="out"):
+    return VideoSegment(index, start, end, end - start, int(start * 25), int(end * 25),
+                        f"{folder}/video_segment_{index:03d}.mp4")
+
+
+class TestPlanCuts:
+    """单次切分计划测试"""
+
+    def test_contiguous_segments(self):
+        """测试相邻分段各对应一个输出段"""
+        segments = [make_segment(0, 0.0, 4.0), make_segment(1, 4.0, 10.0), make_segment(2, 10.0, 30.0)]
+        plan = plan_cuts(segments)
+
+        assert plan.offset == 0.0
+        assert plan.end == 30.0
+        assert plan.cut_points == [4.0, 10.0]
+        assert [plan.pieces[i].index for i in sorted(plan.pieces)] == [0, 1, 2]
+        assert plan.unplanned == []
+
+    def test_gaps_and_offset(self):
+        """测试分段之间的空隙成为单独的输出段，输出从第一个分段开始"""
+        segments = [make_segment(0, 2.0, 5.0, "short"), make_segment(1, 8.0, 20.0, "medium")]
+        plan = plan_cuts(segments)
+
+        assert plan.offset == 2.0
+        assert plan.cut_points == [3.0, 6.0]
+        assert sorted(plan.pieces) == [0, 2]
+        assert 1 not in plan.pieces
+
+    def test_overlapping_segments_are_unplanned(self):
+        """测试相互重叠的分段留给逐个切分"""
+        segments = [make_segment(0, 0.0, 10.0), make_segment(1, 5.0, 15.0)]
+        plan = plan_cuts(segments)
+
+        assert [s.index for s in plan.unplanned] == [0, 1]
+        assert plan.pieces == {}
+
+
+class TestSegmentCutter:
+    """分段切分器测试"""
+
+    def test_single_pass_command(self):
+        """测试单次切分命令在切点强制关键帧并按输入跳转"""
+        segments = [make_segment(0, 1.0, 4.0), make_segment(1, 4.0, 9.0)]
+        cutter = SegmentCutter(video_args=quality_video_args("high"))
+        cmd = cutter.build_command("input.mp4", plan_cuts(segments), "piece_%05d.mp4", "pieces.csv", fps=25)
+
+        assert cmd.index('-ss') < cmd.index('-i')
+        assert cmd[cmd.index('-force_key_frames') + 1] == "3.000000"
+        assert cmd[cmd.index('-segment_times') + 1] == "3.000000"
+        assert cmd[cmd.index('-t') + 1] == "8.000000"
+        assert cmd[cmd.index('-crf') + 1] == "18"
+        assert cmd[-1] == "piece_%05d.mp4"
+
+    def test_single_segment_command_seeks_input(self):
+        """测试单个分段命令把 -ss 放在 -i 之前"""
+        cutter = SegmentCutter(audio_args=['-an'])
+        cmd = cutter.build_single_command("input.mp4", make_segment(3, 12.5, 20.0))
+
+        assert cmd.index('-ss') < cmd.index('-i')
+        assert '-an' in cmd
+        assert cmd[-1].endswith("video_segment_003.mp4")
+
+    def test_falls_back_to_individual_extraction(self):
+        """测试单次切分未完成的分段逐个切分，并逐个回调"""
+        segments = [make_segment(0, 0.0, 4.0), make_segment(1, 4.0, 9.0)]
+        cutter = SegmentCutter()
+        reported = []
+
+        with patch.object(cutter, '_cut_single_pass') as single_pass, \
+                patch.object(cutter, 'extract_single', side_effect=[True, False]) as extract:
+            result = cutter.cut("input.mp4", segments, fps=25,
+                                segment_callback=lambda s, ok: reported.append((s.index, ok)))
+
+        assert single_pass.call_count == 1
+        assert extract.call_count == 2
+        assert reported == [(0, True), (1, False)]
+        assert [s.index for s in result] == [0]
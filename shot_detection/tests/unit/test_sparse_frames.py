@@ -0,0 +1,80 @@
+"""
+Unit Tests for Sparse Frame Reading
+稀疏帧读取单元测试
+"""
+
+import cv2
+import numpy as np
+
+from utils.sparse_frames import iter_sparse_frames, should_seek
+
+
+class CountingCapture:
+    """包装 VideoCapture，记录跳转和 grab 次数"""
+
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        self.seeks = []
+        self.grabs = 0
+
+    def __getattr__(self, name):
+        return getattr(self.cap, name)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.seeks.append(int(value))
+        return self.cap.set(prop, value)
+
+    def grab(self):
+        self.grabs += 1
+        return self.cap.grab()
+
+
+def write_numbered_video(path, frames=120, size=(64, 48)):
+    """每帧亮度等于帧号 * 2 + 1，读取后可以还原帧号（JPEG 压缩后亮度略有偏差）"""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), 25, size)
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), i * 2 + 1, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def frame_number(frame):
+    return int(round(float(frame.mean()) / 2))
+
+
+def test_should_seek():
+    """测试间隔较小时顺序读取，倒退或间隔较大时跳转，有关键帧时按关键帧判断"""
+    assert not should_seek(10, 10)
+    assert not should_seek(10, 74, max_forward_skip=64)
+    assert should_seek(10, 75, max_forward_skip=64)
+    assert should_seek(10, 5) and should_seek(-1, 5)
+
+    keyframes = [0, 50, 100]
+    assert not should_seek(10, 49, keyframes=keyframes)
+    assert should_seek(10, 50, keyframes=keyframes)
+    assert not should_seek(60, 99, max_forward_skip=1, keyframes=keyframes)
+
+
+def test_frames_match_requested_indices(tmp_path):
+    """测试读取的帧与帧号一致，小间隔只 grab，大间隔跳转"""
+    video = write_numbered_video(tmp_path / "numbered.avi")
+    indices = [100, 3, 5, 5, 20, 90, 110, 500]
+
+    cap = CountingCapture(video)
+    frames = list(iter_sparse_frames(cap, indices, max_forward_skip=16))
+    cap.release()
+
+    assert [i for i, _ in frames] == [3, 5, 20, 90, 100, 110]
+    assert all(frame_number(frame) == i for i, frame in frames)
+    # 只有 20 -> 90 和超出范围的 500 需要跳转
+    assert cap.seeks == [90, 500] and cap.grabs == 36
+
+
+def test_path_source_and_keyframes(tmp_path):
+    """测试传入路径时自行打开视频，关键帧信息覆盖间隔阈值"""
+    video = write_numbered_video(tmp_path / "numbered.avi", frames=60)
+
+    frames = list(iter_sparse_frames(video, range(0, 60, 7), keyframes=list(range(0, 60, 10))))
+    assert [frame_number(frame) for _, frame in frames] == list(range(0, 60, 7))
+    assert list(iter_sparse_frames(str(tmp_path / "missing.avi"), [0])) == []
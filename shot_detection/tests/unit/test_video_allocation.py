@@ -0,0 +1,171 @@
+"""
+Unit Tests for Video Allocation Algorithm
+视频分配算法单元测试
+"""
+
+import copy
+import random
+import json
+from pathlib import Path
+
+from jianying import video_allocation_algorithm as allocation
+from jianying.video_allocation_algorithm import AllocationResult, VideoAllocationAlgorithm, VideoFile
+
+NOW = 1700000000
+
+
+def write_template(templates_dir: Path, name: str = "旅行"):
+    template_dir = templates_dir / name
+    template_dir.mkdir(parents=True)
+    videos = [
+        {"id": "a", "path": "C:/old/1.mp4", "local_material_id": "L1"},
+        {"id": "b", "path": "C:/old/cover.png", "local_material_id": "L2"},
+        {"id": "c", "path": "", "local_material_id": "L3"},
+        {"id": "d", "path": "C:/old/2.MOV", "local_material_id": " "},
+        {"id": "e", "path": "C:/old/3.mp4", "local_material_id": "L5"},
+        {"id": "f", "path": "C:/old/4.mp4"},
+    ]
+    content = {"materials": {"videos": videos, "audios": [{"id": "x"}]}, "tracks": [{"segments": []}]}
+    meta = {"draft_name": name, "draft_materials": [
+        {"type": 0, "value": [{"id": "L1", "file_Path": "C:/old/1.mp4"},
+                              {"id": "L5", "file_Path": "C:/old/3.mp4"},
+                              {"id": "L9", "file_Path": "C:/old/9.mp4"}]},
+        {"type": 1, "value": [{"id": "L1", "file_Path": "C:/old/1.mp4"}]},
+    ]}
+    (template_dir / "draft_content.json").write_text(json.dumps(content), encoding='utf-8')
+    (template_dir / "draft_meta_info.json").write_text(json.dumps(meta), encoding='utf-8')
+    return template_dir, content, meta
+
+
+def reference_outputs(content, meta, paths):
+    """旧流程的参考实现：按顺序替换视频路径，再按 local_material_id 同步 meta"""
+    content, meta = copy.deepcopy(content), copy.deepcopy(meta)
+    videos = content["materials"]["videos"]
+    slots = [i for i, v in enumerate(videos)
+             if v.get("path") and Path(v["path"]).suffix.lower() not in allocation.IMAGE_EXTENSIONS]
+    for slot, path in zip(slots, paths):
+        videos[slot]["path"] = path
+    mapping = {v["local_material_id"]: v["path"] for v in videos
+               if v.get("path") and v.get("local_material_id", "").strip()
+               and Path(v["path"]).suffix.lower() not in allocation.IMAGE_EXTENSIONS}
+    for group in meta["draft_materials"]:
+        if group["type"] == 0:
+            for video_meta in group["value"]:
+                if video_meta["id"] in mapping:
+                    path = mapping[video_meta["id"]]
+                    video_meta.update(file_Path=path, extra_info=Path(path).name, create_time=NOW,
+                                      import_time=NOW, import_time_ms=NOW * 1000000)
+    return content, meta
+
+
+def test_clean_output_matches_reference_and_parses_once(tmp_path, monkeypatch):
+    """测试克隆输出与旧流程一致，模板只解析一次且缓存不被修改"""
+    template_dir, content, meta = write_template(tmp_path / "templates")
+    algorithm = VideoAllocationAlgorithm(str(tmp_path))
+    monkeypatch.setattr(allocation.time, "time", lambda: NOW)
+
+    loads = []
+    original_load = allocation.load_draft
+    monkeypatch.setattr(allocation, "load_draft", lambda path: loads.append(Path(path).name) or original_load(path))
+
+    for round_num, count in [(1, 3), (2, 1), (3, 0)]:
+        clips = [VideoFile(path=f"/new/r{round_num}_{i}.mp4", name=f"{i}.mp4", relative_path=f"{i}.mp4")
+                 for i in range(count)]
+        result = AllocationResult(f"旅行_第{round_num}轮_{round_num}", [(i, clip) for i, clip in enumerate(clips)],
+                                  4, count)
+        assert algorithm._save_clean_template_result(result)
+
+        output_dir = tmp_path / "outputs" / result.template_name
+        expected_content, expected_meta = reference_outputs(content, meta, [clip.path for clip in clips])
+        assert json.loads((output_dir / "draft_content.json").read_text(encoding='utf-8')) == expected_content
+        assert json.loads((output_dir / "draft_meta_info.json").read_text(encoding='utf-8')) == expected_meta
+        assert json.loads((output_dir / "draft_virtual_store.json").read_text(encoding='utf-8')) == {"store_data": {}}
+
+    assert sorted(loads) == ["draft_content.json", "draft_meta_info.json"]
+    cached = algorithm.template_cache.get(template_dir)
+    assert cached.content == content and cached.meta == meta
+
+    # 模板文件修改后重新解析
+    content["materials"]["videos"][0]["path"] = "C:/old/changed.mp4"
+    (template_dir / "draft_content.json").write_text(json.dumps(content, indent=1), encoding='utf-8')
+    assert algorithm.template_cache.get(template_dir).content == content
+
+
+def test_missing_template_fails_cleanly(tmp_path):
+    """测试模板目录不存在时返回 False"""
+    algorithm = VideoAllocationAlgorithm(str(tmp_path))
+    assert not algorithm._save_clean_template_result(AllocationResult("不存在_第1轮_1", [], 0, 0))
+
+
+class RecordingProjectManager:
+    def __init__(self):
+        self.updated = []
+
+    def update_project_resources(self, name, assignments):
+        self.updated.append(name)
+
+
+def make_results(rounds: int):
+    results = []
+    for round_num in range(1, rounds + 1):
+        template = "缺失" if round_num % 7 == 0 else "旅行"
+        clips = [VideoFile(path=f"/new/{round_num}_{i}.mp4", name=f"{i}.mp4", relative_path=f"{i}.mp4")
+                 for i in range(3)]
+        results.append(AllocationResult(f"{template}_第{round_num}轮_{round_num}", list(enumerate(clips)), 4, 3))
+    return results
+
+
+def test_parallel_save_reports_in_order_and_isolates_failures(tmp_path):
+    """测试并行保存按分配顺序汇报，单个草稿失败不影响其他草稿"""
+    write_template(tmp_path / "templates")
+    algorithm = VideoAllocationAlgorithm(str(tmp_path), save_workers=4)
+    algorithm.project_manager = RecordingProjectManager()
+    algorithm.allocation_results = make_results(30)
+
+    stats = algorithm._save_results()
+    expected = [r.template_name for r in algorithm.allocation_results if not r.template_name.startswith("缺失")]
+    assert (stats['saved'], stats['failed']) == (len(expected), 30 - len(expected))
+    assert algorithm.project_manager.updated == expected
+    assert sorted(p.name for p in (tmp_path / "outputs").iterdir()) == sorted(expected)
+    for name in expected:
+        content = json.loads((tmp_path / "outputs" / name / "draft_content.json").read_text(encoding='utf-8'))
+        round_num = name.split("_")[-1]
+        assert content["materials"]["videos"][0]["path"] == f"/new/{round_num}_0.mp4"
+
+
+def test_dry_run_writes_nothing(tmp_path):
+    """测试试运行只序列化、统计吞吐量，不写文件也不更新项目管理器"""
+    write_template(tmp_path / "templates")
+    algorithm = VideoAllocationAlgorithm(str(tmp_path), save_workers=2)
+    algorithm.project_manager = RecordingProjectManager()
+    algorithm.allocation_results = make_results(10)
+
+    stats = algorithm._save_results(dry_run=True)
+    assert (stats['saved'], stats['failed']) == (9, 1)
+    assert stats['drafts_per_second'] > 0
+    assert not (tmp_path / "outputs").exists()
+    assert algorithm.project_manager.updated == []
+
+
+def test_allocation_rounds_are_seeded_and_use_each_clip_once(tmp_path):
+    """测试多轮分配：同一随机种子结果相同，每个素材只用一次，模板位置全部填满"""
+    from jianying.video_allocation_algorithm import TemplateInfo
+
+    def run(seed):
+        algorithm = VideoAllocationAlgorithm(str(tmp_path), near_duplicate_distance=None)
+        videos = [VideoFile(path=f"/v/{i}.mp4", name=f"{i}.mp4", relative_path=f"{i}.mp4") for i in range(300)]
+        templates = [TemplateInfo(f"T{i}", "", "", positions) for i, positions in enumerate([3, 8, 5, 12, 0])]
+        random.seed(seed)
+        algorithm._run_allocation_rounds(templates, videos)
+        return algorithm
+
+    algorithm = run(7)
+    results = [(r.template_name, [(p, v.path) for p, v in r.video_assignments]) for r in algorithm.allocation_results]
+    assert results == [(r.template_name, [(p, v.path) for p, v in r.video_assignments])
+                       for r in run(7).allocation_results]
+
+    used = [path for r in algorithm.allocation_results for path in dict.fromkeys(v.path for _, v in r.video_assignments)]
+    assert len(used) == len(set(used)) == len(algorithm.used_videos)
+    for result in algorithm.allocation_results:
+        assert sorted(p for p, _ in result.video_assignments) == list(range(result.total_positions))
+    assert 300 - len(used) < 2  # 剩余素材不足以填任何模板
@@ -0,0 +1,198 @@
+"""
+剪映草稿 JSON 编解码
+优先使用 orjson / msgspec，未安装时回退到标准库 json；一次分配运行要读写上千个
+数 MB 的草稿文件，编解码和缩进空白占了大部分耗时。
+默认紧凑输出，设置环境变量 SHOT_DETECTION_DRAFT_PRETTY=1 或传入 pretty=True 时缩进（调试用）。
+写入先落到同目录临时文件再原子替换，中途失败不会留下半个草稿
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Union
+from loguru import logger
+
+# 指定编解码器（orjson / msgspec / json），默认按可用性自动选择
+CODEC_ENV = "SHOT_DETECTION_DRAFT_CODEC"
+
+# 调试时输出缩进格式
+PRETTY_ENV = "SHOT_DETECTION_DRAFT_PRETTY"
+
+PathLike = Union[str, Path]
+
+
+class DraftCodec:
+    """
+    编解码器
+
+    loads 接受 bytes，dumps 返回 UTF-8 bytes；stream_dump 可选，
+    提供时直接分块写入文件而不在内存中生成完整输出。
+    """
+
+    def __init__(self, name: str,
+                 loads: Callable[[bytes], Any],
+                 dumps: Callable[[Any, bool], bytes],
+                 stream_dump: Optional[Callable[[Any, Any, bool], None]] = None):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.stream_dump = stream_dump
+
+    def __repr__(self) -> str:
+        return f"DraftCodec({self.name!r})"
+
+
+def _json_dumps(data: Any, pretty: bool) -> bytes:
+    if pretty:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# 不提供 stream_dump：json.dump 逐块写入走纯 Python 的 iterencode，
+# 紧凑输出时比 json.dumps（C 编码器）后一次写入慢数倍
+STDLIB_CODEC = DraftCodec("json", json.loads, _json_dumps)
+
+
+def _make_orjson_codec() -> Optional[DraftCodec]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    def dumps(data: Any, pretty: bool) -> bytes:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            # 非字符串键、超出 64 位的整数等 orjson 不支持的值
+            return _json_dumps(data, pretty)
+
+    def loads(data: bytes) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN / Infinity 等标准库能读的扩展写法
+            return json.loads(data)
+
+    return DraftCodec("orjson", loads, dumps)
+
+
+def _make_msgspec_codec() -> Optional[DraftCodec]:
+    try:
+        import msgspec
+    except ImportError:
+        return None
+
+    encoder = msgspec.json.Encoder()
+
+    def dumps(data: Any, pretty: bool) -> bytes:
+        try:
+            encoded = encoder.encode(data)
+        except (TypeError, msgspec.EncodeError):
+            return _json_dumps(data, pretty)
+        return msgspec.json.format(encoded, indent=2) if pretty else encoded
+
+    def loads(data: bytes) -> Any:
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError:
+            return json.loads(data)
+
+    return DraftCodec("msgspec", loads, dumps)
+
+
+_FACTORIES: Dict[str, Callable[[], Optional[DraftCodec]]] = {
+    "orjson": _make_orjson_codec,
+    "msgspec": _make_msgspec_codec,
+    "json": lambda: STDLIB_CODEC,
+}
+_codecs: Dict[str, Optional[DraftCodec]] = {}
+_default: Optional[DraftCodec] = None
+
+
+def register_codec(name: str, factory: Callable[[], Optional[DraftCodec]]):
+    """注册编解码器，factory 在依赖不可用时返回 None"""
+    _FACTORIES[name] = factory
+    _codecs.pop(name, None)
+
+
+def get_codec(name: Optional[str] = None) -> DraftCodec:
+    """
+    获取编解码器
+
+    Args:
+        name: 编解码器名称，默认读取环境变量，再按 orjson、msgspec、json 的顺序选择第一个可用的
+
+    Returns:
+        编解码器（指定的不可用时回退到标准库）
+    """
+    global _default
+    name = name or os.environ.get(CODEC_ENV)
+    if name is None and _default is not None:
+        return _default
+
+    for candidate in ([name] if name else list(_FACTORIES)):
+        if candidate not in _codecs:
+            factory = _FACTORIES.get(candidate)
+            _codecs[candidate] = factory() if factory else None
+        codec = _codecs[candidate]
+        if codec is not None:
+            break
+    else:
+        logger.bind(component="DraftCodec").warning(f"Draft codec {name} unavailable, using json")
+        codec = STDLIB_CODEC
+
+    if name is None:
+        _default = codec
+    return codec
+
+
+def _pretty_default() -> bool:
+    return os.environ.get(PRETTY_ENV, "").lower() in ("1", "true", "yes")
+
+
+def load_draft(path: PathLike, codec: Optional[DraftCodec] = None) -> Any:
+    """读取 JSON 草稿文件"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    # 兼容带 BOM 的文件（与 utf-8-sig 一致）
+    if data.startswith(b'\xef\xbb\xbf'):
+        data = data[3:]
+    return (codec or get_codec()).loads(data)
+
+
+def dump_draft(data: Any, pretty: Optional[bool] = None, codec: Optional[DraftCodec] = None) -> bytes:
+    """序列化为 UTF-8 bytes"""
+    return (codec or get_codec()).dumps(data, _pretty_default() if pretty is None else pretty)
+
+
+def save_draft(path: PathLike, data: Any, pretty: Optional[bool] = None,
+               codec: Optional[DraftCodec] = None):
+    """
+    原子写入 JSON 草稿文件
+
+    Args:
+        path: 目标路径
+        data: 草稿内容
+        pretty: 是否缩进，默认读取 SHOT_DETECTION_DRAFT_PRETTY，未设置时紧凑输出
+        codec: 编解码器，默认自动选择
+    """
+    codec = codec or get_codec()
+    pretty = _pretty_default() if pretty is None else pretty
+    path = Path(path)
+
+    # 临时文件与目标同目录（同一文件系统才能原子替换），按 umask 创建
+    tmp_name = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(tmp_name, 'xb') as f:
+            if codec.stream_dump is not None:
+                codec.stream_dump(data, f, pretty)
+            else:
+                f.write(codec.dumps(data, pretty))
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
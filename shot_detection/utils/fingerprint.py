@@ -0,0 +1,134 @@
+"""
+文件内容指纹
+只读取文件头、尾和均匀分布的若干块计算 BLAKE2b，耗时与文件大小基本无关；
+文件移动、复制或跨机器同步后指纹不变。需要逐字节确认时使用完整哈希模式。
+扫描、缓存校验、上传去重和缓存清理共用，结果按 (设备, inode, 大小, 修改时间) 缓存
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple, Union
+
+# 默认采样：16块 × 64KB，小于采样总量的文件整体读取（此时与完整哈希相同）
+DEFAULT_SAMPLE_COUNT = 16
+DEFAULT_SAMPLE_SIZE = 64 * 1024
+
+# 完整哈希的读缓冲区
+FULL_READ_BUFFER = 4 * 1024 * 1024
+
+_MEMO_LIMIT = 4096
+_memo: 'OrderedDict[Tuple, str]' = OrderedDict()
+_memo_lock = threading.Lock()
+
+PathLike = Union[str, Path]
+
+
+def _digest():
+    return hashlib.blake2b(digest_size=16)
+
+
+def _hash_full(f, digest):
+    """用预分配的大缓冲区读取整个文件"""
+    buffer = bytearray(FULL_READ_BUFFER)
+    view = memoryview(buffer)
+    while True:
+        n = f.readinto(buffer)
+        if not n:
+            break
+        digest.update(view[:n])
+
+
+def _memoized(path: str, mode: Tuple, compute) -> str:
+    stat = os.stat(path)
+    key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns) + mode
+
+    with _memo_lock:
+        cached = _memo.get(key)
+        if cached is not None:
+            _memo.move_to_end(key)
+            return cached
+
+    fingerprint = compute(stat.st_size)
+    with _memo_lock:
+        _memo[key] = fingerprint
+        if len(_memo) > _MEMO_LIMIT:
+            _memo.popitem(last=False)
+    return fingerprint
+
+
+def sampled_fingerprint(file_path: PathLike,
+                        sample_count: int = DEFAULT_SAMPLE_COUNT,
+                        sample_size: int = DEFAULT_SAMPLE_SIZE) -> str:
+    """
+    计算文件的采样内容指纹
+
+    Args:
+        file_path: 文件路径
+        sample_count: 采样块数（包含首块和尾块）
+        sample_size: 每块字节数
+
+    Returns:
+        32位十六进制指纹
+    """
+    path = str(file_path)
+    sample_count = max(2, sample_count)
+
+    def compute(size: int) -> str:
+        digest = _digest()
+        digest.update(str(size).encode())
+        with open(path, 'rb') as f:
+            if size <= sample_count * sample_size:
+                _hash_full(f, digest)
+            else:
+                last_offset = size - sample_size
+                for i in range(sample_count):
+                    f.seek(last_offset * i // (sample_count - 1))
+                    digest.update(f.read(sample_size))
+        return digest.hexdigest()
+
+    return _memoized(path, ('sampled', sample_count, sample_size), compute)
+
+
+def full_fingerprint(file_path: PathLike) -> str:
+    """
+    计算文件的完整内容哈希（读取全部字节）
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        32位十六进制哈希，小文件与采样指纹相同
+    """
+    path = str(file_path)
+
+    def compute(size: int) -> str:
+        digest = _digest()
+        digest.update(str(size).encode())
+        with open(path, 'rb') as f:
+            _hash_full(f, digest)
+        return digest.hexdigest()
+
+    return _memoized(path, ('full',), compute)
+
+
+def file_fingerprint(file_path: PathLike, full: bool = False) -> str:
+    """
+    计算文件指纹
+
+    Args:
+        file_path: 文件路径
+        full: 是否读取全部内容，默认只采样
+
+    Returns:
+        32位十六进制指纹
+    """
+    return full_fingerprint(file_path) if full else sampled_fingerprint(file_path)
+
+
+def clear_fingerprint_cache():
+    """清空进程内的指纹缓存"""
+    with _memo_lock:
+        _memo.clear()
@@ -0,0 +1,100 @@
+"""
+保序空闲池
+按原始顺序保存一组元素，支持 O(log n) 按键移除和按下标取第 j 个剩余元素。
+作为 Sequence 交给 random.sample / random.shuffle 时，与每次重新过滤出的剩余列表
+消耗相同的随机数、得到相同的结果，但不必每次重建列表
+"""
+
+from collections.abc import Sequence
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
+
+class OrderedPool(Sequence):
+    """
+    保序空闲池（树状数组维护剩余元素的前缀计数）
+
+    key 相同的元素同时移除，与按 key 过滤已用集合的列表一致
+    """
+
+    def __init__(self, items: Iterable[Any], key: Optional[Callable[[Any], Hashable]] = None,
+                 exclude: Iterable[Hashable] = ()):
+        """
+        Args:
+            items: 元素（保持原始顺序）
+            key: 移除时使用的键，默认为元素本身
+            exclude: 初始即视为已移除的键
+        """
+        self._items: List[Any] = list(items)
+        self._key = key or (lambda item: item)
+        excluded = set(exclude)
+
+        size = len(self._items)
+        self._alive = bytearray(size)
+        self._positions: Dict[Hashable, List[int]] = {}
+        for index, item in enumerate(self._items):
+            item_key = self._key(item)
+            self._positions.setdefault(item_key, []).append(index)
+            if item_key not in excluded:
+                self._alive[index] = 1
+
+        # 线性时间建树
+        self._tree = [0] * (size + 1)
+        for index in range(1, size + 1):
+            self._tree[index] += self._alive[index - 1]
+            parent = index + (index & -index)
+            if parent <= size:
+                self._tree[parent] += self._tree[index]
+        self._count = sum(self._alive)
+        self._top = 1 << size.bit_length() if size else 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, j: int) -> Any:
+        """第 j 个剩余元素（按原始顺序）"""
+        if isinstance(j, slice):
+            return list(self)[j]
+        if j < 0:
+            j += self._count
+        if not 0 <= j < self._count:
+            raise IndexError("pool index out of range")
+
+        # 在树状数组上二分：找前缀计数为 j+1 的位置
+        position, remaining = 0, j + 1
+        step = self._top
+        size = len(self._items)
+        while step:
+            candidate = position + step
+            if candidate <= size and self._tree[candidate] < remaining:
+                position = candidate
+                remaining -= self._tree[candidate]
+            step >>= 1
+        return self._items[position]
+
+    def __iter__(self) -> Iterator[Any]:
+        alive = self._alive
+        return (item for index, item in enumerate(self._items) if alive[index])
+
+    def __contains__(self, item: Any) -> bool:
+        return any(self._alive[index] for index in self._positions.get(self._key(item), ()))
+
+    def discard(self, item_key: Hashable) -> int:
+        """
+        移除键为 item_key 的全部元素
+
+        Returns:
+            移除的数量
+        """
+        removed = 0
+        size = len(self._items)
+        for index in self._positions.get(item_key, ()):
+            if not self._alive[index]:
+                continue
+            self._alive[index] = 0
+            removed += 1
+            node = index + 1
+            while node <= size:
+                self._tree[node] -= 1
+                node += node & -node
+        self._count -= removed
+        return removed
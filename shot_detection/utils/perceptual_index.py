@@ -0,0 +1,313 @@
+"""
+近重复片段索引
+每个片段均匀采样若干帧，每帧计算 64 位 dHash；帧哈希按 (帧位置, 16 位分段) 存入多索引哈希表，
+汉明半径查询只访问候选桶而不是逐个比较所有片段，十万级片段也能即时查询。
+重新上传、转码和缩放后的同一片段哈希接近，按字节哈希无法发现这类重复。
+帧哈希存入媒体元数据索引（类型 phash），扫描器写入后分配算法和缓存清理直接复用
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+from loguru import logger
+
+from .probe_index import ProbeIndex, get_probe_index
+
+# 元数据索引中帧哈希的类型名
+PHASH_KIND = "phash"
+
+# 每个片段采样的帧数（避开首尾，取 1/6 ... 5/6 处）
+FRAME_SAMPLES = 5
+
+HASH_BITS = 64
+CHUNK_BITS = 16
+CHUNKS = HASH_BITS // CHUNK_BITS
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# 对齐帧的平均汉明距离不超过该值视为近重复（转码、缩放后的同一片段通常在 0-4 之间）
+DEFAULT_MAX_DISTANCE = 7
+
+# 置位过少或过多的帧（纯色、黑场、淡入淡出）几乎所有片段都相同，不进入分段表
+MIN_FRAME_BITS = 4
+
+PathLike = Union[str, Path]
+
+
+def dhash(gray) -> int:
+    """灰度图的 64 位差值哈希：缩放到 9x8，比较每行相邻像素"""
+    import cv2
+    import numpy as np
+
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def video_frame_hashes(video_path: PathLike, samples: int = FRAME_SAMPLES) -> Optional[List[int]]:
+    """
+    计算片段采样帧的 dHash
+
+    Args:
+        video_path: 视频文件路径
+        samples: 采样帧数
+
+    Returns:
+        按时间顺序的帧哈希，无法读取时返回 None
+    """
+    import cv2
+    from .sparse_frames import iter_sparse_frames
+
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        if not cap.isOpened():
+            return None
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if frame_count <= 0:
+            return None
+
+        indices = [frame_count * (i + 1) // (samples + 1) for i in range(samples)]
+        hashes = [dhash(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+                  for _, frame in iter_sparse_frames(cap, indices)]
+        return hashes or None
+    finally:
+        cap.release()
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def clip_distance(a: List[int], b: List[int]) -> float:
+    """两个片段对齐帧的平均汉明距离"""
+    n = min(len(a), len(b))
+    if n == 0:
+        return float(HASH_BITS)
+    return sum(hamming(a[i], b[i]) for i in range(n)) / n
+
+
+def format_hashes(hashes: Iterable[int]) -> str:
+    """帧哈希序列化为逗号分隔的十六进制字符串"""
+    return ','.join(f"{h:016x}" for h in hashes)
+
+
+def parse_hashes(text: Optional[str]) -> List[int]:
+    return [int(h, 16) for h in text.split(',')] if text else []
+
+
+def _informative(h: int) -> bool:
+    return MIN_FRAME_BITS <= bin(h).count('1') <= HASH_BITS - MIN_FRAME_BITS
+
+
+def _chunks(h: int) -> List[int]:
+    return [(h >> (i * CHUNK_BITS)) & _CHUNK_MASK for i in range(CHUNKS)]
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(radius: int) -> Tuple[int, ...]:
+    """16 位分段内翻转不超过 radius 位的所有掩码（包括 0）"""
+    masks = [0]
+    for r in range(1, radius + 1):
+        for bits in combinations(range(CHUNK_BITS), r):
+            mask = 0
+            for bit in bits:
+                mask |= 1 << bit
+            masks.append(mask)
+    return tuple(masks)
+
+
+class PerceptualIndex:
+    """
+    近重复片段索引（多索引哈希）
+
+    若两个片段对齐帧的平均距离不超过 d，至少有一对对齐帧的距离不超过 d；
+    把 64 位帧哈希分成 4 段，这对帧至少有一段的差异不超过 d // 4 位。
+    每个 (帧位置, 分段) 一张表，查询时只在同一位置的表中枚举 d // 4 位以内的变体，
+    命中的片段再计算完整距离。纯色、黑场等信息量过低的帧与几乎所有同类帧都相近，
+    不进入索引；只有这类帧足够接近的片段对可能查不到。
+    """
+
+    def __init__(self, max_distance: float = DEFAULT_MAX_DISTANCE):
+        """
+        初始化索引
+
+        Args:
+            max_distance: 默认的近重复阈值（对齐帧的平均汉明距离）
+        """
+        self.max_distance = max_distance
+        self.logger = logger.bind(component="PerceptualIndex")
+
+        self._clips: Dict[str, List[int]] = {}
+        self._tables: Dict[Tuple[int, int], Dict[int, Set[str]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._clips)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._clips
+
+    def add(self, key: str, hashes: List[int]):
+        """加入（或替换）一个片段"""
+        with self._lock:
+            self.remove(key)
+            self._clips[key] = list(hashes)
+            for position, h in enumerate(hashes):
+                if _informative(h):
+                    for chunk, value in enumerate(_chunks(h)):
+                        self._tables.setdefault((position, chunk), {}).setdefault(value, set()).add(key)
+
+    def remove(self, key: str):
+        """移除一个片段"""
+        with self._lock:
+            hashes = self._clips.pop(key, None)
+            if not hashes:
+                return
+            for position, h in enumerate(hashes):
+                if _informative(h):
+                    for chunk, value in enumerate(_chunks(h)):
+                        table = self._tables.get((position, chunk), {})
+                        bucket = table.get(value)
+                        if bucket is not None:
+                            bucket.discard(key)
+                            if not bucket:
+                                del table[value]
+
+    def hashes(self, key: str) -> Optional[List[int]]:
+        return self._clips.get(key)
+
+    def query(self, hashes: List[int], max_distance: Optional[float] = None,
+              exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """
+        查询近重复片段
+
+        Args:
+            hashes: 待查询片段的帧哈希
+            max_distance: 阈值，默认使用索引的阈值
+            exclude: 结果中排除的片段（查询已入索引的片段自身时）
+
+        Returns:
+            (片段, 距离) 列表，按距离升序
+        """
+        radius = self.max_distance if max_distance is None else max_distance
+        masks = _flip_masks(int(radius) // CHUNKS)
+
+        with self._lock:
+            candidates: Set[str] = set()
+            for position, h in enumerate(hashes):
+                if not _informative(h):
+                    continue
+                for chunk, value in enumerate(_chunks(h)):
+                    table = self._tables.get((position, chunk))
+                    if not table:
+                        continue
+                    for mask in masks:
+                        bucket = table.get(value ^ mask)
+                        if bucket:
+                            candidates.update(bucket)
+            candidates.discard(exclude)
+
+            results = []
+            for key in candidates:
+                distance = clip_distance(hashes, self._clips[key])
+                if distance <= radius:
+                    results.append((key, distance))
+
+        results.sort(key=lambda item: (item[1], item[0]))
+        return results
+
+    def neighbors(self, key: str, max_distance: Optional[float] = None) -> Set[str]:
+        """已入索引片段的近重复片段"""
+        hashes = self._clips.get(key)
+        if not hashes:
+            return set()
+        return {other for other, _ in self.query(hashes, max_distance, exclude=key)}
+
+    def near_duplicate_groups(self, max_distance: Optional[float] = None) -> List[List[str]]:
+        """
+        把互为近重复的片段合并成组（并查集），只返回包含两个以上片段的组
+
+        对每个片段各查询一次，耗时与片段数成正比。
+        """
+        parent: Dict[str, str] = {}
+
+        def find(key: str) -> str:
+            root = key
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while key != root:
+                parent[key], key = root, parent.get(key, key)
+            return root
+
+        for key in list(self._clips):
+            for other in self.neighbors(key, max_distance):
+                parent.setdefault(key, key)
+                parent.setdefault(other, other)
+                a, b = find(key), find(other)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+
+        groups: Dict[str, List[str]] = {}
+        for key in parent:
+            groups.setdefault(find(key), []).append(key)
+        return sorted((sorted(members) for members in groups.values() if len(members) > 1),
+                      key=lambda members: members[0])
+
+    def index_files(self, paths: Iterable[PathLike],
+                    probe_index: Optional[ProbeIndex] = None,
+                    compute_missing: bool = True,
+                    max_workers: int = 4) -> Dict[str, Optional[List[int]]]:
+        """
+        读取或计算文件的帧哈希并加入索引
+
+        已在元数据索引中且文件未修改的直接复用；其余文件并发计算后写回元数据索引。
+
+        Args:
+            paths: 视频文件路径（作为索引中的键）
+            probe_index: 元数据索引，默认使用进程内共享的索引
+            compute_missing: 是否计算元数据索引中没有的文件
+            max_workers: 并发计算的线程数
+
+        Returns:
+            路径 -> 帧哈希（无法读取或未计算的文件为 None）
+        """
+        probe_index = probe_index or get_probe_index()
+        paths = list(dict.fromkeys(str(path) for path in paths))
+        results: Dict[str, Optional[List[int]]] = {path: None for path in paths}
+
+        cached = probe_index.lookup(paths, kind=PHASH_KIND)
+        for path, data in cached.items():
+            results[path] = parse_hashes(data.get('hashes')) if data else None
+        missing = [path for path in paths if path not in cached] if compute_missing else []
+
+        if missing:
+            self.logger.info(f"Computing perceptual hashes for {len(missing)} clips")
+            with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="phash") as executor:
+                for path, hashes in zip(missing, executor.map(self._safe_hashes, missing)):
+                    results[path] = hashes
+                    probe_index.put(path, {'hashes': format_hashes(hashes)} if hashes else None,
+                                    kind=PHASH_KIND)
+
+        for path, hashes in results.items():
+            if hashes:
+                self.add(path, hashes)
+        return results
+
+    def _safe_hashes(self, path: str) -> Optional[List[int]]:
+        try:
+            return video_frame_hashes(path)
+        except Exception as e:
+            self.logger.warning(f"Failed to hash {path}: {e}")
+            return None
+
+    def get_stats(self) -> Dict[str, int]:
+        """片段数和各分段表的桶数"""
+        with self._lock:
+            return {
+                'clips': len(self._clips),
+                'buckets': sum(len(table) for table in self._tables.values()),
+                'largest_bucket': max((len(bucket) for table in self._tables.values() for bucket in table.values()),
+                                      default=0)
+            }
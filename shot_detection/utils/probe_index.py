@@ -0,0 +1,351 @@
+"""
+媒体元数据索引
+ffprobe 的结果持久化到本地 SQLite，按 路径 + 文件大小 + 修改时间 判定是否有效，
+扫描、剪映草稿和视频分段等代码共用，同一文件只探测一次
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from loguru import logger
+
+DEFAULT_INDEX_PATH = Path.home() / ".shot_detection" / "probe_index.db"
+
+# 通过环境变量指定索引文件位置
+INDEX_PATH_ENV = "SHOT_DETECTION_PROBE_INDEX"
+
+SCHEMA_VERSION = 1
+
+# ffprobe 的完整输出（format + streams）
+FFPROBE_KIND = "ffprobe"
+
+# 单条 SQL 中绑定的路径数上限，低于 SQLite 默认的变量数限制
+LOOKUP_BATCH_SIZE = 500
+
+PathLike = Union[str, Path]
+
+
+def run_ffprobe(path: PathLike, ffprobe_path: str = 'ffprobe', timeout: float = 30) -> Optional[Dict[str, Any]]:
+    """
+    运行 ffprobe 读取容器和流信息
+
+    Returns:
+        ffprobe 的 JSON 输出，文件无法解析时返回 None
+
+    Raises:
+        FileNotFoundError: 找不到 ffprobe
+        subprocess.TimeoutExpired: 超时
+    """
+    cmd = [ffprobe_path, '-v', 'quiet', '-print_format', 'json',
+           '-show_format', '-show_streams', str(path)]
+    result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8',
+                            errors='ignore', timeout=timeout)
+    if result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return None
+
+
+def first_stream(data: Optional[Dict[str, Any]], codec_type: str) -> Optional[Dict[str, Any]]:
+    """ffprobe 输出中指定类型的第一个流"""
+    for stream in (data or {}).get('streams', []):
+        if stream.get('codec_type') == codec_type:
+            return stream
+    return None
+
+
+def parse_rate(rate: Optional[str]) -> float:
+    """解析 ffprobe 的帧率字符串（如 30000/1001），无效时返回 0"""
+    try:
+        if rate and '/' in rate:
+            num, den = rate.split('/')
+            return float(num) / float(den) if float(den) != 0 else 0.0
+        return float(rate) if rate else 0.0
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class ProbeIndex:
+    """持久化的媒体元数据索引"""
+
+    def __init__(self, db_path: Optional[PathLike] = None,
+                 ffprobe_path: str = 'ffprobe',
+                 max_workers: Optional[int] = None,
+                 timeout: float = 30,
+                 fingerprint_func: Optional[Callable[[str], str]] = None):
+        """
+        初始化索引
+
+        Args:
+            db_path: SQLite 文件路径，默认取环境变量或 ~/.shot_detection/probe_index.db
+            ffprobe_path: ffprobe可执行文件
+            max_workers: 批量探测的并发数
+            timeout: 单个文件的探测超时时间（秒）
+            fingerprint_func: 内容指纹函数；设置后文件移动或复制到新路径时按指纹复用探测结果
+        """
+        self.db_path = Path(db_path or os.environ.get(INDEX_PATH_ENV) or DEFAULT_INDEX_PATH)
+        self.ffprobe_path = ffprobe_path
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.timeout = timeout
+        self.fingerprint_func = fingerprint_func
+        self.logger = logger.bind(component="ProbeIndex")
+
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._ffprobe_missing = False
+        self._stats = {'hits': 0, 'misses': 0, 'probes': 0, 'failures': 0, 'fingerprint_hits': 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开索引数据库（首次使用时），无法打开时退回内存数据库"""
+        if self._conn is not None:
+            return self._conn
+
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+        except (sqlite3.Error, OSError) as e:
+            self.logger.warning(f"Cannot open probe index {self.db_path}, using in-memory index: {e}")
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            conn.execute("DROP TABLE IF EXISTS probes")
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS probes (
+                path TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                fingerprint TEXT,
+                data TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (path, kind)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS probes_fingerprint ON probes (fingerprint, kind)")
+        conn.commit()
+
+        self._conn = conn
+        return conn
+
+    @staticmethod
+    def _key(path: PathLike) -> str:
+        return os.path.normcase(os.path.abspath(str(path)))
+
+    @staticmethod
+    def _stat(path: PathLike) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+            return stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    def _select(self, keys: List[str], kind: str) -> Dict[str, Tuple[int, int, Optional[str]]]:
+        """批量读取记录，返回 路径 -> (大小, 修改时间, 数据)"""
+        rows = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+                batch = keys[i:i + LOOKUP_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                for path, size, mtime_ns, data in conn.execute(
+                        f"SELECT path, size, mtime_ns, data FROM probes "
+                        f"WHERE kind = ? AND path IN ({placeholders})", [kind] + batch):
+                    rows[path] = (size, mtime_ns, data)
+        return rows
+
+    def _store(self, records: List[Tuple[str, str, int, int, Optional[str], Optional[Dict[str, Any]]]]):
+        """写入 (路径, 类型, 大小, 修改时间, 指纹, 数据) 记录"""
+        if not records:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO probes (path, kind, size, mtime_ns, fingerprint, data, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(path, kind, size, mtime_ns, fingerprint,
+                      json.dumps(data, ensure_ascii=False) if data is not None else None, now)
+                     for path, kind, size, mtime_ns, fingerprint, data in records]
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Failed to update probe index: {e}")
+
+    def lookup(self, paths: Iterable[PathLike], kind: str = FFPROBE_KIND) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批量查询有效的索引记录，不做探测
+
+        Returns:
+            命中的 路径 -> 数据（探测失败的文件为 None）；未命中或已过期的路径不在结果中
+        """
+        stats = {str(path): self._stat(path) for path in paths}
+        keys = {str(path): self._key(path) for path in stats if stats[str(path)] is not None}
+        rows = self._select(list(set(keys.values())), kind)
+
+        found = {}
+        for path, key in keys.items():
+            row = rows.get(key)
+            if row is not None and (row[0], row[1]) == stats[path]:
+                found[path] = json.loads(row[2]) if row[2] is not None else None
+        return found
+
+    def put(self, path: PathLike, data: Optional[Dict[str, Any]], kind: str = FFPROBE_KIND):
+        """写入一条记录（如其他方式读取的元数据）"""
+        stat = self._stat(path)
+        if stat is not None:
+            self._store([(self._key(path), kind, stat[0], stat[1], None, data)])
+
+    def probe(self, path: PathLike) -> Optional[Dict[str, Any]]:
+        """读取单个文件的 ffprobe 信息，文件不存在或无法解析时返回 None"""
+        return self.probe_many([path]).get(str(path))
+
+    def probe_many(self, paths: Iterable[PathLike]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批量读取 ffprobe 信息
+
+        先批量查询索引，未命中的文件并发运行 ffprobe（每个文件本身就是独立的
+        ffprobe 进程，这里用线程池分发即可），结果写回索引。
+
+        Args:
+            paths: 文件路径
+
+        Returns:
+            路径（与输入相同的字符串形式）-> ffprobe 输出或 None
+        """
+        paths = list(dict.fromkeys(str(path) for path in paths))
+        results: Dict[str, Optional[Dict[str, Any]]] = {path: None for path in paths}
+
+        cached = self.lookup(paths)
+        results.update(cached)
+        misses = [path for path in paths if path not in cached and self._stat(path) is not None]
+
+        with self._lock:
+            self._stats['hits'] += len(cached)
+            self._stats['misses'] += len(misses)
+
+        fingerprints: Dict[str, str] = {}
+        if misses and self.fingerprint_func:
+            misses = self._reuse_by_fingerprint(misses, results, fingerprints)
+
+        if misses and not self._ffprobe_missing:
+            self._probe_misses(misses, results, fingerprints)
+
+        return results
+
+    def _reuse_by_fingerprint(self, misses: List[str], results: Dict[str, Optional[Dict[str, Any]]],
+                              fingerprints: Dict[str, str]) -> List[str]:
+        """按内容指纹复用其他路径下同一文件的探测结果，返回仍未命中的路径（指纹记入 fingerprints）"""
+        remaining, records = [], []
+        for path in misses:
+            stat = self._stat(path)
+            try:
+                fingerprint = self.fingerprint_func(path)
+            except Exception as e:
+                self.logger.debug(f"Fingerprint failed for {path}: {e}")
+                remaining.append(path)
+                continue
+
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT data FROM probes WHERE fingerprint = ? AND kind = ? AND data IS NOT NULL LIMIT 1",
+                    (fingerprint, FFPROBE_KIND)).fetchone()
+            if row is None:
+                remaining.append(path)
+                fingerprints[path] = fingerprint
+                continue
+
+            results[path] = json.loads(row[0])
+            records.append((self._key(path), FFPROBE_KIND, stat[0], stat[1], fingerprint, results[path]))
+
+        with self._lock:
+            self._stats['fingerprint_hits'] += len(records)
+        self._store(records)
+        return remaining
+
+    def _probe_misses(self, misses: List[str], results: Dict[str, Optional[Dict[str, Any]]],
+                      fingerprints: Dict[str, str]):
+        """运行 ffprobe 探测未命中的文件并写回索引"""
+
+        def probe_one(path: str):
+            stat = self._stat(path)
+            try:
+                return path, stat, run_ffprobe(path, self.ffprobe_path, self.timeout), True
+            except FileNotFoundError:
+                self._ffprobe_missing = True
+                return path, stat, None, False
+            except Exception as e:
+                # 超时等临时错误不写入索引，下次重新探测
+                self.logger.warning(f"ffprobe failed for {path}: {e}")
+                return path, stat, None, False
+
+        if len(misses) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(misses))) as executor:
+                outcomes = list(executor.map(probe_one, misses))
+        else:
+            outcomes = [probe_one(misses[0])]
+
+        if self._ffprobe_missing:
+            self.logger.warning(f"ffprobe not found: {self.ffprobe_path}")
+
+        records = []
+        for path, stat, data, definitive in outcomes:
+            results[path] = data
+            if not definitive or stat is None:
+                continue
+            records.append((self._key(path), FFPROBE_KIND, stat[0], stat[1],
+                            fingerprints.get(path), data))
+
+        with self._lock:
+            self._stats['probes'] += len(records)
+            self._stats['failures'] += sum(1 for _, _, data, _ in outcomes if data is None)
+        self._store(records)
+
+    def invalidate(self, path: PathLike):
+        """删除一个文件的所有记录"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM probes WHERE path = ?", (self._key(path),))
+            conn.commit()
+
+    def clear(self):
+        """清空索引"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM probes")
+            conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命中、探测次数和记录数"""
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+            return {**self._stats, 'entries': entries, 'db_path': str(self.db_path)}
+
+
+_default_index: Optional[ProbeIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_probe_index() -> ProbeIndex:
+    """进程内共享的默认索引"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = ProbeIndex()
+        return _default_index
+
+
+def probe_media(path: PathLike) -> Optional[Dict[str, Any]]:
+    """通过默认索引读取单个文件的 ffprobe 信息"""
+    return get_probe_index().probe(path)
@@ -0,0 +1,161 @@
+"""
+采样质量分析
+只解码采样帧（间隔内的帧 grab 跳过或直接跳转），先缩放再转灰度得到工作副本，
+一批采样帧堆叠后一次性计算亮度、对比度、清晰度和噪声，质量分析的耗时只是检测的零头
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+import cv2
+import numpy as np
+
+from .sparse_frames import DEFAULT_MAX_FORWARD_SKIP, iter_sparse_frames
+
+# 工作副本高度：指标在该分辨率上计算（只缩小不放大），None 保持原分辨率
+DEFAULT_WORKING_HEIGHT = 360
+
+# 每批堆叠计算的帧数
+DEFAULT_BATCH_SIZE = 16
+
+METRIC_NAMES = ('brightness', 'contrast', 'sharpness', 'noise')
+
+
+@dataclass
+class QualitySamples:
+    """采样帧的质量指标，各数组按帧号顺序一一对应"""
+    frame_indices: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    brightness: np.ndarray = field(default_factory=lambda: np.empty(0))
+    contrast: np.ndarray = field(default_factory=lambda: np.empty(0))
+    sharpness: np.ndarray = field(default_factory=lambda: np.empty(0))
+    noise: np.ndarray = field(default_factory=lambda: np.empty(0))
+
+    def __len__(self) -> int:
+        return len(self.frame_indices)
+
+    def stats(self, name: str) -> Dict[str, float]:
+        """单项指标的均值、标准差、最小值和最大值，没有采样时全为0"""
+        values = getattr(self, name)
+        if len(values) == 0:
+            return {"mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0}
+        return {
+            "mean": float(np.mean(values)),
+            "std": float(np.std(values)),
+            "min": float(np.min(values)),
+            "max": float(np.max(values))
+        }
+
+
+def batch_quality_metrics(grays: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    一次计算一批灰度帧的质量指标
+
+    清晰度为拉普拉斯响应的方差，噪声为其标准差；拉普拉斯只在内部像素上计算，
+    用数组切片代替逐帧卷积。
+
+    Args:
+        grays: (N, H, W) 灰度帧
+
+    Returns:
+        指标名 -> 长度为 N 的数组
+    """
+    frames = grays.astype(np.float32, copy=False)
+    n = frames.shape[0]
+    flat = frames.reshape(n, -1)
+
+    center = frames[:, 1:-1, 1:-1]
+    laplacian = (frames[:, :-2, 1:-1] + frames[:, 2:, 1:-1] +
+                 frames[:, 1:-1, :-2] + frames[:, 1:-1, 2:] - 4 * center).reshape(n, -1)
+    sharpness = np.var(laplacian, axis=1, dtype=np.float64)
+
+    return {
+        'brightness': np.mean(flat, axis=1, dtype=np.float64),
+        'contrast': np.std(flat, axis=1, dtype=np.float64),
+        'sharpness': sharpness,
+        'noise': np.sqrt(sharpness)
+    }
+
+
+def sample_indices(frame_count: int, max_samples: int) -> List[int]:
+    """在整个视频上均匀取不超过 max_samples 个帧号"""
+    if frame_count <= 0 or max_samples <= 0:
+        return []
+    return sorted(set(np.linspace(0, frame_count - 1, min(max_samples, frame_count), dtype=int).tolist()))
+
+
+def sample_video_quality(source: Union[str, Path, cv2.VideoCapture],
+                         max_samples: int = 100,
+                         indices: Optional[Sequence[int]] = None,
+                         working_height: Optional[int] = DEFAULT_WORKING_HEIGHT,
+                         batch_size: int = DEFAULT_BATCH_SIZE,
+                         max_forward_skip: int = DEFAULT_MAX_FORWARD_SKIP,
+                         keyframes: Optional[Sequence[int]] = None) -> QualitySamples:
+    """
+    采样计算视频质量指标
+
+    Args:
+        source: 视频路径或已打开的 VideoCapture
+        max_samples: 未指定帧号时均匀采样的帧数
+        indices: 指定采样帧号（可选）
+        working_height: 工作副本高度
+        batch_size: 每批堆叠计算的帧数
+        max_forward_skip: 顺序 grab 的最大间隔，超过时跳转
+        keyframes: 升序的关键帧帧号（可选），已知时按关键帧决定是否跳转
+
+    Returns:
+        采样帧的质量指标
+    """
+    owns_capture = isinstance(source, (str, Path))
+    cap = cv2.VideoCapture(str(source)) if owns_capture else source
+    try:
+        if not cap.isOpened():
+            return QualitySamples()
+        if indices is None:
+            indices = sample_indices(int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), max_samples)
+
+        batch_size = max(1, batch_size)
+        batch: Optional[np.ndarray] = None
+        size = None
+        filled = 0
+        frame_indices: List[int] = []
+        results: Dict[str, List[np.ndarray]] = {name: [] for name in METRIC_NAMES}
+
+        def flush(count: int):
+            for name, values in batch_quality_metrics(batch[:count]).items():
+                results[name].append(values)
+
+        for frame_idx, frame in iter_sparse_frames(cap, indices, max_forward_skip, keyframes):
+            if batch is None:
+                size = _working_size(frame.shape[1], frame.shape[0], working_height)
+                batch = np.empty((batch_size, size[1], size[0]), dtype=np.uint8)
+
+            # 先缩放再转灰度，颜色转换只处理工作分辨率的像素
+            if (frame.shape[1], frame.shape[0]) != size:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=batch[filled])
+            frame_indices.append(frame_idx)
+            filled += 1
+
+            if filled == batch_size:
+                flush(filled)
+                filled = 0
+
+        if filled:
+            flush(filled)
+        if not frame_indices:
+            return QualitySamples()
+
+        return QualitySamples(
+            frame_indices=np.asarray(frame_indices, dtype=np.int64),
+            **{name: np.concatenate(values) for name, values in results.items()}
+        )
+    finally:
+        if owns_capture:
+            cap.release()
+
+
+def _working_size(width: int, height: int, working_height: Optional[int]):
+    """工作副本尺寸 (宽, 高)"""
+    if working_height and height > working_height:
+        return max(1, int(width * working_height / height)), working_height
+    return width, height
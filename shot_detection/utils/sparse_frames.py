@@ -0,0 +1,86 @@
+"""
+稀疏帧读取
+按升序帧号读取指定帧，每个间隔自行决定顺序 grab 跳过还是跳转。
+长 GOP 的 H.264 每次跳转都要从前一个关键帧重新解码，间隔较小时顺序 grab 更快；
+间隔较大或中间有关键帧时跳转更快。缩略图、质量采样和镜头分析共用
+"""
+
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import cv2
+import numpy as np
+
+# 间隔不超过该帧数时顺序 grab（只解码不转换像素），超过时跳转
+DEFAULT_MAX_FORWARD_SKIP = 64
+
+
+def should_seek(position: int, target: int,
+                max_forward_skip: int = DEFAULT_MAX_FORWARD_SKIP,
+                keyframes: Optional[Sequence[int]] = None) -> bool:
+    """
+    判断从 position 读到 target 是否应该跳转
+
+    Args:
+        position: 下一次 read 返回的帧号，未知时为负数
+        target: 目标帧号
+        max_forward_skip: 无关键帧信息时顺序读取的最大间隔
+        keyframes: 升序的关键帧帧号，已知时按关键帧判断
+
+    Returns:
+        是否跳转
+    """
+    if position < 0 or target < position:
+        return True
+    if target == position:
+        return False
+    if keyframes:
+        # 跳转后从 target 之前最近的关键帧开始解码，该关键帧在当前位置之后才比顺序读取省
+        i = bisect_right(keyframes, target)
+        return i > 0 and keyframes[i - 1] > position
+    return target - position > max_forward_skip
+
+
+def iter_sparse_frames(source: Union[str, Path, cv2.VideoCapture], indices: Iterable[int],
+                       max_forward_skip: int = DEFAULT_MAX_FORWARD_SKIP,
+                       keyframes: Optional[Sequence[int]] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    按帧号读取稀疏帧
+
+    Args:
+        source: 视频路径或已打开的 VideoCapture（从其当前位置继续，不会被释放）
+        indices: 帧号，按升序读取，重复帧号只读取一次
+        max_forward_skip: 无关键帧信息时顺序读取的最大间隔
+        keyframes: 升序的关键帧帧号（可选）
+
+    Yields:
+        (帧号, 帧)，读取失败的帧被跳过
+    """
+    owns_capture = isinstance(source, (str, Path))
+    cap = cv2.VideoCapture(str(source)) if owns_capture else source
+    try:
+        if not cap.isOpened():
+            return
+        targets: List[int] = sorted(set(int(i) for i in indices if i >= 0))
+        position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+        for target in targets:
+            if should_seek(position, target, max_forward_skip, keyframes):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            else:
+                while position < target and cap.grab():
+                    position += 1
+                if position < target:
+                    # 视频提前结束
+                    return
+
+            ret, frame = cap.read()
+            if not ret:
+                # 读取失败后位置未知，下一帧强制跳转
+                position = -1
+                continue
+            position = target + 1
+            yield target, frame
+    finally:
+        if owns_capture:
+            cap.release()
@@ -4,14 +4,18 @@
 """
 
 import os
-import json
-import subprocess
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional
 import cv2
 import numpy as np
 from loguru import logger
 
+from .probe_index import get_probe_index, probe_media, first_stream, parse_rate
+from .sparse_frames import iter_sparse_frames
+
+# 元数据索引中 OpenCV 读取结果的类型名
+OPENCV_KIND = "opencv"
+
 
 def validate_video_file(video_path: str) -> bool:
     """验证视频文件是否有效"""
@@ -41,68 +45,13 @@ def validate_video_file(video_path: str) -> bool:
 
 
 def get_video_info(video_path: str) -> Dict[str, Any]:
-    """获取视频文件详细信息"""
+    """获取视频文件详细信息（ffprobe 结果来自共享的元数据索引）"""
     try:
-        # 使用ffprobe获取详细信息
-        cmd = [
-            'ffprobe', '-v', 'quiet', '-print_format', 'json',
-            '-show_format', '-show_streams', video_path
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        data = json.loads(result.stdout)
-        
-        # 查找视频流和音频流
-        video_stream = None
-        audio_streams = []
-        
-        for stream in data['streams']:
-            if stream['codec_type'] == 'video' and video_stream is None:
-                video_stream = stream
-            elif stream['codec_type'] == 'audio':
-                audio_streams.append(stream)
-        
-        if not video_stream:
-            raise ValueError("No video stream found")
-        
-        # 提取视频信息
-        fps = eval(video_stream.get('r_frame_rate', '25/1'))
-        duration = float(data['format']['duration'])
-        width = int(video_stream['width'])
-        height = int(video_stream['height'])
-        frame_count = int(video_stream.get('nb_frames', duration * fps))
-        
-        # 计算比特率
-        bitrate = int(data['format'].get('bit_rate', 0))
-        
-        # 获取编码信息
-        video_codec = video_stream.get('codec_name', 'unknown')
-        pixel_format = video_stream.get('pix_fmt', 'unknown')
-        
-        # 音频信息
-        audio_info = []
-        for audio_stream in audio_streams:
-            audio_info.append({
-                'codec': audio_stream.get('codec_name', 'unknown'),
-                'sample_rate': int(audio_stream.get('sample_rate', 0)),
-                'channels': int(audio_stream.get('channels', 0)),
-                'bitrate': int(audio_stream.get('bit_rate', 0))
-            })
+        data = probe_media(video_path)
+        if data is None:
+            raise ValueError("ffprobe could not read the file")
         
-        return {
-            'duration': duration,
-            'fps': fps,
-            'frame_count': frame_count,
-            'resolution': (width, height),
-            'width': width,
-            'height': height,
-            'bitrate': bitrate,
-            'video_codec': video_codec,
-            'pixel_format': pixel_format,
-            'audio_streams': audio_info,
-            'file_size': os.path.getsize(video_path),
-            'format': data['format']
-        }
+        return _video_info_from_probe(video_path, data)
         
     except Exception as e:
         logger.error(f"Failed to get video info for {video_path}: {e}")
@@ -110,9 +59,71 @@ def get_video_info(video_path: str) -> Dict[str, Any]:
         return get_basic_video_info(video_path)
 
 
+def _video_info_from_probe(video_path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """从 ffprobe 输出提取视频信息"""
+    # 查找视频流和音频流
+    video_stream = first_stream(data, 'video')
+    audio_streams = [stream for stream in data.get('streams', []) if stream.get('codec_type') == 'audio']
+    
+    if not video_stream:
+        raise ValueError("No video stream found")
+    
+    # 提取视频信息
+    fps = parse_rate(video_stream.get('r_frame_rate', '25/1'))
+    duration = float(data['format']['duration'])
+    width = int(video_stream['width'])
+    height = int(video_stream['height'])
+    frame_count = int(video_stream.get('nb_frames', duration * fps))
+    
+    # 计算比特率
+    bitrate = int(data['format'].get('bit_rate', 0))
+    
+    # 获取编码信息
+    video_codec = video_stream.get('codec_name', 'unknown')
+    pixel_format = video_stream.get('pix_fmt', 'unknown')
+    
+    # 音频信息
+    audio_info = []
+    for audio_stream in audio_streams:
+        audio_info.append({
+            'codec': audio_stream.get('codec_name', 'unknown'),
+            'sample_rate': int(audio_stream.get('sample_rate', 0)),
+            'channels': int(audio_stream.get('channels', 0)),
+            'bitrate': int(audio_stream.get('bit_rate', 0))
+        })
+    
+    return {
+        'duration': duration,
+        'fps': fps,
+        'frame_count': frame_count,
+        'resolution': (width, height),
+        'width': width,
+        'height': height,
+        'bitrate': bitrate,
+        'video_codec': video_codec,
+        'pixel_format': pixel_format,
+        'audio_streams': audio_info,
+        'file_size': os.path.getsize(video_path),
+        'format': data['format']
+    }
+
+
 def get_basic_video_info(video_path: str) -> Dict[str, Any]:
-    """使用OpenCV获取基础视频信息"""
+    """获取基础视频信息，优先使用元数据索引，ffprobe 不可用时用OpenCV读取并写入索引"""
     try:
+        index = get_probe_index()
+        data = index.probe(video_path)
+        if data is not None and first_stream(data, 'video'):
+            try:
+                return _video_info_from_probe(video_path, data)
+            except (KeyError, ValueError, TypeError):
+                pass
+        
+        cached = index.lookup([video_path], kind=OPENCV_KIND).get(str(video_path))
+        if cached:
+            cached['resolution'] = tuple(cached['resolution'])
+            return cached
+        
         cap = cv2.VideoCapture(video_path)
         
         if not cap.isOpened():
@@ -127,7 +138,7 @@ def get_basic_video_info(video_path: str) -> Dict[str, Any]:
         
         cap.release()
         
-        return {
+        info = {
             'duration': duration,
             'fps': fps,
             'frame_count': frame_count,
@@ -140,6 +151,8 @@ def get_basic_video_info(video_path: str) -> Dict[str, Any]:
             'audio_streams': [],
             'file_size': os.path.getsize(video_path)
         }
+        index.put(video_path, info, kind=OPENCV_KIND)
+        return info
         
     except Exception as e:
         logger.error(f"Failed to get basic video info for {video_path}: {e}")
@@ -171,19 +184,17 @@ def extract_frames(video_path: str, frame_numbers: List[int], output_dir: str) -
         extracted_files = []
         video_name = Path(video_path).stem
         
-        for frame_num in frame_numbers:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
-            ret, frame = cap.read()
-            
-            if ret:
-                output_file = output_dir / f"{video_name}_frame_{frame_num:06d}.jpg"
-                cv2.imwrite(str(output_file), frame)
-                extracted_files.append(str(output_file))
-                logger.debug(f"Extracted frame {frame_num} to {output_file}")
-            else:
-                logger.warning(f"Failed to extract frame {frame_num}")
+        for frame_num, frame in iter_sparse_frames(cap, frame_numbers):
+            output_file = output_dir / f"{video_name}_frame_{frame_num:06d}.jpg"
+            cv2.imwrite(str(output_file), frame)
+            extracted_files.append(str(output_file))
+            logger.debug(f"Extracted frame {frame_num} to {output_file}")
         
         cap.release()
+        
+        missing = len(set(frame_numbers)) - len(extracted_files)
+        if missing:
+            logger.warning(f"Failed to extract {missing} frames")
         logger.info(f"Extracted {len(extracted_files)} frames from {video_path}")
         
         return extracted_files
@@ -240,13 +251,7 @@ def calculate_video_quality_metrics(video_path: str, sample_frames: int = 10) ->
         contrast_values = []
         sharpness_values = []
         
-        for frame_idx in sample_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            
-            if not ret:
-                continue
-            
+        for _, frame in iter_sparse_frames(cap, sample_indices):
             # 转换为灰度图
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
@@ -295,13 +300,7 @@ def detect_scene_complexity(video_path: str, sample_frames: int = 20) -> Dict[st
         
         prev_frame = None
         
-        for frame_idx in sample_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            
-            if not ret:
-                continue
-            
+        for _, frame in iter_sparse_frames(cap, sample_indices):
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
             # 边缘密度
@@ -20,6 +20,9 @@ from detectors.frame_diff import FrameDifferenceDetector
 from detectors.histogram import HistogramDetector
 from detectors.base import MultiDetector
 from processors.video_processor import VideoProcessor, VideoSegment
+from processors.segment_cutter import SegmentCutter, quality_video_args
+from processors.fast_cutter import FastCutter, COPY_QUALITY
+from processors.encode_scheduler import EncodeScheduler, plan_concurrency, encoder_preset
 from exporters.project_exporter import ProjectExporter
 from utils.video_utils import validate_video_file, get_basic_video_info
 from utils.report_generator import ReportGenerator
@@ -96,20 +99,13 @@ def create_segment_with_ffmpeg(video_path: str, segment: VideoSegment,
         # 构建FFmpeg命令
         cmd = [
             ffmpeg_cmd, '-y',  # 使用找到的FFmpeg路径，覆盖输出文件
+            '-ss', str(segment.start_time),  # 开始时间（放在 -i 之前按输入跳转，不从头解码）
             '-i', video_path,  # 输入文件
-            '-ss', str(segment.start_time),  # 开始时间
             '-t', str(segment.duration),  # 持续时间
         ]
         
-        # 根据质量设置编码参数
-        if quality == "lossless":
-            cmd.extend(['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '0'])
-        elif quality == "high":
-            cmd.extend(['-c:v', 'libx264', '-preset', 'slow', '-crf', '18'])
-        elif quality == "medium":
-            cmd.extend(['-c:v', 'libx264', '-preset', 'medium', '-crf', '23'])
-        else:  # low
-            cmd.extend(['-c:v', 'libx264', '-preset', 'fast', '-crf', '28'])
+        # 根据质量设置编码参数（单个分段无法流复制，copy 模式按 high 重编码）
+        cmd.extend(quality_video_args('high' if quality == COPY_QUALITY else quality))
         
         # 音频设置
         cmd.extend(['-c:a', 'aac', '-b:a', '128k'])
@@ -267,8 +263,14 @@ def process_video_segmentation(video_path: str, output_dir: str = None,
                              organize_by: str = "duration",
                              quality: str = "medium",
                              enable_classification: bool = False,
-                             classification_config: dict = None) -> bool:
-    """完整的视频分段处理流程"""
+                             classification_config: dict = None,
+                             keyframe_snap: str = "none") -> bool:
+    """
+    完整的视频分段处理流程
+
+    quality 为 copy 时使用流复制快速切分：分段内部完整的GOP直接复制，
+    keyframe_snap 为 none 时两端不完整的GOP重新编码，为 nearest 时切点吸附到最近关键帧。
+    """
     
     logger.info("🎬 开始视频自动分段和切分")
     logger.info("=" * 60)
@@ -387,50 +389,82 @@ def process_video_segmentation(video_path: str, output_dir: str = None,
             # 默认：所有分段放在同一目录
             categorized_segments = {"all": segments}
         
-        # 9. 使用FFmpeg切分视频
+        # 9. 使用FFmpeg切分视频（一次解码切出所有分段）
         logger.info("✂️ 开始视频切分...")
         total_segments = sum(len(segs) for segs in categorized_segments.values())
         processed_count = 0
         success_count = 0
-        
+
+        segment_categories = {}
+        ordered_segments = []
         for category, category_segments in categorized_segments.items():
             if not category_segments:
                 continue
-                
-            logger.info(f"处理类别: {category} ({len(category_segments)} 个分段)")
-            
+            logger.info(f"类别: {category} ({len(category_segments)} 个分段)")
             for segment in category_segments:
-                processed_count += 1
-                logger.info(f"[{processed_count}/{total_segments}] 切分: {Path(segment.file_path).name}")
-                logger.info(f"  时间: {segment.start_time:.2f}s - {segment.end_time:.2f}s (时长: {segment.duration:.2f}s)")
-                
-                if create_segment_with_ffmpeg(video_path, segment, quality):
-                    success_count += 1
-
-                    # 如果启用归类，进行自动归类
-                    if enable_classification and file_organizer:
-                        segment_info = {
-                            'duration': segment.duration,
-                            'confidence': segment.metadata.get('boundary_confidence', 1.0),
-                            'start_time': segment.start_time,
-                            'end_time': segment.end_time,
-                            'category': category,
-                            'content_description': f"segment_{segment.index}"
-                        }
-
-                        # 执行归类
-                        organize_result = file_organizer.organize_segment(
-                            segment.file_path,
-                            segment_info,
-                            str(output_path)
-                        )
-
-                        if organize_result.success:
-                            logger.info(f"  📁 归类成功: {organize_result.category} -> {organize_result.new_path}")
-                        else:
-                            logger.warning(f"  ⚠️ 归类失败: {organize_result.error}")
+                segment_categories[id(segment)] = category
+                ordered_segments.append(segment)
+
+        def on_segment_done(segment: VideoSegment, success: bool):
+            nonlocal processed_count, success_count
+            processed_count += 1
+            category = segment_categories[id(segment)]
+            logger.info(f"[{processed_count}/{total_segments}] 切分: {category}/{Path(segment.file_path).name}")
+            logger.info(f"  时间: {segment.start_time:.2f}s - {segment.end_time:.2f}s (时长: {segment.duration:.2f}s)")
+
+            if not success:
+                logger.error(f"  ❌ 切分失败")
+                return
+
+            success_count += 1
+
+            # 如果启用归类，进行自动归类
+            if enable_classification and file_organizer:
+                segment_info = {
+                    'duration': segment.duration,
+                    'confidence': segment.metadata.get('boundary_confidence', 1.0),
+                    'start_time': segment.start_time,
+                    'end_time': segment.end_time,
+                    'category': category,
+                    'content_description': f"segment_{segment.index}"
+                }
+
+                # 执行归类
+                organize_result = file_organizer.organize_segment(
+                    segment.file_path,
+                    segment_info,
+                    str(output_path)
+                )
+
+                if organize_result.success:
+                    logger.info(f"  📁 归类成功: {organize_result.category} -> {organize_result.new_path}")
                 else:
-                    logger.error(f"  ❌ 切分失败")
+                    logger.warning(f"  ⚠️ 归类失败: {organize_result.error}")
+
+        ffmpeg_cmd = find_ffmpeg_executable()
+        if ffmpeg_cmd:
+            # 按CPU核数、分辨率和编码预设限制并发编码数和每个FFmpeg的线程数
+            encode_args = quality_video_args('high' if quality == COPY_QUALITY else quality)
+            scheduler = EncodeScheduler(plan_concurrency(
+                preset=encoder_preset(encode_args),
+                width=video_info['width'] or 1920,
+                height=video_info['height'] or 1080
+            ))
+
+            if quality == COPY_QUALITY:
+                cutter = FastCutter(ffmpeg_path=ffmpeg_cmd, edge_video_args=encode_args,
+                                    keyframe_snap=keyframe_snap, scheduler=scheduler)
+            else:
+                cutter = SegmentCutter(ffmpeg_path=ffmpeg_cmd, video_args=encode_args, scheduler=scheduler)
+            cutter.cut(video_path, ordered_segments, fps=video_info['fps'], segment_callback=on_segment_done)
+
+            encode_stats = scheduler.get_stats()
+            if encode_stats['completed'] or encode_stats['failed']:
+                logger.info(f"⚙️ 并发编码: {encode_stats['workers']} 进程 x {encode_stats['threads_per_job']} 线程, "
+                           f"{encode_stats['throughput']:.2f}x 实时")
+        else:
+            logger.error("❌ 未找到FFmpeg可执行文件")
+            logger.error("请安装FFmpeg或运行: python install_ffmpeg.py")
         
         # 10. 生成项目文件和报告
         logger.info("📤 生成项目文件和报告...")
@@ -505,8 +539,10 @@ def main():
     parser.add_argument("-o", "--output", help="输出目录路径")
     parser.add_argument("--organize", choices=["duration", "quality", "content", "none"],
                        default="duration", help="分段组织方式")
-    parser.add_argument("--quality", choices=["low", "medium", "high", "lossless"],
-                       default="medium", help="输出视频质量")
+    parser.add_argument("--quality", choices=["low", "medium", "high", "lossless", COPY_QUALITY],
+                       default="medium", help="输出视频质量（copy 为流复制快速切分）")
+    parser.add_argument("--snap", choices=["none", "nearest"], default="none",
+                       help="copy 模式的切点策略：none 两端重编码保证精确，nearest 吸附到最近关键帧")
     parser.add_argument("--classify", action="store_true", help="启用自动归类功能")
     parser.add_argument("--move-files", action="store_true", help="移动文件而不是复制")
     parser.add_argument("--min-confidence", type=float, default=0.6, help="归类最小置信度")
@@ -536,7 +572,8 @@ def main():
         args.organize,
         args.quality,
         args.classify,
-        classification_config
+        classification_config,
+        args.snap
     )
     
     sys.exit(0 if success else 1)